@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the chat pipeline against a fake provider.
+
+Starts a local OpenAI-compatible server that streams a deterministic answer at
+a configurable token rate, chunk size, number of tool-call rounds and usage
+payload, then serves `chat_client.main:app` with uvicorn (the real middleware
+stack, sessions and a fresh SQLite database in a temporary directory) and
+drives it over HTTP with N concurrent users. Each user logs in, creates a
+dialog and runs turns the way the browser does: save the user message, stream
+`/chat`, save the assistant turn events.
+
+Reports throughput, time-to-first-token percentiles, inter-chunk jitter,
+server CPU per streamed token, event-loop lag of the server loop and DB write
+latency. Results are stored as JSON (by default under
+`data/benchmarks/chat_pipeline-<commit>.json`) so runs from different commits
+can be compared with `--compare`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+MODEL = "bench-model"
+TOOL_NAME = "bench_tool"
+PASSWORD = "bench-password"
+LAG_PROBE_INTERVAL_SECONDS = 0.01
+
+# Appended to config-dist.py to build the benchmark's data/config.py.
+CONFIG_OVERRIDES = """
+
+# Benchmark overrides
+DATA_DIR = "data"
+DATABASE = Path(DATA_DIR) / "database.db"
+LOG_LEVEL = logging.WARNING
+RELOAD = False
+SESSION_HTTPS_ONLY = False
+DIALOG_TITLE_MODEL = ""
+METRICS_TOKEN = ""
+TRACING_EXPORTER = ""
+PROFILING_TOKEN = ""
+ATTACHMENT_STORAGE_DIR = Path(DATA_DIR) / "attachments"
+MODEL_CAPABILITIES_CACHE_FILE = ""
+CHAT_EMPTY_ANSWER_RETRY_COUNT = 0
+PROVIDERS = {{"fake": {{"base_url": "{base_url}", "api_key": "bench"}}}}
+MODELS = {{"{model}": "fake"}}
+DEFAULT_MODEL = "{model}"
+VISION_MODELS = []
+TOOL_MODELS = {tool_models}
+MCP_SERVER_URL = ""
+
+
+def {tool_name}(query: str = "") -> str:
+    return "bench result for " + query
+
+
+TOOL_REGISTRY = {{"{tool_name}": {tool_name}}}
+LOCAL_TOOL_DEFINITIONS = [
+    {{
+        "name": "{tool_name}",
+        "description": "Benchmark tool returning a fixed string.",
+        "input_schema": {{"type": "object", "properties": {{"query": {{"type": "string"}}}}}},
+    }}
+]
+"""
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark /chat end to end against a fake streaming provider.")
+    parser.add_argument("--users", type=int, default=8, help="Concurrent users.")
+    parser.add_argument("--turns", type=int, default=5, help="Chat turns per user.")
+    parser.add_argument("--tokens", type=int, default=200, help="Answer tokens streamed per turn.")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="Fake provider token rate per stream.")
+    parser.add_argument("--chunk-tokens", type=int, default=1, help="Tokens per streamed chunk.")
+    parser.add_argument("--tool-rounds", type=int, default=0, help="Tool-call rounds before the answer in each turn.")
+    parser.add_argument("--no-usage", action="store_true", help="Do not send a usage chunk at the end of streams.")
+    parser.add_argument("--output", type=Path, default=None, help="Result file (default: data/benchmarks/chat_pipeline-<commit>.json).")
+    parser.add_argument("--compare", type=Path, default=None, help="Earlier result file to print relative changes against.")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of text.")
+    return parser.parse_args()
+
+
+def _git_commit() -> str:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True, timeout=10
+        )
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+    return completed.stdout.strip() or "unknown"
+
+
+def _percentile(values: list[float], fraction: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _ms(seconds: float | None) -> float | None:
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def _bound_socket() -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    return sock
+
+
+def _thread_cpu_seconds(thread: threading.Thread) -> float:
+    if thread.ident is None or not hasattr(time, "pthread_getcpuclockid"):
+        return 0.0
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(thread.ident))
+    except OSError:
+        # The thread has exited.
+        return 0.0
+
+
+def build_fake_provider(args: argparse.Namespace) -> Starlette:
+    """
+    OpenAI-compatible `/v1/chat/completions`. Streams `args.tokens` tokens in
+    chunks of `args.chunk_tokens` at `args.tokens_per_second`, preceded by
+    `args.tool_rounds` tool-call rounds (counted from the assistant tool-call
+    messages already in the request).
+    """
+    chunk_tokens = max(1, args.chunk_tokens)
+    chunk_interval = chunk_tokens / args.tokens_per_second if args.tokens_per_second > 0 else 0.0
+
+    def sse(payload: dict[str, Any] | str) -> str:
+        return f"data: {payload if isinstance(payload, str) else json.dumps(payload)}\n\n"
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        messages = body.get("messages") or []
+        prompt_tokens = sum(len(str(message.get("content") or "").split()) for message in messages)
+        base = {"id": "chatcmpl-bench", "object": "chat.completion.chunk", "created": 0, "model": body.get("model", MODEL)}
+        if not body.get("stream"):
+            return JSONResponse(
+                {
+                    **base,
+                    "object": "chat.completion",
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": "ok"}, "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 1, "total_tokens": prompt_tokens + 1},
+                }
+            )
+
+        completed_tool_rounds = sum(1 for message in messages if message.get("role") == "assistant" and message.get("tool_calls"))
+        include_usage = not args.no_usage and bool((body.get("stream_options") or {}).get("include_usage"))
+
+        def chunk(delta: dict[str, Any], finish_reason: str | None = None) -> str:
+            return sse({**base, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]})
+
+        async def events():
+            started = time.perf_counter()
+            if completed_tool_rounds < args.tool_rounds:
+                await asyncio.sleep(chunk_interval)
+                call = {
+                    "index": 0,
+                    "id": f"call_{completed_tool_rounds}",
+                    "type": "function",
+                    "function": {"name": TOOL_NAME, "arguments": json.dumps({"query": f"round {completed_tool_rounds}"})},
+                }
+                yield chunk({"role": "assistant", "tool_calls": [call]})
+                yield chunk({}, "tool_calls")
+                completion_tokens = 1
+            else:
+                sent = 0
+                index = 0
+                while sent < args.tokens:
+                    count = min(chunk_tokens, args.tokens - sent)
+                    index += 1
+                    # Pace against the start time so the rate does not drift with scheduling delays.
+                    delay = started + index * chunk_interval - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    yield chunk({"content": " tok" * count})
+                    sent += count
+                yield chunk({}, "stop")
+                completion_tokens = args.tokens
+            if include_usage:
+                usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+                usage["total_tokens"] = prompt_tokens + completion_tokens
+                yield sse({**base, "choices": [], "usage": usage})
+            yield sse("[DONE]")
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return Starlette(routes=[Route("/v1/chat/completions", chat_completions, methods=["POST"])])
+
+
+class _ServerThread:
+    """
+    Runs an ASGI app with uvicorn on its own thread and event loop.
+    """
+
+    def __init__(self, app: Any, name: str, *, probe_lag: bool = False) -> None:
+        self.socket = _bound_socket()
+        self.port = self.socket.getsockname()[1]
+        self.server = uvicorn.Server(uvicorn.Config(app, log_level="warning", access_log=False, lifespan="on"))
+        self.probe_lag = probe_lag
+        self.lag_samples: list[float] = []
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    async def _lag_probe(self) -> None:
+        while True:
+            expected = time.perf_counter() + LAG_PROBE_INTERVAL_SECONDS
+            await asyncio.sleep(LAG_PROBE_INTERVAL_SECONDS)
+            self.lag_samples.append(max(0.0, time.perf_counter() - expected))
+
+    async def _serve(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        probe = asyncio.create_task(self._lag_probe()) if self.probe_lag else None
+        try:
+            await self.server.serve(sockets=[self.socket])
+        finally:
+            if probe is not None:
+                probe.cancel()
+
+    def _run(self) -> None:
+        asyncio.run(self._serve())
+
+    def start(self) -> None:
+        self.thread.start()
+        deadline = time.monotonic() + 30
+        while not self.server.started:
+            if not self.thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError(f"{self.thread.name} did not start")
+            time.sleep(0.01)
+
+    def run_coroutine(self, coroutine: Any) -> Any:
+        assert self.loop is not None
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout=60)
+
+    def stop(self) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=30)
+
+
+def _write_config(workdir: Path, provider_port: int, args: argparse.Namespace) -> None:
+    data_dir = workdir / "data"
+    data_dir.mkdir()
+    (data_dir / "__init__.py").write_text("", encoding="utf-8")
+    overrides = CONFIG_OVERRIDES.format(
+        base_url=f"http://127.0.0.1:{provider_port}/v1",
+        model=MODEL,
+        tool_name=TOOL_NAME,
+        tool_models=repr([MODEL] if args.tool_rounds else []),
+    )
+    template = (REPO_ROOT / "chat_client" / "config-dist.py").read_text(encoding="utf-8")
+    (data_dir / "config.py").write_text(template + overrides, encoding="utf-8")
+
+
+def _content_of(payload: dict[str, Any]) -> str:
+    choices = payload.get("choices") or []
+    if not choices:
+        return ""
+    delta = choices[0].get("delta") or {}
+    return str(delta.get("content") or "")
+
+
+async def _run_user(client: httpx.AsyncClient, email: str, args: argparse.Namespace, stats: dict[str, list[float]]) -> None:
+    response = await client.post("/user/login", json={"email": email, "password": PASSWORD})
+    response.raise_for_status()
+    response = await client.post("/api/chat/dialogs", json={"title": f"Benchmark {email}"})
+    response.raise_for_status()
+    dialog_id = response.json()["dialog_id"]
+
+    for turn in range(args.turns):
+        started = time.perf_counter()
+        response = await client.post(
+            f"/api/chat/dialogs/{dialog_id}/messages", json={"role": "user", "content": f"Question {turn} from {email}"}
+        )
+        response.raise_for_status()
+        stats["db_write_http"].append(time.perf_counter() - started)
+
+        content_parts: list[str] = []
+        turn_id = ""
+        last_chunk_at: float | None = None
+        started = time.perf_counter()
+        async with client.stream("POST", "/chat", json={"model": MODEL, "dialog_id": dialog_id, "messages": []}) as stream:
+            stream.raise_for_status()
+            async for line in stream.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                payload = json.loads(line[len("data: ") :])
+                if "error" in payload:
+                    raise RuntimeError(f"Chat stream failed: {payload['error']}")
+                turn_id = str(payload.get("turn_id") or turn_id)
+                content = _content_of(payload)
+                if not content:
+                    continue
+                now = time.perf_counter()
+                if last_chunk_at is None:
+                    stats["ttft"].append(now - started)
+                else:
+                    stats["inter_chunk"].append(now - last_chunk_at)
+                last_chunk_at = now
+                content_parts.append(content)
+        stats["turn"].append(time.perf_counter() - started)
+        stats["tokens"].append(float("".join(content_parts).count(" tok")))
+
+        started = time.perf_counter()
+        response = await client.post(
+            f"/api/chat/dialogs/{dialog_id}/assistant-turn-events",
+            json={"turn_id": turn_id or f"turn-{turn}", "events": [{"event_type": "content", "content_text": "".join(content_parts)}]},
+        )
+        response.raise_for_status()
+        stats["db_write_http"].append(time.perf_counter() - started)
+
+
+async def _drive(base_url: str, emails: list[str], args: argparse.Namespace) -> tuple[dict[str, list[float]], float]:
+    stats: dict[str, list[float]] = {key: [] for key in ("ttft", "inter_chunk", "turn", "tokens", "db_write_http")}
+    timeout = httpx.Timeout(120.0)
+    clients = [httpx.AsyncClient(base_url=base_url, timeout=timeout) for _ in emails]
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(_run_user(client, email, args, stats) for client, email in zip(clients, emails)))
+        elapsed = time.perf_counter() - started
+    finally:
+        await asyncio.gather(*(client.aclose() for client in clients))
+    return stats, elapsed
+
+
+def _db_write_summary(snapshot: dict[str, Any]) -> dict[str, Any]:
+    """
+    Mean server-side duration of the repository writes, from `db_query_duration_seconds`.
+    """
+    histogram = snapshot.get("db_query_duration_seconds") or {}
+    total = 0.0
+    count = 0
+    per_function: dict[str, float] = {}
+    for labels, _counts, series_total, series_count in histogram.get("series", []):
+        function = labels[0] if labels else ""
+        if not function.rsplit(".", 1)[-1].startswith(("create_", "update_", "add_", "save_", "delete_")):
+            continue
+        total += series_total
+        count += series_count
+        per_function[function] = round(series_total / series_count * 1000, 3) if series_count else 0.0
+    return {
+        "db_write_count": count,
+        "db_write_mean_ms": round(total / count * 1000, 3) if count else None,
+        "db_write_mean_ms_by_function": dict(sorted(per_function.items())),
+    }
+
+
+def _run(args: argparse.Namespace) -> dict[str, Any]:
+    provider = _ServerThread(build_fake_provider(args), "fake-provider")
+    provider.start()
+    original_cwd = Path.cwd()
+    workdir = Path(tempfile.mkdtemp(prefix="chat-bench-"))
+    try:
+        _write_config(workdir, provider.port, args)
+        os.chdir(workdir)
+        sys.path.insert(0, str(workdir))
+
+        import data.config as config
+        from chat_client.core import bootstrap, metrics
+
+        bootstrap.run_migrations(config)
+
+        from chat_client.main import app
+        from chat_client.repositories import user_repository
+
+        server = _ServerThread(app, "chat-app", probe_lag=True)
+        server.start()
+        try:
+            emails = [f"bench{index}@example.com" for index in range(args.users)]
+            for email in emails:
+                server.run_coroutine(user_repository.create_local_user(email, PASSWORD, verified=1))
+
+            db_before = metrics.REGISTRY.snapshot()
+            lag_offset = len(server.lag_samples)
+            cpu_started = time.process_time()
+            client_cpu_started = time.thread_time()
+            provider_cpu_started = _thread_cpu_seconds(provider.thread)
+
+            stats, elapsed = asyncio.run(_drive(f"http://127.0.0.1:{server.port}", emails, args))
+
+            client_cpu = time.thread_time() - client_cpu_started
+            provider_cpu = _thread_cpu_seconds(provider.thread) - provider_cpu_started
+            server_cpu = max(0.0, time.process_time() - cpu_started - client_cpu - provider_cpu)
+            lag_samples = server.lag_samples[lag_offset:]
+            db_after = metrics.REGISTRY.snapshot()
+        finally:
+            server.stop()
+    finally:
+        os.chdir(original_cwd)
+        provider.stop()
+
+    total_tokens = sum(stats["tokens"])
+    turns = len(stats["turn"])
+    jitter = statistics.pstdev(stats["inter_chunk"]) if len(stats["inter_chunk"]) > 1 else None
+    result: dict[str, Any] = {
+        "users": args.users,
+        "turns_per_user": args.turns,
+        "tokens_per_turn": args.tokens,
+        "tokens_per_second_per_stream": args.tokens_per_second,
+        "chunk_tokens": args.chunk_tokens,
+        "tool_rounds": args.tool_rounds,
+        "usage_chunk": not args.no_usage,
+        "elapsed_seconds": round(elapsed, 3),
+        "turns_completed": turns,
+        "turns_per_second": round(turns / elapsed, 3) if elapsed else None,
+        "tokens_streamed": int(total_tokens),
+        "tokens_per_second": round(total_tokens / elapsed, 1) if elapsed else None,
+        "ttft_p50_ms": _ms(_percentile(stats["ttft"], 0.50)),
+        "ttft_p95_ms": _ms(_percentile(stats["ttft"], 0.95)),
+        "ttft_p99_ms": _ms(_percentile(stats["ttft"], 0.99)),
+        "inter_chunk_p50_ms": _ms(_percentile(stats["inter_chunk"], 0.50)),
+        "inter_chunk_p99_ms": _ms(_percentile(stats["inter_chunk"], 0.99)),
+        "inter_chunk_jitter_ms": _ms(jitter),
+        "server_cpu_seconds": round(server_cpu, 3),
+        "server_cpu_us_per_token": round(server_cpu / total_tokens * 1_000_000, 2) if total_tokens else None,
+        "loop_lag_p50_ms": _ms(_percentile(lag_samples, 0.50)),
+        "loop_lag_p99_ms": _ms(_percentile(lag_samples, 0.99)),
+        "loop_lag_max_ms": _ms(max(lag_samples) if lag_samples else None),
+        "db_write_http_p50_ms": _ms(_percentile(stats["db_write_http"], 0.50)),
+        "db_write_http_p95_ms": _ms(_percentile(stats["db_write_http"], 0.95)),
+    }
+    result.update(_db_write_summary(_subtract_histograms(db_after, db_before)))
+    return result
+
+
+def _subtract_histograms(after: dict[str, Any], before: dict[str, Any]) -> dict[str, Any]:
+    histogram = after.get("db_query_duration_seconds")
+    if not histogram:
+        return {}
+    previous = {
+        tuple(labels): (total, count) for labels, _counts, total, count in before.get("db_query_duration_seconds", {}).get("series", [])
+    }
+    series = []
+    for labels, counts, total, count in histogram["series"]:
+        old_total, old_count = previous.get(tuple(labels), (0.0, 0))
+        series.append([labels, counts, total - old_total, count - old_count])
+    return {"db_query_duration_seconds": {**histogram, "series": series}}
+
+
+def _compare(result: dict[str, Any], baseline: dict[str, Any]) -> dict[str, float]:
+    changes: dict[str, float] = {}
+    for key, value in result.items():
+        old = baseline.get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and isinstance(old, (int, float)) and old:
+            changes[key] = round((value - old) / old * 100, 1)
+    return changes
+
+
+def main() -> int:
+    args = _parse_args()
+    commit = _git_commit()
+    output = args.output or REPO_ROOT / "data" / "benchmarks" / f"chat_pipeline-{commit}.json"
+    baseline_path = args.compare.resolve() if args.compare else None
+    output = output.resolve()
+
+    result = _run(args)
+    document = {
+        "benchmark": "chat_pipeline",
+        "commit": commit,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": result,
+    }
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(document, indent=2) + "\n", encoding="utf-8")
+
+    changes: dict[str, float] = {}
+    if baseline_path is not None:
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        changes = _compare(result, baseline.get("results", baseline))
+
+    if args.json:
+        print(json.dumps({**document, "change_percent": changes} if baseline_path else document, indent=2))
+    else:
+        for key, value in result.items():
+            change = f"  ({changes[key]:+.1f}%)" if key in changes else ""
+            print(f"{key:32} {value}{change}")
+        print(f"{'written_to':32} {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Bytes-on-wire benchmark for response compression.
+
+Builds a synthetic long dialog shaped like the `/api/chat/dialogs/{id}/messages`
+payload (user messages plus assistant turns with reasoning, tool calls and tool
+output) and serves it through `CompressionMiddleware` with each encoding.
+Reports the bytes sent and the time spent per request. Requests go through
+httpx's in-process ASGI transport, so no server or network is involved.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from chat_client.core import middleware as middleware_module
+from chat_client.core.middleware import CompressionMiddleware
+
+WORDS = (
+    "the model returned a result for this query and the tool output contains rows of data with values "
+    "def return import class async await dialog message assistant user token stream content function "
+    "error status response request python print json value key index count total average result"
+).split()
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure bytes on the wire for a long dialog load.")
+    parser.add_argument("--turns", type=int, default=60, help="Number of user/assistant turns in the dialog.")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per encoding for timing.")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of text.")
+    return parser.parse_args()
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _tool_output(rng: random.Random, rows: int) -> str:
+    return "\n".join(f"{index},{rng.random():.6f},{rng.randint(0, 10_000)},{rng.choice(WORDS)}" for index in range(rows))
+
+
+def build_long_dialog(turns: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    messages = []
+    for turn in range(turns):
+        messages.append(
+            {
+                "message_id": str(turn * 2 + 1),
+                "role": "user",
+                "content": _text(rng, 40),
+                "images": [],
+                "attachments": [],
+                "created": "2026-01-01T12:00:00",
+            }
+        )
+        messages.append(
+            {
+                "turn_id": f"turn-{turn}",
+                "role": "assistant",
+                "events": [
+                    {"event_type": "reasoning", "reasoning_text": _text(rng, 150)},
+                    {
+                        "event_type": "tool_call",
+                        "tool_call_id": f"call_{turn}",
+                        "tool_name": "python_tool",
+                        "arguments_json": json.dumps({"code": f"import pandas as pd\nprint(df.head({turn}))"}),
+                        "result_text": _tool_output(rng, 40),
+                    },
+                    {"event_type": "assistant_segment", "content_text": _text(rng, 250)},
+                ],
+                "created": "2026-01-01T12:00:05",
+            }
+        )
+    return {"dialog": {"dialog_id": "bench", "title": "Benchmark dialog"}, "messages": messages}
+
+
+async def _measure(app: Starlette, accept_encoding: str, requests: int) -> tuple[int, float]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        wire_bytes = 0
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = await client.get("/messages", headers={"Accept-Encoding": accept_encoding})
+            response.raise_for_status()
+            wire_bytes = response.num_bytes_downloaded
+        elapsed = time.perf_counter() - started
+    return wire_bytes, elapsed / requests
+
+
+async def _run(args: argparse.Namespace) -> dict:
+    payload = build_long_dialog(args.turns)
+
+    async def messages(request):
+        return JSONResponse(payload)
+
+    app = Starlette(routes=[Route("/messages", messages)], middleware=[Middleware(CompressionMiddleware)])
+    encodings = ["identity", "gzip"]
+    if middleware_module.brotli is not None:
+        encodings.append("br")
+
+    result: dict = {"turns": args.turns}
+    for encoding in encodings:
+        wire_bytes, seconds = await _measure(app, encoding, args.requests)
+        result[f"{encoding}_bytes"] = wire_bytes
+        result[f"{encoding}_ms_per_request"] = round(seconds * 1000, 2)
+    for encoding in encodings[1:]:
+        result[f"{encoding}_ratio"] = round(result["identity_bytes"] / result[f"{encoding}_bytes"], 2)
+    return result
+
+
+def main() -> int:
+    args = _parse_args()
+    result = asyncio.run(_run(args))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        for key, value in result.items():
+            print(f"{key:24} {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+HTTP benchmark of the request-size and cache-header middleware.
+
+Serves a static file and a small JSON endpoint through the previous
+BaseHTTPMiddleware implementations and through the current pure-ASGI ones, and
+reports requests per second for each. Requests go through httpx's in-process
+ASGI transport, so no server or network is involved.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from chat_client.core.middleware import LimitRequestSizeMiddleware, NoCacheMiddleware
+
+STATIC_DIR = REPO_ROOT / "chat_client" / "static"
+STATIC_PATH = "/static/js/app-dialog.js"
+MAX_SIZE = 10 * 1024 * 1024
+
+
+class LegacyNoCacheMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        if request.url.path.startswith("/static"):
+            response.headers["Cache-Control"] = "public, max-age=31536000"
+            return response
+        response.headers["Cache-Control"] = "no-store"
+        return response
+
+
+class LegacyLimitRequestSizeMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app, max_size: int):
+        super().__init__(app)
+        self.max_size = max_size
+
+    async def dispatch(self, request: Request, call_next):
+        request_body = await request.body()
+        if len(request_body) > self.max_size:
+            return JSONResponse({"error": True, "message": "Request body too large"}, status_code=413)
+        return await call_next(request)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark static-file and small-JSON requests per second.")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per scenario.")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent in-flight requests.")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of text.")
+    return parser.parse_args()
+
+
+def _build_app(no_cache_cls, limit_cls) -> Starlette:
+    async def ping(request: Request):
+        payload = await request.json()
+        return JSONResponse({"ok": True, "echo": payload.get("value")})
+
+    return Starlette(
+        routes=[
+            Route("/ping", ping, methods=["POST"]),
+            Mount("/static", app=StaticFiles(directory=STATIC_DIR), name="static"),
+        ],
+        middleware=[Middleware(no_cache_cls), Middleware(limit_cls, max_size=MAX_SIZE)],
+    )
+
+
+async def _requests_per_second(app: Starlette, *, kind: str, total: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def one() -> None:
+            if kind == "static":
+                response = await client.get(STATIC_PATH)
+            else:
+                response = await client.post("/ping", json={"value": 1})
+            response.raise_for_status()
+
+        for _ in range(min(total, 50)):
+            await one()
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded() -> None:
+            async with semaphore:
+                await one()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(bounded() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+    return total / elapsed if elapsed else 0.0
+
+
+async def _run(args: argparse.Namespace) -> dict:
+    variants = {
+        "base_http_middleware": _build_app(LegacyNoCacheMiddleware, LegacyLimitRequestSizeMiddleware),
+        "pure_asgi": _build_app(NoCacheMiddleware, LimitRequestSizeMiddleware),
+    }
+    result: dict = {"requests": args.requests, "concurrency": args.concurrency}
+    for kind in ("static", "json"):
+        for name, app in variants.items():
+            rps = await _requests_per_second(app, kind=kind, total=args.requests, concurrency=args.concurrency)
+            result[f"{kind}_{name}_rps"] = round(rps, 1)
+        before = result[f"{kind}_base_http_middleware_rps"]
+        result[f"{kind}_speedup"] = round(result[f"{kind}_pure_asgi_rps"] / before, 2) if before else None
+    return result
+
+
+def main() -> int:
+    args = _parse_args()
+    result = asyncio.run(_run(args))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        for key, value in result.items():
+            print(f"{key:36} {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of the per-request model capability lookups.
+
+Compares the legacy path (rebuilding the JSON cache key from the full config on
+every call) with the precomputed capability table. No provider is contacted:
+metadata detection is stubbed out so only the lookup overhead is measured.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+from unittest.mock import patch
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from chat_client.core import model_capabilities
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark model capability lookups on the /chat request path.")
+    parser.add_argument("--models", type=int, default=50, help="Number of configured models.")
+    parser.add_argument("--number", type=int, default=2000, help="Lookups per measurement.")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of text.")
+    return parser.parse_args()
+
+
+def _build_config(model_count: int) -> dict:
+    providers = {
+        "ollama": {"base_url": "http://localhost:11434/v1", "api_key": "ollama"},
+        "openai": {"base_url": "https://api.openai.com/v1", "api_key": "key"},
+    }
+    models = {f"model-{index}": ("ollama" if index % 2 else "openai") for index in range(model_count)}
+    return {
+        "providers": providers,
+        "models": models,
+        "vision_models": [name for index, name in enumerate(models) if index % 3 == 0],
+        "tool_models": [name for index, name in enumerate(models) if index % 4 == 0],
+        "system_message_denylist": [],
+    }
+
+
+def main() -> int:
+    args = _parse_args()
+    config = _build_config(args.models)
+    model_name = next(iter(config["models"]))
+
+    def provider_info_resolver(name: str) -> dict:
+        return config["providers"][config["models"][name]]
+
+    common = {
+        "models": config["models"],
+        "vision_models": config["vision_models"],
+        "tool_models": config["tool_models"],
+        "system_message_denylist": config["system_message_denylist"],
+        "provider_info_resolver": provider_info_resolver,
+    }
+
+    def legacy_request_path() -> None:
+        # What each /chat request did before: three capability checks plus the tool-model
+        # list, each rebuilding the cache key from a fresh cache token.
+        for _ in range(3):
+            cache_token = {**config}
+            capabilities = model_capabilities.build_model_capabilities(**common, cache_token=cache_token)
+            bool(capabilities.get(model_name, {}).get("supports_images"))
+        cache_token = {**config}
+        capabilities = model_capabilities.build_model_capabilities(**common, cache_token=cache_token)
+        [name for name, details in capabilities.items() if details.get("supports_tools")]
+
+    def table_request_path() -> None:
+        for capability in ("supports_images", "supports_attachments", "supports_thinking_control"):
+            model_capabilities.get_model_capability_table(**common, cache_token=config["providers"]).supports(model_name, capability)
+        list(model_capabilities.get_model_capability_table(**common, cache_token=config["providers"]).tool_models)
+
+    with (
+        patch.object(model_capabilities, "get_ollama_model_metadata", return_value={"supports_tools": True}),
+        patch.object(model_capabilities, "get_openai_model_metadata", return_value={"supports_reasoning": True}),
+    ):
+        legacy_request_path()
+        table_request_path()
+        legacy_seconds = min(timeit.repeat(legacy_request_path, number=args.number, repeat=3))
+        table_seconds = min(timeit.repeat(table_request_path, number=args.number, repeat=3))
+
+    result = {
+        "models": args.models,
+        "requests": args.number,
+        "legacy_us_per_request": round(legacy_seconds / args.number * 1_000_000, 2),
+        "table_us_per_request": round(table_seconds / args.number * 1_000_000, 2),
+        "speedup": round(legacy_seconds / table_seconds, 1) if table_seconds else None,
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        for key, value in result.items():
+            print(f"{key:24} {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Repository-layer micro-benchmarks on synthetic data.
+
+For each scale factor, migrates a fresh SQLite database in a temporary
+directory, fills it with `chat_client.database.synthetic_data` (many light
+users plus one heavy user with long dialogs) and times the repository calls the
+chat UI depends on for the heavy user: loading a long dialog, listing and
+searching dialogs, usage totals, editing a message and appending assistant
+turn events. Reports latency percentiles, the number of SQL statements per call
+and any full table scans in their query plans, so index and N+1 regressions
+show up next to the timings as the data grows.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+DATABASE = Path("data") / "database.db"
+CONFIG = """from pathlib import Path
+
+DATA_DIR = "data"
+DATABASE = Path(DATA_DIR) / "database.db"
+LOG_LEVEL = "WARNING"
+"""
+LARGE_TABLES = ("dialog", "message", "message_image", "message_attachment", "tool_call_event", "assistant_turn_event", "llm_usage_event")
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Time repository calls on synthetic databases of growing size.")
+    parser.add_argument("--scales", default="0.1,0.5,1", help="Comma-separated scale factors of the default synthetic dataset.")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed calls per repository function and scale.")
+    parser.add_argument("--output", type=Path, default=None, help="Also write the JSON result to this file.")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of text.")
+    return parser.parse_args()
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))]
+
+
+def _message_ids_to_edit(dialog_ids: list[str], count: int) -> list[int]:
+    """
+    The middle message of `count` of the heavy user's short dialogs, so each
+    edit deactivates and deletes the same amount of history.
+    """
+    connection = sqlite3.connect(str(DATABASE))
+    try:
+        message_ids = []
+        for dialog_id in dialog_ids[1 : count + 1]:
+            rows = connection.execute("SELECT message_id FROM message WHERE dialog_id = ? ORDER BY sequence_index", (dialog_id,)).fetchall()
+            message_ids.append(int(rows[len(rows) // 2][0]))
+        return message_ids
+    finally:
+        connection.close()
+
+
+def _full_scans(queries: list[Any]) -> list[str]:
+    from chat_client.database.query_plan import explain_query_plan, full_table_scans
+
+    connection = sqlite3.connect(str(DATABASE))
+    try:
+        scans: list[str] = []
+        for query in queries:
+            scans.extend(full_table_scans(explain_query_plan(connection, query.statement, query.parameters), LARGE_TABLES))
+        return sorted(set(scans))
+    finally:
+        connection.close()
+
+
+async def _measure(name: str, calls: list[Any]) -> dict[str, Any]:
+    from chat_client.database.db_session import engine
+    from chat_client.database.query_plan import QueryRecorder
+
+    # The first call is recorded for its statements and plans, and not timed.
+    with QueryRecorder(engine) as recorder:
+        await calls[0]()
+    query_count = len(recorder.queries)
+    scans = _full_scans(recorder.reads_and_writes())
+
+    durations = []
+    for call in calls[1:]:
+        started = time.perf_counter()
+        await call()
+        durations.append(time.perf_counter() - started)
+    return {
+        "function": name,
+        "mean_ms": round(statistics.fmean(durations) * 1000, 3),
+        "p50_ms": round(_percentile(durations, 0.50) * 1000, 3),
+        "p95_ms": round(_percentile(durations, 0.95) * 1000, 3),
+        "queries_per_call": query_count,
+        "full_scans": scans,
+    }
+
+
+async def _run_scale(scale: float, repeat: int) -> dict[str, Any]:
+    from chat_client.database.db_session import engine
+    from chat_client.database.migration import Migration
+    from chat_client.database.synthetic_data import SEARCH_NEEDLE, SyntheticDataSpec, populate
+    from chat_client.repositories import chat_repository
+
+    await engine.dispose()
+    DATABASE.unlink(missing_ok=True)
+    Migration(str(DATABASE), str(REPO_ROOT / "chat_client" / "migrations")).run_migrations()
+    spec = SyntheticDataSpec().scaled(scale)
+    started = time.perf_counter()
+    summary = await asyncio.to_thread(populate, DATABASE, spec)
+    generate_seconds = time.perf_counter() - started
+
+    user_id = summary.heavy_user_id
+    dialog_id = summary.heavy_dialog_id
+    calls_per_function = repeat + 1
+    edit_ids = _message_ids_to_edit(summary.heavy_dialog_ids, min(calls_per_function, len(summary.heavy_dialog_ids) - 1))
+    event = {"event_type": "assistant_segment", "reasoning_text": "thinking", "content_text": "answer"}
+
+    benchmarks = {
+        "get_messages": [lambda: chat_repository.get_messages(user_id, dialog_id)] * calls_per_function,
+        "get_dialogs_info": [lambda: chat_repository.get_dialogs_info(user_id, 1)] * calls_per_function,
+        "get_dialogs_info_search": [lambda: chat_repository.get_dialogs_info(user_id, 1, SEARCH_NEEDLE)] * calls_per_function,
+        "get_user_usage_totals": [lambda: chat_repository.get_user_usage_totals(user_id)] * calls_per_function,
+        "update_message": [
+            lambda message_id=message_id: chat_repository.update_message(user_id, message_id, "Edited question") for message_id in edit_ids
+        ],
+        "create_assistant_turn_events": [
+            lambda index=index: chat_repository.create_assistant_turn_events(user_id, dialog_id, f"bench-turn-{index}", [event, event])
+            for index in range(calls_per_function)
+        ],
+    }
+    results = [await _measure(name, calls) for name, calls in benchmarks.items() if len(calls) > 1]
+    return {
+        "scale": scale,
+        "generate_seconds": round(generate_seconds, 2),
+        "rows": summary.row_counts,
+        "heavy_dialog_turns": spec.heavy_dialog_turns,
+        "heavy_user_dialogs": spec.heavy_user_dialogs,
+        "functions": results,
+    }
+
+
+async def _run(args: argparse.Namespace) -> dict[str, Any]:
+    scales = [float(value) for value in args.scales.split(",") if value.strip()]
+    return {"repeat": args.repeat, "scales": [await _run_scale(scale, args.repeat) for scale in scales]}
+
+
+def main() -> int:
+    args = _parse_args()
+    # get_dialogs_info logs every call at WARNING.
+    logging.disable(logging.WARNING)
+    output = args.output.resolve() if args.output else None
+    original_cwd = Path.cwd()
+    with tempfile.TemporaryDirectory(prefix="repository-bench-") as workdir:
+        data_dir = Path(workdir) / "data"
+        data_dir.mkdir()
+        (data_dir / "__init__.py").write_text("", encoding="utf-8")
+        (data_dir / "config.py").write_text(CONFIG, encoding="utf-8")
+        # The engine URL is relative to the working directory.
+        os.chdir(workdir)
+        sys.path.insert(0, workdir)
+        try:
+            result = asyncio.run(_run(args))
+        finally:
+            os.chdir(original_cwd)
+
+    if output is not None:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+    for scale_result in result["scales"]:
+        rows = ", ".join(f"{table}={count}" for table, count in scale_result["rows"].items())
+        print(f"scale {scale_result['scale']} ({rows}; generated in {scale_result['generate_seconds']}s)")
+        for item in scale_result["functions"]:
+            scans = f"  SCANS: {'; '.join(item['full_scans'])}" if item["full_scans"] else ""
+            print(
+                f"  {item['function']:30} mean {item['mean_ms']:9.3f} ms  p50 {item['p50_ms']:9.3f} ms  "
+                f"p95 {item['p95_ms']:9.3f} ms  queries {item['queries_per_call']}{scans}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,28 +1,19 @@
 #!/usr/bin/env python
-import json
-from pathlib import Path
-
+"""
+Regenerate chat_client/templates/includes/importmap.html.
 
-def generate_import_map(base_dirs):
-    import_map = {"imports": {}}
-    for base_dir in base_dirs:
-        base_path = Path(base_dir)
-        # Strip "chat_client" or any top-level prefix.
-        relative_dir = str(base_path).split("chat_client/")[-1]
-        import_dir = f"/{relative_dir}"
+Run this after adding or removing JS modules. The import map resolves each
+module through `static_url` when rendered, so it does not need to change when
+`chat-client build-static` fingerprints the files.
+"""
 
-        js_files = sorted(base_path.rglob("*.js"))
-        for js_file in js_files:
-            relative_js_path = js_file.relative_to(base_path).as_posix()
-            key = f"{import_dir}/{relative_js_path}"
-            value = key + "?version={{ version }}"
-            import_map["imports"][key] = value
-    return json.dumps(import_map, indent=4)
+import sys
+from pathlib import Path
 
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
 
-base_directories = ["chat_client/static/js", "chat_client/static/dist"]
-import_map = generate_import_map(base_directories)
-import_map_html = f'<script type="importmap">\n{import_map}\n</script>'
+from chat_client.core.static_assets import write_import_map
 
-with open("chat_client/templates/includes/importmap.html", "w") as f:
-    f.write(import_map_html)
+write_import_map()
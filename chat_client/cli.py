@@ -3,12 +3,14 @@ import logging
 import os
 import subprocess
 import sys
+from pathlib import Path
 
 import click
 
 from chat_client import __program__, __version__
 from chat_client.core.bootstrap import bootstrap_runtime, create_local_user
 from chat_client.core.logging import setup_logging
+from chat_client.core.metrics import clear_multiprocess_directory
 
 setup_logging(logging.INFO)
 logger: logging.Logger = logging.getLogger(__name__)
@@ -75,13 +77,30 @@ def server_dev(port: int, workers: int, host: str, log_level: str):
 @click.option("--port", default=1972, help="Server port.")
 @click.option("--workers", default=3, help="Number of workers.")
 @click.option("--host", default="0.0.0.0", help="Server host.")
-def server_prod(port: int, workers: int, host: str):
+@click.option("--preload/--no-preload", default=True, help="Load the app and warm shared state once in the master before forking.")
+@click.option("--max-requests", default=2000, help="Restart a worker after this many requests. 0 disables restarts.")
+@click.option("--max-requests-jitter", default=200, help="Random extra requests per worker, so workers do not restart together.")
+@click.option("--graceful-timeout", default=120, help="Seconds a stopping worker may spend finishing open streams.")
+def server_prod(
+    port: int,
+    workers: int,
+    host: str,
+    preload: bool,
+    max_requests: int,
+    max_requests_jitter: int,
+    graceful_timeout: int,
+):
     _emit_bootstrap_messages(prompt_for_initial_user=True)
 
     if os.name == "nt":
         logger.info("Gunicorn does not work on Windows. Use server-dev instead.")
         raise SystemExit(1)
 
+    # Snapshots of the previous run's workers would otherwise be merged into /metrics.
+    import data.config as config
+
+    clear_multiprocess_directory(getattr(config, "METRICS_DIR", Path(config.DATA_DIR) / "metrics"))
+
     cmd = [
         sys.executable,
         "-m",
@@ -89,9 +108,15 @@ def server_prod(port: int, workers: int, host: str):
         "chat_client.main:app",
         f"--workers={workers}",
         f"--bind={host}:{port}",
-        "--worker-class=uvicorn.workers.UvicornWorker",
+        "--config=python:chat_client.gunicorn_conf",
+        "--worker-class=chat_client.gunicorn_conf.DrainingUvicornWorker",
+        f"--max-requests={max_requests}",
+        f"--max-requests-jitter={max_requests_jitter}",
+        f"--graceful-timeout={graceful_timeout}",
         "--log-level=info",
     ]
+    if preload:
+        cmd.append("--preload")
 
     try:
         logger.info("Started Gunicorn in the foreground")
@@ -115,6 +140,48 @@ def create_user(email: str | None, password: str | None):
     asyncio.run(create_local_user(email, password))
 
 
+@cli.command(help="Write fingerprinted and precompressed static assets to chat_client/static/build.")
+def build_static():
+    from chat_client.core.static_assets import build_static_assets
+
+    manifest = build_static_assets()
+    click.echo(f"Built {len(manifest)} static assets.")
+
+
+def _format_bytes(size_bytes: int) -> str:
+    return f"{size_bytes / (1024 * 1024):.1f} MB"
+
+
+@cli.command(help="Move attachment files stored before content addressing, and inline images, into the deduplicated blob store.")
+def attachments_migrate():
+    _emit_bootstrap_messages(prompt_for_initial_user=False)
+    from chat_client.core.attachment_maintenance import migrate_legacy_attachments, spill_inline_images
+
+    report = asyncio.run(migrate_legacy_attachments())
+    click.echo(
+        f"Migrated {report['migrated']} attachment(s), {report['missing']} file(s) missing. "
+        f"Reclaimed {_format_bytes(report['bytes_reclaimed'])} of duplicate content."
+    )
+    image_report = asyncio.run(spill_inline_images())
+    click.echo(
+        f"Moved {image_report['moved']} inline image(s) out of the database, {image_report['skipped']} skipped. "
+        f"Moved {_format_bytes(image_report['bytes_moved'])}; run VACUUM on the database to reclaim the space."
+    )
+
+
+@cli.command(help="Delete attachments no message uses, unreferenced blobs and abandoned uploads.")
+@click.option("--grace-hours", default=24.0, help="Keep attachments uploaded within this many hours, e.g. not yet sent.")
+def attachments_gc(grace_hours: float):
+    _emit_bootstrap_messages(prompt_for_initial_user=False)
+    from chat_client.core.attachment_maintenance import collect_garbage
+
+    report = asyncio.run(collect_garbage(grace_seconds=grace_hours * 3600))
+    click.echo(
+        f"Deleted {report['attachments_deleted']} attachment(s) and {report['blobs_deleted']} blob(s). "
+        f"Reclaimed {_format_bytes(report['bytes_reclaimed'])}."
+    )
+
+
 @cli.command(help="Init the system")
 def init_system():
     _emit_bootstrap_messages(prompt_for_initial_user=True)
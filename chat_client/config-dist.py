@@ -18,11 +18,16 @@ class ConfigSMTP:
 # DEFAULT_MODEL = "deepseek-r1:14b"
 
 # Optional dedicated model used only for dialog title generation.
-# When unset, titles are derived from the first user message instead.
+# When unset, or when the title call fails, titles are derived from the first user message instead.
 DIALOG_TITLE_MODEL = ""
 
+# Start the title call in parallel with the first chat stream instead of after it.
+DIALOG_TITLE_SPECULATIVE = False
+
 # Logging
 LOG_LEVEL = logging.INFO
+# "text" or "json" (one JSON object per line, with chat event fields as structured data)
+LOG_FORMAT = "text"
 
 # Reloading when code changes
 RELOAD = True
@@ -50,6 +55,28 @@ SESSION_MAX_AGE = 14 * 24 * 60 * 60  # 14 days
 # Maximum accepted HTTP request body size in bytes (default 10 MB)
 REQUEST_MAX_SIZE = 100 * 1024 * 1024
 
+# Responses at least this large are gzip/brotli compressed when the client accepts it.
+# Server-sent event streams are never compressed.
+RESPONSE_COMPRESSION_MINIMUM_SIZE = 1000
+
+# Prometheus metrics are served at /metrics to clients sending `Authorization: Bearer <token>`.
+# Leave empty to disable the endpoint. Workers share their metrics through METRICS_DIR.
+METRICS_TOKEN = ""
+METRICS_DIR = Path(DATA_DIR) / "metrics"
+
+# Request tracing: "" (off), "otlp" (post OTLP/JSON to a collector) or "json" (append spans to a file).
+# Spans cover request parsing, dialog loading, each model round, each tool call and each repository call.
+TRACING_EXPORTER = ""
+TRACING_OTLP_ENDPOINT = "http://localhost:4318/v1/traces"
+TRACING_OTLP_HEADERS: dict[str, str] = {}
+TRACING_JSON_FILE = Path(DATA_DIR) / "traces.jsonl"
+
+# POST /admin/profile?seconds=10 samples the stacks of the worker serving the request and
+# returns a flamegraph-compatible folded profile (also written to PROFILE_DIR).
+# Requires `Authorization: Bearer <token>`. Leave empty to disable the endpoint.
+PROFILING_TOKEN = ""
+PROFILE_DIR = Path(DATA_DIR) / "profiles"
+
 # Use mathjax for rendering math
 USE_KATEX = True
 
@@ -61,6 +88,21 @@ PYTHON_TOOL_TIMEOUT_SECONDS = 60
 ATTACHMENT_STORAGE_DIR = Path(DATA_DIR) / "attachments"
 MAX_ATTACHMENT_SIZE_BYTES = 100 * 1024 * 1024
 PYTHON_TOOL_ATTACHMENT_MOUNT_DIR = "/mnt/data"
+# How attachments appear in the tool workspace. "link" reflinks each file next to the stored one
+# (a copy where the filesystem cannot) and mounts it writable; inputs cannot be deleted or
+# replaced by renaming, e.g. with `sed -i`. "copy" copies all of them into the workspace tmpfs
+# inside the container, where they count against its 65 MB.
+PYTHON_TOOL_WORKSPACE_MODE = "link"
+
+# Admission control for chat streams (per worker process). Streams beyond these limits wait in
+# a queue served round-robin between users, and the browser shows the queue position.
+# Provider and model names map to their maximum concurrent streams; missing names are unlimited.
+# A stream waiting for an Ollama model to load joins the queue once the model is loaded.
+CHAT_STREAM_PROVIDER_LIMITS: dict[str, int] = {}  # e.g. {"ollama": 2}
+CHAT_STREAM_MODEL_LIMITS: dict[str, int] = {}
+# Maximum concurrent streams per user (0 for no limit), and maximum queued streams before new ones are refused.
+CHAT_STREAM_USER_LIMIT = 4
+CHAT_STREAM_MAX_QUEUED = 100
 
 # Maximum number of model-response rounds used to produce a single assistant reply.
 # This includes tool-calling rounds and the final no-tool answer round.
@@ -87,6 +129,15 @@ PROVIDERS = {
     #     "base_url": "http://localhost:8000/v1",
     #     "api_key": "ollama",
     # },
+    # A provider served by several hosts or API keys lists them as "endpoints" instead of
+    # "base_url". Each model call goes to the endpoint with the fewest streams in flight
+    # ("routing": "latency" also weighs recent time to first token). Failing endpoints are
+    # taken out of rotation and a call that fails before its first token is retried on another.
+    # "ollama-pool": {
+    #     "endpoints": ["http://gpu-1:11434/v1", {"base_url": "http://gpu-2:11434/v1", "api_key": "other"}],
+    #     "api_key": "ollama",
+    #     "routing": "least_outstanding",
+    # },
     "ollama": {
         "base_url": "http://localhost:11434/v1",
         "api_key": "ollama",
@@ -97,6 +148,21 @@ PROVIDERS = {
     },
 }
 
+# How often each worker checks the endpoints of multi-endpoint providers. 0 disables it.
+PROVIDER_HEALTH_CHECK_INTERVAL_SECONDS = 15
+
+# Ollama loads a model on its first request, which can take tens of seconds for large models.
+# Models listed here are loaded when a worker starts. While a chat waits for a model to load,
+# the browser shows "Loading model" instead of a silent stall (OLLAMA_TRACK_RESIDENCY).
+OLLAMA_PRELOAD_MODELS: list[str] = []
+# How long Ollama keeps each model loaded after a request, e.g. {"llama3.1:70b": "1h"}; -1 keeps it
+# loaded. Models missing here use OLLAMA_DEFAULT_KEEP_ALIVE, and None uses the Ollama server default.
+OLLAMA_KEEP_ALIVE: dict[str, str | int] = {}
+OLLAMA_DEFAULT_KEEP_ALIVE = None
+OLLAMA_TRACK_RESIDENCY = True
+# Start loading an Ollama model as soon as a user selects it in the model picker.
+OLLAMA_WARM_UP_ON_SELECT = False
+
 # Ollama models are discovered automatically and this can be left empty.
 MODELS: dict[str, str] = {
     # "gpt-5.4-mini": "openai",
@@ -111,6 +177,37 @@ VISION_MODELS: list[str] = []
 # Their custom prompts will instead be injected as the first user message.
 SYSTEM_MESSAGE_DENYLIST: list[str] = []
 
+# Model capabilities are probed at startup with this many concurrent probes,
+# each provider call limited to the given timeout.
+MODEL_CAPABILITIES_PROBE_CONCURRENCY = 8
+MODEL_CAPABILITIES_PROBE_TIMEOUT_SECONDS = 5
+
+# Probe results are shared by all workers through this file. Workers start from the stored
+# results and re-probe entries older than the TTL in the background. Set to "" to disable.
+MODEL_CAPABILITIES_CACHE_FILE = Path(DATA_DIR) / "model_capabilities.json"
+MODEL_CAPABILITIES_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+# Dialog history is trimmed to the model's context window minus the tokens reserved for the
+# answer and tool definitions. The window comes from Ollama metadata or from this table;
+# models with neither are sent the full history.
+# Oversized tool results in earlier turns are shortened first, then the oldest exchanges are dropped.
+CONTEXT_WINDOW_TOKENS: dict[str, int] = {
+    # "gpt-5.4-mini": 400_000,
+}
+CONTEXT_RESERVED_OUTPUT_TOKENS = 4096
+CONTEXT_TOOL_RESULT_MAX_TOKENS = 2000
+# Optional `str -> int` token counter, e.g. a tiktoken encoding:
+# CONTEXT_TOKENIZER = lambda text: len(tiktoken.get_encoding("o200k_base").encode(text))
+# Defaults to an estimate of four characters per token.
+CONTEXT_TOKENIZER = None
+
+# Send requests in a stable-prefix layout so provider prompt caches can reuse earlier turns:
+# tool definitions in name order, messages with a fixed set of keys, tool calls and results
+# encoded as they are stored, and trimmed history dropped in steps of whole exchanges.
+# OpenAI requests get a per-dialog `prompt_cache_key`, llama.cpp requests `cache_prompt`.
+# The cache hit ratio per dialog and model is shown on the usage page.
+PROMPT_CACHE_STABLE_PREFIX = True
+
 # Tool registry
 # Functions must be callables that accept keyword arguments.
 TOOL_REGISTRY: dict[str, Any] = {
@@ -119,6 +216,16 @@ TOOL_REGISTRY: dict[str, Any] = {
     "search_wikipedia": search_wikipedia,
 }
 
+# Results of deterministic tools can be reused across calls, dialogs and users. A tool opts in
+# through its LOCAL_TOOL_DEFINITIONS entry, e.g.
+# {"name": "search_wikipedia", "execution": {"cacheable": True, "cache_ttl_seconds": 3600}, ...}
+# Results are kept in memory and, with TOOL_RESULT_CACHE_DATABASE, shared by all workers through the database.
+TOOL_RESULT_CACHE_MAX_ENTRIES = 1024
+TOOL_RESULT_CACHE_DATABASE = True
+
+# Each worker deletes expired rows of the cache table (e.g. cached tool results) this often. 0 disables it.
+CACHE_SWEEP_INTERVAL_SECONDS = 600
+
 # Models that should receive tool definitions.
 # Ollama tool models are discovered automatically.
 TOOL_MODELS: list[str] = [
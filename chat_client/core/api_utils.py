@@ -1,20 +1,21 @@
 from typing import Any
 from urllib.parse import urlsplit, urlunsplit
 
-import httpx
-from openai import OpenAI
+from chat_client.core import lazy_imports
 
 OLLAMA_CAPABILITY_TIMEOUT_SECONDS = 5.0
 
 _OLLAMA_MODEL_METADATA_CACHE: dict[tuple[str, str], dict[str, Any]] = {}
 _OPENAI_MODEL_METADATA_CACHE: dict[tuple[str, str, bool], dict[str, Any]] = {}
 
+__getattr__ = lazy_imports.module_getattr(__name__, {"httpx": "httpx", "OpenAI": "openai:OpenAI"})
+
 
 def get_provider_models(provider: dict):
     """
     Helper to get all ollama models
     """
-    client = OpenAI(**provider)
+    client = lazy_imports.load(__name__, "OpenAI")(**provider)
     ollama_model_names = []
     ollama_models = client.models.list()
     for model in ollama_models:
@@ -96,7 +97,7 @@ def _ollama_post(
     api_key: str,
     timeout_seconds: float,
 ) -> dict[str, Any]:
-    with httpx.Client(timeout=timeout_seconds) as client:
+    with lazy_imports.load(__name__, "httpx").Client(timeout=timeout_seconds) as client:
         response = client.post(
             f"{api_base_url}/{endpoint.lstrip('/')}",
             json=payload,
@@ -147,12 +148,14 @@ def _ollama_model_accepts_tools(
     return True
 
 
-def get_ollama_model_metadata(provider: dict[str, Any], model_name: str) -> dict[str, Any]:
+def get_ollama_model_metadata(provider: dict[str, Any], model_name: str, *, refresh: bool = False) -> dict[str, Any]:
     """
     Best-effort Ollama metadata detection.
 
     `supports_tools` means the model safely accepts a `tools` payload.
     `supports_thinking` is informational only and should not be used to gate requests.
+    `probe_failed` is set when the server could not be reached, so the result should not be persisted.
+    Pass `refresh=True` to bypass the in-process cache.
     """
     if not isinstance(provider, dict):
         return {}
@@ -163,7 +166,7 @@ def get_ollama_model_metadata(provider: dict[str, Any], model_name: str) -> dict
         return {}
 
     cache_key = (api_base_url, normalized_model_name)
-    cached = _OLLAMA_MODEL_METADATA_CACHE.get(cache_key)
+    cached = None if refresh else _OLLAMA_MODEL_METADATA_CACHE.get(cache_key)
     if cached is not None:
         return dict(cached)
 
@@ -187,6 +190,7 @@ def get_ollama_model_metadata(provider: dict[str, Any], model_name: str) -> dict
         metadata.update(_extract_ollama_capability_flags(show_payload, normalized_model_name))
         metadata["context_length"] = _extract_ollama_context_length(show_payload)
     except Exception:
+        metadata["probe_failed"] = True
         _OLLAMA_MODEL_METADATA_CACHE[cache_key] = dict(metadata)
         return dict(metadata)
 
@@ -211,12 +215,20 @@ def get_ollama_model_capabilities(provider: dict[str, Any], model_name: str) ->
     }
 
 
-def get_openai_model_metadata(provider: dict[str, Any], model_name: str, *, probe_tools: bool = False) -> dict[str, Any]:
+def get_openai_model_metadata(
+    provider: dict[str, Any],
+    model_name: str,
+    *,
+    probe_tools: bool = False,
+    refresh: bool = False,
+) -> dict[str, Any]:
     """
     Best-effort OpenAI metadata detection.
 
     `supports_reasoning` and `supports_thinking` are inferred by probing a small
-    Chat Completions API call with reasoning enabled. Failure is treated as unsupported.
+    Chat Completions API call with reasoning enabled. Failure is treated as unsupported,
+    except connection errors and timeouts, which also set `probe_failed`.
+    Pass `refresh=True` to bypass the in-process cache.
     """
     if not isinstance(provider, dict):
         return {}
@@ -227,7 +239,7 @@ def get_openai_model_metadata(provider: dict[str, Any], model_name: str, *, prob
         return {}
 
     cache_key = (base_url, normalized_model_name, bool(probe_tools))
-    cached = _OPENAI_MODEL_METADATA_CACHE.get(cache_key)
+    cached = None if refresh else _OPENAI_MODEL_METADATA_CACHE.get(cache_key)
     if cached is not None:
         return dict(cached)
 
@@ -237,9 +249,11 @@ def get_openai_model_metadata(provider: dict[str, Any], model_name: str, *, prob
         "context_length": None,
     }
 
+    from openai import APIConnectionError
+
     try:
         timeout_seconds = float(provider.get("timeout_seconds", OLLAMA_CAPABILITY_TIMEOUT_SECONDS) or OLLAMA_CAPABILITY_TIMEOUT_SECONDS)
-        client = OpenAI(
+        client = lazy_imports.load(__name__, "OpenAI")(
             api_key=provider.get("api_key"),
             base_url=base_url or None,
             timeout=timeout_seconds,
@@ -269,6 +283,10 @@ def get_openai_model_metadata(provider: dict[str, Any], model_name: str, *, prob
         client.chat.completions.create(**create_kwargs)
         metadata["supports_reasoning"] = True
         metadata["supports_thinking"] = True
+    except APIConnectionError:
+        metadata["probe_failed"] = True
+        _OPENAI_MODEL_METADATA_CACHE[cache_key] = dict(metadata)
+        return dict(metadata)
     except Exception:
         _OPENAI_MODEL_METADATA_CACHE[cache_key] = dict(metadata)
         return dict(metadata)
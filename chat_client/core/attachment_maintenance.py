@@ -0,0 +1,102 @@
+"""
+Upkeep of the content-addressed attachment store: moving files stored before
+content addressing, and images stored inline in the database, into it, and
+deleting attachments and blobs nothing references any more. All run from the CLI.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from chat_client.core import attachments as attachment_service
+from chat_client.repositories import attachment_repository, image_repository
+
+DEFAULT_GC_GRACE_SECONDS = 24 * 3600
+
+
+def remove_file(path: str) -> int:
+    """
+    Delete a file, returning the bytes freed (0 when it was already gone).
+    """
+    file_path = Path(path)
+    try:
+        size_bytes = file_path.stat().st_size
+        file_path.unlink()
+    except FileNotFoundError:
+        return 0
+    return size_bytes
+
+
+async def migrate_legacy_attachments() -> dict[str, int]:
+    """
+    Move files stored as `attachments/{attachment_id}_{name}` into the blob
+    store. Bytes reclaimed are those of files whose content was already stored.
+    """
+    migrated = 0
+    missing = 0
+    bytes_reclaimed = 0
+    for attachment in await attachment_repository.list_legacy_attachments():
+        source_path = Path(attachment["storage_path"])
+        if not source_path.is_file():
+            missing += 1
+            continue
+        size_bytes = source_path.stat().st_size
+        sha256, storage_path, is_new = await asyncio.to_thread(attachment_service.store_file_as_blob, source_path)
+        await attachment_repository.assign_attachment_blob(int(attachment["attachment_id"]), sha256, str(storage_path), size_bytes)
+        source_path.unlink()
+        migrated += 1
+        if not is_new:
+            bytes_reclaimed += size_bytes
+    return {"migrated": migrated, "missing": missing, "bytes_reclaimed": bytes_reclaimed}
+
+
+async def spill_inline_images() -> dict[str, int]:
+    """
+    Move images stored as base64 data URLs in the `image` table into the blob
+    store, leaving an attachment reference in the row. Images that do not
+    decode are left as they are. Run VACUUM afterwards to shrink the database file.
+    """
+    moved = 0
+    skipped = 0
+    bytes_moved = 0
+    for image in await image_repository.list_inline_images():
+        data_url = await image_repository.get_image_data_url(int(image["image_id"]))
+        decoded = attachment_service.decode_image_data_url(data_url)
+        if decoded is None:
+            skipped += 1
+            continue
+        content_type, content = decoded
+        staged = await asyncio.to_thread(attachment_service.stage_blob_bytes, content)
+        try:
+            attachment_id = await image_repository.replace_inline_image(
+                int(image["image_id"]),
+                user_id=int(image["user_id"]),
+                name=attachment_service.build_image_attachment_name(staged.sha256, content_type),
+                content_type=content_type,
+                size_bytes=staged.size_bytes,
+                storage_path=str(staged.storage_path),
+                sha256=staged.sha256,
+            )
+            if attachment_id is None:
+                skipped += 1
+                continue
+            attachment_service.commit_staged_blob(staged)
+        finally:
+            attachment_service.discard_staged_blob(staged)
+        moved += 1
+        bytes_moved += len(data_url)
+    return {"moved": moved, "skipped": skipped, "bytes_moved": bytes_moved}
+
+
+async def collect_garbage(grace_seconds: float = DEFAULT_GC_GRACE_SECONDS) -> dict[str, int]:
+    """
+    Delete attachments older than `grace_seconds` that no message uses (e.g.
+    of deleted dialogs or never sent), unreferenced blobs and staged uploads
+    of interrupted requests. The grace period keeps uploads that are about to
+    be sent.
+    """
+    created_before = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=grace_seconds)
+    report = await attachment_repository.collect_garbage(created_before, remove_file)
+    report["bytes_reclaimed"] += await asyncio.to_thread(attachment_service.remove_stale_staged_uploads, grace_seconds, time.time())
+    return report
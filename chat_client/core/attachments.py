@@ -3,18 +3,38 @@ import shutil
 import tempfile
 import os
 import base64
+import binascii
+import hashlib
+import logging
+import mimetypes
+import stat
 from collections.abc import Iterable
 from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Protocol
 
 import data.config as config
 
+logger: logging.Logger = logging.getLogger(__name__)
+
 DEFAULT_ATTACHMENT_STORAGE_DIRNAME = "attachments"
 DEFAULT_MAX_ATTACHMENT_SIZE_BYTES = 10 * 1024 * 1024
 DEFAULT_TOOL_MOUNT_DIR = "/mnt/data"
+# "link" mounts each input into the tool workspace as a private, writable reflink or copy.
+# "copy" mounts the inputs read-only and the tool runtime copies them into the workspace tmpfs.
+TOOL_WORKSPACE_MODES = ("link", "copy")
+DEFAULT_TOOL_WORKSPACE_MODE = "link"
+BLOB_DIRNAME = "blobs"
+STAGED_UPLOAD_PREFIX = ".upload-"
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 IMAGE_ATTACHMENT_REF_PREFIX = "attachment://"
+TOOL_MOUNT_PREFIX = ".tool-files-"
+# ioctl(2) request that clones a file's extents (btrfs, XFS, bcachefs).
+FICLONE = 0x40049409
+WORLD_READABLE = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
 FILENAME_SAFE_PATTERN = re.compile(r"[^A-Za-z0-9._-]+")
+IMAGE_DATA_URL_PATTERN = re.compile(r"^data:(image/[A-Za-z0-9.+-]+);base64,(.*)$", re.DOTALL)
 
 ALLOWED_ATTACHMENT_EXTENSIONS = {
     ".txt",
@@ -57,6 +77,18 @@ class AttachmentValidationError(ValueError):
     pass
 
 
+class ChunkedUpload(Protocol):
+    async def read(self, size: int = -1) -> bytes: ...
+
+
+@dataclass(frozen=True)
+class StagedBlob:
+    sha256: str
+    size_bytes: int
+    temp_path: Path
+    storage_path: Path
+
+
 def resolve_attachment_storage_dir() -> Path:
     configured = getattr(config, "ATTACHMENT_STORAGE_DIR", "")
     if configured:
@@ -72,6 +104,11 @@ def resolve_tool_mount_dir() -> str:
     return str(getattr(config, "PYTHON_TOOL_ATTACHMENT_MOUNT_DIR", DEFAULT_TOOL_MOUNT_DIR)).strip() or DEFAULT_TOOL_MOUNT_DIR
 
 
+def resolve_tool_workspace_mode() -> str:
+    mode = str(getattr(config, "PYTHON_TOOL_WORKSPACE_MODE", DEFAULT_TOOL_WORKSPACE_MODE)).strip().lower()
+    return mode if mode in TOOL_WORKSPACE_MODES else DEFAULT_TOOL_WORKSPACE_MODE
+
+
 def resolve_max_attachment_size_bytes() -> int:
     configured = getattr(config, "MAX_ATTACHMENT_SIZE_BYTES", DEFAULT_MAX_ATTACHMENT_SIZE_BYTES)
     try:
@@ -104,14 +141,146 @@ def validate_attachment_metadata(filename: str, content_type: str, size_bytes: i
     if normalized_content_type and normalized_content_type not in ALLOWED_ATTACHMENT_CONTENT_TYPES:
         raise AttachmentValidationError(f"Unsupported attachment content type for {safe_name}.")
     if size_bytes > resolve_max_attachment_size_bytes():
-        max_size_mb = resolve_max_attachment_size_bytes() // (1024 * 1024)
-        raise AttachmentValidationError(f"{safe_name} is larger than {max_size_mb}MB.")
+        raise _too_large_error(safe_name)
     return safe_name, normalized_content_type
 
 
-def build_attachment_storage_path(attachment_id: int, filename: str) -> Path:
-    safe_name = sanitize_attachment_filename(filename, fallback_stem=f"attachment_{attachment_id}")
-    return resolve_attachment_storage_dir() / f"{attachment_id}_{safe_name}"
+def resolve_blob_dir() -> Path:
+    path = resolve_attachment_storage_dir() / BLOB_DIRNAME
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def build_blob_storage_path(sha256: str) -> Path:
+    """
+    Sharded path of the blob with this content hash, e.g. blobs/ab/cd/abcd....
+    """
+    return resolve_blob_dir() / sha256[:2] / sha256[2:4] / sha256
+
+
+def _too_large_error(safe_name: str) -> AttachmentValidationError:
+    max_size_mb = resolve_max_attachment_size_bytes() // (1024 * 1024)
+    return AttachmentValidationError(f"{safe_name} is larger than {max_size_mb}MB.")
+
+
+async def stage_upload_blob(upload: ChunkedUpload, safe_name: str) -> StagedBlob:
+    """
+    Stream an upload into a temporary file in the blob directory, hashing it on
+    the way and rejecting it as soon as it exceeds the size limit.
+    """
+    max_size_bytes = resolve_max_attachment_size_bytes()
+    digest = hashlib.sha256()
+    size_bytes = 0
+    fd, temp_name = tempfile.mkstemp(prefix=STAGED_UPLOAD_PREFIX, dir=resolve_blob_dir())
+    temp_path = Path(temp_name)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+                size_bytes += len(chunk)
+                if size_bytes > max_size_bytes:
+                    raise _too_large_error(safe_name)
+                digest.update(chunk)
+                handle.write(chunk)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    sha256 = digest.hexdigest()
+    return StagedBlob(sha256=sha256, size_bytes=size_bytes, temp_path=temp_path, storage_path=build_blob_storage_path(sha256))
+
+
+def stage_blob_bytes(content: bytes) -> StagedBlob:
+    """
+    Write `content` to a temporary file in the blob directory, like `stage_upload_blob`.
+    """
+    sha256 = hashlib.sha256(content).hexdigest()
+    fd, temp_name = tempfile.mkstemp(prefix=STAGED_UPLOAD_PREFIX, dir=resolve_blob_dir())
+    temp_path = Path(temp_name)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(content)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    return StagedBlob(sha256=sha256, size_bytes=len(content), temp_path=temp_path, storage_path=build_blob_storage_path(sha256))
+
+
+def decode_image_data_url(data_url: str) -> tuple[str, bytes] | None:
+    """
+    Content type and bytes of a base64 `data:image/...` URL, None when it is not one.
+    """
+    match = IMAGE_DATA_URL_PATTERN.match(str(data_url or "").strip())
+    if match is None:
+        return None
+    try:
+        content = base64.b64decode(match.group(2), validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    return match.group(1).lower(), content
+
+
+def build_image_attachment_name(sha256: str, content_type: str) -> str:
+    extension = ".jpg" if content_type == "image/jpeg" else mimetypes.guess_extension(content_type) or ""
+    return f"image_{sha256[:12]}{extension}"
+
+
+def commit_staged_blob(staged: StagedBlob) -> Path:
+    """
+    Move a staged upload to its blob path. Call after the attachment row
+    referencing the blob is committed: the rename also restores a blob the
+    garbage collector removed in the meantime, and identical content already
+    stored there is simply replaced.
+    """
+    staged.storage_path.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(staged.temp_path, staged.storage_path)
+    os.chmod(staged.storage_path, 0o644)
+    return staged.storage_path
+
+
+def discard_staged_blob(staged: StagedBlob) -> None:
+    staged.temp_path.unlink(missing_ok=True)
+
+
+def hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        while chunk := handle.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_file_as_blob(source_path: Path) -> tuple[str, Path, bool]:
+    """
+    Copy an existing file into the blob store. Returns its hash, its blob path
+    and whether the content was new to the store.
+    """
+    sha256 = hash_file(source_path)
+    storage_path = build_blob_storage_path(sha256)
+    if storage_path.is_file():
+        return sha256, storage_path, False
+    storage_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(prefix=STAGED_UPLOAD_PREFIX, dir=resolve_blob_dir())
+    os.close(fd)
+    shutil.copyfile(source_path, temp_name)
+    os.replace(temp_name, storage_path)
+    os.chmod(storage_path, 0o644)
+    return sha256, storage_path, True
+
+
+def remove_stale_staged_uploads(older_than_seconds: float, now: float) -> int:
+    """
+    Delete staged uploads left behind by interrupted requests. Returns the bytes freed.
+    """
+    freed = 0
+    for path in resolve_blob_dir().glob(f"{STAGED_UPLOAD_PREFIX}*"):
+        try:
+            stat = path.stat()
+            if now - stat.st_mtime < older_than_seconds:
+                continue
+            path.unlink()
+            freed += stat.st_size
+        except FileNotFoundError:
+            continue
+    return freed
 
 
 def format_attachment_note(attachments: list[dict[str, Any]] | None) -> str:
@@ -188,11 +357,57 @@ def _choose_unique_name(name: str, used_names: set[str]) -> str:
         counter += 1
 
 
+def _reflink(source_path: Path, destination_path: Path) -> bool:
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with source_path.open("rb") as source, destination_path.open("xb") as destination:
+            fcntl.ioctl(destination.fileno(), FICLONE, source.fileno())
+    except OSError:
+        destination_path.unlink(missing_ok=True)
+        return False
+    return True
+
+
+def link_or_copy_file(source_path: Path, destination_path: Path, writable: bool = False) -> str:
+    """
+    Make `source_path` available at `destination_path` without copying its
+    data where the filesystem allows. Hardlinks share the file mode, so only
+    files that are already world-readable are hardlinked; others are reflinked
+    or copied and made world-readable. A `writable` destination is never a
+    hardlink, since writing it would change the source, and is made
+    world-writable. Returns the method used.
+    """
+    if not writable and source_path.stat().st_mode & WORLD_READABLE == WORLD_READABLE:
+        try:
+            os.link(source_path, destination_path)
+            return "hardlink"
+        except OSError:
+            pass
+    if _reflink(source_path, destination_path):
+        method = "reflink"
+    else:
+        shutil.copyfile(source_path, destination_path)
+        method = "copy"
+    os.chmod(destination_path, 0o666 if writable else 0o644)
+    return method
+
+
 @contextmanager
 def prepare_tool_attachment_mount(attachments: Iterable[dict[str, Any]]):
+    """
+    Directory to bind-mount into the tool container, holding the attachments
+    under unique names. It is created next to the stored files so they can be
+    linked into it instead of copied. In the "link" workspace mode its files
+    are mounted writable, so they are reflinks or copies of the stored files;
+    in the "copy" mode they are mounted read-only and may be hardlinks.
+    """
     attachment_list = list(attachments)
+    writable = resolve_tool_workspace_mode() == "link"
     used_names: set[str] = set()
-    with tempfile.TemporaryDirectory(prefix="chat-client-tool-files-") as temp_dir:
+    with tempfile.TemporaryDirectory(prefix=TOOL_MOUNT_PREFIX, dir=resolve_attachment_storage_dir()) as temp_dir:
         temp_path = Path(temp_dir)
         os.chmod(temp_path, 0o755)
         mounted_attachments: list[dict[str, Any]] = []
@@ -204,8 +419,8 @@ def prepare_tool_attachment_mount(attachments: Iterable[dict[str, Any]]):
 
             mounted_name = _choose_unique_name(str(attachment.get("name", "")), used_names)
             destination_path = temp_path / mounted_name
-            shutil.copy2(source_path, destination_path)
-            os.chmod(destination_path, 0o644)
+            method = link_or_copy_file(source_path, destination_path, writable=writable)
+            logger.debug("Mounted attachment %s for tools by %s", mounted_name, method)
             mounted_attachments.append(
                 {
                     "attachment_id": int(attachment.get("attachment_id", 0)),
@@ -6,7 +6,6 @@ from dataclasses import dataclass
 from pathlib import Path
 
 import click
-from sqlalchemy import func, select
 
 from chat_client.core.logging import setup_logging
 
@@ -75,7 +74,7 @@ def load_runtime_config(*, prompt_before_create: bool = False, allow_create: boo
         config = importlib.reload(sys.modules["data.config"])
     else:
         config = importlib.import_module("data.config")
-    setup_logging(config.LOG_LEVEL)
+    setup_logging(config.LOG_LEVEL, log_format=getattr(config, "LOG_FORMAT", "text"))
     return config
 
 
@@ -97,6 +96,8 @@ def run_migrations(config) -> Path:
 
 
 async def count_users() -> int:
+    from sqlalchemy import func, select
+
     from chat_client.database.db_session import async_session
     from chat_client.models import User
 
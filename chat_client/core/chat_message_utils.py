@@ -1,9 +1,9 @@
-import json
 import re
 from html import unescape
 from typing import Any
 
 from chat_client.core import chat_service
+from chat_client.core.prompt_cache import canonical_tool_arguments
 
 TITLE_FALLBACK_MAX_LENGTH = 80
 DEFAULT_PENDING_DIALOG_TITLE = "New Chat"
@@ -56,14 +56,7 @@ def build_model_messages_from_dialog_history(messages: list[dict[str, Any]]) ->
                 if event_type == "tool_call":
                     tool_call_id = str(raw_event.get("tool_call_id", "")).strip()
                     tool_name = str(raw_event.get("tool_name", "")).strip() or "unknown_tool"
-                    raw_arguments = raw_event.get("arguments_json", "{}")
-                    arguments_json = "{}"
-                    if isinstance(raw_arguments, str):
-                        try:
-                            parsed_arguments = json.loads(raw_arguments)
-                            arguments_json = json.dumps(parsed_arguments, ensure_ascii=True, separators=(",", ":"))
-                        except json.JSONDecodeError:
-                            arguments_json = "{}"
+                    arguments_json = canonical_tool_arguments(raw_event.get("arguments_json", "{}"))
                     pending_tool_calls.append(
                         {
                             "id": tool_call_id,
@@ -124,14 +117,7 @@ def build_model_messages_from_dialog_history(messages: list[dict[str, Any]]) ->
             for tool_message in consecutive_tools:
                 tool_call_id = str(tool_message.get("tool_call_id", "")).strip()
                 tool_name = str(tool_message.get("tool_name", "")).strip() or "unknown_tool"
-                raw_arguments = tool_message.get("arguments_json", "{}")
-                arguments_json = "{}"
-                if isinstance(raw_arguments, str):
-                    try:
-                        parsed_arguments = json.loads(raw_arguments)
-                        arguments_json = json.dumps(parsed_arguments, ensure_ascii=True, separators=(",", ":"))
-                    except json.JSONDecodeError:
-                        arguments_json = "{}"
+                arguments_json = canonical_tool_arguments(tool_message.get("arguments_json", "{}"))
 
                 tool_calls.append(
                     {
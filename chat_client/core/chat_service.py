@@ -1,13 +1,14 @@
 import asyncio
+import itertools
 import json
 import logging
 import re
+import sys
 import time
-from collections.abc import AsyncIterator, Callable
+from collections.abc import AsyncIterator, Callable, Iterator
 from inspect import isawaitable, iscoroutinefunction
 from typing import Any
 
-from openai import OpenAIError
 from starlette.requests import Request
 
 from chat_client.core.attachments import (
@@ -16,6 +17,8 @@ from chat_client.core.attachments import (
     list_attachment_paths,
     parse_image_attachment_ref,
 )
+from chat_client.core import metrics, profiling, prompt_cache, provider_endpoints, tracing
+from chat_client.core.logging import log_event
 from chat_client.core.usage_pricing import normalize_usage_payload
 
 GENERIC_OPENAI_ERROR_MESSAGE = "An error occurred. Please try again later."
@@ -74,8 +77,7 @@ def _truncate_for_log(value: Any, limit: int = GENERIC_LOG_TEXT_PREVIEW_LIMIT) -
 
 
 def _log_event(logger: logging.Logger, level: int, event: str, **fields: Any) -> None:
-    payload = {key: value for key, value in fields.items() if value is not None}
-    logger.log(level, "%s: %s", event, payload)
+    log_event(logger, level, event, **fields)
 
 
 def _count_message_images(message: dict[str, Any]) -> int:
@@ -267,6 +269,72 @@ def _create_sync_stream(create_fn: Callable[..., Any], create_kwargs: dict[str,
     return create_fn(**create_kwargs)
 
 
+def _is_retryable_provider_error(error: Exception) -> bool:
+    """
+    Connection failures, timeouts, 429 and 5xx answers, which another endpoint may not have.
+    """
+    openai = sys.modules.get("openai")
+    if openai is None:
+        return False
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+async def _open_pooled_stream(
+    pool: provider_endpoints.EndpointPool,
+    client_for: Callable[[provider_endpoints.Endpoint], Any],
+    create_kwargs: dict[str, Any],
+    logger: logging.Logger,
+    log_context: dict[str, Any],
+) -> tuple[Any, Iterator[Any], provider_endpoints.Endpoint]:
+    """
+    Create the stream on the pool's best endpoint and read its first chunk,
+    moving on to the next endpoint when either fails with a retryable error.
+    Returns the stream, an iterator that still yields the first chunk, and the
+    endpoint, which the caller releases.
+    """
+    tried: list[str] = []
+    last_error: Exception | None = None
+    while True:
+        try:
+            endpoint = pool.acquire(exclude=tried)
+        except provider_endpoints.NoHealthyEndpointError:
+            if last_error is not None:
+                raise last_error
+            raise
+        tried.append(endpoint.base_url)
+        started_at = time.perf_counter()
+        stream_response = None
+        try:
+            client = client_for(endpoint)
+            stream_response = await asyncio.to_thread(_create_sync_stream, client.chat.completions.create, create_kwargs)
+            stream_iterator = iter(stream_response)
+            finished, first_chunk = await asyncio.to_thread(_next_stream_chunk, stream_iterator)
+        except Exception as error:
+            if stream_response is not None:
+                _close_stream(stream_response, logger)
+            retryable = _is_retryable_provider_error(error)
+            pool.release(endpoint, failed=retryable)
+            if not retryable:
+                raise
+            _log_event(
+                logger,
+                logging.WARNING,
+                "chat.model.endpoint_failed",
+                base_url=endpoint.base_url,
+                error_type=error.__class__.__name__,
+                error_message=str(error),
+                **log_context,
+            )
+            last_error = error
+            continue
+        pool.record_latency(endpoint, time.perf_counter() - started_at)
+        return stream_response, iter(()) if finished else itertools.chain([first_chunk], stream_iterator), endpoint
+
+
 def _next_stream_chunk(iterator: Any) -> tuple[bool, Any]:
     """
     Advance a synchronous stream iterator without leaking StopIteration across
@@ -295,7 +363,16 @@ def _extract_error_messages(value: Any) -> list[str]:
     return messages
 
 
-def map_openai_error_message(error: OpenAIError) -> str:
+def _openai_errors() -> tuple[type[Exception], ...]:
+    """
+    `openai.OpenAIError` for an `except` clause once a provider client has
+    imported `openai`; no error can come from it before that.
+    """
+    openai = sys.modules.get("openai")
+    return (openai.OpenAIError,) if openai is not None else ()
+
+
+def map_openai_error_message(error: Exception) -> str:
     texts: list[str] = []
 
     direct_message = str(error).strip()
@@ -324,14 +401,14 @@ def resolve_provider_info(model: str, models: dict[str, Any], providers: dict[st
     model_config = models.get(model, "")
 
     if isinstance(model_config, str):
-        return providers.get(model_config, {})
+        return provider_endpoints.with_primary_endpoint(providers.get(model_config, {}))
 
     if isinstance(model_config, dict):
         provider_name = model_config.get("provider")
         base_info = providers.get(provider_name, {}) if isinstance(provider_name, str) else {}
         merged = {**base_info, **model_config}
         merged.pop("provider", None)
-        return merged
+        return provider_endpoints.with_primary_endpoint(merged)
 
     return {}
 
@@ -590,7 +667,19 @@ def build_chat_completion_create_kwargs(
     reasoning_effort: Any = "",
     include_usage_in_stream: bool = False,
     tool_definitions: list[dict[str, Any]] | None = None,
+    stable_prefix: bool = False,
+    prompt_cache_key: str = "",
+    keep_alive: Any = None,
 ) -> dict[str, Any]:
+    """
+    With `stable_prefix`, messages and tools are serialized the same way on
+    every turn and provider prompt-cache hints are added (see `prompt_cache`).
+    `keep_alive` is sent to Ollama to keep the model loaded (see `ollama_residency`).
+    """
+    if stable_prefix:
+        messages = prompt_cache.stable_messages(messages)
+        if isinstance(tool_definitions, list):
+            tool_definitions = prompt_cache.stable_tool_definitions(tool_definitions)
     create_kwargs: dict[str, Any] = {
         "model": model,
         "messages": messages,
@@ -604,6 +693,12 @@ def build_chat_completion_create_kwargs(
         create_kwargs["stream_options"] = {"include_usage": True}
     if isinstance(tool_definitions, list) and tool_definitions:
         create_kwargs["tools"] = tool_definitions
+    if stable_prefix:
+        cache_hints = prompt_cache.provider_cache_hints(normalized_provider, prompt_cache_key)
+        if cache_hints:
+            create_kwargs["extra_body"] = cache_hints
+    if keep_alive is not None and normalized_provider == "ollama":
+        create_kwargs["extra_body"] = {**create_kwargs.get("extra_body", {}), "keep_alive": keep_alive}
     return create_kwargs
 
 
@@ -778,6 +873,9 @@ async def chat_response_stream(
     provider_name: str = "",
     include_usage_in_stream: bool = False,
     persist_usage_event: Callable[..., Any] | None = None,
+    stable_prefix: bool = False,
+    prompt_cache_key: str = "",
+    keep_alive: Any = None,
 ) -> AsyncIterator[str]:
     base_log_context = {
         "trace_id": trace_id,
@@ -785,6 +883,9 @@ async def chat_response_stream(
         "dialog_id": dialog_id,
         "model": model,
     }
+    # Event-loop CPU vs. provider and tool wait for the whole turn, logged at `chat.stream.closed`.
+    cpu_split = profiling.CpuSplit()
+    metrics.ACTIVE_STREAMS.inc()
     try:
         provider_info = provider_info_resolver(model)
         max_rounds = _resolve_max_chat_loop_rounds(max_chat_loop_rounds)
@@ -806,6 +907,14 @@ async def chat_response_stream(
             api_key=provider_info.get("api_key"),
             base_url=provider_info.get("base_url"),
         )
+        endpoint_pool = provider_endpoints.get_pool(provider_name or model, provider_info)
+        endpoint_clients: dict[str, Any] = {}
+
+        def _endpoint_client(endpoint: provider_endpoints.Endpoint) -> Any:
+            # Failover replaces the client's own retries against the same endpoint.
+            if endpoint.base_url not in endpoint_clients:
+                endpoint_clients[endpoint.base_url] = openai_client_cls(api_key=endpoint.api_key, base_url=endpoint.base_url, max_retries=0)
+            return endpoint_clients[endpoint.base_url]
 
         tools_enabled = model in tool_models
         tool_definitions = tools_loader() if tools_enabled else []
@@ -833,254 +942,293 @@ async def chat_response_stream(
                 reasoning_effort=reasoning_effort,
                 include_usage_in_stream=include_usage_in_stream,
                 tool_definitions=tool_definitions if tools_enabled else None,
+                stable_prefix=stable_prefix,
+                prompt_cache_key=prompt_cache_key,
+                keep_alive=keep_alive,
             )
 
-            round_started_at = time.perf_counter()
-            _log_event(
-                logger,
-                logging.INFO,
-                "chat.model.call.start",
-                round=rounds,
-                tools_enabled=tools_enabled,
-                tool_definition_count=len(tool_definitions),
-                **summarize_messages_for_log(messages),
-                **base_log_context,
-            )
-
-            stream_response = await asyncio.to_thread(_create_sync_stream, client.chat.completions.create, create_kwargs)
-            disconnected = False
-            assistant_content_parts: list[str] = []
-            finish_reason: Any = None
-            chunk_count = 0
-            chunks_with_choices = 0
-            chunks_with_delta = 0
-            chunks_with_content = 0
-            chunks_with_tool_calls = 0
-            unknown_delta_keys: set[str] = set()
-            first_chunk_summary: dict[str, Any] | None = None
-            last_chunk_summary: dict[str, Any] | None = None
-            first_chunk_preview = ""
-            last_chunk_preview = ""
-            usage_summary = {
-                "request_id": "",
-                "input_tokens": 0,
-                "cached_input_tokens": 0,
-                "output_tokens": 0,
-                "total_tokens": 0,
-                "reasoning_tokens": 0,
-                "usage_source": "missing",
-            }
-            tool_call_state: dict[str, Any] = {
-                "tool_calls_by_key": {},
-                "tool_call_order": [],
-                "index_active_key": {},
-                "tmp_counter": 0,
-            }
-
-            try:
-                stream_iterator = iter(stream_response)
-                while True:
-                    finished, chunk = await asyncio.to_thread(_next_stream_chunk, stream_iterator)
-                    if finished:
-                        break
-                    if await _request_is_disconnected(request):
-                        disconnected = True
-                        break
-
-                    model_dict = chunk.model_dump()
-                    chunk_count += 1
-                    chunk_preview = _truncate_for_log(json.dumps(model_dict, ensure_ascii=True))
-                    chunk_summary = _summarize_chunk_for_log(model_dict)
-                    if first_chunk_summary is None:
-                        first_chunk_summary = chunk_summary
-                        first_chunk_preview = chunk_preview
-                    last_chunk_summary = chunk_summary
-                    last_chunk_preview = chunk_preview
-                    json_chunk = json.dumps(model_dict)
-                    yield f"data: {json_chunk}\n\n"
-                    if isinstance(model_dict.get("usage"), dict):
-                        usage_summary = normalize_usage_payload(model_dict)
-
-                    choices = getattr(chunk, "choices", None)
-                    if not isinstance(choices, list) or not choices:
-                        continue
-                    chunks_with_choices += 1
-                    first_choice = choices[0]
-                    delta = getattr(first_choice, "delta", None)
-                    if delta is not None:
-                        chunks_with_delta += 1
-                        content_piece = getattr(delta, "content", None)
-                        if isinstance(content_piece, str) and content_piece:
-                            assistant_content_parts.append(content_piece)
-                            chunks_with_content += 1
-                        _append_stream_tool_call_deltas(getattr(delta, "tool_calls", None), tool_call_state)
-                        if isinstance(getattr(delta, "tool_calls", None), list) and getattr(delta, "tool_calls", None):
-                            chunks_with_tool_calls += 1
-                        if hasattr(delta, "model_fields_set") and isinstance(delta.model_fields_set, set):
-                            unknown_delta_keys.update(
-                                str(key) for key in delta.model_fields_set if str(key) not in {"content", "tool_calls", "role", "refusal"}
-                            )
-                    if getattr(first_choice, "finish_reason", None) is not None:
-                        finish_reason = getattr(first_choice, "finish_reason", None)
-            finally:
-                _close_stream(stream_response, logger)
-
-            if disconnected:
+            with tracing.start_span("chat.model.round", round=rounds, model=model, provider=provider_name) as round_span:
+                round_started_at = time.perf_counter()
                 _log_event(
                     logger,
                     logging.INFO,
-                    "chat.stream.client_disconnected",
+                    "chat.model.call.start",
                     round=rounds,
-                    duration_ms=round((time.perf_counter() - round_started_at) * 1000, 2),
+                    tools_enabled=tools_enabled,
+                    tool_definition_count=len(tool_definitions),
+                    **summarize_messages_for_log(messages),
                     **base_log_context,
                 )
-                return
 
-            tool_calls = _collect_streamed_tool_calls(tool_call_state)
-            if tool_calls and not tools_enabled:
+                endpoint: provider_endpoints.Endpoint | None = None
+                with tracing.start_span("chat.model.connect") as connect_span, cpu_split.wait("provider_connect"):
+                    if endpoint_pool is None:
+                        stream_response = await asyncio.to_thread(_create_sync_stream, client.chat.completions.create, create_kwargs)
+                        stream_iterator = iter(stream_response)
+                    else:
+                        stream_response, stream_iterator, endpoint = await _open_pooled_stream(
+                            endpoint_pool, _endpoint_client, create_kwargs, logger, base_log_context
+                        )
+                        connect_span.set_attribute("base_url", endpoint.base_url)
+                disconnected = False
+                assistant_content_parts: list[str] = []
+                finish_reason: Any = None
+                chunk_count = 0
+                chunks_with_choices = 0
+                chunks_with_delta = 0
+                chunks_with_content = 0
+                chunks_with_tool_calls = 0
+                unknown_delta_keys: set[str] = set()
+                first_chunk_summary: dict[str, Any] | None = None
+                last_chunk_summary: dict[str, Any] | None = None
+                first_chunk_preview = ""
+                last_chunk_preview = ""
+                usage_summary: dict[str, Any] = {
+                    "request_id": "",
+                    "input_tokens": 0,
+                    "cached_input_tokens": 0,
+                    "output_tokens": 0,
+                    "total_tokens": 0,
+                    "reasoning_tokens": 0,
+                    "usage_source": "missing",
+                }
+                tool_call_state: dict[str, Any] = {
+                    "tool_calls_by_key": {},
+                    "tool_call_order": [],
+                    "index_active_key": {},
+                    "tmp_counter": 0,
+                }
+
+                stream_failed = False
+                try:
+                    while True:
+                        with cpu_split.wait("provider_stream"):
+                            finished, chunk = await asyncio.to_thread(_next_stream_chunk, stream_iterator)
+                        if finished:
+                            break
+                        if await _request_is_disconnected(request):
+                            disconnected = True
+                            break
+
+                        with cpu_split.cpu("serialize"):
+                            model_dict = chunk.model_dump()
+                            json_chunk = json.dumps(model_dict)
+                        chunk_count += 1
+                        with cpu_split.cpu("log"):
+                            chunk_preview = _truncate_for_log(json.dumps(model_dict, ensure_ascii=True))
+                            chunk_summary = _summarize_chunk_for_log(model_dict)
+                        if first_chunk_summary is None:
+                            metrics.TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - round_started_at, model=model)
+                            round_span.add_event("first_token")
+                            first_chunk_summary = chunk_summary
+                            first_chunk_preview = chunk_preview
+                        last_chunk_summary = chunk_summary
+                        last_chunk_preview = chunk_preview
+                        yield f"data: {json_chunk}\n\n"
+                        if isinstance(model_dict.get("usage"), dict):
+                            usage_summary = normalize_usage_payload(model_dict)
+
+                        choices = getattr(chunk, "choices", None)
+                        if not isinstance(choices, list) or not choices:
+                            continue
+                        chunks_with_choices += 1
+                        first_choice = choices[0]
+                        delta = getattr(first_choice, "delta", None)
+                        if delta is not None:
+                            chunks_with_delta += 1
+                            content_piece = getattr(delta, "content", None)
+                            if isinstance(content_piece, str) and content_piece:
+                                assistant_content_parts.append(content_piece)
+                                chunks_with_content += 1
+                            with cpu_split.cpu("tool_deltas"):
+                                _append_stream_tool_call_deltas(getattr(delta, "tool_calls", None), tool_call_state)
+                            if isinstance(getattr(delta, "tool_calls", None), list) and getattr(delta, "tool_calls", None):
+                                chunks_with_tool_calls += 1
+                            if hasattr(delta, "model_fields_set") and isinstance(delta.model_fields_set, set):
+                                unknown_delta_keys.update(
+                                    str(key)
+                                    for key in delta.model_fields_set
+                                    if str(key) not in {"content", "tool_calls", "role", "refusal"}
+                                )
+                        if getattr(first_choice, "finish_reason", None) is not None:
+                            finish_reason = getattr(first_choice, "finish_reason", None)
+                except Exception:
+                    stream_failed = True
+                    raise
+                finally:
+                    _close_stream(stream_response, logger)
+                    if endpoint_pool is not None and endpoint is not None:
+                        endpoint_pool.release(endpoint, failed=stream_failed)
+                if chunk_count:
+                    round_span.add_event("last_token", chunk_count=chunk_count)
+
+                if disconnected:
+                    _log_event(
+                        logger,
+                        logging.INFO,
+                        "chat.stream.client_disconnected",
+                        round=rounds,
+                        duration_ms=round((time.perf_counter() - round_started_at) * 1000, 2),
+                        **base_log_context,
+                    )
+                    return
+
+                tool_calls = _collect_streamed_tool_calls(tool_call_state)
+                if tool_calls and not tools_enabled:
+                    _log_event(
+                        logger,
+                        logging.WARNING,
+                        "chat.model.unexpected_tool_calls_ignored",
+                        round=rounds,
+                        tool_calls=[summarize_tool_call_for_log(tool_call) for tool_call in tool_calls],
+                        **base_log_context,
+                    )
+                    tool_calls = []
+                assistant_content = "".join(assistant_content_parts)
+                assistant_summary = summarize_assistant_text_for_log(assistant_content)
+                round_duration = time.perf_counter() - round_started_at
+                round_span.set_attribute("finish_reason", str(finish_reason or ""))
+                round_span.set_attribute("tool_call_count", len(tool_calls))
+                round_span.set_attribute("output_tokens", usage_summary["output_tokens"])
+                metrics.ROUND_DURATION.observe(round_duration, model=model)
+                if usage_summary["output_tokens"] and round_duration > 0:
+                    metrics.OUTPUT_TOKENS_PER_SECOND.observe(usage_summary["output_tokens"] / round_duration, model=model)
                 _log_event(
                     logger,
-                    logging.WARNING,
-                    "chat.model.unexpected_tool_calls_ignored",
+                    logging.INFO,
+                    "chat.model.call.finish",
                     round=rounds,
-                    tool_calls=[summarize_tool_call_for_log(tool_call) for tool_call in tool_calls],
-                    **base_log_context,
-                )
-                tool_calls = []
-            assistant_content = "".join(assistant_content_parts)
-            assistant_summary = summarize_assistant_text_for_log(assistant_content)
-            _log_event(
-                logger,
-                logging.INFO,
-                "chat.model.call.finish",
-                round=rounds,
-                finish_reason=str(finish_reason or ""),
-                duration_ms=round((time.perf_counter() - round_started_at) * 1000, 2),
-                tool_call_count=len(tool_calls),
-                content_chars=assistant_summary["content_chars"],
-                chunk_count=chunk_count,
-                usage_source=usage_summary["usage_source"],
-                input_tokens=usage_summary["input_tokens"],
-                cached_input_tokens=usage_summary["cached_input_tokens"],
-                output_tokens=usage_summary["output_tokens"],
-                total_tokens=usage_summary["total_tokens"],
-                **base_log_context,
-            )
-            if persist_usage_event is not None:
-                persist_result = persist_usage_event(
-                    turn_id=turn_id,
-                    round_index=rounds,
-                    provider=provider_name,
-                    model=model,
-                    call_type="chat",
-                    request_id=usage_summary["request_id"],
+                    finish_reason=str(finish_reason or ""),
+                    duration_ms=round(round_duration * 1000, 2),
+                    tool_call_count=len(tool_calls),
+                    content_chars=assistant_summary["content_chars"],
+                    chunk_count=chunk_count,
+                    usage_source=usage_summary["usage_source"],
                     input_tokens=usage_summary["input_tokens"],
                     cached_input_tokens=usage_summary["cached_input_tokens"],
                     output_tokens=usage_summary["output_tokens"],
                     total_tokens=usage_summary["total_tokens"],
-                    reasoning_tokens=usage_summary["reasoning_tokens"],
-                    usage_source=usage_summary["usage_source"],
-                )
-                if isawaitable(persist_result):
-                    await persist_result
-            _log_event(
-                logger,
-                logging.DEBUG,
-                "chat.model.chunk.summary",
-                round=rounds,
-                chunk_count=chunk_count,
-                chunks_with_choices=chunks_with_choices,
-                chunks_with_delta=chunks_with_delta,
-                chunks_with_content=chunks_with_content,
-                chunks_with_tool_calls=chunks_with_tool_calls,
-                finish_reason=str(finish_reason or ""),
-                first_chunk_summary=first_chunk_summary or {},
-                last_chunk_summary=last_chunk_summary or {},
-                **base_log_context,
-            )
-            if unknown_delta_keys:
-                _log_event(
-                    logger,
-                    logging.INFO,
-                    "chat.model.unknown_delta_fields",
-                    round=rounds,
-                    unknown_delta_keys=sorted(unknown_delta_keys),
                     **base_log_context,
                 )
-            if assistant_summary["has_thinking"]:
+                if persist_usage_event is not None:
+                    persist_result = persist_usage_event(
+                        turn_id=turn_id,
+                        round_index=rounds,
+                        provider=provider_name,
+                        model=model,
+                        call_type="chat",
+                        request_id=usage_summary["request_id"],
+                        input_tokens=usage_summary["input_tokens"],
+                        cached_input_tokens=usage_summary["cached_input_tokens"],
+                        output_tokens=usage_summary["output_tokens"],
+                        total_tokens=usage_summary["total_tokens"],
+                        reasoning_tokens=usage_summary["reasoning_tokens"],
+                        usage_source=usage_summary["usage_source"],
+                    )
+                    if isawaitable(persist_result):
+                        await persist_result
                 _log_event(
                     logger,
                     logging.DEBUG,
-                    "chat.assistant.thinking",
+                    "chat.model.chunk.summary",
                     round=rounds,
-                    thinking_chars=assistant_summary["thinking_chars"],
-                    thinking_preview=assistant_summary["thinking_preview"],
+                    chunk_count=chunk_count,
+                    chunks_with_choices=chunks_with_choices,
+                    chunks_with_delta=chunks_with_delta,
+                    chunks_with_content=chunks_with_content,
+                    chunks_with_tool_calls=chunks_with_tool_calls,
+                    finish_reason=str(finish_reason or ""),
+                    first_chunk_summary=first_chunk_summary or {},
+                    last_chunk_summary=last_chunk_summary or {},
                     **base_log_context,
                 )
-            _log_event(
-                logger,
-                logging.INFO,
-                "chat.assistant.answer",
-                round=rounds,
-                finish_reason=str(finish_reason or ""),
-                answer_chars=assistant_summary["answer_chars"],
-                answer_preview=assistant_summary["answer_preview"],
-                **base_log_context,
-            )
-            if chunk_count > 0 and assistant_summary["content_chars"] == 0 and not tool_calls:
+                if unknown_delta_keys:
+                    _log_event(
+                        logger,
+                        logging.INFO,
+                        "chat.model.unknown_delta_fields",
+                        round=rounds,
+                        unknown_delta_keys=sorted(unknown_delta_keys),
+                        **base_log_context,
+                    )
+                if assistant_summary["has_thinking"]:
+                    _log_event(
+                        logger,
+                        logging.DEBUG,
+                        "chat.assistant.thinking",
+                        round=rounds,
+                        thinking_chars=assistant_summary["thinking_chars"],
+                        thinking_preview=assistant_summary["thinking_preview"],
+                        **base_log_context,
+                    )
                 _log_event(
                     logger,
-                    logging.WARNING,
-                    "chat.model.empty_output",
+                    logging.INFO,
+                    "chat.assistant.answer",
                     round=rounds,
                     finish_reason=str(finish_reason or ""),
-                    chunk_count=chunk_count,
-                    chunks_with_choices=chunks_with_choices,
-                    chunks_with_delta=chunks_with_delta,
-                    first_chunk_preview=first_chunk_preview,
-                    last_chunk_preview=last_chunk_preview,
-                    first_chunk_summary=first_chunk_summary or {},
-                    last_chunk_summary=last_chunk_summary or {},
+                    answer_chars=assistant_summary["answer_chars"],
+                    answer_preview=assistant_summary["answer_preview"],
                     **base_log_context,
                 )
-            answer_missing = assistant_summary["answer_chars"] == 0 and not tool_calls
-            stream_incomplete = chunk_count > 0 and finish_reason is None and answer_missing
-            empty_stopped_answer = chunk_count > 0 and finish_reason is not None and answer_missing and retry_on_empty_answer_stop
-            if stream_incomplete or empty_stopped_answer:
-                if empty_answer_retry_attempts < max_empty_answer_retries:
-                    empty_answer_retry_attempts += 1
+                if chunk_count > 0 and assistant_summary["content_chars"] == 0 and not tool_calls:
                     _log_event(
                         logger,
                         logging.WARNING,
-                        ("chat.model.incomplete_stream.retry" if stream_incomplete else "chat.model.empty_answer_stop.retry"),
+                        "chat.model.empty_output",
                         round=rounds,
-                        retry_attempt=empty_answer_retry_attempts,
-                        max_retry_count=max_empty_answer_retries,
                         finish_reason=str(finish_reason or ""),
                         chunk_count=chunk_count,
                         chunks_with_choices=chunks_with_choices,
                         chunks_with_delta=chunks_with_delta,
+                        first_chunk_preview=first_chunk_preview,
+                        last_chunk_preview=last_chunk_preview,
                         first_chunk_summary=first_chunk_summary or {},
                         last_chunk_summary=last_chunk_summary or {},
                         **base_log_context,
                     )
-                    continue
-                if stream_incomplete:
-                    raise IncompleteStreamError(INCOMPLETE_STREAM_ERROR_MESSAGE)
-            if tool_calls:
-                _log_event(
-                    logger,
-                    logging.INFO,
-                    "chat.assistant.tool_calls",
-                    round=rounds,
-                    tool_calls=[summarize_tool_call_for_log(tool_call) for tool_call in tool_calls],
-                    **base_log_context,
-                )
+                answer_missing = assistant_summary["answer_chars"] == 0 and not tool_calls
+                stream_incomplete = chunk_count > 0 and finish_reason is None and answer_missing
+                empty_stopped_answer = chunk_count > 0 and finish_reason is not None and answer_missing and retry_on_empty_answer_stop
+                if stream_incomplete or empty_stopped_answer:
+                    if empty_answer_retry_attempts < max_empty_answer_retries:
+                        empty_answer_retry_attempts += 1
+                        _log_event(
+                            logger,
+                            logging.WARNING,
+                            ("chat.model.incomplete_stream.retry" if stream_incomplete else "chat.model.empty_answer_stop.retry"),
+                            round=rounds,
+                            retry_attempt=empty_answer_retry_attempts,
+                            max_retry_count=max_empty_answer_retries,
+                            finish_reason=str(finish_reason or ""),
+                            chunk_count=chunk_count,
+                            chunks_with_choices=chunks_with_choices,
+                            chunks_with_delta=chunks_with_delta,
+                            first_chunk_summary=first_chunk_summary or {},
+                            last_chunk_summary=last_chunk_summary or {},
+                            **base_log_context,
+                        )
+                        continue
+                    if stream_incomplete:
+                        raise IncompleteStreamError(INCOMPLETE_STREAM_ERROR_MESSAGE)
+                if tool_calls:
+                    _log_event(
+                        logger,
+                        logging.INFO,
+                        "chat.assistant.tool_calls",
+                        round=rounds,
+                        tool_calls=[summarize_tool_call_for_log(tool_call) for tool_call in tool_calls],
+                        **base_log_context,
+                    )
 
             if not tool_calls:
                 return
 
-            messages.append({"role": "assistant", "content": assistant_content, "tool_calls": tool_calls})
+            if stable_prefix:
+                # Same layout and argument encoding as the turn is rebuilt from the database next time.
+                messages.extend(prompt_cache.assistant_tool_call_messages(assistant_content, tool_calls))
+            else:
+                messages.append({"role": "assistant", "content": assistant_content, "tool_calls": tool_calls})
 
             tool_results: list[tuple[dict[str, Any], str, str]] = []
             for tool_call in tool_calls:
@@ -1109,18 +1257,23 @@ async def chat_response_stream(
                 await asyncio.sleep(0)
                 error_text = ""
                 result_text = ""
-                try:
-                    result = await execute_tool_nonblocking(tool_call, tool_executor)
-                    result_text = str(result)
-                except ToolExecutionError as error:
-                    error_text = str(error)
+                with tracing.start_span("chat.tool", round=rounds, tool=tool_call["function"]["name"]) as tool_span:
+                    try:
+                        with cpu_split.wait("tool"):
+                            result = await execute_tool_nonblocking(tool_call, tool_executor)
+                        result_text = prompt_cache.serialize_tool_result(result) if stable_prefix else str(result)
+                    except ToolExecutionError as error:
+                        error_text = str(error)
+                        tool_span.set_attribute("error", error_text)
                 tool_results.append((tool_call, result_text, error_text))
+                tool_duration = time.perf_counter() - tool_started_at
+                metrics.TOOL_DURATION.observe(tool_duration, tool=tool_call["function"]["name"])
                 _log_event(
                     logger,
                     logging.INFO if not error_text else logging.WARNING,
                     "chat.tool.finish" if not error_text else "chat.tool.error",
                     round=rounds,
-                    duration_ms=round((time.perf_counter() - tool_started_at) * 1000, 2),
+                    duration_ms=round(tool_duration * 1000, 2),
                     **summarize_tool_result_for_log(tool_call, result_text, error_text),
                     **base_log_context,
                 )
@@ -1149,7 +1302,7 @@ async def chat_response_stream(
                     }
                 )
 
-    except OpenAIError as error:
+    except _openai_errors() as error:
         _log_event(logger, logging.ERROR, "chat.stream.openai_error", error_message=str(error), **base_log_context)
         logger.exception("OpenAI error")
         yield f"data: {json.dumps({'error': map_openai_error_message(error)})}\n\n"
@@ -1177,4 +1330,5 @@ async def chat_response_stream(
             error_message = str(error) or "MCP request failed"
         yield f"data: {json.dumps({'error': error_message})}\n\n"
     finally:
-        _log_event(logger, logging.INFO, "chat.stream.closed", **base_log_context)
+        metrics.ACTIVE_STREAMS.dec()
+        _log_event(logger, logging.INFO, "chat.stream.closed", **cpu_split.summary(), **base_log_context)
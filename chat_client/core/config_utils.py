@@ -1,5 +1,6 @@
 import logging
 
+from chat_client.core import provider_endpoints
 from chat_client.core.api_utils import get_provider_models
 
 logger: logging.Logger = logging.getLogger(__name__)
@@ -16,8 +17,13 @@ def resolve_models(configured_models: dict | None, providers: dict | None) -> di
     if not isinstance(ollama_provider, dict):
         return resolved_models
 
+    client_options = {
+        key: value
+        for key, value in provider_endpoints.with_primary_endpoint(ollama_provider).items()
+        if key not in provider_endpoints.ROUTING_KEYS
+    }
     try:
-        ollama_models = get_provider_models(ollama_provider)
+        ollama_models = get_provider_models(client_options)
     except Exception as exc:
         logger.warning("Unable to load Ollama models from provider config: %s", exc)
         return resolved_models
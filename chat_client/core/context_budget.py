@@ -0,0 +1,277 @@
+"""
+Fit dialog history into a model's context window.
+
+Token counts are estimates: a configured tokenizer (any `str -> int`
+callable) or a characters-per-token heuristic. Counts are cached per
+persisted message, so each turn only counts what is new. When the history
+does not fit `context_length` minus the tokens reserved for the answer and
+for what is sent besides the history (tool definitions), oversized tool
+results in earlier turns are shortened first, then the oldest exchanges are
+dropped and replaced by a short note. System messages and the latest
+exchange are always kept.
+"""
+
+import json
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from chat_client.core.chat_message_utils import build_model_messages_from_dialog_history
+
+Tokenizer = Callable[[str], int]
+
+DEFAULT_RESERVED_OUTPUT_TOKENS = 4096
+DEFAULT_TOOL_RESULT_MAX_TOKENS = 2000
+CHARS_PER_TOKEN = 4
+# Role and framing tokens each chat message costs on top of its content.
+MESSAGE_OVERHEAD_TOKENS = 4
+# Rough cost of one image input; providers charge between ~85 and ~1500.
+IMAGE_TOKENS = 768
+DEFAULT_CACHE_SIZE = 50_000
+ELISION_NOTE = "{count} earlier message(s) of this conversation were omitted to fit the model's context window."
+TRUNCATION_MARKER = "\n[... {count} characters omitted to fit the model's context window ...]\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Heuristic token count, about four characters per token for English text and code.
+    """
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+class TokenCounter:
+    """
+    Counts tokens of model messages with `tokenizer`, caching the count of
+    each persisted dialog message (keyed on its id and content).
+    """
+
+    def __init__(self, tokenizer: Tokenizer | None = None, max_entries: int = DEFAULT_CACHE_SIZE) -> None:
+        self.tokenizer = tokenizer or estimate_tokens
+        self.max_entries = max_entries
+        self._cache: OrderedDict[tuple[Any, ...], int] = OrderedDict()
+
+    def count_text(self, text: str) -> int:
+        return int(self.tokenizer(text)) if text else 0
+
+    def count_messages(self, messages: list[dict[str, Any]]) -> int:
+        total = 0
+        for message in messages:
+            total += MESSAGE_OVERHEAD_TOKENS + self.count_text(str(message.get("content", "") or ""))
+            for tool_call in message.get("tool_calls", []) or []:
+                function = tool_call.get("function", {}) if isinstance(tool_call, dict) else {}
+                total += self.count_text(str(function.get("name", ""))) + self.count_text(str(function.get("arguments", "")))
+            images = message.get("images", [])
+            if isinstance(images, list):
+                total += IMAGE_TOKENS * len(images)
+        return total
+
+    def count_tools(self, tool_definitions: list[dict[str, Any]]) -> int:
+        """
+        Tokens of the tool definitions sent with every request.
+        """
+        if not tool_definitions:
+            return 0
+        return self.count_text(json.dumps(tool_definitions, ensure_ascii=False, separators=(",", ":")))
+
+    def count_history_item(self, item: dict[str, Any], messages: list[dict[str, Any]]) -> int:
+        """
+        Tokens of the model messages built from one persisted history item.
+        The heuristic is cheaper than hashing the cache key, so only counts of
+        a configured tokenizer are cached.
+        """
+        key = None if self.tokenizer is estimate_tokens else _history_item_key(item, messages)
+        if key is None:
+            return self.count_messages(messages)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+        count = self.count_messages(messages)
+        self._cache[key] = count
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return count
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+def _history_item_key(item: dict[str, Any], messages: list[dict[str, Any]]) -> tuple[Any, ...] | None:
+    identity = item.get("turn_id") or item.get("message_id")
+    if not identity:
+        return None
+    texts = []
+    for message in messages:
+        texts.append(str(message.get("content", "") or ""))
+        for tool_call in message.get("tool_calls", []) or []:
+            texts.append(str(tool_call.get("function", {}).get("arguments", "")))
+        texts.append(str(len(message.get("images", []) or [])))
+    return (str(item.get("role", "")), str(identity), hash(tuple(texts)))
+
+
+@dataclass
+class _Unit:
+    item: dict[str, Any]
+    messages: list[dict[str, Any]]
+    tokens: int
+
+    @property
+    def role(self) -> str:
+        return str(self.item.get("role", "")).strip()
+
+    def describe(self) -> dict[str, Any]:
+        description: dict[str, Any] = {"role": self.role}
+        if self.item.get("turn_id"):
+            description["turn_id"] = str(self.item["turn_id"])
+        if self.item.get("message_id"):
+            description["message_id"] = str(self.item["message_id"])
+        return description
+
+
+@dataclass
+class ContextFit:
+    messages: list[dict[str, Any]]
+    context_length: int
+    budget_tokens: int
+    estimated_tokens: int
+    elided: list[dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def fits(self) -> bool:
+        return self.estimated_tokens <= self.budget_tokens
+
+    def report(self) -> dict[str, Any]:
+        return {
+            "context_length": self.context_length,
+            "budget_tokens": self.budget_tokens,
+            "estimated_tokens": self.estimated_tokens,
+            "fits": self.fits,
+            "elided": self.elided,
+        }
+
+
+def _truncate_text(text: str, max_chars: int) -> str:
+    omitted = len(text) - max_chars
+    head = max_chars * 2 // 3
+    tail = max_chars - head
+    return text[:head] + TRUNCATION_MARKER.format(count=omitted) + (text[-tail:] if tail else "")
+
+
+def _truncate_tool_results(unit: _Unit, counter: TokenCounter, max_tokens: int) -> list[dict[str, Any]]:
+    truncated = []
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    for index, message in enumerate(unit.messages):
+        if message.get("role") != "tool":
+            continue
+        content = str(message.get("content", "") or "")
+        tokens = counter.count_text(content)
+        if tokens <= max_tokens or len(content) <= max_chars:
+            continue
+        unit.messages[index] = {**message, "content": _truncate_text(content, max_chars)}
+        truncated.append(
+            {**unit.describe(), "tool_call_id": str(message.get("tool_call_id", "")), "action": "truncated", "original_tokens": tokens}
+        )
+    if truncated:
+        unit.tokens = counter.count_messages(unit.messages)
+    return truncated
+
+
+def _history_groups(history: list[dict[str, Any]]) -> list[list[dict[str, Any]]]:
+    """
+    History items that become model messages together. Consecutive legacy
+    `tool` rows share one assistant `tool_calls` message, so they stay together.
+    """
+    groups: list[list[dict[str, Any]]] = []
+    previous_role = ""
+    for item in history:
+        if not isinstance(item, dict):
+            continue
+        role = str(item.get("role", "")).strip()
+        if role == "tool" and previous_role == "tool":
+            groups[-1].append(item)
+        else:
+            groups.append([item])
+        previous_role = role
+    return groups
+
+
+def _exchanges(units: list[_Unit]) -> list[list[int]]:
+    """
+    Indexes of non-system units grouped by exchange: a user message and the
+    assistant turns answering it.
+    """
+    exchanges: list[list[int]] = []
+    for index, unit in enumerate(units):
+        if unit.role == "system":
+            continue
+        if unit.role == "user" or not exchanges:
+            exchanges.append([])
+        exchanges[-1].append(index)
+    return exchanges
+
+
+def fit_dialog_history(
+    history: list[dict[str, Any]],
+    *,
+    context_length: int,
+    counter: TokenCounter,
+    reserved_output_tokens: int = DEFAULT_RESERVED_OUTPUT_TOKENS,
+    reserved_input_tokens: int = 0,
+    tool_result_max_tokens: int = DEFAULT_TOOL_RESULT_MAX_TOKENS,
+    drop_step: int = 1,
+) -> ContextFit:
+    """
+    Build model messages from persisted dialog history (as returned by
+    `chat_repository.get_messages`) that fit within `context_length` minus
+    `reserved_output_tokens` and `reserved_input_tokens` (e.g. the tool
+    definitions sent with the history). Exchanges are dropped in multiples of
+    `drop_step`, so the remaining prefix changes less often.
+    """
+    units = []
+    for items in _history_groups(history):
+        messages = build_model_messages_from_dialog_history(items)
+        if messages:
+            units.append(_Unit(item=items[0], messages=messages, tokens=counter.count_history_item(items[0], messages)))
+
+    budget = max(0, context_length - reserved_output_tokens - reserved_input_tokens)
+    total = sum(unit.tokens for unit in units)
+
+    exchanges = _exchanges(units)
+    latest = set(exchanges[-1]) if exchanges else set()
+    truncated: dict[int, list[dict[str, Any]]] = {}
+    if total > budget and tool_result_max_tokens > 0:
+        for index, unit in enumerate(units):
+            if index in latest:
+                continue
+            before = unit.tokens
+            truncated[index] = _truncate_tool_results(unit, counter, tool_result_max_tokens)
+            total += unit.tokens - before
+
+    dropped: list[int] = []
+    note_tokens = MESSAGE_OVERHEAD_TOKENS + counter.count_text(ELISION_NOTE.format(count=0)) if total > budget else 0
+    for dropped_exchanges, exchange in enumerate(exchanges[:-1]):
+        if total + (note_tokens if dropped else 0) <= budget and dropped_exchanges % max(1, drop_step) == 0:
+            break
+        for index in exchange:
+            dropped.append(index)
+            total -= units[index].tokens
+
+    dropped_indexes = set(dropped)
+    elided = [{**units[index].describe(), "action": "dropped"} for index in dropped]
+    for index, entries in truncated.items():
+        if index not in dropped_indexes:
+            elided.extend(entries)
+
+    fitted: list[dict[str, Any]] = []
+    note_inserted = not dropped
+    for index, unit in enumerate(units):
+        if index in dropped_indexes:
+            continue
+        if not note_inserted and unit.role != "system":
+            fitted.append({"role": "system", "content": ELISION_NOTE.format(count=len(dropped))})
+            total += note_tokens
+            note_inserted = True
+        fitted.extend(unit.messages)
+
+    return ContextFit(messages=fitted, context_length=context_length, budget_tokens=budget, estimated_tokens=total, elided=elided)
@@ -0,0 +1,79 @@
+"""
+Coalescing of dialog title generation.
+
+Concurrent requests for the same dialog share one in-flight provider call. A
+title can also be started speculatively while the first chat stream runs, and
+the later title request joins it instead of starting a second call.
+"""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+_IN_FLIGHT_TITLES: dict[tuple[Any, str], asyncio.Task] = {}
+_BACKGROUND_TASKS: set[asyncio.Task] = set()
+
+
+def _get_in_flight(key: tuple[Any, str]) -> asyncio.Task | None:
+    task = _IN_FLIGHT_TITLES.get(key)
+    if task is None:
+        return None
+    if task.done() or task.get_loop() is not asyncio.get_running_loop():
+        _IN_FLIGHT_TITLES.pop(key, None)
+        return None
+    return task
+
+
+def _forget(key: tuple[Any, str], task: asyncio.Task) -> None:
+    if _IN_FLIGHT_TITLES.get(key) is task:
+        _IN_FLIGHT_TITLES.pop(key, None)
+
+
+def _ensure_task(key: tuple[Any, str], title_factory: Callable[[], Awaitable[str]]) -> asyncio.Task:
+    task = _get_in_flight(key)
+    if task is None:
+        task = asyncio.ensure_future(title_factory())
+        _IN_FLIGHT_TITLES[key] = task
+        task.add_done_callback(lambda done: _forget(key, done))
+    return task
+
+
+async def generate_coalesced(user_id: Any, dialog_id: str, title_factory: Callable[[], Awaitable[str]]) -> str:
+    """
+    Await the in-flight title for the dialog, or start one with `title_factory`.
+    Cancelling one waiter does not cancel the shared call.
+    """
+    task = _ensure_task((user_id, dialog_id), title_factory)
+    return await asyncio.shield(task)
+
+
+def start_speculative(
+    user_id: Any,
+    dialog_id: str,
+    title_factory: Callable[[], Awaitable[str]],
+    on_title: Callable[[str], Awaitable[Any]] | None = None,
+) -> asyncio.Task:
+    """
+    Start title generation in the background and optionally hand the result to `on_title`.
+    """
+
+    async def _run() -> None:
+        try:
+            title = await generate_coalesced(user_id, dialog_id, title_factory)
+            if on_title is not None:
+                await on_title(title)
+        except Exception:
+            logger.exception("Speculative dialog title generation failed", extra={"dialog_id": dialog_id})
+
+    background_task = asyncio.ensure_future(_run())
+    _BACKGROUND_TASKS.add(background_task)
+    background_task.add_done_callback(_BACKGROUND_TASKS.discard)
+    return background_task
+
+
+def is_in_flight(user_id: Any, dialog_id: str) -> bool:
+    task = _IN_FLIGHT_TITLES.get((user_id, dialog_id))
+    return task is not None and not task.done()
@@ -1,4 +1,5 @@
 import json
+import secrets
 from typing import TypeVar
 from urllib.parse import quote
 
@@ -24,6 +25,19 @@ async def parse_json_payload(request: Request, model_class: type[T]) -> T:
         raise exceptions_validation.JSONError(error_msg, status_code=400)
 
 
+def bearer_token_matches(request: Request, expected: str) -> bool:
+    """
+    Whether the request carries `Authorization: Bearer <expected>`. Always
+    false when `expected` is empty.
+    """
+    if not expected:
+        return False
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer":
+        return False
+    return secrets.compare_digest(token.strip().encode(), expected.encode())
+
+
 async def get_user_id_or_json_error(
     request: Request,
     message: str = "Not authenticated",
@@ -0,0 +1,45 @@
+"""
+Deferred imports of heavy dependencies.
+
+A module that wants `openai` or `httpx` without paying for them at import time
+declares
+
+    __getattr__ = lazy_imports.module_getattr(__name__, {"OpenAI": "openai:OpenAI", "httpx": "httpx"})
+
+The first access to `module.OpenAI` imports `openai`, stores the class on the
+module and returns it, so the name stays patchable from tests. Bare global
+lookups inside the module bypass `__getattr__`; use `load(__name__, "OpenAI")`
+there instead.
+"""
+
+import importlib
+import sys
+from collections.abc import Callable
+from typing import Any
+
+
+def module_getattr(module_name: str, targets: dict[str, str]) -> Callable[[str], Any]:
+    """
+    Build a module-level `__getattr__` resolving each name in `targets` from a
+    `"package.module"` (the module itself) or `"package.module:attribute"` target.
+    """
+
+    def __getattr__(name: str) -> Any:
+        target = targets.get(name)
+        if target is None:
+            raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+        module_path, _, attribute = target.partition(":")
+        value = importlib.import_module(module_path)
+        if attribute:
+            value = getattr(value, attribute)
+        setattr(sys.modules[module_name], name, value)
+        return value
+
+    return __getattr__
+
+
+def load(module_name: str, name: str) -> Any:
+    """
+    The current value of `module_name.name`, importing it on first use.
+    """
+    return getattr(sys.modules[module_name], name)
@@ -1,5 +1,11 @@
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
 import os
+import queue
+from datetime import datetime, timezone
 from pathlib import Path
 from concurrent_log_handler import ConcurrentRotatingFileHandler
 import typing
@@ -18,6 +24,65 @@ NOISY_DEPENDENCY_LOGGERS = (
     "sqlalchemy",
 )
 
+# Records are handed to this listener's thread, which does the formatting and file I/O.
+_queue_listener: logging.handlers.QueueListener | None = None
+# Process that started the listener, and the `setup_logging` arguments to start it again with.
+_listener_pid: int | None = None
+_logging_options: dict[str, typing.Any] = {}
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    Formats each record as one JSON object per line. Records emitted through
+    `log_event` carry their event name and fields as structured data.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: dict[str, typing.Any] = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+        }
+        event = getattr(record, "event", None)
+        if event:
+            payload["event"] = event
+            payload["fields"] = getattr(record, "event_fields", {})
+        else:
+            payload["message"] = record.getMessage()
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc_info"] = record.exc_text
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Resolves the message and traceback on the calling thread but leaves the
+    traceback in `exc_text`, so each writer's formatter decides how to render it.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def log_event(logger: logging.Logger, level: int, event: str, **fields: typing.Any) -> None:
+    """
+    Log a named event. Text output is `event: {fields}`; the JSON formatter
+    emits the fields as structured data.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    payload = {key: value for key, value in fields.items() if value is not None}
+    logger.log(level, "%s: %s", event, payload, extra={"event": event, "event_fields": payload})
+
 
 def _normalize_log_level(level: typing.Any) -> int:
     if isinstance(level, str):
@@ -40,10 +105,58 @@ def get_rotating_file_handler(level: typing.Any, file_name):
     return handler
 
 
-def setup_logging(log_level: int = logging.INFO, data_dir: str | os.PathLike[str] = "data"):
+def stop_logging() -> None:
+    """
+    Stop the background writer after flushing everything queued so far.
+    """
+    global _queue_listener
+    if _queue_listener is not None:
+        root_logger = logging.getLogger()
+        for handler in list(root_logger.handlers):
+            if isinstance(handler, _QueueHandler):
+                root_logger.removeHandler(handler)
+        _queue_listener.stop()
+        for handler in _queue_listener.handlers:
+            handler.close()
+        _queue_listener = None
+
+
+atexit.register(stop_logging)
+
+
+def restart_logging() -> None:
+    """
+    Start a fresh queue and writer thread in a forked child process.
+
+    Threads do not survive `fork()`: a child of a process that already set up
+    logging (e.g. a gunicorn worker of a `--preload` master) would keep
+    putting records on the inherited queue, which nothing reads. A no-op in
+    the process that set up logging and when logging was never set up.
+    """
+    global _queue_listener
+    if _queue_listener is None or _listener_pid == os.getpid():
+        return
+    # The parent's writer thread is not running here; close this process's copies of its handlers.
+    for handler in _queue_listener.handlers:
+        handler.close()
+    _queue_listener = None
+    setup_logging(**_logging_options)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=restart_logging)
+
+
+def setup_logging(log_level: int = logging.INFO, data_dir: str | os.PathLike[str] = "data", log_format: str = "text"):
     """
     Configures the logging setup with the specified log level.
+
+    The root logger only gets a `QueueHandler`, so logging a record is a queue
+    put. Console and file output are written by a background thread.
+    `log_format="json"` writes JSON lines instead of plain text. Forked
+    child processes start their own writer thread (see `restart_logging`).
     """
+    global _queue_listener, _listener_pid, _logging_options
     log_level = _normalize_log_level(log_level)
 
     logger = logging.getLogger()
@@ -53,18 +166,30 @@ def setup_logging(log_level: int = logging.INFO, data_dir: str | os.PathLike[str
     # Remove existing handlers
     while logger.handlers:
         logger.handlers.pop()
+    stop_logging()
+
+    json_formatter = JsonLinesFormatter() if log_format == "json" else None
 
     # Console Handler
     console_handler = logging.StreamHandler()
     console_handler.setLevel(log_level)
     console_formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-    console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
+    console_handler.setFormatter(json_formatter or console_formatter)
 
     # Rotating File Handler
     log_file = Path(data_dir) / "main.log"
     rotating_file_handler = get_rotating_file_handler(log_level, log_file)
-    logger.addHandler(rotating_file_handler)
+    if json_formatter is not None:
+        rotating_file_handler.setFormatter(json_formatter)
+
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.setLevel(log_level)
+    logger.addHandler(queue_handler)
+    _queue_listener = logging.handlers.QueueListener(log_queue, console_handler, rotating_file_handler, respect_handler_level=True)
+    _queue_listener.start()
+    _listener_pid = os.getpid()
+    _logging_options = {"log_level": log_level, "data_dir": data_dir, "log_format": log_format}
 
     for logger_name in NOISY_DEPENDENCY_LOGGERS:
         dependency_logger = logging.getLogger(logger_name)
@@ -2,7 +2,9 @@ import json
 import uuid
 from typing import Any
 
-import httpx
+from chat_client.core import lazy_imports
+
+__getattr__ = lazy_imports.module_getattr(__name__, {"httpx": "httpx"})
 
 
 class MCPClientError(Exception):
@@ -51,6 +53,7 @@ def _post_jsonrpc(
         "params": params,
     }
 
+    httpx = lazy_imports.load(__name__, "httpx")
     try:
         with httpx.Client(timeout=timeout_seconds) as client:
             response = client.post(url, json=body, headers=_build_headers(auth_token))
@@ -0,0 +1,413 @@
+"""
+In-process metrics rendered in the Prometheus text exposition format.
+
+Each worker records into its own `MetricsRegistry`. When a shared directory is
+configured, every worker writes a snapshot of its registry to
+`metrics-<pid>.json` in that directory, and `/metrics` merges all snapshots,
+so any worker can answer the scrape for the whole server. Histograms from
+workers that have exited are kept; gauges are only counted for live workers.
+"""
+
+import asyncio
+import bisect
+import inspect
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+import weakref
+from collections.abc import Callable, Iterable
+from functools import wraps
+from pathlib import Path
+from types import ModuleType
+from typing import Any
+
+from chat_client.core import tracing
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+SNAPSHOT_PREFIX = "metrics-"
+DEFAULT_FLUSH_INTERVAL_SECONDS = 5.0
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0, 120.0)
+TOKENS_PER_SECOND_BUCKETS = (1.0, 5.0, 10.0, 20.0, 40.0, 60.0, 80.0, 120.0, 160.0, 240.0, 320.0)
+DB_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _label_key(labelnames: tuple[str, ...], labels: dict[str, Any]) -> tuple[str, ...]:
+    if set(labels) != set(labelnames):
+        raise ValueError(f"Expected labels {labelnames}, got {tuple(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs: Iterable[tuple[str, str]]) -> str:
+    rendered = ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in pairs)
+    return "{" + rendered + "}" if rendered else ""
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
+        self._lock = threading.Lock()
+        # Per label set: [per-bucket counts (last one is +Inf), sum, count]
+        self._series: dict[tuple[str, ...], list[Any]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _label_key(self.labelnames, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._series[key] = series
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            series = [[list(key), list(counts), total, count] for key, (counts, total, count) in self._series.items()]
+        return {
+            "type": self.kind,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "buckets": list(self.buckets),
+            "series": series,
+        }
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        callback: Callable[[], float] | None = None,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def snapshot(self) -> dict[str, Any]:
+        if self.callback is not None:
+            try:
+                self.set(self.callback())
+            except Exception:
+                logger.debug("Gauge callback failed", extra={"metric": self.name}, exc_info=True)
+        with self._lock:
+            series = [[list(key), value] for key, value in self._values.items()]
+        return {"type": self.kind, "help": self.documentation, "labelnames": list(self.labelnames), "series": series}
+
+
+def _pid_is_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def _merge_into(merged: dict[str, dict[str, Any]], snapshot: dict[str, Any], *, include_gauges: bool) -> None:
+    for name, metric in snapshot.items():
+        if not isinstance(metric, dict):
+            continue
+        kind = metric.get("type")
+        if kind == Gauge.kind and not include_gauges:
+            continue
+        target = merged.get(name)
+        if target is None:
+            target = {key: value for key, value in metric.items() if key != "series"}
+            target["series"] = {}
+            merged[name] = target
+        elif target.get("type") != kind or target.get("buckets") != metric.get("buckets"):
+            logger.warning("Skipping incompatible metric snapshot", extra={"metric": name})
+            continue
+        for entry in metric.get("series", []):
+            key = tuple(entry[0])
+            if kind == Histogram.kind:
+                counts, total, count = entry[1], entry[2], entry[3]
+                current = target["series"].get(key)
+                if current is None:
+                    target["series"][key] = [list(counts), total, count]
+                else:
+                    current[0] = [left + right for left, right in zip(current[0], counts)]
+                    current[1] += total
+                    current[2] += count
+            else:
+                target["series"][key] = target["series"].get(key, 0.0) + entry[1]
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Histogram | Gauge] = {}
+        self.directory: Path | None = None
+        self._write_lock = threading.Lock()
+        self._flusher: threading.Thread | None = None
+        self._flusher_stop = threading.Event()
+
+    def register(self, metric: Histogram | Gauge) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), callback: Callable[[], float] | None = None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def snapshot(self) -> dict[str, Any]:
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def _snapshot_path(self, pid: int) -> Path:
+        assert self.directory is not None
+        return self.directory / f"{SNAPSHOT_PREFIX}{pid}.json"
+
+    def write_snapshot(self) -> None:
+        """
+        Write this process' snapshot to the shared directory, if configured.
+        """
+        if self.directory is None:
+            return
+        payload = json.dumps(self.snapshot())
+        with self._write_lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=f".{SNAPSHOT_PREFIX}", dir=self.directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                    handle.write(payload)
+                os.replace(tmp_path, self._snapshot_path(os.getpid()))
+            except BaseException:
+                Path(tmp_path).unlink(missing_ok=True)
+                raise
+
+    def _other_snapshots(self) -> Iterable[tuple[int, dict[str, Any]]]:
+        if self.directory is None:
+            return
+        own_pid = os.getpid()
+        for path in sorted(self.directory.glob(f"{SNAPSHOT_PREFIX}*.json")):
+            try:
+                pid = int(path.stem[len(SNAPSHOT_PREFIX) :])
+            except ValueError:
+                continue
+            if pid == own_pid:
+                continue
+            try:
+                payload = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            if isinstance(payload, dict):
+                yield pid, payload
+
+    def collect(self) -> dict[str, dict[str, Any]]:
+        """
+        Merge this process' live values with the snapshots of all other workers.
+        """
+        merged: dict[str, dict[str, Any]] = {}
+        _merge_into(merged, self.snapshot(), include_gauges=True)
+        for pid, snapshot in self._other_snapshots():
+            _merge_into(merged, snapshot, include_gauges=_pid_is_alive(pid))
+        return merged
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for name, metric in self.collect().items():
+            lines.append(f"# HELP {name} {metric.get('help', '')}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            labelnames = metric.get("labelnames", [])
+            for key, value in sorted(metric["series"].items()):
+                pairs = list(zip(labelnames, key))
+                if metric["type"] == Histogram.kind:
+                    counts, total, count = value
+                    cumulative = 0
+                    for bound, bucket_count in zip([*metric["buckets"], math.inf], counts):
+                        cumulative += bucket_count
+                        lines.append(f"{name}_bucket{_format_labels([*pairs, ('le', _format_value(bound))])} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(pairs)} {_format_value(total)}")
+                    lines.append(f"{name}_count{_format_labels(pairs)} {count}")
+                else:
+                    lines.append(f"{name}{_format_labels(pairs)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def configure_multiprocess(
+        self, directory: str | os.PathLike[str], *, flush_interval_seconds: float = DEFAULT_FLUSH_INTERVAL_SECONDS
+    ) -> None:
+        """
+        Share metrics through `directory` and start a thread that writes this
+        process' snapshot every `flush_interval_seconds`.
+        """
+        self.stop_flusher()
+        self.directory = Path(directory)
+        self.write_snapshot()
+        self._flusher_stop = threading.Event()
+
+        def flush_loop(stop: threading.Event) -> None:
+            while not stop.wait(flush_interval_seconds):
+                try:
+                    self.write_snapshot()
+                except OSError:
+                    logger.warning("Could not write metrics snapshot", exc_info=True)
+
+        self._flusher = threading.Thread(target=flush_loop, args=(self._flusher_stop,), name="metrics-flusher", daemon=True)
+        self._flusher.start()
+
+    def stop_flusher(self) -> None:
+        if self._flusher is None:
+            return
+        self._flusher_stop.set()
+        self._flusher.join(timeout=5)
+        self._flusher = None
+        try:
+            self.write_snapshot()
+        except OSError:
+            logger.warning("Could not write metrics snapshot", exc_info=True)
+
+
+def clear_multiprocess_directory(directory: str | os.PathLike[str]) -> None:
+    """
+    Remove snapshots left by a previous server run. Call before starting workers.
+    """
+    path = Path(directory)
+    if not path.is_dir():
+        return
+    for snapshot in path.glob(f"{SNAPSHOT_PREFIX}*.json"):
+        snapshot.unlink(missing_ok=True)
+
+
+REGISTRY = MetricsRegistry()
+
+_tracked_loop: "weakref.ReferenceType[asyncio.AbstractEventLoop] | None" = None
+
+
+def track_event_loop(loop: asyncio.AbstractEventLoop) -> None:
+    """
+    Report the default executor queue of `loop` as `executor_queue_depth`.
+    """
+    global _tracked_loop
+    _tracked_loop = weakref.ref(loop)
+
+
+def _executor_queue_depth() -> float:
+    loop = _tracked_loop() if _tracked_loop is not None else None
+    # asyncio has no public accessor for its default executor.
+    executor = getattr(loop, "_default_executor", None)
+    work_queue = getattr(executor, "_work_queue", None)
+    return float(work_queue.qsize()) if work_queue is not None else 0.0
+
+
+TIME_TO_FIRST_TOKEN = REGISTRY.histogram(
+    "chat_time_to_first_token_seconds",
+    "Time from sending a model request to receiving its first chunk.",
+    ("model",),
+)
+ROUND_DURATION = REGISTRY.histogram(
+    "chat_round_duration_seconds",
+    "Duration of one model call in the chat tool loop.",
+    ("model",),
+)
+OUTPUT_TOKENS_PER_SECOND = REGISTRY.histogram(
+    "chat_output_tokens_per_second",
+    "Output tokens per second of a model call, when the provider reports usage.",
+    ("model",),
+    TOKENS_PER_SECOND_BUCKETS,
+)
+TOOL_DURATION = REGISTRY.histogram(
+    "chat_tool_duration_seconds",
+    "Duration of a tool call, including failed calls.",
+    ("tool",),
+)
+DB_QUERY_DURATION = REGISTRY.histogram(
+    "db_query_duration_seconds",
+    "Duration of repository functions.",
+    ("function",),
+    DB_LATENCY_BUCKETS,
+)
+ACTIVE_STREAMS = REGISTRY.gauge("chat_active_streams", "Chat responses currently streaming.")
+CHAT_STREAM_QUEUE_DEPTH = REGISTRY.gauge("chat_stream_queue_depth", "Chat streams waiting for admission.")
+CHAT_STREAM_QUEUE_WAIT = REGISTRY.histogram(
+    "chat_stream_queue_wait_seconds",
+    "Time a chat stream waited for admission, 0 when it started at once.",
+    ("provider",),
+)
+EXECUTOR_QUEUE_DEPTH = REGISTRY.gauge(
+    "executor_queue_depth",
+    "Work items waiting for a thread in the event loop's default executor.",
+    callback=_executor_queue_depth,
+)
+
+
+def instrument_repository(module: ModuleType) -> None:
+    """
+    Wrap the public async functions defined in `module` so their duration is
+    recorded in `db_query_duration_seconds` and each call gets a `db.*` span.
+    Call at the end of the module.
+    """
+    prefix = module.__name__.rsplit(".", 1)[-1]
+    for name, function in list(vars(module).items()):
+        if name.startswith("_") or not inspect.iscoroutinefunction(function) or function.__module__ != module.__name__:
+            continue
+        setattr(module, name, _timed(function, f"{prefix}.{name}"))
+
+
+def _timed(function: Callable[..., Any], label: str) -> Callable[..., Any]:
+    span_name = f"db.{label}"
+
+    @wraps(function)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        started_at = time.perf_counter()
+        try:
+            with tracing.start_span(span_name):
+                return await function(*args, **kwargs)
+        finally:
+            DB_QUERY_DURATION.observe(time.perf_counter() - started_at, function=label)
+
+    return wrapper
@@ -2,63 +2,285 @@
 Middleware for the application
 """
 
+import asyncio
 import json
+import zlib
 from base64 import b64decode, b64encode
 from typing import Any
 
 from starlette.middleware import Middleware
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.datastructures import MutableHeaders
+from starlette.datastructures import Headers, MutableHeaders
 from starlette.requests import HTTPConnection
 from itsdangerous import BadSignature, TimestampSigner
 
 # from starlette.middleware.cors import CORSMiddleware
-# from starlette.middleware.gzip import GZipMiddleware
-# NOTE: GZIP cannot be used with streaming responses
 from starlette.responses import JSONResponse
-from starlette.requests import Request
 from starlette.types import Message, Receive, Scope, Send
 import data.config as config
 import logging
 
+from chat_client.core.static_assets import accepted_encodings
+
+try:
+    import brotli  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
 logger: logging.Logger = logging.getLogger(__name__)
 
 
-class NoCacheMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        response = await call_next(request)
-        path = request.url.path
+class NoCacheMiddleware:
+    """
+    Sets Cache-Control on every HTTP response as it is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Fingerprinted files under /static/build never change, so browsers may skip revalidation.
+        # Other static files are cached for a year; their URLs carry a version that changes on release.
+        # Pages and API responses are never stored, so the browser always asks for a fresh copy.
+        path = scope.get("path", "")
+        if path.startswith("/static/build/"):
+            cache_control = "public, max-age=31536000, immutable"
+        elif path.startswith("/static"):
+            cache_control = "public, max-age=31536000"
+        else:
+            cache_control = "no-store"
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["Cache-Control"] = cache_control
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
 
-        # cache static files for 1 year. There are versioning on the static files
-        # so they will be reloaded when version is changed
-        if path.startswith("/static"):
-            response.headers["Cache-Control"] = "public, max-age=31536000"
-            return response
+class RequestTooLarge(Exception):
+    pass
 
-        # ignore_paths = ["/"]  # chat page
-        # for ignore_path in ignore_paths:
-        #     if path == ignore_path:
-        #         # Default cache. No cache directives are sent, so the browser
-        #         # will cache the response as it sees fit.
-        #         return response
 
-        # Ensure no cache. Do not store any part of the response in the cache
-        # Will force the browser to always request a new version of the page
-        response.headers["Cache-Control"] = "no-store"
-        return response
+class LimitRequestSizeMiddleware:
+    """
+    Rejects request bodies larger than `max_size` with 413.
 
+    A declared Content-Length is checked before the app runs. Bodies are also
+    counted as the app reads them, so chunked uploads are limited too, and
+    requests whose body is never read cost nothing.
+    """
 
-class LimitRequestSizeMiddleware(BaseHTTPMiddleware):
     def __init__(self, app, max_size: int):
-        super().__init__(app)
+        self.app = app
         self.max_size = max_size
 
-    async def dispatch(self, request: Request, call_next):
-        request_body = await request.body()
-        if len(request_body) > self.max_size:
-            return JSONResponse({"error": True, "message": "Request body too large"}, status_code=413)
-        return await call_next(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length is not None:
+            try:
+                declared_size = int(content_length)
+            except ValueError:
+                declared_size = 0
+            if declared_size > self.max_size:
+                await self._reject(scope, receive, send)
+                return
+
+        received_size = 0
+        too_large = False
+        response_started = False
+
+        async def receive_wrapper() -> Message:
+            nonlocal received_size, too_large
+            message = await receive()
+            if message["type"] == "http.request":
+                received_size += len(message.get("body", b""))
+                if received_size > self.max_size:
+                    too_large = True
+                    raise RequestTooLarge()
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                if too_large:
+                    # The app handled RequestTooLarge itself; answer with 413 instead.
+                    await self._reject(scope, receive, send)
+                    return
+            elif too_large:
+                return
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        except RequestTooLarge:
+            if response_started:
+                raise
+            await self._reject(scope, receive, send)
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send) -> None:
+        response = JSONResponse({"error": True, "message": "Request body too large"}, status_code=413)
+        await response(scope, receive, send)
+
+
+COMPRESSIBLE_CONTENT_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/manifest+json",
+    "image/svg+xml",
+)
+# Never buffered or compressed: every event must reach the browser as soon as it is sent.
+UNCOMPRESSED_CONTENT_TYPES = ("text/event-stream",)
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, *, final: bool) -> bytes:
+        """
+        Compress `data` and flush, so each chunk can be decoded on arrival.
+        """
+        if self.encoding == "br":
+            return self._brotli.process(data) + (self._brotli.finish() if final else self._brotli.flush())
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with brotli (when installed) or gzip.
+
+    Single-message bodies below `minimum_size` are sent as-is. Streamed bodies
+    are compressed chunk by chunk with a flush after each chunk, so nothing is
+    held back. Server-sent events, already-encoded responses (e.g.
+    precompressed static files) and non-text content types are left alone.
+    Chunks of `thread_minimum_size` bytes or more are compressed in a worker
+    thread so a large dialog load does not stall other streams on the loop.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1000,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+        thread_minimum_size: int = 64 * 1024,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.thread_minimum_size = thread_minimum_size
+
+    async def _compress(self, compressor: _StreamCompressor, body: bytes, *, final: bool) -> bytes:
+        if len(body) >= self.thread_minimum_size:
+            return await asyncio.to_thread(compressor.compress, body, final=final)
+        return compressor.compress(body, final=final)
+
+    def _select_encoding(self, scope: Scope) -> str | None:
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    @staticmethod
+    def _is_compressible(message: Message) -> bool:
+        if message["status"] in (204, 206, 304):
+            return False
+        headers = Headers(raw=message["headers"])
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").split(";", 1)[0].strip().lower()
+        if content_type in UNCOMPRESSED_CONTENT_TYPES:
+            return False
+        return content_type.startswith(COMPRESSIBLE_CONTENT_TYPES)
+
+    @staticmethod
+    def _mark_encoded(message: Message, encoding: str, content_length: int | None) -> None:
+        headers = MutableHeaders(scope=message)
+        headers["Content-Encoding"] = encoding
+        headers.add_vary_header("Accept-Encoding")
+        if content_length is None:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(content_length)
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self._select_encoding(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Message | None = None
+        compressor: _StreamCompressor | None = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, compressor
+            message_type = message["type"]
+            if message_type == "http.response.start":
+                if self._is_compressible(message):
+                    # Held until the first body chunk shows whether compression is worthwhile.
+                    start_message = message
+                    return
+                await send(message)
+                return
+
+            if start_message is None and compressor is None:
+                await send(message)
+                return
+
+            if message_type != "http.response.body":
+                # e.g. a zero-copy file send; the body cannot be rewritten, so send it as-is.
+                if start_message is not None:
+                    await send(start_message)
+                    start_message = None
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                assert start_message is not None
+                if not more_body and len(body) < self.minimum_size:
+                    await send(start_message)
+                    start_message = None
+                    await send(message)
+                    return
+                compressor = _StreamCompressor(encoding, self.gzip_level, self.brotli_quality)
+                compressed = await self._compress(compressor, body, final=not more_body)
+                self._mark_encoded(start_message, encoding, None if more_body else len(compressed))
+                await send(start_message)
+                start_message = None
+            else:
+                compressed = await self._compress(compressor, body, final=not more_body)
+            await send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
 
 
 class SignedCookieStateMiddleware:
@@ -168,15 +390,17 @@ flash_middleware = Middleware(
 )
 
 
+compression_middleware = Middleware(
+    CompressionMiddleware,
+    minimum_size=getattr(config, "RESPONSE_COMPRESSION_MINIMUM_SIZE", 1000),
+)
 no_cache_middlewares = Middleware(NoCacheMiddleware)
 request_max_size = getattr(config, "REQUEST_MAX_SIZE", 10 * 1024 * 1024)  # 10 MB default
 limit_request_size_middlewares = Middleware(LimitRequestSizeMiddleware, max_size=request_max_size)
 
 middleware = []
+middleware.append(compression_middleware)
 middleware.append(no_cache_middlewares)
 middleware.append(session_middleware)
 middleware.append(flash_middleware)
 middleware.append(limit_request_size_middlewares)
-
-# gzip won't work with streaming responses
-# middleware.append(Middleware(GZipMiddleware, minimum_size=1000, compresslevel=9))
@@ -1,10 +1,84 @@
 import json
 import logging
-from typing import Any, Callable
+import math
+import threading
+from collections.abc import Callable, Mapping
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any
 
 from chat_client.core.api_utils import get_ollama_model_metadata, get_openai_model_metadata
+from chat_client.core.model_capability_store import ModelCapabilityStore, build_store_key
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+DEFAULT_PROBE_CONCURRENCY = 8
+DEFAULT_PROBE_TIMEOUT_SECONDS = 5.0
+# An Ollama probe is `/api/show` followed by at most one `chat` call.
+_PROBE_CALLS_PER_MODEL = 2
 
 _MODEL_CAPABILITIES_CACHE: dict[str, dict[str, dict[str, Any]]] = {}
+_EMPTY_CAPABILITIES: Mapping[str, Any] = MappingProxyType({})
+
+_PROBE_CONCURRENCY = DEFAULT_PROBE_CONCURRENCY
+_PROBE_TIMEOUT_SECONDS = DEFAULT_PROBE_TIMEOUT_SECONDS
+_CAPABILITY_STORE: ModelCapabilityStore | None = None
+_REFRESH_THREAD: threading.Thread | None = None
+
+
+@dataclass(frozen=True)
+class ModelCapabilityTable:
+    """
+    Immutable per-model capability snapshot with constant-time lookups.
+
+    `sources` holds the config objects the table was built from. A table is
+    reused for as long as the same objects are passed in, so the request path
+    never re-serializes the config.
+    """
+
+    version: int
+    sources: tuple[Any, ...]
+    capabilities: Mapping[str, Mapping[str, Any]]
+    tool_models: tuple[str, ...]
+
+    def get(self, model_name: str) -> Mapping[str, Any]:
+        return self.capabilities.get(model_name, _EMPTY_CAPABILITIES)
+
+    def supports(self, model_name: str, capability: str) -> bool:
+        return bool(self.get(model_name).get(capability))
+
+    def as_dict(self) -> dict[str, dict[str, Any]]:
+        return {model_name: dict(details) for model_name, details in self.capabilities.items()}
+
+
+_CAPABILITY_TABLE: ModelCapabilityTable | None = None
+_CAPABILITY_TABLE_VERSION = 0
+
+
+@dataclass(frozen=True)
+class _ProbeRequest:
+    model_name: str
+    provider_name: str
+    provider_info: dict[str, Any]
+    probe_tools: bool
+    store_key: str
+
+
+def configure_probing(
+    *,
+    concurrency: int = DEFAULT_PROBE_CONCURRENCY,
+    timeout_seconds: float = DEFAULT_PROBE_TIMEOUT_SECONDS,
+    store: ModelCapabilityStore | None = None,
+) -> None:
+    """
+    Set how many models are probed at once, the timeout applied to each
+    provider call, and the optional store shared between workers.
+    """
+    global _PROBE_CONCURRENCY, _PROBE_TIMEOUT_SECONDS, _CAPABILITY_STORE
+    _PROBE_CONCURRENCY = max(1, int(concurrency or 1))
+    _PROBE_TIMEOUT_SECONDS = float(timeout_seconds) if timeout_seconds and timeout_seconds > 0 else DEFAULT_PROBE_TIMEOUT_SECONDS
+    _CAPABILITY_STORE = store
 
 
 def resolve_model_provider_name(models: dict[str, Any], model_name: str) -> str:
@@ -19,7 +93,9 @@ def resolve_model_provider_name(models: dict[str, Any], model_name: str) -> str:
 
 
 def clear_model_capabilities_cache() -> None:
+    global _CAPABILITY_TABLE
     _MODEL_CAPABILITIES_CACHE.clear()
+    _CAPABILITY_TABLE = None
 
 
 def _normalize_cache_value(value: Any) -> Any:
@@ -54,6 +130,110 @@ def _supports_system_messages_for_model(model_name: str, system_message_denylist
     return model_name not in system_message_denylist
 
 
+def _resolve_configured_tool_models(models: dict[str, Any], tool_models: list[str] | None) -> set[str]:
+    if not isinstance(tool_models, list):
+        return set()
+    if "*" in tool_models:
+        return set(models.keys())
+    return set(tool_models)
+
+
+def _build_probe_requests(
+    models: dict[str, Any],
+    configured_tool_models: set[str],
+    provider_info_resolver: Callable[[str], dict[str, Any]],
+) -> list[_ProbeRequest]:
+    requests: list[_ProbeRequest] = []
+    for model_name in models:
+        provider_name = resolve_model_provider_name(models, model_name)
+        if provider_name not in ("ollama", "openai"):
+            continue
+        provider_info = provider_info_resolver(model_name)
+        probe_tools = provider_name == "openai" and model_name in configured_tool_models
+        base_url = str(provider_info.get("base_url", "") or "").strip() if isinstance(provider_info, dict) else ""
+        requests.append(
+            _ProbeRequest(
+                model_name=model_name,
+                provider_name=provider_name,
+                provider_info=provider_info,
+                probe_tools=probe_tools,
+                store_key=build_store_key(provider_name, base_url, model_name, probe_tools),
+            )
+        )
+    return requests
+
+
+def _run_probe(request: _ProbeRequest, *, refresh: bool) -> dict[str, Any]:
+    provider_info = request.provider_info
+    if isinstance(provider_info, dict) and "timeout_seconds" not in provider_info:
+        provider_info = {**provider_info, "timeout_seconds": _PROBE_TIMEOUT_SECONDS}
+    if request.provider_name == "ollama":
+        return get_ollama_model_metadata(provider_info, request.model_name, refresh=refresh)
+    return get_openai_model_metadata(
+        provider_info,
+        request.model_name,
+        probe_tools=request.probe_tools,
+        refresh=refresh,
+    )
+
+
+def _probe_concurrently(requests: list[_ProbeRequest], *, refresh: bool) -> dict[str, dict[str, Any]]:
+    """
+    Probe models on a bounded thread pool. Probes still running when the
+    overall budget runs out are abandoned and treated as undetected.
+    """
+    if not requests:
+        return {}
+
+    max_workers = min(_PROBE_CONCURRENCY, len(requests))
+    budget_seconds = math.ceil(len(requests) / max_workers) * _PROBE_TIMEOUT_SECONDS * _PROBE_CALLS_PER_MODEL + 1.0
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="model-probe")
+    try:
+        futures = {executor.submit(_run_probe, request, refresh=refresh): request for request in requests}
+        done, not_done = wait(futures, timeout=budget_seconds)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    results: dict[str, dict[str, Any]] = {}
+    for future in done:
+        request = futures[future]
+        try:
+            results[request.model_name] = future.result()
+        except Exception:
+            logger.warning("Model capability probe failed", extra={"model": request.model_name}, exc_info=True)
+    for future in not_done:
+        logger.warning("Model capability probe timed out", extra={"model": futures[future].model_name})
+    return results
+
+
+def _detect_model_metadata(requests: list[_ProbeRequest], *, refresh: bool = False) -> dict[str, dict[str, Any]]:
+    """
+    Return detected metadata per model. Stored results are used as-is unless
+    `refresh` is set; everything else is probed and written back to the store.
+    """
+    store = _CAPABILITY_STORE
+    detected: dict[str, dict[str, Any]] = {}
+    pending: list[_ProbeRequest] = []
+    for request in requests:
+        stored = None if store is None or refresh else store.get(request.store_key)
+        if stored is None:
+            pending.append(request)
+        else:
+            detected[request.model_name] = stored
+
+    probed = _probe_concurrently(pending, refresh=refresh)
+    detected.update(probed)
+    if store is not None:
+        store.put_many(
+            {
+                request.store_key: probed[request.model_name]
+                for request in pending
+                if request.model_name in probed and not probed[request.model_name].get("probe_failed")
+            }
+        )
+    return detected
+
+
 def supports_thinking_control(details: dict[str, Any] | None) -> bool:
     if not isinstance(details, dict):
         return False
@@ -82,26 +262,12 @@ def build_model_capabilities(
 
     configured_vision_models = set(vision_models if isinstance(vision_models, list) else [])
     configured_system_message_denylist = set(system_message_denylist if isinstance(system_message_denylist, list) else [])
-    configured_tool_models: set[str] = set()
-    if isinstance(tool_models, list):
-        if "*" in tool_models:
-            configured_tool_models = set(models.keys())
-        else:
-            configured_tool_models = set(tool_models)
+    configured_tool_models = _resolve_configured_tool_models(models, tool_models)
+    detected_metadata = _detect_model_metadata(_build_probe_requests(models, configured_tool_models, provider_info_resolver))
 
     capabilities: dict[str, dict[str, Any]] = {}
-    for model_name in models.keys():
-        detected_capabilities: dict[str, Any] = {}
-        provider_name = resolve_model_provider_name(models, model_name)
-        if provider_name == "ollama":
-            detected_capabilities = get_ollama_model_metadata(provider_info_resolver(model_name), model_name)
-        elif provider_name == "openai":
-            detected_capabilities = get_openai_model_metadata(
-                provider_info_resolver(model_name),
-                model_name,
-                probe_tools=model_name in configured_tool_models,
-            )
-
+    for model_name in models:
+        detected_capabilities = detected_metadata.get(model_name, {})
         supports_images = model_name in configured_vision_models or bool(detected_capabilities.get("supports_images"))
         supports_tools = model_name in configured_tool_models or bool(detected_capabilities.get("supports_tools"))
         supports_system_messages = _supports_system_messages_for_model(model_name, configured_system_message_denylist)
@@ -119,6 +285,169 @@ def build_model_capabilities(
     return {model_name: dict(details) for model_name, details in capabilities.items()}
 
 
+def _table_matches(table: ModelCapabilityTable | None, sources: tuple[Any, ...]) -> bool:
+    if table is None or len(table.sources) != len(sources):
+        return False
+    return all(current is previous for current, previous in zip(sources, table.sources))
+
+
+def build_model_capability_table(
+    *,
+    models: dict[str, Any],
+    vision_models: list[str] | None,
+    tool_models: list[str] | None,
+    system_message_denylist: list[str] | None,
+    provider_info_resolver: Callable[[str], dict[str, Any]],
+    cache_token: Any = None,
+) -> ModelCapabilityTable:
+    """
+    Build a new capability table and make it the current one.
+    """
+    global _CAPABILITY_TABLE, _CAPABILITY_TABLE_VERSION
+    capabilities = build_model_capabilities(
+        models=models,
+        vision_models=vision_models,
+        tool_models=tool_models,
+        system_message_denylist=system_message_denylist,
+        provider_info_resolver=provider_info_resolver,
+        cache_token=cache_token,
+    )
+    _CAPABILITY_TABLE_VERSION += 1
+    table = ModelCapabilityTable(
+        version=_CAPABILITY_TABLE_VERSION,
+        sources=(models, vision_models, tool_models, system_message_denylist, provider_info_resolver, cache_token),
+        capabilities=MappingProxyType({model_name: MappingProxyType(dict(details)) for model_name, details in capabilities.items()}),
+        tool_models=tuple(model_name for model_name, details in capabilities.items() if details.get("supports_tools")),
+    )
+    _CAPABILITY_TABLE = table
+    return table
+
+
+def get_model_capability_table(
+    *,
+    models: dict[str, Any],
+    vision_models: list[str] | None,
+    tool_models: list[str] | None,
+    system_message_denylist: list[str] | None,
+    provider_info_resolver: Callable[[str], dict[str, Any]],
+    cache_token: Any = None,
+) -> ModelCapabilityTable:
+    """
+    Return the current capability table, rebuilding it only when a different
+    config object is passed in (e.g. after a config reload).
+    """
+    table = _CAPABILITY_TABLE
+    sources = (models, vision_models, tool_models, system_message_denylist, provider_info_resolver, cache_token)
+    if table is not None and _table_matches(table, sources):
+        return table
+    return build_model_capability_table(
+        models=models,
+        vision_models=vision_models,
+        tool_models=tool_models,
+        system_message_denylist=system_message_denylist,
+        provider_info_resolver=provider_info_resolver,
+        cache_token=cache_token,
+    )
+
+
+def reload_model_capability_table(
+    *,
+    models: dict[str, Any],
+    vision_models: list[str] | None,
+    tool_models: list[str] | None,
+    system_message_denylist: list[str] | None,
+    provider_info_resolver: Callable[[str], dict[str, Any]],
+    cache_token: Any = None,
+) -> ModelCapabilityTable:
+    """
+    Drop cached capabilities and rebuild the table from the given config.
+    """
+    clear_model_capabilities_cache()
+    return build_model_capability_table(
+        models=models,
+        vision_models=vision_models,
+        tool_models=tool_models,
+        system_message_denylist=system_message_denylist,
+        provider_info_resolver=provider_info_resolver,
+        cache_token=cache_token,
+    )
+
+
+def refresh_stale_model_capabilities(
+    *,
+    models: dict[str, Any],
+    vision_models: list[str] | None,
+    tool_models: list[str] | None,
+    system_message_denylist: list[str] | None,
+    provider_info_resolver: Callable[[str], dict[str, Any]],
+    cache_token: Any = None,
+) -> ModelCapabilityTable | None:
+    """
+    Re-probe models whose stored metadata is missing or older than the TTL and
+    swap in a rebuilt table. Returns None when nothing needed refreshing.
+    """
+    store = _CAPABILITY_STORE
+    if store is None:
+        return None
+    requests = _build_probe_requests(models, _resolve_configured_tool_models(models, tool_models), provider_info_resolver)
+    stale_requests = [request for request in requests if not store.is_fresh(request.store_key)]
+    if not stale_requests:
+        return None
+
+    logger.info("Refreshing stored capabilities for %d model(s)", len(stale_requests))
+    _detect_model_metadata(stale_requests, refresh=True)
+    _MODEL_CAPABILITIES_CACHE.clear()
+    return build_model_capability_table(
+        models=models,
+        vision_models=vision_models,
+        tool_models=tool_models,
+        system_message_denylist=system_message_denylist,
+        provider_info_resolver=provider_info_resolver,
+        cache_token=cache_token,
+    )
+
+
+def _refresh_in_background(**kwargs: Any) -> None:
+    try:
+        refresh_stale_model_capabilities(**kwargs)
+    except Exception:
+        logger.exception("Background model capability refresh failed")
+
+
+def start_background_refresh(
+    *,
+    models: dict[str, Any],
+    vision_models: list[str] | None,
+    tool_models: list[str] | None,
+    system_message_denylist: list[str] | None,
+    provider_info_resolver: Callable[[str], dict[str, Any]],
+    cache_token: Any = None,
+) -> threading.Thread | None:
+    """
+    Run `refresh_stale_model_capabilities` on a daemon thread. At most one
+    refresh runs per process; returns None when one is already running.
+    """
+    global _REFRESH_THREAD
+    if _CAPABILITY_STORE is None or (_REFRESH_THREAD is not None and _REFRESH_THREAD.is_alive()):
+        return None
+    thread = threading.Thread(
+        target=_refresh_in_background,
+        kwargs={
+            "models": models,
+            "vision_models": vision_models,
+            "tool_models": tool_models,
+            "system_message_denylist": system_message_denylist,
+            "provider_info_resolver": provider_info_resolver,
+            "cache_token": cache_token,
+        },
+        name="model-capability-refresh",
+        daemon=True,
+    )
+    _REFRESH_THREAD = thread
+    thread.start()
+    return thread
+
+
 def resolve_tool_models(
     *,
     models: dict[str, Any],
@@ -128,7 +457,7 @@ def resolve_tool_models(
     provider_info_resolver: Callable[[str], dict[str, Any]],
     cache_token: Any = None,
 ) -> list[str]:
-    capabilities = build_model_capabilities(
+    table = get_model_capability_table(
         models=models,
         vision_models=vision_models,
         tool_models=tool_models,
@@ -136,7 +465,7 @@ def resolve_tool_models(
         provider_info_resolver=provider_info_resolver,
         cache_token=cache_token,
     )
-    return [model_name for model_name, details in capabilities.items() if details.get("supports_tools")]
+    return list(table.tool_models)
 
 
 def supports_model_images(
@@ -149,7 +478,7 @@ def supports_model_images(
     provider_info_resolver: Callable[[str], dict[str, Any]],
     cache_token: Any = None,
 ) -> bool:
-    capabilities = build_model_capabilities(
+    table = get_model_capability_table(
         models=models,
         vision_models=vision_models,
         tool_models=tool_models,
@@ -157,7 +486,7 @@ def supports_model_images(
         provider_info_resolver=provider_info_resolver,
         cache_token=cache_token,
     )
-    return bool(capabilities.get(model_name, {}).get("supports_images"))
+    return table.supports(model_name, "supports_images")
 
 
 def supports_model_attachments(
@@ -170,7 +499,7 @@ def supports_model_attachments(
     provider_info_resolver: Callable[[str], dict[str, Any]],
     cache_token: Any = None,
 ) -> bool:
-    capabilities = build_model_capabilities(
+    table = get_model_capability_table(
         models=models,
         vision_models=vision_models,
         tool_models=tool_models,
@@ -178,7 +507,7 @@ def supports_model_attachments(
         provider_info_resolver=provider_info_resolver,
         cache_token=cache_token,
     )
-    return bool(capabilities.get(model_name, {}).get("supports_attachments"))
+    return table.supports(model_name, "supports_attachments")
 
 
 def supports_model_thinking_control(
@@ -191,7 +520,7 @@ def supports_model_thinking_control(
     provider_info_resolver: Callable[[str], dict[str, Any]],
     cache_token: Any = None,
 ) -> bool:
-    capabilities = build_model_capabilities(
+    table = get_model_capability_table(
         models=models,
         vision_models=vision_models,
         tool_models=tool_models,
@@ -199,7 +528,7 @@ def supports_model_thinking_control(
         provider_info_resolver=provider_info_resolver,
         cache_token=cache_token,
     )
-    return bool(capabilities.get(model_name, {}).get("supports_thinking_control"))
+    return table.supports(model_name, "supports_thinking_control")
 
 
 def warm_and_log_model_capabilities(
@@ -211,15 +540,31 @@ def warm_and_log_model_capabilities(
     system_message_denylist: list[str] | None,
     provider_info_resolver: Callable[[str], dict[str, Any]],
     cache_token: Any = None,
+    refresh_in_background: bool = False,
 ) -> dict[str, dict[str, Any]]:
-    capabilities = build_model_capabilities(
+    """
+    Build the capability table and log it. With a store configured, stored
+    results are used right away and `refresh_in_background` re-probes the
+    stale ones after startup.
+    """
+    capabilities = build_model_capability_table(
         models=models,
         vision_models=vision_models,
         tool_models=tool_models,
         system_message_denylist=system_message_denylist,
         provider_info_resolver=provider_info_resolver,
         cache_token=cache_token,
-    )
+    ).as_dict()
+
+    if refresh_in_background:
+        start_background_refresh(
+            models=models,
+            vision_models=vision_models,
+            tool_models=tool_models,
+            system_message_denylist=system_message_denylist,
+            provider_info_resolver=provider_info_resolver,
+            cache_token=cache_token,
+        )
 
     if not capabilities:
         logger.info("Model capabilities detected at startup: {}")
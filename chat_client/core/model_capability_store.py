@@ -0,0 +1,104 @@
+"""
+On-disk store for probed model metadata.
+
+Probe results are shared by all workers through a single JSON file. Entries
+older than the TTL are still served, so a worker can start immediately, but
+are reported as stale so they can be refreshed in the background.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+STORE_FORMAT_VERSION = 1
+
+
+def build_store_key(provider_name: str, base_url: str, model_name: str, probe_tools: bool) -> str:
+    return json.dumps([provider_name, base_url, model_name, bool(probe_tools)], separators=(",", ":"))
+
+
+class ModelCapabilityStore:
+    def __init__(self, path: str | Path, ttl_seconds: float) -> None:
+        self.path = Path(path)
+        self.ttl_seconds = float(ttl_seconds)
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, Any]] | None = None
+
+    def _read_file(self) -> dict[str, dict[str, Any]]:
+        try:
+            payload = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable model capability store", extra={"path": str(self.path)})
+            return {}
+        if not isinstance(payload, dict) or payload.get("version") != STORE_FORMAT_VERSION:
+            return {}
+        entries = payload.get("entries")
+        if not isinstance(entries, dict):
+            return {}
+        return {
+            key: entry
+            for key, entry in entries.items()
+            if isinstance(entry, dict) and isinstance(entry.get("metadata"), dict) and isinstance(entry.get("probed_at"), (int, float))
+        }
+
+    def _write_file(self, entries: dict[str, dict[str, Any]]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = json.dumps({"version": STORE_FORMAT_VERSION, "entries": entries}, sort_keys=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{self.path.name}.", dir=self.path.parent)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                handle.write(payload)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def _loaded_entries(self) -> dict[str, dict[str, Any]]:
+        if self._entries is None:
+            self._entries = self._read_file()
+        return self._entries
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """
+        Return the stored metadata for `key`, regardless of its age.
+        """
+        with self._lock:
+            entry = self._loaded_entries().get(key)
+        if entry is None:
+            return None
+        return dict(entry["metadata"])
+
+    def is_fresh(self, key: str, *, now: float | None = None) -> bool:
+        with self._lock:
+            entry = self._loaded_entries().get(key)
+        if entry is None:
+            return False
+        current_time = time.time() if now is None else now
+        return current_time - float(entry["probed_at"]) < self.ttl_seconds
+
+    def put_many(self, results: dict[str, dict[str, Any]], *, now: float | None = None) -> None:
+        """
+        Merge `results` into the file. The file is re-read first so entries
+        written by other workers in the meantime are kept.
+        """
+        if not results:
+            return
+        probed_at = time.time() if now is None else now
+        with self._lock:
+            entries = self._read_file()
+            for key, metadata in results.items():
+                entries[key] = {"probed_at": probed_at, "metadata": dict(metadata)}
+            try:
+                self._write_file(entries)
+            except OSError:
+                logger.warning("Could not write model capability store", extra={"path": str(self.path)}, exc_info=True)
+            self._entries = entries
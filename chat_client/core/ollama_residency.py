@@ -0,0 +1,187 @@
+"""
+Residency of Ollama models.
+
+Ollama loads a model into memory on its first request and unloads it once the
+model's `keep_alive` has passed (5 minutes by default). Loading a large model
+can take tens of seconds, which would otherwise be spent inside the first
+chat request without any feedback. `OllamaResidency`:
+
+- knows which models are loaded from `/api/ps`, cached for `PS_CACHE_SECONDS`,
+- loads models with an empty `/api/generate` request, at most one load per
+  model in flight (preloading at startup, warm-up from the model picker and
+  chat streams share it),
+- resolves the `keep_alive` sent with every request for a model.
+
+State is kept per process.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Iterable
+from typing import Any
+
+from chat_client.core.api_utils import _build_ollama_headers, _normalize_ollama_api_base_url
+from chat_client.tools import http_client
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+PROVIDER_NAME = "ollama"
+PS_CACHE_SECONDS = 5.0
+PS_TIMEOUT_SECONDS = 5.0
+LOAD_TIMEOUT_SECONDS = 300.0
+# How often a chat stream waiting for a load tells the client; also keeps the connection alive.
+LOAD_STATUS_INTERVAL_SECONDS = 2.0
+
+
+def normalize_model_name(model: str) -> str:
+    """
+    Ollama reports models with their tag; a bare name means `:latest`.
+    """
+    name = str(model or "").strip()
+    if name and ":" not in name.rsplit("/", 1)[-1]:
+        name = f"{name}:latest"
+    return name
+
+
+class OllamaResidency:
+    def __init__(
+        self,
+        *,
+        keep_alive: dict[str, Any] | None = None,
+        default_keep_alive: Any = None,
+        track_residency: bool = True,
+        clock: Any = time.monotonic,
+    ) -> None:
+        self.keep_alive = {normalize_model_name(name): value for name, value in (keep_alive or {}).items()}
+        self.default_keep_alive = default_keep_alive
+        self.track_residency = bool(track_residency)
+        self.clock = clock
+        # api base url -> (checked at, loaded model names)
+        self._loaded: dict[str, tuple[float, set[str]]] = {}
+        self._loads: dict[tuple[str, str], asyncio.Task] = {}
+
+    def keep_alive_for(self, model: str) -> Any:
+        """
+        The configured `keep_alive` of `model`, None for the server default.
+        """
+        value = self.keep_alive.get(normalize_model_name(model), self.default_keep_alive)
+        return None if value in (None, "") else value
+
+    async def loaded_models(self, provider_info: dict[str, Any], *, refresh: bool = False) -> set[str] | None:
+        """
+        Names of the models loaded on the provider's server, None when it cannot be asked.
+        """
+        api_base_url = _api_base_url(provider_info)
+        if not api_base_url:
+            return None
+        cached = self._loaded.get(api_base_url)
+        if cached is not None and not refresh and self.clock() - cached[0] < PS_CACHE_SECONDS:
+            return set(cached[1])
+        httpx = http_client.httpx
+        try:
+            response = await http_client.get(
+                f"{api_base_url}/ps",
+                headers=_build_ollama_headers(str(provider_info.get("api_key", "") or "")),
+                timeout=PS_TIMEOUT_SECONDS,
+            )
+            response.raise_for_status()
+            payload = response.json()
+        except (httpx.HTTPError, ValueError) as error:
+            logger.debug("Unable to list loaded Ollama models: %s", error)
+            return None
+        entries = payload.get("models") if isinstance(payload, dict) else None
+        loaded = {
+            normalize_model_name(str(entry.get("model") or entry.get("name")))
+            for entry in entries or []
+            if isinstance(entry, dict) and (entry.get("model") or entry.get("name"))
+        }
+        self._loaded[api_base_url] = (self.clock(), loaded)
+        return set(loaded)
+
+    async def is_resident(self, provider_info: dict[str, Any], model: str) -> bool | None:
+        """
+        Whether `model` is loaded, None when unknown.
+        """
+        loaded = await self.loaded_models(provider_info)
+        if loaded is None:
+            return None
+        return normalize_model_name(model) in loaded
+
+    def mark_resident(self, provider_info: dict[str, Any], model: str) -> None:
+        cached = self._loaded.get(_api_base_url(provider_info))
+        if cached is not None:
+            cached[1].add(normalize_model_name(model))
+
+    def load(self, provider_info: dict[str, Any], model: str) -> "asyncio.Task[bool]":
+        """
+        Task loading `model`, shared with any load of it already in flight.
+        It resolves to whether the model was loaded.
+        """
+        key = (_api_base_url(provider_info), normalize_model_name(model))
+        task = self._loads.get(key)
+        if task is None or task.done():
+            task = asyncio.create_task(self._load(provider_info, model))
+            self._loads[key] = task
+        return task
+
+    async def _load(self, provider_info: dict[str, Any], model: str) -> bool:
+        api_base_url = _api_base_url(provider_info)
+        if not api_base_url:
+            return False
+        payload: dict[str, Any] = {"model": model}
+        keep_alive = self.keep_alive_for(model)
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        started_at = time.perf_counter()
+        httpx = http_client.httpx
+        try:
+            response = await http_client.post(
+                f"{api_base_url}/generate",
+                json=payload,
+                headers=_build_ollama_headers(str(provider_info.get("api_key", "") or "")),
+                timeout=LOAD_TIMEOUT_SECONDS,
+            )
+            response.raise_for_status()
+        except httpx.HTTPError as error:
+            logger.warning("Unable to load Ollama model %s: %s", model, error)
+            return False
+        self.mark_resident(provider_info, model)
+        logger.info("Loaded Ollama model %s in %.1f s", model, time.perf_counter() - started_at)
+        return True
+
+    async def aclose(self) -> None:
+        """
+        Cancel the loads in flight and wait for them to finish.
+        """
+        loads = list(self._loads.values())
+        self._loads.clear()
+        for task in loads:
+            task.cancel()
+        await asyncio.gather(*loads, return_exceptions=True)
+
+    async def preload(self, provider_info: dict[str, Any], models: Iterable[str]) -> dict[str, bool]:
+        """
+        Load `models` one after another, so they do not compete for memory while loading.
+        """
+        results: dict[str, bool] = {}
+        for model in models:
+            if await self.is_resident(provider_info, model):
+                results[model] = True
+                continue
+            results[model] = await self.load(provider_info, model)
+        return results
+
+
+def _api_base_url(provider_info: dict[str, Any]) -> str:
+    if not isinstance(provider_info, dict):
+        return ""
+    return _normalize_ollama_api_base_url(str(provider_info.get("base_url", "") or ""))
+
+
+def from_config(config: Any) -> OllamaResidency:
+    return OllamaResidency(
+        keep_alive=getattr(config, "OLLAMA_KEEP_ALIVE", {}),
+        default_keep_alive=getattr(config, "OLLAMA_DEFAULT_KEEP_ALIVE", None),
+        track_residency=getattr(config, "OLLAMA_TRACK_RESIDENCY", True),
+    )
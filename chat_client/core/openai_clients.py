@@ -0,0 +1,40 @@
+"""
+Shared pool of OpenAI-compatible clients.
+
+Each client owns an HTTP connection pool, so clients are reused per provider
+endpoint instead of being constructed for every request.
+"""
+
+from collections.abc import Callable
+from typing import Any
+
+_ASYNC_CLIENTS: dict[tuple[Any, str, str], Any] = {}
+
+
+def _client_key(provider_info: dict[str, Any], client_cls: Callable[..., Any]) -> tuple[Any, str, str]:
+    base_url = str(provider_info.get("base_url", "") or "").strip()
+    api_key = str(provider_info.get("api_key", "") or "")
+    return (client_cls, base_url, api_key)
+
+
+def get_async_client(provider_info: dict[str, Any], *, client_cls: Callable[..., Any] | None = None) -> Any:
+    """
+    Return a shared async client for the provider endpoint, creating it on first use.
+    """
+    if client_cls is None:
+        from openai import AsyncOpenAI
+
+        client_cls = AsyncOpenAI
+    key = _client_key(provider_info, client_cls)
+    client = _ASYNC_CLIENTS.get(key)
+    if client is None:
+        client = client_cls(
+            api_key=provider_info.get("api_key"),
+            base_url=provider_info.get("base_url"),
+        )
+        _ASYNC_CLIENTS[key] = client
+    return client
+
+
+def clear_async_clients() -> None:
+    _ASYNC_CLIENTS.clear()
@@ -0,0 +1,159 @@
+"""
+Profiling helpers.
+
+`SamplingProfiler` samples the stacks of all threads of the current process
+from a background thread and renders them in the collapsed ("folded") format
+read by flamegraph.pl, speedscope and inferno. `CpuSplit` accounts the CPU
+time of named sections on the calling thread, so a chat turn's log line can
+tell event-loop CPU apart from time spent waiting on the provider or on tools.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from types import FrameType
+
+DEFAULT_SAMPLE_INTERVAL_SECONDS = 0.005
+MAX_PROFILE_SECONDS = 120.0
+MAX_STACK_DEPTH = 128
+
+
+class ProfilerBusyError(RuntimeError):
+    """
+    Raised when a profile is requested while another one is running.
+    """
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    label = f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+    # `;` separates frames and the last space separates the count in the folded format.
+    return label.replace(";", ":").replace(" ", "_")
+
+
+def _collapse(thread_name: str, frame: FrameType | None) -> str:
+    labels: list[str] = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(thread_name.replace(";", ":").replace(" ", "_"))
+    return ";".join(reversed(labels))
+
+
+class SamplingProfiler:
+    def __init__(self, interval_seconds: float = DEFAULT_SAMPLE_INTERVAL_SECONDS) -> None:
+        self.interval_seconds = max(0.001, float(interval_seconds))
+        self.samples: Counter[str] = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _sample(self) -> None:
+        own_ident = threading.get_ident()
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            self.samples[_collapse(thread_names.get(ident, f"thread-{ident}"), frame)] += 1
+        self.sample_count += 1
+
+    def _run(self, deadline: float) -> None:
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            self._sample()
+            self._stop.wait(self.interval_seconds)
+
+    def start(self, duration_seconds: float) -> None:
+        duration_seconds = min(max(0.0, float(duration_seconds)), MAX_PROFILE_SECONDS)
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(time.monotonic() + duration_seconds,), name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def join(self) -> None:
+        """
+        Wait until the profile duration has elapsed.
+        """
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.samples.items()))
+
+
+_profile_lock = threading.Lock()
+
+
+def profile_for(duration_seconds: float, interval_seconds: float = DEFAULT_SAMPLE_INTERVAL_SECONDS) -> SamplingProfiler:
+    """
+    Sample this process for `duration_seconds` (blocking the calling thread)
+    and return the profiler. Only one profile runs at a time per process.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusyError("A profile is already running in this worker")
+    try:
+        profiler = SamplingProfiler(interval_seconds)
+        profiler.start(duration_seconds)
+        profiler.join()
+        return profiler
+    finally:
+        _profile_lock.release()
+
+
+def write_collapsed(profiler: SamplingProfiler, directory: str | os.PathLike[str]) -> Path:
+    target_dir = Path(directory)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    target = target_dir / f"profile-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.folded"
+    target.write_text(profiler.collapsed(), encoding="utf-8")
+    return target
+
+
+class CpuSplit:
+    """
+    Wall time of a unit of work, split into CPU spent in named sections on the
+    calling thread and time spent waiting on named external calls.
+    """
+
+    def __init__(self) -> None:
+        self.started_at = time.perf_counter()
+        self.cpu_seconds: defaultdict[str, float] = defaultdict(float)
+        self.wait_seconds: defaultdict[str, float] = defaultdict(float)
+
+    @contextmanager
+    def cpu(self, section: str) -> Iterator[None]:
+        started = time.thread_time()
+        try:
+            yield
+        finally:
+            self.cpu_seconds[section] += time.thread_time() - started
+
+    @contextmanager
+    def wait(self, section: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.wait_seconds[section] += time.perf_counter() - started
+
+    def summary(self) -> dict[str, float]:
+        """
+        Milliseconds per section as flat `<section>_cpu_ms`/`<section>_wait_ms`
+        fields, plus `wall_ms` and the `loop_cpu_ms` total.
+        """
+        result = {"wall_ms": round((time.perf_counter() - self.started_at) * 1000, 2)}
+        result["loop_cpu_ms"] = round(sum(self.cpu_seconds.values()) * 1000, 2)
+        for section, seconds in sorted(self.cpu_seconds.items()):
+            result[f"{section}_cpu_ms"] = round(seconds * 1000, 2)
+        for section, seconds in sorted(self.wait_seconds.items()):
+            result[f"{section}_wait_ms"] = round(seconds * 1000, 2)
+        return result
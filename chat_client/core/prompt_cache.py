@@ -0,0 +1,138 @@
+"""
+Keep chat requests byte-stable across turns so provider prompt caches hit.
+
+Providers reuse work for the longest request prefix they have seen before
+(OpenAI prompt caching, llama.cpp and vLLM prefix reuse, Ollama's KV cache),
+but only when that prefix is identical byte for byte. In stable-prefix mode
+tool definitions are sent in a fixed order, and messages are sent with a
+fixed set of keys in a fixed order. The live tool loop appends assistant
+tool calls and tool results exactly as `build_model_messages_from_dialog_history`
+rebuilds them from the database on the next turn, so the previous turn's
+request is a prefix of the next one.
+"""
+
+import hashlib
+import json
+from typing import Any
+
+# Keys providers read from a chat message, in the order they are sent.
+MESSAGE_KEYS = ("role", "content", "tool_calls", "tool_call_id", "name")
+
+# When history has to be trimmed, whole exchanges are dropped in steps of this
+# many, so the trimmed prefix stays the same for several turns.
+HISTORY_DROP_STEP = 8
+
+
+def canonical_tool_arguments(raw_arguments: Any) -> str:
+    """
+    Compact ASCII JSON for tool call arguments, "{}" when they are not valid JSON.
+    """
+    if not isinstance(raw_arguments, str):
+        return "{}"
+    try:
+        parsed_arguments = json.loads(raw_arguments)
+    except json.JSONDecodeError:
+        return "{}"
+    return json.dumps(parsed_arguments, ensure_ascii=True, separators=(",", ":"))
+
+
+def serialize_tool_result(result: Any) -> str:
+    """
+    Text of a tool result as it is persisted and sent back to the model.
+    """
+    if isinstance(result, str):
+        return result
+    try:
+        return json.dumps(result, ensure_ascii=True)
+    except TypeError:
+        return str(result)
+
+
+def _stable_tool_call(tool_call: dict[str, Any]) -> dict[str, Any]:
+    function = tool_call.get("function", {}) if isinstance(tool_call.get("function"), dict) else {}
+    return {
+        "id": str(tool_call.get("id", "")),
+        "type": "function",
+        "function": {
+            "name": str(function.get("name", "")),
+            "arguments": canonical_tool_arguments(function.get("arguments", "{}")),
+        },
+    }
+
+
+def stable_messages(messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    Copies of `messages` with only the keys providers read, in a fixed order.
+    Bookkeeping keys such as `images` and `attachments` are already folded into
+    `content` by `normalize_chat_messages`.
+    """
+    stable: list[dict[str, Any]] = []
+    for message in messages:
+        if not isinstance(message, dict):
+            continue
+        item: dict[str, Any] = {}
+        for key in MESSAGE_KEYS:
+            if key not in message:
+                continue
+            if key == "tool_calls":
+                tool_calls = message.get("tool_calls") or []
+                if tool_calls:
+                    item["tool_calls"] = [_stable_tool_call(tool_call) for tool_call in tool_calls if isinstance(tool_call, dict)]
+            elif key == "content":
+                content = message.get("content")
+                item["content"] = content if isinstance(content, list) else str(content or "")
+            else:
+                item[key] = message[key]
+        stable.append(item)
+    return stable
+
+
+def stable_tool_definitions(tool_definitions: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    Tool definitions ordered by name, so MCP listing order does not move them.
+    """
+    return sorted(tool_definitions, key=lambda tool: str(tool.get("function", {}).get("name", "")) if isinstance(tool, dict) else "")
+
+
+def assistant_tool_call_messages(content: str, tool_calls: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    An assistant round that called tools, laid out as it is rebuilt from the
+    persisted turn: the text segment, then a message with the tool calls.
+    """
+    messages: list[dict[str, Any]] = []
+    if content.strip():
+        messages.append({"role": "assistant", "content": content})
+    messages.append({"role": "assistant", "content": "", "tool_calls": [_stable_tool_call(tool_call) for tool_call in tool_calls]})
+    return messages
+
+
+def prompt_cache_key(dialog_id: str) -> str:
+    """
+    Opaque per-dialog key for providers that route requests by cache key.
+    """
+    normalized = str(dialog_id or "").strip()
+    if not normalized:
+        return ""
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:32]
+
+
+def provider_cache_hints(provider_name: str, cache_key: str = "") -> dict[str, Any]:
+    """
+    Request body fields that turn on or route prompt caching for a provider.
+    Ollama and vLLM reuse matching prefixes without any hint.
+    """
+    normalized_provider = str(provider_name or "").strip().lower()
+    if normalized_provider == "openai" and cache_key:
+        return {"prompt_cache_key": cache_key}
+    if normalized_provider == "llama":
+        return {"cache_prompt": True}
+    return {}
+
+
+def cache_hit_ratio(cached_input_tokens: int, input_tokens: int) -> float:
+    """
+    Share of input tokens served from the provider's prompt cache.
+    """
+    if input_tokens <= 0:
+        return 0.0
+    return round(min(cached_input_tokens, input_tokens) / input_tokens, 4)
@@ -0,0 +1,215 @@
+"""
+Providers served by several endpoints.
+
+A `PROVIDERS` entry may list `endpoints` (base URLs, or dicts with `base_url`
+and an optional `api_key`) instead of a single `base_url`. Chat streams of
+such a provider are routed to one endpoint per model call:
+
+- "least_outstanding" (default) picks the endpoint with the fewest streams in
+  flight; "latency" weighs that by the endpoint's recent time to first token.
+- After `FAILURE_THRESHOLD` consecutive failures an endpoint's circuit opens
+  and it gets no traffic for a cooldown, which doubles each time a trial
+  request after the cooldown fails. Background health checks close it again.
+
+Pools are kept per process and created on first use.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+from chat_client.tools import http_client
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+ROUTING_STRATEGIES = ("least_outstanding", "latency")
+# Provider keys read by this module, not client options.
+ROUTING_KEYS = ("endpoints", "routing")
+FAILURE_THRESHOLD = 3
+BASE_COOLDOWN_SECONDS = 10.0
+MAX_COOLDOWN_SECONDS = 300.0
+LATENCY_EWMA_ALPHA = 0.3
+DEFAULT_HEALTH_CHECK_INTERVAL_SECONDS = 15.0
+HEALTH_CHECK_TIMEOUT_SECONDS = 5.0
+
+
+class NoHealthyEndpointError(RuntimeError):
+    """
+    Raised when every endpoint of a provider is ejected or was already tried.
+    """
+
+
+@dataclass
+class Endpoint:
+    base_url: str
+    api_key: str = ""
+    outstanding: int = 0
+    latency_seconds: float | None = None
+    consecutive_failures: int = 0
+    open_until: float = 0.0
+    cooldown_seconds: float = BASE_COOLDOWN_SECONDS
+    last_used: float = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        return self.consecutive_failures >= FAILURE_THRESHOLD
+
+
+@dataclass
+class EndpointPool:
+    name: str
+    endpoints: list[Endpoint]
+    strategy: str = "least_outstanding"
+    clock: Any = field(default=time.monotonic, repr=False)
+
+    def _available(self, endpoint: Endpoint, now: float) -> bool:
+        if not endpoint.is_open:
+            return True
+        # Half-open: one trial request once the cooldown has passed.
+        return now >= endpoint.open_until and endpoint.outstanding == 0
+
+    def _score(self, endpoint: Endpoint) -> tuple[float, float]:
+        if self.strategy == "latency":
+            # Endpoints without a measurement yet score 0 so they get tried.
+            return (endpoint.latency_seconds or 0.0) * (endpoint.outstanding + 1), endpoint.last_used
+        return float(endpoint.outstanding), endpoint.last_used
+
+    def acquire(self, exclude: Iterable[str] = ()) -> Endpoint:
+        """
+        Endpoint for the next request, skipping ejected ones and base URLs in
+        `exclude`. `release` it when the request is done.
+        """
+        now = self.clock()
+        excluded = set(exclude)
+        candidates = [endpoint for endpoint in self.endpoints if endpoint.base_url not in excluded and self._available(endpoint, now)]
+        if not candidates:
+            raise NoHealthyEndpointError(f"No healthy endpoint for provider {self.name}")
+        endpoint = min(candidates, key=self._score)
+        endpoint.outstanding += 1
+        endpoint.last_used = now
+        return endpoint
+
+    def release(self, endpoint: Endpoint, *, failed: bool = False) -> None:
+        endpoint.outstanding = max(endpoint.outstanding - 1, 0)
+        if failed:
+            self.record_failure(endpoint)
+        else:
+            self.record_success(endpoint)
+
+    def record_latency(self, endpoint: Endpoint, seconds: float) -> None:
+        if endpoint.latency_seconds is None:
+            endpoint.latency_seconds = seconds
+        else:
+            endpoint.latency_seconds += LATENCY_EWMA_ALPHA * (seconds - endpoint.latency_seconds)
+
+    def record_success(self, endpoint: Endpoint) -> None:
+        if endpoint.is_open:
+            logger.info("Provider endpoint recovered", extra={"provider": self.name, "base_url": endpoint.base_url})
+        endpoint.consecutive_failures = 0
+        endpoint.cooldown_seconds = BASE_COOLDOWN_SECONDS
+
+    def record_failure(self, endpoint: Endpoint) -> None:
+        was_open = endpoint.is_open
+        endpoint.consecutive_failures += 1
+        if not endpoint.is_open:
+            return
+        if was_open:
+            endpoint.cooldown_seconds = min(endpoint.cooldown_seconds * 2, MAX_COOLDOWN_SECONDS)
+        endpoint.open_until = self.clock() + endpoint.cooldown_seconds
+        logger.warning(
+            "Provider endpoint ejected",
+            extra={"provider": self.name, "base_url": endpoint.base_url, "cooldown_seconds": endpoint.cooldown_seconds},
+        )
+
+
+def parse_endpoints(provider_info: dict[str, Any]) -> list[Endpoint]:
+    default_api_key = str(provider_info.get("api_key", "") or "")
+    endpoints: list[Endpoint] = []
+    for entry in provider_info.get("endpoints") or []:
+        if isinstance(entry, str):
+            entry = {"base_url": entry}
+        if not isinstance(entry, dict):
+            continue
+        base_url = str(entry.get("base_url", "") or "").strip()
+        if base_url:
+            endpoints.append(Endpoint(base_url=base_url, api_key=str(entry.get("api_key", default_api_key) or "")))
+    return endpoints
+
+
+_POOLS: dict[str, EndpointPool] = {}
+
+
+def get_pool(provider_name: str, provider_info: dict[str, Any]) -> EndpointPool | None:
+    """
+    Shared pool of the provider's endpoints, None for single-endpoint providers.
+    """
+    if not isinstance(provider_info, dict) or not provider_info.get("endpoints"):
+        return None
+    pool = _POOLS.get(provider_name)
+    if pool is None:
+        endpoints = parse_endpoints(provider_info)
+        if not endpoints:
+            return None
+        strategy = str(provider_info.get("routing", "") or "").strip()
+        pool = EndpointPool(provider_name, endpoints, strategy if strategy in ROUTING_STRATEGIES else "least_outstanding")
+        _POOLS[provider_name] = pool
+    return pool
+
+
+def configure_pools(providers: dict[str, Any]) -> list[EndpointPool]:
+    """
+    Create the pools of all configured multi-endpoint providers, e.g. so they are health-checked from startup.
+    """
+    pools = [get_pool(str(name), info) for name, info in providers.items()] if isinstance(providers, dict) else []
+    return [pool for pool in pools if pool is not None]
+
+
+def clear_pools() -> None:
+    _POOLS.clear()
+
+
+def with_primary_endpoint(provider_info: dict[str, Any]) -> dict[str, Any]:
+    """
+    `provider_info` with `base_url` and `api_key` of its first endpoint filled
+    in, for callers that talk to a single endpoint (titles, capability probes).
+    """
+    if provider_info.get("base_url") or not provider_info.get("endpoints"):
+        return provider_info
+    endpoints = parse_endpoints(provider_info)
+    if not endpoints:
+        return provider_info
+    return {**provider_info, "base_url": endpoints[0].base_url, "api_key": endpoints[0].api_key}
+
+
+async def check_endpoint(pool: EndpointPool, endpoint: Endpoint) -> bool:
+    """
+    GET the endpoint's `/models`. Any answer below 500 counts as healthy.
+    """
+    headers = {"Authorization": f"Bearer {endpoint.api_key}"} if endpoint.api_key else None
+    httpx = http_client.httpx
+    try:
+        response = await http_client.get(f"{endpoint.base_url.rstrip('/')}/models", headers=headers, timeout=HEALTH_CHECK_TIMEOUT_SECONDS)
+        healthy = response.status_code < 500
+    except (httpx.HTTPError, OSError):
+        healthy = False
+    if healthy:
+        pool.record_success(endpoint)
+    else:
+        pool.record_failure(endpoint)
+    return healthy
+
+
+async def run_health_checks(interval_seconds: float = DEFAULT_HEALTH_CHECK_INTERVAL_SECONDS) -> None:
+    """
+    Check every endpoint of every pool each `interval_seconds` until cancelled.
+    """
+    while True:
+        await asyncio.sleep(interval_seconds)
+        checks = [check_endpoint(pool, endpoint) for pool in list(_POOLS.values()) for endpoint in pool.endpoints]
+        try:
+            await asyncio.gather(*checks)
+        except Exception:
+            logger.warning("Provider health check failed", exc_info=True)
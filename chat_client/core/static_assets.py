@@ -0,0 +1,197 @@
+"""
+Fingerprinted, precompressed static assets.
+
+`build_static_assets` copies every file under the static directory into
+`static/build/` with a content hash in its name, writes `.gz` (and `.br` when
+the optional `brotli` package is installed) siblings for text assets, and
+records the mapping in a manifest. Templates resolve asset URLs through
+`static_url`, which falls back to the plain versioned URL when no build exists.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import shutil
+from pathlib import Path
+from typing import Any
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from chat_client import __version__
+
+try:
+    import brotli  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates"
+BUILD_DIR_NAME = "build"
+MANIFEST_NAME = "manifest.json"
+HASH_LENGTH = 12
+COMPRESSIBLE_SUFFIXES = {".js", ".mjs", ".css", ".svg", ".json", ".webmanifest", ".txt", ".html", ".map"}
+MIN_COMPRESS_SIZE = 256
+SKIPPED_SUFFIXES = {".sh"}
+# Preferred first.
+ENCODING_SUFFIXES = (("br", ".br"), ("gzip", ".gz"))
+
+_MANIFEST: dict[str, str] | None = None
+
+
+def _fingerprinted_name(relative_path: Path, digest: str) -> Path:
+    return relative_path.with_name(f"{relative_path.stem}.{digest}{relative_path.suffix}")
+
+
+def _write_compressed_variants(target: Path, data: bytes) -> None:
+    gzipped = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(gzipped) < len(data):
+        target.with_name(target.name + ".gz").write_bytes(gzipped)
+    if brotli is not None:
+        compressed = brotli.compress(data, quality=11)
+        if len(compressed) < len(data):
+            target.with_name(target.name + ".br").write_bytes(compressed)
+
+
+def build_static_assets(static_dir: Path = STATIC_DIR) -> dict[str, str]:
+    """
+    Write fingerprinted copies and compressed siblings of all static files
+    into `static_dir/build` and return the logical-to-hashed path manifest.
+    """
+    build_dir = static_dir / BUILD_DIR_NAME
+    if build_dir.exists():
+        shutil.rmtree(build_dir)
+    build_dir.mkdir(parents=True)
+
+    manifest: dict[str, str] = {}
+    for source in sorted(static_dir.rglob("*")):
+        if not source.is_file() or build_dir in source.parents or source.suffix in SKIPPED_SUFFIXES:
+            continue
+        relative_path = source.relative_to(static_dir)
+        data = source.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        hashed_path = _fingerprinted_name(relative_path, digest)
+        target = build_dir / hashed_path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+        if source.suffix in COMPRESSIBLE_SUFFIXES and len(data) >= MIN_COMPRESS_SIZE:
+            _write_compressed_variants(target, data)
+        manifest[relative_path.as_posix()] = hashed_path.as_posix()
+
+    (build_dir / MANIFEST_NAME).write_text(json.dumps({"files": manifest}, indent=2, sort_keys=True), encoding="utf-8")
+    reload_manifest(static_dir)
+    return manifest
+
+
+def reload_manifest(static_dir: Path = STATIC_DIR) -> dict[str, str]:
+    global _MANIFEST
+    manifest_path = static_dir / BUILD_DIR_NAME / MANIFEST_NAME
+    try:
+        payload = json.loads(manifest_path.read_text(encoding="utf-8"))
+        files = payload.get("files", {}) if isinstance(payload, dict) else {}
+        _MANIFEST = {str(key): str(value) for key, value in files.items()} if isinstance(files, dict) else {}
+    except FileNotFoundError:
+        _MANIFEST = {}
+    except (OSError, ValueError):
+        logger.warning("Ignoring unreadable static manifest", extra={"path": str(manifest_path)})
+        _MANIFEST = {}
+    return _MANIFEST
+
+
+def static_url(path: str) -> str:
+    """
+    Return the URL of a static asset given its path relative to `static/`.
+    """
+    manifest = _MANIFEST if _MANIFEST is not None else reload_manifest()
+    relative_path = path.lstrip("/")
+    hashed_path = manifest.get(relative_path)
+    if hashed_path:
+        return f"/static/{BUILD_DIR_NAME}/{hashed_path}"
+    return f"/static/{relative_path}?version={__version__}"
+
+
+def generate_import_map(static_dir: Path = STATIC_DIR, module_dirs: tuple[str, ...] = ("js", "dist")) -> str:
+    """
+    Render the import map template. Keys are the logical module paths used in
+    `import` statements; values are resolved with `static_url` at render time.
+    """
+    imports: dict[str, str] = {}
+    for module_dir in module_dirs:
+        for js_file in sorted((static_dir / module_dir).rglob("*.js")):
+            relative_path = js_file.relative_to(static_dir).as_posix()
+            imports[f"/static/{relative_path}"] = "{{ static_url('" + relative_path + "') }}"
+    import_map = json.dumps({"imports": imports}, indent=4)
+    return f'<script type="importmap">\n{import_map}\n</script>'
+
+
+def write_import_map(static_dir: Path = STATIC_DIR, templates_dir: Path = TEMPLATES_DIR) -> Path:
+    target = templates_dir / "includes" / "importmap.html"
+    target.write_text(generate_import_map(static_dir), encoding="utf-8")
+    return target
+
+
+def accepted_encodings(accept_encoding: str) -> set[str]:
+    accepted: set[str] = set()
+    for item in accept_encoding.split(","):
+        token, _, params = item.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(token)
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves a `.br` or `.gz` sibling when the client accepts
+    it. ETag and Last-Modified come from the file actually sent, so each
+    encoding revalidates to 304 on its own.
+    """
+
+    def file_response(
+        self,
+        full_path: Any,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+        variants = [(encoding, f"{full_path}{suffix}") for encoding, suffix in ENCODING_SUFFIXES]
+        has_variants = False
+        for encoding, variant_path in variants:
+            try:
+                variant_stat = os.stat(variant_path)
+            except OSError:
+                continue
+            has_variants = True
+            if encoding not in accepted and "*" not in accepted:
+                continue
+            media_type = mimetypes.guess_type(str(full_path))[0] or "text/plain"
+            response: Response = FileResponse(variant_path, status_code=status_code, stat_result=variant_stat, media_type=media_type)
+            response.headers["content-encoding"] = encoding
+            response.headers["vary"] = "Accept-Encoding"
+            if self.is_not_modified(response.headers, request_headers):
+                return NotModifiedResponse(response.headers)
+            return response
+
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if has_variants:
+            response.headers["vary"] = "Accept-Encoding"
+        return response
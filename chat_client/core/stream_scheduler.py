@@ -0,0 +1,193 @@
+"""
+Admission control for chat streams.
+
+A stream needs a slot from its provider, its model and its user. Limits of 0
+(or names missing from the limit maps) are unlimited. Streams that cannot
+start wait in a queue per user. Users are served round-robin, so one user with
+many tabs does not delay everyone else. Each user's queue is FIFO. The
+scheduler is per process; with several workers the limits apply per worker.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from collections.abc import Hashable
+from typing import Any
+
+from chat_client.core import metrics
+
+DEFAULT_USER_LIMIT = 4
+DEFAULT_MAX_QUEUED = 100
+# How often a queued client is told its position; also keeps the connection alive.
+QUEUE_UPDATE_INTERVAL_SECONDS = 2.0
+
+
+class QueueFullError(RuntimeError):
+    """
+    Raised when a stream cannot be queued because the queue is full.
+    """
+
+
+class StreamTicket:
+    """
+    A stream's place in the scheduler. Release it when the stream ends,
+    whether it was admitted or not.
+    """
+
+    def __init__(self, scheduler: "StreamScheduler", user_id: Hashable, provider: str, model: str) -> None:
+        self.scheduler = scheduler
+        self.user_id = user_id
+        self.provider = provider
+        self.model = model
+        self.enqueued_at = time.perf_counter()
+        self.admitted = asyncio.get_running_loop().create_future()
+        self.released = False
+
+    @property
+    def is_admitted(self) -> bool:
+        return self.admitted.done() and not self.admitted.cancelled()
+
+    def position(self) -> int:
+        """
+        1-based place in the round-robin order, 0 once admitted. Limits may
+        still let streams of other providers or models start earlier.
+        """
+        return self.scheduler.position(self)
+
+    async def wait(self, timeout: float | None = None) -> bool:
+        """
+        Wait up to `timeout` seconds for admission. Returns whether the stream may start.
+        """
+        if self.admitted.done():
+            return True
+        try:
+            await asyncio.wait_for(asyncio.shield(self.admitted), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def release(self) -> None:
+        self.scheduler.release(self)
+
+
+class StreamScheduler:
+    def __init__(
+        self,
+        *,
+        provider_limits: dict[str, int] | None = None,
+        model_limits: dict[str, int] | None = None,
+        user_limit: int = DEFAULT_USER_LIMIT,
+        max_queued: int = DEFAULT_MAX_QUEUED,
+    ) -> None:
+        self.provider_limits = {str(name): max(int(limit), 0) for name, limit in (provider_limits or {}).items()}
+        self.model_limits = {str(name): max(int(limit), 0) for name, limit in (model_limits or {}).items()}
+        self.user_limit = max(int(user_limit), 0)
+        self.max_queued = max(int(max_queued), 0)
+        self._running: dict[tuple[str, Hashable], int] = {}
+        # user_id -> that user's waiting tickets; the first user is served next.
+        self._queues: OrderedDict[Hashable, deque[StreamTicket]] = OrderedDict()
+
+    @property
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def running(self, kind: str, name: Hashable) -> int:
+        return self._running.get((kind, name), 0)
+
+    def enqueue(self, user_id: Hashable, provider: str, model: str) -> StreamTicket:
+        """
+        Ticket for a new stream, admitted at once when nothing is waiting ahead of it.
+        """
+        ticket = StreamTicket(self, user_id, provider, model)
+        if not self._queues and self._fits(ticket):
+            self._admit(ticket)
+            return ticket
+        if self.max_queued and self.queued >= self.max_queued:
+            raise QueueFullError("The server is busy. Please try again shortly.")
+        self._queues.setdefault(user_id, deque()).append(ticket)
+        metrics.CHAT_STREAM_QUEUE_DEPTH.inc()
+        self._dispatch()
+        return ticket
+
+    def release(self, ticket: StreamTicket) -> None:
+        if ticket.released:
+            return
+        ticket.released = True
+        if ticket.admitted.done():
+            for key in self._keys(ticket):
+                self._running[key] -= 1
+                if not self._running[key]:
+                    del self._running[key]
+        else:
+            ticket.admitted.cancel()
+            queue = self._queues.get(ticket.user_id)
+            if queue is not None and ticket in queue:
+                queue.remove(ticket)
+                metrics.CHAT_STREAM_QUEUE_DEPTH.dec()
+                if not queue:
+                    del self._queues[ticket.user_id]
+        self._dispatch()
+
+    def position(self, ticket: StreamTicket) -> int:
+        if ticket.admitted.done():
+            return 0
+        queue = self._queues.get(ticket.user_id)
+        if queue is None or ticket not in queue:
+            return 0
+        own_index = queue.index(ticket)
+        ahead = own_index
+        turns = own_index + 1
+        for user_id, other_queue in self._queues.items():
+            if user_id == ticket.user_id:
+                # Users behind this one in the rotation get one turn fewer before it.
+                turns = own_index
+                continue
+            ahead += min(len(other_queue), turns)
+        return ahead + 1
+
+    def _limits(self, ticket: StreamTicket) -> list[tuple[tuple[str, Hashable], int]]:
+        return [
+            (("provider", ticket.provider), self.provider_limits.get(ticket.provider, 0)),
+            (("model", ticket.model), self.model_limits.get(ticket.model, 0)),
+            (("user", ticket.user_id), self.user_limit),
+        ]
+
+    def _keys(self, ticket: StreamTicket) -> list[tuple[str, Hashable]]:
+        return [key for key, _ in self._limits(ticket)]
+
+    def _fits(self, ticket: StreamTicket) -> bool:
+        return all(not limit or self._running.get(key, 0) < limit for key, limit in self._limits(ticket))
+
+    def _admit(self, ticket: StreamTicket) -> None:
+        for key in self._keys(ticket):
+            self._running[key] = self._running.get(key, 0) + 1
+        ticket.admitted.set_result(None)
+        metrics.CHAT_STREAM_QUEUE_WAIT.observe(time.perf_counter() - ticket.enqueued_at, provider=ticket.provider)
+
+    def _dispatch(self) -> None:
+        """
+        Admit waiting streams, one per user per pass, until a full pass admits none.
+        """
+        admitted = True
+        while admitted:
+            admitted = False
+            for user_id in list(self._queues):
+                queue = self._queues[user_id]
+                if not self._fits(queue[0]):
+                    continue
+                self._admit(queue.popleft())
+                metrics.CHAT_STREAM_QUEUE_DEPTH.dec()
+                # Served users go to the back of the rotation.
+                del self._queues[user_id]
+                if queue:
+                    self._queues[user_id] = queue
+                admitted = True
+
+
+def from_config(config: Any) -> StreamScheduler:
+    return StreamScheduler(
+        provider_limits=getattr(config, "CHAT_STREAM_PROVIDER_LIMITS", {}),
+        model_limits=getattr(config, "CHAT_STREAM_MODEL_LIMITS", {}),
+        user_limit=getattr(config, "CHAT_STREAM_USER_LIMIT", DEFAULT_USER_LIMIT),
+        max_queued=getattr(config, "CHAT_STREAM_MAX_QUEUED", DEFAULT_MAX_QUEUED),
+    )
@@ -1,3 +1,4 @@
+import functools
 import logging
 import os
 from collections.abc import Mapping
@@ -6,9 +7,10 @@ from typing import Any, overload
 from jinja2 import Environment, FileSystemLoader
 from starlette.background import BackgroundTask
 from starlette.requests import Request
-from starlette.staticfiles import StaticFiles
 from starlette.templating import Jinja2Templates, _TemplateResponse
 
+from chat_client.core.static_assets import PrecompressedStaticFiles, static_url
+
 logger: logging.Logger = logging.getLogger(__name__)
 
 
@@ -80,9 +82,11 @@ def _get_template_dirs():
     return template_dirs
 
 
+@functools.cache
 def get_templates():
     """
-    Returns a Jinja2Templates object with the template directories set.
+    Returns the Jinja2Templates object with the template directories set.
+    It is shared by all endpoint modules, so each template is compiled once.
     """
     template_dirs = _get_template_dirs()
 
@@ -92,17 +96,30 @@ def get_templates():
         trim_blocks=True,
         lstrip_blocks=True,
     )
+    env.globals["static_url"] = static_url
     templates = AppTemplates(env=env)
     return templates
 
 
+def precompile_templates() -> int:
+    """
+    Compile every template into the shared environment's cache and return how many there are.
+    """
+    env = get_templates().env
+    names = env.list_templates()
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
 def get_static_files():
     """
     Returns a StaticFiles object with the static directory set.
+    Precompressed `.br`/`.gz` siblings written by `chat-client build-static` are preferred.
     """
     current_dir = os.path.dirname(os.path.abspath(__file__))
     static_dir = os.path.join(current_dir, "..", "static")
-    static_files = StaticFiles(directory=static_dir)
+    static_files = PrecompressedStaticFiles(directory=static_dir)
     return static_files
 
 
@@ -5,12 +5,15 @@ from typing import Any, Callable
 
 logger = logging.getLogger(__name__)
 INTERNAL_TOOL_PARAMETER_NAMES = {"attachment_host_dir", "docker_image"}
+DEFAULT_TOOL_CACHE_TTL_SECONDS = 60 * 60
 _warned_inferred_tool_names: set[str] = set()
 
 
 @dataclass(frozen=True)
 class LocalToolExecutionOptions:
     mount_workspace: bool | None = None
+    # Results of cacheable tools are reused for this many seconds; None when not cacheable.
+    cache_ttl_seconds: float | None = None
 
 
 @dataclass(frozen=True)
@@ -42,13 +45,23 @@ def _normalize_input_schema(value: Any) -> dict[str, Any]:
     return {"type": "object", "properties": {}}
 
 
+def _normalize_cache_ttl_seconds(value: dict[str, Any]) -> float | None:
+    if value.get("cacheable") is not True:
+        return None
+    ttl_seconds = value.get("cache_ttl_seconds", DEFAULT_TOOL_CACHE_TTL_SECONDS)
+    if isinstance(ttl_seconds, bool) or not isinstance(ttl_seconds, (int, float)) or ttl_seconds <= 0:
+        return None
+    return float(ttl_seconds)
+
+
 def _normalize_execution_options(value: Any) -> LocalToolExecutionOptions:
     if not isinstance(value, dict):
         return LocalToolExecutionOptions()
     mount_workspace = value.get("mount_workspace")
-    if isinstance(mount_workspace, bool):
-        return LocalToolExecutionOptions(mount_workspace=mount_workspace)
-    return LocalToolExecutionOptions()
+    return LocalToolExecutionOptions(
+        mount_workspace=mount_workspace if isinstance(mount_workspace, bool) else None,
+        cache_ttl_seconds=_normalize_cache_ttl_seconds(value),
+    )
 
 
 def _json_type_for_annotation(annotation: Any) -> str | None:
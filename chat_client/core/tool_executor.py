@@ -1,12 +1,15 @@
+import asyncio
 import inspect
 import logging
+from collections.abc import Awaitable, Coroutine
 from typing import Any, Callable
 
 from chat_client.core import attachments as attachment_service
 from chat_client.core import chat_service
 from chat_client.core import mcp_client
 from chat_client.core.tool_config import LocalToolSpec, normalize_local_tool_specs
-from chat_client.tools.python_runtime import PythonRuntimeError
+from chat_client.core.tool_result_cache import ToolResultCache
+from chat_client.tools import http_client
 
 
 def normalize_local_tool_definition(
@@ -145,6 +148,24 @@ def get_local_tool_execution_options(
     return {"mount_workspace": spec.execution.mount_workspace}
 
 
+def get_local_tool_cache_ttl(
+    name: str,
+    *,
+    tool_registry: dict[str, Callable[..., Any]],
+    local_tool_definitions: list[dict[str, Any]] | Any,
+) -> float | None:
+    spec = find_local_tool_spec(
+        name,
+        get_local_tool_specs(
+            tool_registry=tool_registry,
+            local_tool_definitions=local_tool_definitions,
+        ),
+    )
+    if spec is None:
+        return None
+    return spec.execution.cache_ttl_seconds
+
+
 def local_tool_accepts_attachment_workspace(name: str, tool_registry: dict[str, Callable[..., Any]]) -> bool:
     tool = tool_registry.get(name)
     if not callable(tool):
@@ -174,21 +195,19 @@ def tool_uses_workspace_mount(
     return local_tool_accepts_attachment_workspace(name, tool_registry)
 
 
-def execute_tool(
+def _prepare_tool_call(
     tool_call: dict[str, Any],
     *,
     logger: logging.Logger,
     tools: list[dict[str, Any]],
-    tool_registry: dict[str, Callable[..., Any]],
-    local_tool_definitions: list[dict[str, Any]] | Any,
     has_local_tool_registry: bool,
     has_mcp_config: bool,
-    mcp_server_url: str,
-    mcp_auth_token: str,
-    mcp_timeout_seconds: float,
-    log_context: dict[str, Any] | None = None,
-    argument_overrides: dict[str, Any] | None = None,
-) -> Any:
+    argument_overrides: dict[str, Any] | None,
+) -> tuple[str, dict[str, Any], dict[str, Any]]:
+    """
+    Validate a tool call and return its function name, parsed arguments and the
+    arguments to call a local tool with.
+    """
     func_name = str(tool_call.get("function", {}).get("name", "")).strip()
     if not func_name:
         raise chat_service.ToolArgumentsError("Tool call is missing function name.")
@@ -208,38 +227,75 @@ def execute_tool(
     call_args = dict(args)
     if isinstance(argument_overrides, dict):
         call_args.update(argument_overrides)
+    return func_name, args, call_args
+
+
+def _log_tool_start(
+    logger: logging.Logger, event: str, tool_call: dict[str, Any], func_name: str, log_context: dict[str, Any] | None
+) -> None:
+    logger.info(
+        "%s: %s",
+        event,
+        {
+            "tool_name": func_name,
+            "arguments_preview": chat_service.summarize_tool_call_for_log(tool_call)["arguments_preview"],
+            **(log_context or {}),
+        },
+    )
+
+
+def _local_tool_error(func_name: str, error: Exception) -> chat_service.ToolExecutionError:
+    if isinstance(error, TypeError):
+        return chat_service.ToolArgumentsError(f'Tool "{func_name}" was called with invalid arguments: {error}')
+    return chat_service.ToolBackendError(f'Tool "{func_name}" failed: {error}')
+
+
+async def _run_detached(coroutine: Coroutine[Any, Any, Any]) -> Any:
+    try:
+        return await coroutine
+    finally:
+        await http_client.aclose()
+
+
+def execute_tool(
+    tool_call: dict[str, Any],
+    *,
+    logger: logging.Logger,
+    tools: list[dict[str, Any]],
+    tool_registry: dict[str, Callable[..., Any]],
+    local_tool_definitions: list[dict[str, Any]] | Any,
+    has_local_tool_registry: bool,
+    has_mcp_config: bool,
+    mcp_server_url: str,
+    mcp_auth_token: str,
+    mcp_timeout_seconds: float,
+    log_context: dict[str, Any] | None = None,
+    argument_overrides: dict[str, Any] | None = None,
+) -> Any:
+    func_name, args, call_args = _prepare_tool_call(
+        tool_call,
+        logger=logger,
+        tools=tools,
+        has_local_tool_registry=has_local_tool_registry,
+        has_mcp_config=has_mcp_config,
+        argument_overrides=argument_overrides,
+    )
 
     if has_local_tool_registry and func_name in tool_registry:
-        logger.info(
-            "%s: %s",
-            "chat.tool.local.start",
-            {
-                "tool_name": func_name,
-                "arguments_preview": chat_service.summarize_tool_call_for_log(tool_call)["arguments_preview"],
-                **(log_context or {}),
-            },
-        )
+        _log_tool_start(logger, "chat.tool.local.start", tool_call, func_name, log_context)
         try:
-            return tool_registry[func_name](**call_args)
-        except TypeError as error:
-            raise chat_service.ToolArgumentsError(f'Tool "{func_name}" was called with invalid arguments: {error}') from error
+            result = tool_registry[func_name](**call_args)
+            if inspect.iscoroutine(result):
+                # An async tool called from a worker thread; the chat loop uses `execute_tool_async` instead.
+                result = asyncio.run(_run_detached(result))
+            return result
         except chat_service.ToolExecutionError:
             raise
-        except PythonRuntimeError as error:
-            raise chat_service.ToolBackendError(f'Tool "{func_name}" failed: {error}') from error
         except Exception as error:
-            raise chat_service.ToolBackendError(f'Tool "{func_name}" failed: {error}') from error
+            raise _local_tool_error(func_name, error) from error
 
     if has_mcp_config:
-        logger.info(
-            "%s: %s",
-            "chat.tool.mcp.start",
-            {
-                "tool_name": func_name,
-                "arguments_preview": chat_service.summarize_tool_call_for_log(tool_call)["arguments_preview"],
-                **(log_context or {}),
-            },
-        )
+        _log_tool_start(logger, "chat.tool.mcp.start", tool_call, func_name, log_context)
         try:
             return mcp_client.call_tool(
                 server_url=mcp_server_url,
@@ -254,6 +310,61 @@ def execute_tool(
     raise chat_service.ToolNotConfiguredError(f'No tool backend is configured for tool "{func_name}".')
 
 
+async def execute_tool_async(
+    tool_call: dict[str, Any],
+    *,
+    logger: logging.Logger,
+    tools: list[dict[str, Any]],
+    tool_registry: dict[str, Callable[..., Any]],
+    local_tool_definitions: list[dict[str, Any]] | Any,
+    has_local_tool_registry: bool,
+    has_mcp_config: bool,
+    mcp_server_url: str,
+    mcp_auth_token: str,
+    mcp_timeout_seconds: float,
+    log_context: dict[str, Any] | None = None,
+    argument_overrides: dict[str, Any] | None = None,
+) -> Any:
+    """
+    Like `execute_tool`, but async local tools are awaited on the event loop.
+    Sync tools and MCP calls still run in a worker thread.
+    """
+    func_name = str(tool_call.get("function", {}).get("name", "")).strip()
+    tool = tool_registry.get(func_name) if has_local_tool_registry else None
+    if tool is None or not inspect.iscoroutinefunction(tool):
+        return await asyncio.to_thread(
+            execute_tool,
+            tool_call,
+            logger=logger,
+            tools=tools,
+            tool_registry=tool_registry,
+            local_tool_definitions=local_tool_definitions,
+            has_local_tool_registry=has_local_tool_registry,
+            has_mcp_config=has_mcp_config,
+            mcp_server_url=mcp_server_url,
+            mcp_auth_token=mcp_auth_token,
+            mcp_timeout_seconds=mcp_timeout_seconds,
+            log_context=log_context,
+            argument_overrides=argument_overrides,
+        )
+
+    func_name, _args, call_args = _prepare_tool_call(
+        tool_call,
+        logger=logger,
+        tools=tools,
+        has_local_tool_registry=has_local_tool_registry,
+        has_mcp_config=has_mcp_config,
+        argument_overrides=argument_overrides,
+    )
+    _log_tool_start(logger, "chat.tool.local.start", tool_call, func_name, log_context)
+    try:
+        return await tool(**call_args)
+    except chat_service.ToolExecutionError:
+        raise
+    except Exception as error:
+        raise _local_tool_error(func_name, error) from error
+
+
 def execute_local_tool_with_runtime_context(
     tool_call: dict[str, Any],
     *,
@@ -304,3 +415,102 @@ def execute_local_tool_with_runtime_context(
         mcp_timeout_seconds=mcp_timeout_seconds,
         log_context=log_context,
     )
+
+
+async def execute_local_tool_with_runtime_context_async(
+    tool_call: dict[str, Any],
+    *,
+    logger: logging.Logger,
+    tools: list[dict[str, Any]],
+    tool_registry: dict[str, Callable[..., Any]],
+    local_tool_definitions: list[dict[str, Any]] | Any,
+    has_local_tool_registry: bool,
+    has_mcp_config: bool,
+    mcp_server_url: str,
+    mcp_auth_token: str,
+    mcp_timeout_seconds: float,
+    log_context: dict[str, Any] | None = None,
+    available_attachments: list[dict[str, Any]] | None = None,
+) -> Any:
+    """
+    Async counterpart of `execute_local_tool_with_runtime_context`. Tools that
+    get the attachment workspace mounted keep running in a worker thread.
+    """
+    func_name = str(tool_call.get("function", {}).get("name", "")).strip()
+    if tool_uses_workspace_mount(
+        func_name,
+        tool_registry=tool_registry,
+        local_tool_definitions=local_tool_definitions,
+    ):
+        return await asyncio.to_thread(
+            execute_local_tool_with_runtime_context,
+            tool_call,
+            logger=logger,
+            tools=tools,
+            tool_registry=tool_registry,
+            local_tool_definitions=local_tool_definitions,
+            has_local_tool_registry=has_local_tool_registry,
+            has_mcp_config=has_mcp_config,
+            mcp_server_url=mcp_server_url,
+            mcp_auth_token=mcp_auth_token,
+            mcp_timeout_seconds=mcp_timeout_seconds,
+            log_context=log_context,
+            available_attachments=available_attachments,
+        )
+
+    return await execute_tool_async(
+        tool_call,
+        logger=logger,
+        tools=tools,
+        tool_registry=tool_registry,
+        local_tool_definitions=local_tool_definitions,
+        has_local_tool_registry=has_local_tool_registry,
+        has_mcp_config=has_mcp_config,
+        mcp_server_url=mcp_server_url,
+        mcp_auth_token=mcp_auth_token,
+        mcp_timeout_seconds=mcp_timeout_seconds,
+        log_context=log_context,
+    )
+
+
+async def execute_tool_cached(
+    tool_call: dict[str, Any],
+    run: Callable[[], Awaitable[Any]],
+    *,
+    result_cache: ToolResultCache | None,
+    ttl_seconds: float | None,
+    logger: logging.Logger,
+    log_context: dict[str, Any] | None = None,
+) -> Any:
+    """
+    Await `run` (an `execute_tool_async` call), reusing a cached result when
+    the tool is cacheable and was called with the same arguments within
+    `ttl_seconds`.
+    """
+    if result_cache is None or not ttl_seconds:
+        return await run()
+
+    func_name = str(tool_call.get("function", {}).get("name", "")).strip()
+    try:
+        args = chat_service.parse_tool_arguments(tool_call, logger)
+    except chat_service.ToolArgumentsError:
+        return await run()
+
+    key = result_cache.make_key(func_name, args)
+    lookup = await result_cache.get(key, ttl_seconds)
+    logger.info(
+        "%s: %s",
+        "chat.tool.cache.hit" if lookup.hit else "chat.tool.cache.miss",
+        {
+            "tool_name": func_name,
+            "cache_tier": lookup.tier,
+            **result_cache.stats(),
+            **(log_context or {}),
+        },
+    )
+    if lookup.hit:
+        return lookup.value
+
+    result = await run()
+    await result_cache.set(key, result, ttl_seconds)
+    return result
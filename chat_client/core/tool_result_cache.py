@@ -0,0 +1,133 @@
+"""
+Result cache for deterministic tools.
+
+A local tool opts in through its LOCAL_TOOL_DEFINITIONS entry:
+`"execution": {"cacheable": True, "cache_ttl_seconds": 3600}`. Results are
+keyed by tool name and canonical JSON arguments, kept in an in-process LRU and,
+when a session factory is given, in the `cache` table so all workers share
+them, read through the given `MemoryCache`. Only successful, JSON-serializable results are cached; a failing
+database tier is treated as a miss.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from chat_client.database.cache import DatabaseCache, MemoryCache
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 1024
+KEY_PREFIX = "tool_result:"
+
+
+@dataclass(frozen=True)
+class CacheLookup:
+    hit: bool
+    value: Any = None
+    # "memory" or "database" for hits.
+    tier: str = ""
+
+
+class ToolResultCache:
+    """
+    Two-tier cache of tool results. Used from the event loop only.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        session_factory: Callable[[], Any] | None = None,
+        memory: MemoryCache | None = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.session_factory = session_factory
+        self.memory = memory
+        self.hits = 0
+        self.misses = 0
+        # key -> (expires_at, JSON text); values are decoded on every hit so callers never share an object.
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    @staticmethod
+    def make_key(tool_name: str, arguments: dict[str, Any]) -> str:
+        canonical_arguments = json.dumps(arguments, ensure_ascii=True, separators=(",", ":"), sort_keys=True)
+        digest = hashlib.sha256(canonical_arguments.encode("utf-8")).hexdigest()
+        return f"{KEY_PREFIX}{tool_name}:{digest}"
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "cache_hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "cache_entries": len(self._entries),
+        }
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, key: str, expires_at: float, encoded: str) -> None:
+        self._entries[key] = (expires_at, encoded)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str, ttl_seconds: float) -> CacheLookup:
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, encoded = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return CacheLookup(hit=True, value=json.loads(encoded), tier="memory")
+            del self._entries[key]
+
+        stored = await self._get_stored(key, ttl_seconds)
+        if isinstance(stored, dict) and "result" in stored:
+            expires_at = float(stored.get("stored_at", 0)) + ttl_seconds
+            if expires_at > now:
+                encoded = json.dumps(stored["result"])
+                self._remember(key, expires_at, encoded)
+                self.hits += 1
+                return CacheLookup(hit=True, value=json.loads(encoded), tier="database")
+
+        self.misses += 1
+        return CacheLookup(hit=False)
+
+    async def set(self, key: str, result: Any, ttl_seconds: float) -> bool:
+        try:
+            encoded = json.dumps(result)
+        except (TypeError, ValueError):
+            return False
+        stored_at = time.time()
+        self._remember(key, stored_at + ttl_seconds, encoded)
+        await self._set_stored(key, {"stored_at": stored_at, "result": result}, ttl_seconds)
+        return True
+
+    async def _get_stored(self, key: str, ttl_seconds: float) -> Any:
+        if self.session_factory is None:
+            return None
+        try:
+            async with self.session_factory() as session:
+                return await DatabaseCache(session, memory=self.memory).get(key, expire_in=max(1, math.ceil(ttl_seconds)))
+        except Exception:
+            logger.warning("Tool result cache read failed", exc_info=True)
+            return None
+
+    async def _set_stored(self, key: str, payload: dict[str, Any], ttl_seconds: float) -> None:
+        if self.session_factory is None:
+            return
+        try:
+            async with self.session_factory() as session:
+                await DatabaseCache(session, memory=self.memory).set(key, payload, ttl_seconds=ttl_seconds)
+        except Exception:
+            logger.warning("Tool result cache write failed", exc_info=True)
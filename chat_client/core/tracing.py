@@ -0,0 +1,366 @@
+"""
+Request tracing.
+
+Spans are opened with `start_span` and nest through a context variable, so
+spans opened in `asyncio.to_thread` workers become children of the span that
+was current when the thread was started. Finished spans are batched by a
+background thread and written by an exporter: `OtlpHttpSpanExporter` posts
+OTLP/JSON to a collector, `JsonFileSpanExporter` appends JSON lines to a file.
+
+Tracing is off until `configure_tracing` is called. While off, `start_span`
+yields a shared non-recording span and costs one context-variable lookup.
+"""
+
+import contextvars
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Protocol
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+DEFAULT_SERVICE_NAME = "chat-client"
+DEFAULT_OTLP_ENDPOINT = "http://localhost:4318/v1/traces"
+MAX_BATCH_SIZE = 256
+MAX_QUEUE_SIZE = 4096
+SCHEDULE_DELAY_SECONDS = 2.0
+
+# OTLP status codes
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+SPAN_KIND_INTERNAL = 1
+
+
+def new_trace_id() -> str:
+    return f"{random.getrandbits(128):032x}"
+
+
+def _new_span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    trace_id: str
+    span_id: str
+
+
+class Span:
+    def __init__(
+        self,
+        name: str,
+        context: SpanContext | None,
+        parent_span_id: str = "",
+        attributes: dict[str, Any] | None = None,
+        start_time_ns: int | None = None,
+    ) -> None:
+        self.name = name
+        self.context = context
+        self.parent_span_id = parent_span_id
+        self.attributes: dict[str, Any] = {key: value for key, value in (attributes or {}).items() if value is not None}
+        self.events: list[tuple[str, int, dict[str, Any]]] = []
+        self.start_time_ns = time.time_ns() if start_time_ns is None else start_time_ns
+        self.end_time_ns = 0
+        self.status_code = STATUS_UNSET
+        self.status_message = ""
+
+    @property
+    def recording(self) -> bool:
+        return self.context is not None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if self.recording and value is not None:
+            self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes: Any) -> None:
+        if self.recording:
+            self.events.append((name, time.time_ns(), {key: value for key, value in attributes.items() if value is not None}))
+
+    def record_exception(self, error: BaseException) -> None:
+        if not self.recording:
+            return
+        self.status_code = STATUS_ERROR
+        self.status_message = str(error)
+        self.add_event("exception", **{"exception.type": error.__class__.__name__, "exception.message": str(error)})
+
+    def end(self, end_time_ns: int | None = None) -> None:
+        if not self.recording or self.end_time_ns:
+            return
+        self.end_time_ns = time.time_ns() if end_time_ns is None else end_time_ns
+        processor = _processor
+        if processor is not None:
+            processor.on_end(self)
+
+    def to_dict(self) -> dict[str, Any]:
+        assert self.context is not None
+        return {
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start_time_ns,
+            "end_time_unix_nano": self.end_time_ns,
+            "duration_ms": round((self.end_time_ns - self.start_time_ns) / 1_000_000, 3),
+            "attributes": self.attributes,
+            "events": [{"name": name, "time_unix_nano": at, "attributes": attributes} for name, at, attributes in self.events],
+            "status": {"code": self.status_code, "message": self.status_message},
+        }
+
+
+_NON_RECORDING_SPAN = Span("", None)
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar("chat_client_current_span", default=None)
+
+
+def current_span() -> Span:
+    return _current_span.get() or _NON_RECORDING_SPAN
+
+
+def _new_span(name: str, parent: SpanContext | None, trace_id: str | None, attributes: dict[str, Any], start_time_ns: int | None) -> Span:
+    if parent is None:
+        current = _current_span.get()
+        parent = current.context if current is not None else None
+    if parent is not None:
+        context = SpanContext(parent.trace_id, _new_span_id())
+        return Span(name, context, parent.span_id, attributes, start_time_ns)
+    return Span(name, SpanContext(trace_id or new_trace_id(), _new_span_id()), "", attributes, start_time_ns)
+
+
+@contextmanager
+def start_span(name: str, *, parent: SpanContext | None = None, trace_id: str | None = None, **attributes: Any) -> Iterator[Span]:
+    """
+    Open a span as the child of `parent`, or of the current span. A span
+    without either starts a trace, using `trace_id` when given.
+    """
+    if _processor is None:
+        yield _NON_RECORDING_SPAN
+        return
+
+    span = _new_span(name, parent, trace_id, attributes, None)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except GeneratorExit:
+        span.set_attribute("closed_early", True)
+        raise
+    except BaseException as error:
+        span.record_exception(error)
+        raise
+    finally:
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # An async generator closed from another task runs this in a different context.
+            pass
+        span.end()
+
+
+def record_span(name: str, start_time_ns: int, end_time_ns: int, **attributes: Any) -> None:
+    """
+    Record an already finished span as a child of the current span.
+    """
+    if _processor is None:
+        return
+    _new_span(name, None, None, attributes, start_time_ns).end(end_time_ns)
+
+
+class SpanExporter(Protocol):
+    def export(self, spans: list[Span]) -> None: ...
+
+    def shutdown(self) -> None: ...
+
+
+class JsonFileSpanExporter:
+    """
+    Appends one JSON object per span to `path`.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def export(self, spans: list[Span]) -> None:
+        lines = "".join(json.dumps(span.to_dict(), default=str, ensure_ascii=False) + "\n" for span in spans)
+        with self.path.open("a", encoding="utf-8") as handle:
+            handle.write(lines)
+
+    def shutdown(self) -> None:
+        return None
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, str):
+        return {"stringValue": value}
+    return {"stringValue": json.dumps(value, default=str, ensure_ascii=False)}
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+def build_otlp_payload(spans: list[Span], service_name: str = DEFAULT_SERVICE_NAME) -> dict[str, Any]:
+    """
+    Build an OTLP/JSON `ExportTraceServiceRequest` body.
+    """
+    otlp_spans = []
+    for span in spans:
+        assert span.context is not None
+        otlp_span: dict[str, Any] = {
+            "traceId": span.context.trace_id,
+            "spanId": span.context.span_id,
+            "name": span.name,
+            "kind": SPAN_KIND_INTERNAL,
+            "startTimeUnixNano": str(span.start_time_ns),
+            "endTimeUnixNano": str(span.end_time_ns),
+            "attributes": _otlp_attributes(span.attributes),
+            "events": [
+                {"timeUnixNano": str(at), "name": name, "attributes": _otlp_attributes(attributes)} for name, at, attributes in span.events
+            ],
+            "status": {"code": span.status_code, "message": span.status_message},
+        }
+        if span.parent_span_id:
+            otlp_span["parentSpanId"] = span.parent_span_id
+        otlp_spans.append(otlp_span)
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": _otlp_attributes({"service.name": service_name})},
+                "scopeSpans": [{"scope": {"name": "chat_client"}, "spans": otlp_spans}],
+            }
+        ]
+    }
+
+
+class OtlpHttpSpanExporter:
+    """
+    Posts spans as OTLP/JSON to a collector's `/v1/traces` endpoint.
+    """
+
+    def __init__(
+        self,
+        endpoint: str = DEFAULT_OTLP_ENDPOINT,
+        *,
+        headers: dict[str, str] | None = None,
+        service_name: str = DEFAULT_SERVICE_NAME,
+        timeout_seconds: float = 10.0,
+    ) -> None:
+        import httpx
+
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self._client = httpx.Client(headers=headers or {}, timeout=timeout_seconds)
+
+    def export(self, spans: list[Span]) -> None:
+        response = self._client.post(self.endpoint, json=build_otlp_payload(spans, self.service_name))
+        response.raise_for_status()
+
+    def shutdown(self) -> None:
+        self._client.close()
+
+
+class _BatchSpanProcessor:
+    """
+    Hands finished spans to a background thread that exports them in batches.
+    Spans are dropped, not blocked on, when the queue is full.
+    """
+
+    def __init__(self, exporter: SpanExporter, *, schedule_delay_seconds: float = SCHEDULE_DELAY_SECONDS) -> None:
+        self.exporter = exporter
+        self.schedule_delay_seconds = schedule_delay_seconds
+        self.dropped = 0
+        self._queue: queue.Queue[Span | None] = queue.Queue(maxsize=MAX_QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def on_end(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _export(self, batch: list[Span]) -> None:
+        if not batch:
+            return
+        try:
+            self.exporter.export(batch)
+        except Exception:
+            logger.warning("Could not export %d spans", len(batch), exc_info=True)
+
+    def _run(self) -> None:
+        batch: list[Span] = []
+        deadline = time.monotonic() + self.schedule_delay_seconds
+        while True:
+            try:
+                span = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                span = _NON_RECORDING_SPAN
+            if span is None:
+                self._export(batch)
+                return
+            if span.recording:
+                batch.append(span)
+            if len(batch) >= MAX_BATCH_SIZE or time.monotonic() >= deadline:
+                self._export(batch)
+                batch = []
+                deadline = time.monotonic() + self.schedule_delay_seconds
+
+    def shutdown(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+        self.exporter.shutdown()
+
+
+_processor: _BatchSpanProcessor | None = None
+
+
+def build_exporter(
+    kind: str,
+    *,
+    otlp_endpoint: str = DEFAULT_OTLP_ENDPOINT,
+    otlp_headers: dict[str, str] | None = None,
+    json_file: str | Path = "data/traces.jsonl",
+    service_name: str = DEFAULT_SERVICE_NAME,
+) -> SpanExporter | None:
+    """
+    Build the exporter named by the `TRACING_EXPORTER` setting: "otlp",
+    "json" or "" (tracing off).
+    """
+    normalized = str(kind or "").strip().lower()
+    if not normalized:
+        return None
+    if normalized == "otlp":
+        return OtlpHttpSpanExporter(otlp_endpoint, headers=otlp_headers, service_name=service_name)
+    if normalized == "json":
+        return JsonFileSpanExporter(json_file)
+    raise ValueError(f"Unknown tracing exporter: {kind!r}")
+
+
+def configure_tracing(exporter: SpanExporter | None, *, schedule_delay_seconds: float = SCHEDULE_DELAY_SECONDS) -> None:
+    global _processor
+    shutdown_tracing()
+    if exporter is not None:
+        _processor = _BatchSpanProcessor(exporter, schedule_delay_seconds=schedule_delay_seconds)
+
+
+def shutdown_tracing() -> None:
+    """
+    Export the spans queued so far and stop the exporter thread.
+    """
+    global _processor
+    processor = _processor
+    _processor = None
+    if processor is not None:
+        processor.shutdown()
@@ -1,61 +1,245 @@
 # chat_client/cache.py
 
+"""
+Key/value cache stored in the `cache` table.
+
+Writes are single `INSERT ... ON CONFLICT DO UPDATE` upserts on the unique
+key. A row written with `ttl_seconds` gets an `expires_at` time; expired rows
+are never returned and are removed in bulk by `sweep_expired`, which
+`run_sweeper` calls periodically. Values whose JSON is at least
+`compress_min_bytes` long are stored zlib-compressed.
+
+A `MemoryCache` can be put in front of the table. Entries there are only
+trusted for `max_age_seconds`, because other workers write the same table.
+`MEMORY_CACHE` is the one the app shares between its caches in a worker.
+"""
+
+import asyncio
+import base64
 import json
+import logging
 import time
+import zlib
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
 from typing import Any
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
-import logging
+
 from chat_client.models import Cache
 
 logger: logging.Logger = logging.getLogger(__name__)
 
+DEFAULT_MEMORY_MAX_ENTRIES = 1024
+DEFAULT_MEMORY_MAX_AGE_SECONDS = 5.0
+DEFAULT_COMPRESS_MIN_BYTES = 16 * 1024
+DEFAULT_SWEEP_INTERVAL_SECONDS = 600.0
+COMPRESSED_PREFIX = "zlib:"
+# SQLite allows 32766 bound parameters per statement; stay well below.
+BATCH_SIZE = 500
+
+
+def encode_value(data: Any, compress_min_bytes: int | None = DEFAULT_COMPRESS_MIN_BYTES) -> str:
+    """
+    JSON text of `data`, zlib-compressed and base64-encoded when it is large.
+    JSON never starts with the compression prefix, so both forms can share a column.
+    """
+    encoded = json.dumps(data)
+    if compress_min_bytes is None or len(encoded) < compress_min_bytes:
+        return encoded
+    compressed = base64.b64encode(zlib.compress(encoded.encode("utf-8"))).decode("ascii")
+    return COMPRESSED_PREFIX + compressed
+
+
+def decode_value(value: str) -> Any:
+    if value.startswith(COMPRESSED_PREFIX):
+        value = zlib.decompress(base64.b64decode(value[len(COMPRESSED_PREFIX) :])).decode("utf-8")
+    return json.loads(value)
+
+
+def _is_fresh(stored_at: int, expires_at: int, now: float, expire_in: int) -> bool:
+    if expires_at and expires_at <= now:
+        return False
+    return not expire_in or now - stored_at < expire_in
+
+
+class MemoryCache:
+    """
+    Bounded in-process LRU of decoded-on-read cache rows, shared by the
+    `DatabaseCache` instances given it.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MEMORY_MAX_ENTRIES, max_age_seconds: float = DEFAULT_MEMORY_MAX_AGE_SECONDS) -> None:
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        # key -> (cached_at, stored_at, expires_at, JSON text)
+        self._entries: OrderedDict[str, tuple[float, int, int, str]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, now: float, expire_in: int = 0) -> tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        cached_at, stored_at, expires_at, encoded = entry
+        if now - cached_at >= self.max_age_seconds or not _is_fresh(stored_at, expires_at, now, expire_in):
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, json.loads(encoded)
+
+    def put(self, key: str, now: float, stored_at: int, expires_at: int, encoded: str) -> None:
+        self._entries[key] = (now, stored_at, expires_at, encoded)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+MEMORY_CACHE = MemoryCache()
+
 
 class DatabaseCache:
-    def __init__(self, session: AsyncSession):
+    def __init__(
+        self,
+        session: AsyncSession,
+        memory: MemoryCache | None = None,
+        compress_min_bytes: int | None = DEFAULT_COMPRESS_MIN_BYTES,
+    ):
         """
-        Initialize with an Async SQLAlchemy Session.
+        Initialize with an Async SQLAlchemy Session, and optionally a shared
+        in-process tier and the value size from which values are compressed
+        (None to never compress).
         """
         self.session = session
+        self.memory = memory
+        self.compress_min_bytes = compress_min_bytes
 
-    async def set(self, key: str, data: Any) -> bool:
+    async def set(self, key: str, data: Any, ttl_seconds: float | None = None) -> bool:
         """
-        Set a cache value. Delete old, insert new.
+        Set a cache value, expiring after `ttl_seconds` when given.
         """
-        # Delete existing
-        await self.session.execute(delete(Cache).where(Cache.key == key))
-        # Insert new
-        new_cache = Cache(key=key, value=json.dumps(data), unix_timestamp=int(time.time()))
-        self.session.add(new_cache)
+        return await self.set_many({key: data}, ttl_seconds=ttl_seconds)
+
+    async def set_many(self, items: dict[str, Any], ttl_seconds: float | None = None) -> bool:
+        """
+        Upsert several cache values in one transaction.
+        """
+        if not items:
+            return True
+        now = int(time.time())
+        expires_at = now + max(1, int(ttl_seconds)) if ttl_seconds else 0
+        rows = [
+            {
+                "key": key,
+                "value": encode_value(data, self.compress_min_bytes),
+                "unix_timestamp": now,
+                "expires_at": expires_at,
+            }
+            for key, data in items.items()
+        ]
+        for start in range(0, len(rows), BATCH_SIZE):
+            statement = insert(Cache).values(rows[start : start + BATCH_SIZE])
+            statement = statement.on_conflict_do_update(
+                index_elements=[Cache.key],
+                set_={
+                    "value": statement.excluded.value,
+                    "unix_timestamp": statement.excluded.unix_timestamp,
+                    "expires_at": statement.excluded.expires_at,
+                },
+            )
+            await self.session.execute(statement)
         await self.session.commit()
+        if self.memory is not None:
+            for key, data in items.items():
+                self.memory.put(key, time.time(), now, expires_at, json.dumps(data))
         return True
 
     async def get(self, key: str, expire_in: int = 0) -> Any:
         """
-        Get value by key, optionally check expiration.
+        Get value by key, None when missing, expired or older than `expire_in` seconds.
         """
-        result = await self.session.execute(select(Cache).where(Cache.key == key))
-        cache_row = result.scalar_one_or_none()
-
-        if cache_row is None or cache_row.value is None:
-            return None
+        return (await self.get_many([key], expire_in=expire_in)).get(key)
 
-        if expire_in == 0:
-            return json.loads(cache_row.value)
+    async def get_many(self, keys: Iterable[str], expire_in: int = 0) -> dict[str, Any]:
+        """
+        Values of the given keys that are present and fresh, by key.
+        """
+        now = time.time()
+        found: dict[str, Any] = {}
+        missing: list[str] = []
+        for key in dict.fromkeys(keys):
+            if self.memory is not None:
+                hit, value = self.memory.get(key, now, expire_in)
+                if hit:
+                    found[key] = value
+                    continue
+            missing.append(key)
 
-        current_time = int(time.time())
-        if current_time - cache_row.unix_timestamp < expire_in:
-            return json.loads(cache_row.value)
-        else:
-            await self.session.execute(delete(Cache).where(Cache.cache_id == cache_row.cache_id))
-            await self.session.commit()
-
-        return None
+        for start in range(0, len(missing), BATCH_SIZE):
+            batch = missing[start : start + BATCH_SIZE]
+            result = await self.session.execute(
+                select(Cache.key, Cache.value, Cache.unix_timestamp, Cache.expires_at).where(Cache.key.in_(batch))
+            )
+            for row_key, value, stored_at, expires_at in result.all():
+                if value is None or not _is_fresh(stored_at, expires_at, now, expire_in):
+                    continue
+                data = decode_value(value)
+                found[row_key] = data
+                if self.memory is not None:
+                    self.memory.put(row_key, now, stored_at, expires_at, json.dumps(data))
+        return found
 
     async def delete(self, cache_id: int) -> None:
         """
         Delete a cache value by cache_id.
         """
+        if self.memory is not None:
+            key = await self.session.scalar(select(Cache.key).where(Cache.cache_id == cache_id))
+            if key is not None:
+                self.memory.discard(key)
         await self.session.execute(delete(Cache).where(Cache.cache_id == cache_id))
         await self.session.commit()
         return None
+
+    async def delete_key(self, key: str) -> None:
+        """
+        Delete a cache value by key.
+        """
+        if self.memory is not None:
+            self.memory.discard(key)
+        await self.session.execute(delete(Cache).where(Cache.key == key))
+        await self.session.commit()
+
+
+async def sweep_expired(session: AsyncSession, now: float | None = None) -> int:
+    """
+    Delete rows whose `expires_at` has passed. Returns the number of rows deleted.
+    """
+    cutoff = int(time.time() if now is None else now)
+    result = await session.execute(delete(Cache).where(Cache.expires_at > 0, Cache.expires_at <= cutoff))
+    await session.commit()
+    return int(getattr(result, "rowcount", 0) or 0)
+
+
+async def run_sweeper(session_factory: Callable[[], Any], interval_seconds: float = DEFAULT_SWEEP_INTERVAL_SECONDS) -> None:
+    """
+    Sweep expired rows every `interval_seconds` until cancelled.
+    """
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with session_factory() as session:
+                deleted = await sweep_expired(session)
+            if deleted:
+                logger.info("Swept %d expired cache row(s)", deleted)
+        except Exception:
+            logger.warning("Cache sweep failed", exc_info=True)
@@ -1,6 +1,8 @@
-from alembic.config import Config
-from alembic import command
 import logging
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from alembic.config import Config
 
 logger: logging.Logger = logging.getLogger(__name__)
 
@@ -10,7 +12,9 @@ class Migration:
         self.db_path = db_path
         self.migrations_package = migrations_package
 
-    def get_alembic_config(self) -> Config:
+    def get_alembic_config(self) -> "Config":
+        from alembic.config import Config
+
         cfg = Config()
         cfg.set_main_option("script_location", self.migrations_package)
         # Alembic expects a SQLAlchemy URL
@@ -19,6 +23,8 @@ class Migration:
         return cfg
 
     def run_migrations(self):
+        from alembic import command
+
         cfg = self.get_alembic_config()
         command.upgrade(cfg, "head")
 
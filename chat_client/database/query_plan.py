@@ -0,0 +1,74 @@
+"""
+Helpers for checking the SQL issued by the repositories.
+
+`QueryRecorder` captures the statements an engine executes, and
+`explain_query_plan` asks SQLite how it would run one of them, so tests and
+benchmarks can assert on query counts (N+1 regressions) and on full table
+scans (missing indexes).
+"""
+
+import re
+import sqlite3
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import event
+from typing_extensions import Self
+
+_SCAN_PATTERN = re.compile(r"^SCAN (\w+)")
+
+
+@dataclass(frozen=True)
+class RecordedQuery:
+    statement: str
+    parameters: Any
+
+
+class QueryRecorder:
+    """
+    Records the statements executed through `engine` (sync or async) while
+    used as a context manager. Bulk `executemany` inserts are not recorded.
+    """
+
+    def __init__(self, engine: Any) -> None:
+        self.engine = getattr(engine, "sync_engine", engine)
+        self.queries: list[RecordedQuery] = []
+
+    def _record(self, _connection, _cursor, statement, parameters, _context, executemany) -> None:
+        if not executemany:
+            self.queries.append(RecordedQuery(statement, parameters))
+
+    def __enter__(self) -> Self:
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *_exc_info) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+    def clear(self) -> None:
+        self.queries.clear()
+
+    def reads_and_writes(self) -> list[RecordedQuery]:
+        """
+        The SELECT, UPDATE and DELETE statements, which are the ones with a plan worth checking.
+        """
+        return [query for query in self.queries if query.statement.lstrip().split(" ", 1)[0].upper() in {"SELECT", "UPDATE", "DELETE"}]
+
+
+def explain_query_plan(connection: sqlite3.Connection, statement: str, parameters: Any = ()) -> list[str]:
+    rows = connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ()).fetchall()
+    return [str(row[-1]) for row in rows]
+
+
+def full_table_scans(plan: Iterable[str], tables: Iterable[str]) -> list[str]:
+    """
+    Plan lines that visit every row of one of `tables`, with or without an index.
+    """
+    watched = set(tables)
+    scans = []
+    for line in plan:
+        match = _SCAN_PATTERN.match(line.strip())
+        if match and match.group(1) in watched:
+            scans.append(line.strip())
+    return scans
@@ -0,0 +1,297 @@
+"""
+Deterministic synthetic data for repository benchmarks and query-plan tests.
+
+`populate` fills an already migrated SQLite database with many light users
+plus one heavy user whose dialogs are long, so repository calls for the heavy
+user run against realistic table sizes. Rows are written with plain sqlite3
+in a single transaction.
+"""
+
+import random
+import sqlite3
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from chat_client.core.attachments import make_image_attachment_ref
+
+SEARCH_NEEDLE = "zanzibar"
+_WORDS = [
+    "the",
+    "model",
+    "returned",
+    "a",
+    "result",
+    "for",
+    "this",
+    "query",
+    "and",
+    "the",
+    "tool",
+    "output",
+    "contains",
+    "rows",
+    "of",
+    "data",
+    "with",
+    "values",
+    "def",
+    "return",
+    "import",
+    "class",
+    "async",
+    "await",
+    "dialog",
+    "message",
+    "assistant",
+    "user",
+    "token",
+    "stream",
+    "content",
+    "function",
+    "error",
+    "status",
+    "response",
+    "request",
+    "python",
+    "print",
+    "json",
+    "value",
+    "key",
+    "index",
+    "count",
+    "total",
+    "average",
+    "result",
+]
+_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+@dataclass(frozen=True)
+class SyntheticDataSpec:
+    users: int = 1000
+    dialogs_per_user: int = 5
+    turns_per_dialog: int = 10
+    heavy_user_dialogs: int = 200
+    heavy_dialog_turns: int = 300
+    tool_calls_per_turn: int = 1
+    attachment_every_turns: int = 5
+    search_hit_every_dialogs: int = 25
+    seed: int = 7
+
+    def scaled(self, factor: float) -> "SyntheticDataSpec":
+        """
+        Same shape with the user count and the heavy user's data scaled by `factor`.
+        """
+        return SyntheticDataSpec(
+            users=max(1, round(self.users * factor)),
+            dialogs_per_user=self.dialogs_per_user,
+            turns_per_dialog=self.turns_per_dialog,
+            heavy_user_dialogs=max(2, round(self.heavy_user_dialogs * factor)),
+            heavy_dialog_turns=max(2, round(self.heavy_dialog_turns * factor)),
+            tool_calls_per_turn=self.tool_calls_per_turn,
+            attachment_every_turns=self.attachment_every_turns,
+            search_hit_every_dialogs=self.search_hit_every_dialogs,
+            seed=self.seed,
+        )
+
+
+@dataclass(frozen=True)
+class SyntheticDataSummary:
+    heavy_user_id: int
+    heavy_dialog_id: str
+    heavy_dialog_ids: list[str]
+    row_counts: dict[str, int]
+
+
+def _insert_many(connection: sqlite3.Connection, table: str, rows: list[dict]) -> None:
+    if not rows:
+        return
+    columns = list(rows[0])
+    placeholders = ", ".join(f":{column}" for column in columns)
+    connection.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows)
+
+
+class _Writer:
+    # Insert order for `flush`, parents before children so foreign keys resolve.
+    TABLES = ("dialog", "message", "attachment", "image", "message_attachment", "message_image", "assistant_turn_event", "llm_usage_event")
+
+    def __init__(self, connection: sqlite3.Connection, spec: SyntheticDataSpec) -> None:
+        self.connection = connection
+        self.spec = spec
+        self.rng = random.Random(spec.seed)
+        self.clock = datetime(2026, 1, 1, 8, 0, 0)
+        self.rows: dict[str, list[dict]] = {table: [] for table in self.TABLES}
+        self.pending_rows = 0
+        self.next_message_id = 1
+        self.next_attachment_id = 1
+        self.next_image_id = 1
+
+    def _text(self, words: int) -> str:
+        return " ".join(self.rng.choice(_WORDS) for _ in range(words))
+
+    def _tick(self) -> str:
+        self.clock += timedelta(seconds=self.rng.randint(5, 90))
+        return self.clock.strftime(_TIMESTAMP_FORMAT)
+
+    def _uuid(self) -> str:
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def _add(self, table: str, **row) -> None:
+        self.rows[table].append(row)
+        self.pending_rows += 1
+
+    def add_user(self, index: int) -> int:
+        cursor = self.connection.execute(
+            "INSERT INTO users (password_hash, email, random, created, verified, locked) VALUES (?, ?, ?, ?, 1, 0)",
+            ("x", f"user{index}@example.com", self._uuid(), self._tick()),
+        )
+        assert cursor.lastrowid is not None
+        return int(cursor.lastrowid)
+
+    def add_dialog(self, user_id: int, turns: int, *, search_hit: bool) -> str:
+        dialog_id = self._uuid()
+        title = self._text(5)
+        created = self._tick()
+        sequence_index = 0
+        for turn in range(turns):
+            sequence_index += 1
+            message_id = self.next_message_id
+            self.next_message_id += 1
+            content = self._text(30)
+            if search_hit and turn == turns // 2:
+                content = f"{content} {SEARCH_NEEDLE}"
+            self._add(
+                "message",
+                message_id=message_id,
+                dialog_id=dialog_id,
+                user_id=user_id,
+                role="user",
+                content=content,
+                sequence_index=sequence_index,
+                active=1,
+                created=self._tick(),
+            )
+            every = self.spec.attachment_every_turns
+            if every and turn % every == every - 1:
+                self._add_attachments(user_id, message_id)
+
+            turn_id = self._uuid()
+            for round_index in range(self.spec.tool_calls_per_turn + 1):
+                sequence_index += 1
+                created_at = self._tick()
+                is_tool_call = round_index < self.spec.tool_calls_per_turn
+                self._add(
+                    "assistant_turn_event",
+                    dialog_id=dialog_id,
+                    user_id=user_id,
+                    turn_id=turn_id,
+                    event_type="tool_call" if is_tool_call else "assistant_segment",
+                    sequence_index=sequence_index,
+                    reasoning_text=self._text(20 if is_tool_call else 40),
+                    content_text="" if is_tool_call else self._text(120),
+                    tool_call_id=f"call_{self.rng.getrandbits(48):x}" if is_tool_call else "",
+                    tool_name="python_tool" if is_tool_call else "",
+                    arguments_json='{"code": "print(1)"}' if is_tool_call else "{}",
+                    result_text=self._text(40) if is_tool_call else "",
+                    error_text="",
+                    created=created_at,
+                )
+                input_tokens = self.rng.randint(200, 4000)
+                output_tokens = self.rng.randint(20, 800)
+                self._add(
+                    "llm_usage_event",
+                    dialog_id=dialog_id,
+                    user_id=user_id,
+                    dialog_title=title,
+                    turn_id=turn_id,
+                    round_index=round_index,
+                    provider="openai",
+                    model="gpt-test",
+                    call_type="chat",
+                    request_id=self._uuid(),
+                    input_tokens=input_tokens,
+                    cached_input_tokens=input_tokens // 4,
+                    output_tokens=output_tokens,
+                    total_tokens=input_tokens + output_tokens,
+                    reasoning_tokens=output_tokens // 3,
+                    input_price_per_million="0.75",
+                    cached_input_price_per_million="0.075",
+                    output_price_per_million="4.50",
+                    currency="USD",
+                    cost_amount="0",
+                    usage_source="provider",
+                    created=created_at,
+                )
+
+        updated = self.clock.strftime(_TIMESTAMP_FORMAT)
+        self._add("dialog", dialog_id=dialog_id, user_id=user_id, title=title, created=created, updated=updated, public=0)
+        return dialog_id
+
+    def _add_attachments(self, user_id: int, message_id: int) -> None:
+        created = self.clock.strftime(_TIMESTAMP_FORMAT)
+        file_id = self.next_attachment_id
+        image_attachment_id = file_id + 1
+        image_id = self.next_image_id
+        self.next_attachment_id += 2
+        self.next_image_id += 1
+        for attachment_id, name, content_type, size_bytes in (
+            (file_id, "report.csv", "text/csv", 2048),
+            (image_attachment_id, "plot.png", "image/png", 40960),
+        ):
+            self._add(
+                "attachment",
+                attachment_id=attachment_id,
+                user_id=user_id,
+                name=name,
+                storage_path=f"{user_id}/{attachment_id}",
+                content_type=content_type,
+                size_bytes=size_bytes,
+                created=created,
+            )
+        self._add("message_attachment", message_id=message_id, attachment_id=file_id, created=created)
+        self._add("image", image_id=image_id, data_url=make_image_attachment_ref(image_attachment_id), created=created)
+        self._add("message_image", message_id=message_id, image_id=image_id, created=created)
+
+    def flush(self) -> None:
+        for table in self.TABLES:
+            _insert_many(self.connection, table, self.rows[table])
+            self.rows[table].clear()
+        self.pending_rows = 0
+
+
+def populate(database_path: str | Path, spec: SyntheticDataSpec | None = None) -> SyntheticDataSummary:
+    """
+    Fill a migrated, empty database with `spec` (the default spec when None).
+    User 1 is the heavy user and its first dialog is the long one.
+    """
+    spec = spec or SyntheticDataSpec()
+    connection = sqlite3.connect(str(database_path))
+    try:
+        writer = _Writer(connection, spec)
+        with connection:
+            heavy_user_id = writer.add_user(0)
+            heavy_dialog_ids = []
+            for index in range(spec.heavy_user_dialogs):
+                turns = spec.heavy_dialog_turns if index == 0 else spec.turns_per_dialog
+                search_hit = bool(spec.search_hit_every_dialogs) and index % spec.search_hit_every_dialogs == 1
+                heavy_dialog_ids.append(writer.add_dialog(heavy_user_id, turns, search_hit=search_hit))
+            writer.flush()
+            for index in range(1, spec.users):
+                user_id = writer.add_user(index)
+                for _ in range(spec.dialogs_per_user):
+                    writer.add_dialog(user_id, spec.turns_per_dialog, search_hit=False)
+                if writer.pending_rows > 200_000:
+                    writer.flush()
+            writer.flush()
+        tables = ("users", "dialog", "message", "assistant_turn_event", "llm_usage_event", "attachment", "image")
+        row_counts = {table: int(connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]) for table in tables}
+    finally:
+        connection.close()
+    return SyntheticDataSummary(
+        heavy_user_id=heavy_user_id,
+        heavy_dialog_id=heavy_dialog_ids[0],
+        heavy_dialog_ids=heavy_dialog_ids,
+        row_counts=row_counts,
+    )
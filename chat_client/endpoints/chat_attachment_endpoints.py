@@ -13,7 +13,7 @@ class UploadWithRead(Protocol):
     filename: str | None
     content_type: str | None
 
-    async def read(self) -> bytes:
+    async def read(self, size: int = -1) -> bytes:
         raise NotImplementedError
 
 
@@ -76,27 +76,26 @@ async def upload_attachment(
 
         filename = str(getattr(upload, "filename", "") or "").strip()
         content_type = str(getattr(upload, "content_type", "") or "").strip().lower()
-        file_bytes = await upload.read()
-        size_bytes = len(file_bytes)
         safe_name, normalized_content_type = attachment_service.validate_attachment_metadata(
             filename,
             content_type,
-            size_bytes,
+            0,
         )
-        attachment_id: int | None = await attachment_repository.create_attachment(
-            user_id=user_id,
-            name=safe_name,
-            content_type=normalized_content_type or content_type,
-            size_bytes=size_bytes,
-            storage_path="",
-        )
-        if not attachment_id:
-            raise RuntimeError("Failed to create attachment id")
-
-        storage_path = attachment_service.build_attachment_storage_path(attachment_id, safe_name)
-        storage_path.parent.mkdir(parents=True, exist_ok=True)
-        storage_path.write_bytes(file_bytes)
-        await attachment_repository.update_attachment_storage_path(user_id, int(attachment_id), str(storage_path))
+        staged = await attachment_service.stage_upload_blob(upload, safe_name)
+        try:
+            attachment_id: int | None = await attachment_repository.create_attachment(
+                user_id=user_id,
+                name=safe_name,
+                content_type=normalized_content_type or content_type,
+                size_bytes=staged.size_bytes,
+                storage_path=str(staged.storage_path),
+                sha256=staged.sha256,
+            )
+            if not attachment_id:
+                raise RuntimeError("Failed to create attachment id")
+            attachment_service.commit_staged_blob(staged)
+        finally:
+            attachment_service.discard_staged_blob(staged)
         attachment = await attachment_repository.get_attachment(user_id, int(attachment_id))
         return json_success(**attachment_service.serialize_attachment_response(attachment))
     except attachment_service.AttachmentValidationError as e:
@@ -137,7 +136,8 @@ async def preview_attachment(
 
         filename = str(attachment.get("name", "") or storage_path.name)
         content_type = str(attachment.get("content_type", "") or "").strip().lower()
-        suffix = storage_path.suffix.lower()
+        # Blob paths are content hashes without a suffix.
+        suffix = Path(filename).suffix.lower()
 
         if attachment_preview_is_image(content_type, suffix):
             response = FileResponse(str(storage_path), media_type=content_type or None, filename=filename)
@@ -1,4 +1,3 @@
-import asyncio
 import logging
 
 from starlette.requests import Request
@@ -26,6 +25,7 @@ async def get_chat_config(
         "vision_models": vision_models,
         "model_capabilities": build_model_capabilities(),
         "model_providers": build_model_providers(),
+        "ollama_warm_up_on_select": bool(getattr(config, "OLLAMA_WARM_UP_ON_SELECT", False)),
     }
     return json_success(**config_values)
 
@@ -36,6 +36,24 @@ async def list_chat_models(request: Request, *, get_model_names, get_model_entri
     return json_success(model_names=model_names, models=model_entries)
 
 
+async def warm_up_model(
+    request: Request,
+    *,
+    require_user_id_json,
+    parse_json_payload,
+    warm_up_model_request,
+    start_model_warm_up,
+    json_success,
+    json_error,
+):
+    await require_user_id_json(request, message="You must be logged in to warm up a model")
+    payload = await parse_json_payload(request, warm_up_model_request)
+    model_name = str(payload.model or "").strip()
+    if not model_name:
+        return json_error("Missing model", status_code=400)
+    return json_success(status=start_model_warm_up(model_name))
+
+
 async def create_dialog(
     request: Request,
     *,
@@ -184,8 +202,7 @@ async def create_dialog_title(
         if dialog_title_model:
             title_source = "model"
             title_model = dialog_title_model
-            generated_title = await asyncio.to_thread(
-                create_dialog_title_fn,
+            generated_title = await create_dialog_title_fn(
                 first_user_message,
                 dialog_title_model,
                 user_id,
@@ -340,10 +357,17 @@ async def get_dialog_usage(
             start_datetime=date_range.start_datetime,
             end_datetime_exclusive=date_range.end_datetime_exclusive,
         )
+        models = await chat_repository.list_usage_by_model(
+            user_id,
+            dialog_id=dialog_id,
+            start_datetime=date_range.start_datetime,
+            end_datetime_exclusive=date_range.end_datetime_exclusive,
+        )
         return json_success(
             dialog_id=dialog_id,
             totals=totals,
             turns=turns,
+            models=models,
             events=events,
             start_date=date_range.start_date,
             end_date=date_range.end_date,
@@ -1,13 +1,13 @@
 import asyncio
-from functools import wraps
+from functools import partial, wraps
 import time
 import json
 import logging
 import uuid
+from pathlib import Path
 from typing import Any, cast
 
 import data.config as config
-from openai import OpenAI
 from starlette.requests import Request
 
 from chat_client.core import base_context
@@ -24,13 +24,27 @@ from chat_client.core.chat_message_utils import (
     strip_images_from_messages as _strip_images_from_messages,
 )
 from chat_client.core import config_utils
+from chat_client.core.logging import log_event
+from chat_client.core import context_budget
+from chat_client.core import dialog_titles
 from chat_client.core import mcp_client
 from chat_client.core import model_capabilities
+from chat_client.core import ollama_residency
+from chat_client.core import prompt_cache
+from chat_client.core import provider_endpoints
+from chat_client.core import stream_scheduler
+from chat_client.core import tracing
+from chat_client.core.model_capability_store import ModelCapabilityStore
+from chat_client.core import openai_clients
 from chat_client.core import tool_executor
+from chat_client.core import tool_result_cache
+from chat_client.database import cache as database_cache
+from chat_client.database import db_session
 from chat_client.core.usage_pricing import compute_usage_cost, normalize_chat_usage, resolve_model_pricing
 from chat_client.endpoints import chat_attachment_endpoints, chat_dialog_endpoints, chat_page_endpoints, chat_stream_endpoints
 from chat_client.repositories import attachment_repository, chat_repository, prompt_repository
 from chat_client.core import exceptions_validation
+from chat_client.core import lazy_imports
 from chat_client.core.http import (
     json_error,
     json_error_from_exception,
@@ -46,6 +60,7 @@ from chat_client.schemas.chat import (
     CreateDialogRequest,
     CreateMessageRequest,
     UpdateMessageRequest,
+    WarmUpModelRequest,
 )
 
 # Logger
@@ -64,13 +79,36 @@ CONFIGURED_TOOL_REGISTRY = getattr(config, "TOOL_REGISTRY", {})
 CONFIGURED_LOCAL_TOOL_DEFINITIONS = getattr(config, "LOCAL_TOOL_DEFINITIONS", [])
 CONFIGURED_TOOL_MODELS = getattr(config, "TOOL_MODELS", [])
 CONFIGURED_DIALOG_TITLE_MODEL = getattr(config, "DIALOG_TITLE_MODEL", "")
+CONFIGURED_DIALOG_TITLE_SPECULATIVE = bool(getattr(config, "DIALOG_TITLE_SPECULATIVE", False))
 CONFIGURED_MODEL_PRICING = getattr(config, "MODEL_PRICING", {})
+CONFIGURED_MODEL_CAPABILITIES_CACHE_FILE = getattr(config, "MODEL_CAPABILITIES_CACHE_FILE", "")
+RESOLVED_MODEL_CAPABILITIES_CACHE_TTL_SECONDS = float(getattr(config, "MODEL_CAPABILITIES_CACHE_TTL_SECONDS", 24 * 60 * 60))
+RESOLVED_MODEL_CAPABILITIES_PROBE_CONCURRENCY = int(
+    getattr(config, "MODEL_CAPABILITIES_PROBE_CONCURRENCY", model_capabilities.DEFAULT_PROBE_CONCURRENCY)
+)
+RESOLVED_MODEL_CAPABILITIES_PROBE_TIMEOUT_SECONDS = float(
+    getattr(config, "MODEL_CAPABILITIES_PROBE_TIMEOUT_SECONDS", model_capabilities.DEFAULT_PROBE_TIMEOUT_SECONDS)
+)
 RESOLVED_CHAT_MAX_LOOP_ROUNDS = getattr(config, "CHAT_MAX_LOOP_ROUNDS", chat_service.DEFAULT_CHAT_MAX_LOOP_ROUNDS)
 RESOLVED_CHAT_EMPTY_ANSWER_RETRY_COUNT = getattr(config, "CHAT_EMPTY_ANSWER_RETRY_COUNT", 1)
 RESOLVED_CHAT_RETRY_ON_EMPTY_ANSWER_STOP = bool(getattr(config, "CHAT_RETRY_ON_EMPTY_ANSWER_STOP", False))
+CONFIGURED_CONTEXT_WINDOW_TOKENS = getattr(config, "CONTEXT_WINDOW_TOKENS", {})
+CONFIGURED_CONTEXT_TOKENIZER = getattr(config, "CONTEXT_TOKENIZER", None)
+RESOLVED_CONTEXT_RESERVED_OUTPUT_TOKENS = int(
+    getattr(config, "CONTEXT_RESERVED_OUTPUT_TOKENS", context_budget.DEFAULT_RESERVED_OUTPUT_TOKENS)
+)
+RESOLVED_CONTEXT_TOOL_RESULT_MAX_TOKENS = int(
+    getattr(config, "CONTEXT_TOOL_RESULT_MAX_TOKENS", context_budget.DEFAULT_TOOL_RESULT_MAX_TOKENS)
+)
+CONFIGURED_PROMPT_CACHE_STABLE_PREFIX = bool(getattr(config, "PROMPT_CACHE_STABLE_PREFIX", False))
+RESOLVED_TOOL_RESULT_CACHE_MAX_ENTRIES = int(getattr(config, "TOOL_RESULT_CACHE_MAX_ENTRIES", tool_result_cache.DEFAULT_MAX_ENTRIES))
+CONFIGURED_TOOL_RESULT_CACHE_DATABASE = bool(getattr(config, "TOOL_RESULT_CACHE_DATABASE", True))
+CONFIGURED_OLLAMA_PRELOAD_MODELS = getattr(config, "OLLAMA_PRELOAD_MODELS", [])
+CONFIGURED_OLLAMA_WARM_UP_ON_SELECT = bool(getattr(config, "OLLAMA_WARM_UP_ON_SELECT", False))
 
 # Backward-compatible aliases for existing patch points in tests and local imports.
-MODELS = config_utils.resolve_models(CONFIGURED_MODELS, CONFIGURED_PROVIDERS)
+# Provider-backed models are added by `discover_models` at startup.
+MODELS = dict(CONFIGURED_MODELS) if isinstance(CONFIGURED_MODELS, dict) else {}
 PROVIDERS = CONFIGURED_PROVIDERS
 MCP_SERVER_URL = CONFIGURED_MCP_SERVER_URL
 MCP_AUTH_TOKEN = CONFIGURED_MCP_AUTH_TOKEN
@@ -82,9 +120,33 @@ TOOL_REGISTRY = CONFIGURED_TOOL_REGISTRY
 LOCAL_TOOL_DEFINITIONS = CONFIGURED_LOCAL_TOOL_DEFINITIONS
 TOOL_MODELS = CONFIGURED_TOOL_MODELS
 DIALOG_TITLE_MODEL = str(CONFIGURED_DIALOG_TITLE_MODEL or "").strip()
+DIALOG_TITLE_SPECULATIVE = CONFIGURED_DIALOG_TITLE_SPECULATIVE
 CHAT_MAX_LOOP_ROUNDS = RESOLVED_CHAT_MAX_LOOP_ROUNDS
 MODEL_PRICING = CONFIGURED_MODEL_PRICING
+CONTEXT_WINDOW_TOKENS = CONFIGURED_CONTEXT_WINDOW_TOKENS
+PROMPT_CACHE_STABLE_PREFIX = CONFIGURED_PROMPT_CACHE_STABLE_PREFIX
+
+# The OpenAI SDK is imported on first use; tests patch these names.
+__getattr__ = lazy_imports.module_getattr(__name__, {"AsyncOpenAI": "openai:AsyncOpenAI", "OpenAI": "openai:OpenAI"})
+
+model_capabilities.configure_probing(
+    concurrency=RESOLVED_MODEL_CAPABILITIES_PROBE_CONCURRENCY,
+    timeout_seconds=RESOLVED_MODEL_CAPABILITIES_PROBE_TIMEOUT_SECONDS,
+    store=(
+        ModelCapabilityStore(Path(CONFIGURED_MODEL_CAPABILITIES_CACHE_FILE), RESOLVED_MODEL_CAPABILITIES_CACHE_TTL_SECONDS)
+        if CONFIGURED_MODEL_CAPABILITIES_CACHE_FILE
+        else None
+    ),
+)
 
+_token_counter = context_budget.TokenCounter(CONFIGURED_CONTEXT_TOKENIZER)
+_tool_result_cache = tool_result_cache.ToolResultCache(
+    max_entries=RESOLVED_TOOL_RESULT_CACHE_MAX_ENTRIES,
+    session_factory=db_session.async_session if CONFIGURED_TOOL_RESULT_CACHE_DATABASE else None,
+    memory=database_cache.MEMORY_CACHE,
+)
+_stream_scheduler = stream_scheduler.from_config(config)
+_ollama_residency = ollama_residency.from_config(config)
 _mcp_tools_cache: list[dict] = []
 _mcp_tools_cache_at: float = 0.0
 
@@ -181,16 +243,6 @@ def _build_usage_cost_record(provider_name: str, model_name: str, usage_data: di
     }
 
 
-def _model_capabilities_cache_token() -> dict[str, Any]:
-    return {
-        "providers": PROVIDERS,
-        "models": MODELS,
-        "vision_models": VISION_MODELS,
-        "tool_models": TOOL_MODELS,
-        "system_message_denylist": SYSTEM_MESSAGE_DENYLIST,
-    }
-
-
 def _has_local_tool_registry() -> bool:
     return isinstance(TOOL_REGISTRY, dict) and bool(TOOL_REGISTRY)
 
@@ -218,76 +270,128 @@ def _list_local_tools() -> list[dict[str, Any]]:
     )
 
 
-def _resolve_tool_models() -> list[str]:
-    return model_capabilities.resolve_tool_models(
+def _model_capability_table() -> model_capabilities.ModelCapabilityTable:
+    """
+    Current capability table. It is only rebuilt when one of the config objects
+    below is replaced, so per-request lookups are constant time.
+    """
+    return model_capabilities.get_model_capability_table(
         models=MODELS,
         vision_models=VISION_MODELS,
         tool_models=TOOL_MODELS,
         system_message_denylist=SYSTEM_MESSAGE_DENYLIST,
         provider_info_resolver=_resolve_provider_info,
-        cache_token=_model_capabilities_cache_token(),
+        cache_token=PROVIDERS,
     )
 
 
+def _resolve_tool_models() -> list[str]:
+    return list(_model_capability_table().tool_models)
+
+
 def _build_model_capabilities() -> dict[str, dict[str, bool]]:
-    return model_capabilities.build_model_capabilities(
-        models=MODELS,
-        vision_models=VISION_MODELS,
-        tool_models=TOOL_MODELS,
-        system_message_denylist=SYSTEM_MESSAGE_DENYLIST,
-        provider_info_resolver=_resolve_provider_info,
-        cache_token=_model_capabilities_cache_token(),
-    )
+    return _model_capability_table().as_dict()
 
 
 def _supports_model_images(model_name: str) -> bool:
-    return model_capabilities.supports_model_images(
-        model_name=model_name,
-        models=MODELS,
-        vision_models=VISION_MODELS,
-        tool_models=TOOL_MODELS,
-        system_message_denylist=SYSTEM_MESSAGE_DENYLIST,
-        provider_info_resolver=_resolve_provider_info,
-        cache_token=_model_capabilities_cache_token(),
-    )
+    return _model_capability_table().supports(model_name, "supports_images")
 
 
 def _supports_model_attachments(model_name: str) -> bool:
-    return model_capabilities.supports_model_attachments(
-        model_name=model_name,
-        models=MODELS,
-        vision_models=VISION_MODELS,
-        tool_models=TOOL_MODELS,
-        system_message_denylist=SYSTEM_MESSAGE_DENYLIST,
-        provider_info_resolver=_resolve_provider_info,
-        cache_token=_model_capabilities_cache_token(),
-    )
+    return _model_capability_table().supports(model_name, "supports_attachments")
 
 
 def _supports_model_thinking_control(model_name: str) -> bool:
-    return model_capabilities.supports_model_thinking_control(
-        model_name=model_name,
+    return _model_capability_table().supports(model_name, "supports_thinking_control")
+
+
+def _resolve_context_length(model_name: str) -> int | None:
+    """
+    Context window of the model: `CONTEXT_WINDOW_TOKENS` in the config, else the
+    length reported by the provider (Ollama). None when unknown.
+    """
+    configured = CONTEXT_WINDOW_TOKENS.get(model_name) if isinstance(CONTEXT_WINDOW_TOKENS, dict) else None
+    context_length = configured or _model_capability_table().get(model_name).get("context_length")
+    try:
+        return int(context_length) if context_length else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _fit_context_window(model_name: str, persisted_messages: list[dict[str, Any]]) -> tuple[list[dict[str, Any]], dict[str, Any] | None]:
+    """
+    Model messages for the dialog history, trimmed to the model's context
+    window, and a report of what was elided (None when nothing was).
+    """
+    context_length = _resolve_context_length(model_name)
+    if context_length is None:
+        return _build_model_messages_from_dialog_history(persisted_messages), None
+    # Tool definitions go with every request of tool models and share the window with the history.
+    tool_tokens = _token_counter.count_tools(_list_tools()) if model_name in _resolve_tool_models() else 0
+    fit = context_budget.fit_dialog_history(
+        persisted_messages,
+        context_length=context_length,
+        counter=_token_counter,
+        reserved_output_tokens=RESOLVED_CONTEXT_RESERVED_OUTPUT_TOKENS,
+        reserved_input_tokens=tool_tokens,
+        tool_result_max_tokens=RESOLVED_CONTEXT_TOOL_RESULT_MAX_TOKENS,
+        drop_step=prompt_cache.HISTORY_DROP_STEP if PROMPT_CACHE_STABLE_PREFIX else 1,
+    )
+    return fit.messages, fit.report() if fit.elided else None
+
+
+def discover_models() -> dict[str, Any]:
+    """
+    Add the models served by dynamic providers (Ollama) to `MODELS`. This
+    calls the provider, so it runs from the app lifespan instead of at import.
+    """
+    global MODELS
+    MODELS = config_utils.resolve_models(CONFIGURED_MODELS, CONFIGURED_PROVIDERS)
+    return MODELS
+
+
+def log_model_capabilities_summary(
+    logger_: logging.Logger | None = None, *, refresh_in_background: bool = True
+) -> dict[str, dict[str, bool]]:
+    return model_capabilities.warm_and_log_model_capabilities(
+        logger=logger_ or logger,
         models=MODELS,
         vision_models=VISION_MODELS,
         tool_models=TOOL_MODELS,
         system_message_denylist=SYSTEM_MESSAGE_DENYLIST,
         provider_info_resolver=_resolve_provider_info,
-        cache_token=_model_capabilities_cache_token(),
+        cache_token=PROVIDERS,
+        refresh_in_background=refresh_in_background,
     )
 
 
-def log_model_capabilities_summary(logger_: logging.Logger | None = None) -> dict[str, dict[str, bool]]:
-    return model_capabilities.warm_and_log_model_capabilities(
-        logger=logger_ or logger,
+def start_model_capability_refresh() -> None:
+    """
+    Re-probe stale stored capabilities on a background thread of this process.
+    """
+    model_capabilities.start_background_refresh(
         models=MODELS,
         vision_models=VISION_MODELS,
         tool_models=TOOL_MODELS,
         system_message_denylist=SYSTEM_MESSAGE_DENYLIST,
         provider_info_resolver=_resolve_provider_info,
-        cache_token=_model_capabilities_cache_token(),
+        cache_token=PROVIDERS,
     )
 
 
+def warm_tool_catalog() -> int:
+    """
+    Load the local and MCP tool definitions into their caches and return how
+    many tools there are. An unreachable MCP server is logged, not raised;
+    requests retry it once the cache expires.
+    """
+    try:
+        return len(_list_tools())
+    except mcp_client.MCPClientError as error:
+        logger.warning("Unable to load MCP tools at startup: %s", error)
+        return len(_list_local_tools()) if _has_local_tool_registry() else 0
+
+
 def _attachment_preview_is_image(content_type: str, suffix: str) -> bool:
     normalized = str(content_type or "").strip().lower()
     return normalized.startswith("image/") or suffix in {".png", ".jpg", ".jpeg", ".gif", ".webp"}
@@ -362,6 +466,14 @@ def _get_local_tool_execution_options(name: str) -> dict[str, Any]:
     )
 
 
+def _get_local_tool_cache_ttl(name: str) -> float | None:
+    return tool_executor.get_local_tool_cache_ttl(
+        name,
+        tool_registry=TOOL_REGISTRY,
+        local_tool_definitions=LOCAL_TOOL_DEFINITIONS,
+    )
+
+
 def _local_tool_accepts_attachment_workspace(name: str) -> bool:
     return tool_executor.local_tool_accepts_attachment_workspace(name, TOOL_REGISTRY)
 
@@ -374,13 +486,13 @@ def _tool_uses_workspace_mount(name: str) -> bool:
     )
 
 
-def _execute_local_tool_with_runtime_context(
+async def _execute_local_tool_with_runtime_context(
     tool_call: dict[str, Any],
     *,
     log_context: dict[str, Any] | None = None,
     available_attachments: list[dict[str, Any]] | None = None,
 ):
-    return tool_executor.execute_local_tool_with_runtime_context(
+    return await tool_executor.execute_local_tool_with_runtime_context_async(
         tool_call,
         logger=logger,
         tools=_list_tools(),
@@ -412,12 +524,11 @@ def _build_chat_log_context(
 
 
 def _log_chat_event(level: int, event: str, **fields: Any) -> None:
-    payload = {key: value for key, value in fields.items() if value is not None}
-    logger.log(level, "%s: %s", event, payload)
+    log_event(logger, level, event, **fields)
 
 
 def _new_trace_id() -> str:
-    return uuid.uuid4().hex[:12]
+    return tracing.new_trace_id()
 
 
 def _execute_tool(
@@ -443,18 +554,13 @@ def _execute_tool(
 
 
 def _serialize_tool_content(result) -> str:
-    if isinstance(result, str):
-        return result
-    try:
-        return json.dumps(result, ensure_ascii=True)
-    except TypeError:
-        return str(result)
+    return prompt_cache.serialize_tool_result(result)
 
 
 TITLE_GENERATION_MAX_TOKENS = 24
 
 
-def _generate_dialog_title(user_content: str, model: str, user_id: int | None = None, dialog_id: str = "") -> str:
+async def _generate_dialog_title(user_content: str, model: str, user_id: int | None = None, dialog_id: str = "") -> str:
     normalized_user_content = str(user_content or "").strip()
     selected_model = str(model or "").strip()
     if not normalized_user_content:
@@ -464,41 +570,48 @@ def _generate_dialog_title(user_content: str, model: str, user_id: int | None =
 
     provider_info = _resolve_provider_info(selected_model)
     provider_name = _resolve_provider_name(selected_model)
-    client = OpenAI(
-        api_key=provider_info.get("api_key"),
-        base_url=provider_info.get("base_url"),
-    )
-    response = client.chat.completions.create(
-        model=selected_model,
-        messages=cast(Any, _build_dialog_title_prompt(normalized_user_content)),
-        stream=False,
-        max_tokens=TITLE_GENERATION_MAX_TOKENS,
-    )
+    client = openai_clients.get_async_client(provider_info, client_cls=lazy_imports.load(__name__, "AsyncOpenAI"))
+    try:
+        response = await client.chat.completions.create(
+            model=selected_model,
+            messages=cast(Any, _build_dialog_title_prompt(normalized_user_content)),
+            stream=False,
+            max_tokens=TITLE_GENERATION_MAX_TOKENS,
+        )
+    except Exception as error:
+        # A title is cosmetic: fall back to the cheap derived title instead of failing the request.
+        _log_chat_event(
+            logging.WARNING,
+            "chat.dialog_title.model_error",
+            model=selected_model,
+            provider=provider_name,
+            error_type=error.__class__.__name__,
+            error_message=str(error),
+        )
+        return _derive_dialog_title_from_user_message(normalized_user_content)
     usage_data = normalize_chat_usage(response)
     usage_cost_record = _build_usage_cost_record(provider_name, selected_model, usage_data)
     if user_id is not None and dialog_id:
-        asyncio.run(
-            chat_repository.create_llm_usage_event(
-                user_id=user_id,
-                dialog_id=dialog_id,
-                turn_id="",
-                round_index=1,
-                provider=usage_cost_record["provider"],
-                model=usage_cost_record["model"],
-                call_type="title_generation",
-                request_id=usage_data["request_id"],
-                input_tokens=usage_cost_record["input_tokens"],
-                cached_input_tokens=usage_cost_record["cached_input_tokens"],
-                output_tokens=usage_cost_record["output_tokens"],
-                total_tokens=usage_cost_record["total_tokens"],
-                reasoning_tokens=usage_cost_record["reasoning_tokens"],
-                input_price_per_million=usage_cost_record["input_price_per_million"],
-                cached_input_price_per_million=usage_cost_record["cached_input_price_per_million"],
-                output_price_per_million=usage_cost_record["output_price_per_million"],
-                currency=usage_cost_record["currency"],
-                cost_amount=usage_cost_record["cost_amount"],
-                usage_source=usage_data["usage_source"],
-            )
+        await chat_repository.create_llm_usage_event(
+            user_id=user_id,
+            dialog_id=dialog_id,
+            turn_id="",
+            round_index=1,
+            provider=usage_cost_record["provider"],
+            model=usage_cost_record["model"],
+            call_type="title_generation",
+            request_id=usage_data["request_id"],
+            input_tokens=usage_cost_record["input_tokens"],
+            cached_input_tokens=usage_cost_record["cached_input_tokens"],
+            output_tokens=usage_cost_record["output_tokens"],
+            total_tokens=usage_cost_record["total_tokens"],
+            reasoning_tokens=usage_cost_record["reasoning_tokens"],
+            input_price_per_million=usage_cost_record["input_price_per_million"],
+            cached_input_price_per_million=usage_cost_record["cached_input_price_per_million"],
+            output_price_per_million=usage_cost_record["output_price_per_million"],
+            currency=usage_cost_record["currency"],
+            cost_amount=usage_cost_record["cost_amount"],
+            usage_source=usage_data["usage_source"],
         )
     _log_chat_event(
         logging.INFO,
@@ -537,6 +650,57 @@ def _generate_dialog_title(user_content: str, model: str, user_id: int | None =
     return normalized_title
 
 
+async def _generate_dialog_title_coalesced(user_content: str, model: str, user_id: int | None = None, dialog_id: str = "") -> str:
+    """
+    Share one title call between concurrent requests (and a speculative start) for the same dialog.
+    """
+    if not dialog_id:
+        return await _generate_dialog_title(user_content, model, user_id, dialog_id)
+    return await dialog_titles.generate_coalesced(
+        user_id,
+        dialog_id,
+        lambda: _generate_dialog_title(user_content, model, user_id, dialog_id),
+    )
+
+
+def _start_speculative_dialog_title(
+    user_id: int,
+    dialog_id: str,
+    dialog: dict[str, Any],
+    persisted_messages: list[dict[str, Any]],
+) -> None:
+    """
+    Start the title call alongside the first chat stream of a dialog that still has a placeholder title.
+    """
+    if not DIALOG_TITLE_SPECULATIVE or not DIALOG_TITLE_MODEL or not dialog_id:
+        return
+    if not isinstance(dialog, dict) or not _is_pending_dialog_title(str(dialog.get("title", "")).strip()):
+        return
+    user_message_count = sum(1 for message in persisted_messages if isinstance(message, dict) and message.get("role") == "user")
+    first_user_message = _extract_first_user_message(persisted_messages)
+    if user_message_count != 1 or not first_user_message or dialog_titles.is_in_flight(user_id, dialog_id):
+        return
+
+    async def _persist_title(title: str) -> None:
+        await chat_repository.update_dialog_title(user_id, dialog_id, title)
+        _log_chat_event(
+            logging.INFO,
+            "chat.dialog_title.generated",
+            user_id=user_id,
+            dialog_id=dialog_id,
+            source="speculative",
+            model=DIALOG_TITLE_MODEL,
+            generated_title=title,
+        )
+
+    dialog_titles.start_speculative(
+        user_id,
+        dialog_id,
+        lambda: _generate_dialog_title(first_user_message, DIALOG_TITLE_MODEL, user_id, dialog_id),
+        on_title=_persist_title,
+    )
+
+
 async def _chat_response_stream(
     request: Request,
     messages,
@@ -546,6 +710,8 @@ async def _chat_response_stream(
     dialog_id: str,
     trace_id: str,
     available_attachments: list[dict[str, Any]] | None = None,
+    trace_parent: tracing.SpanContext | None = None,
+    context_report: dict[str, Any] | None = None,
 ):
     log_context = _build_chat_log_context(trace_id=trace_id, user_id=logged_in, dialog_id=dialog_id, model=model)
     tool_attachments = list(available_attachments or [])
@@ -559,11 +725,18 @@ async def _chat_response_stream(
         error_text = ""
         started_at = time.perf_counter()
         try:
-            result = await asyncio.to_thread(
-                _execute_local_tool_with_runtime_context,
+            result = await tool_executor.execute_tool_cached(
                 tool_call,
+                partial(
+                    _execute_local_tool_with_runtime_context,
+                    tool_call,
+                    log_context=log_context,
+                    available_attachments=tool_attachments,
+                ),
+                result_cache=_tool_result_cache,
+                ttl_seconds=_get_local_tool_cache_ttl(str(tool_call.get("function", {}).get("name", ""))),
+                logger=logger,
                 log_context=log_context,
-                available_attachments=tool_attachments,
             )
             result_text = _serialize_tool_content(result)
             return result
@@ -631,31 +804,147 @@ async def _chat_response_stream(
             **log_context,
         )
 
-    yield f"data: {json.dumps({'turn_id': usage_turn_id})}\n\n"
+    with tracing.start_span("chat.stream", parent=trace_parent, trace_id=trace_id, model=model, dialog_id=dialog_id or None):
+        turn_metadata: dict[str, Any] = {"turn_id": usage_turn_id}
+        if context_report:
+            turn_metadata["context"] = context_report
+        yield f"data: {json.dumps(turn_metadata)}\n\n"
+
+        # Wait for the model before queueing, so a load does not hold a stream slot.
+        model_load = await _start_model_load(provider_name, provider_info, model)
+        if model_load is not None:
+            async for chunk in _wait_for_model_load(request, model_load, model, log_context):
+                yield chunk
+            if not model_load.done():
+                return
+            if not model_load.result():
+                yield f"data: {json.dumps({'error': f'Unable to load model {model}. Try again later.'})}\n\n"
+                return
 
-    async for chunk in chat_service.chat_response_stream(
-        request,
-        messages,
-        model,
-        reasoning_effort=effective_reasoning_effort,
-        openai_client_cls=OpenAI,
-        provider_info_resolver=_resolve_provider_info,
-        tool_models=_resolve_tool_models(),
-        tools_loader=_list_tools,
-        tool_executor=_tool_executor_with_persist,
-        max_chat_loop_rounds=CHAT_MAX_LOOP_ROUNDS,
-        empty_answer_retry_count=RESOLVED_CHAT_EMPTY_ANSWER_RETRY_COUNT,
-        retry_on_empty_answer_stop=RESOLVED_CHAT_RETRY_ON_EMPTY_ANSWER_STOP,
-        logger=logger,
-        trace_id=trace_id,
-        user_id=logged_in,
-        dialog_id=dialog_id,
-        turn_id=usage_turn_id,
-        provider_name=provider_name,
-        include_usage_in_stream=_provider_supports_stream_usage(provider_name, provider_info),
-        persist_usage_event=_persist_usage_event,
-    ):
-        yield chunk
+        try:
+            ticket = _stream_scheduler.enqueue(logged_in, provider_name, model)
+        except stream_scheduler.QueueFullError as error:
+            _log_chat_event(logging.WARNING, "chat.stream.rejected", queued=_stream_scheduler.queued, **log_context)
+            yield f"data: {json.dumps({'error': str(error)})}\n\n"
+            return
+        try:
+            async for chunk in _wait_for_stream_admission(request, ticket, log_context):
+                yield chunk
+            if not ticket.is_admitted:
+                return
+
+            async for chunk in chat_service.chat_response_stream(
+                request,
+                messages,
+                model,
+                reasoning_effort=effective_reasoning_effort,
+                openai_client_cls=lazy_imports.load(__name__, "OpenAI"),
+                provider_info_resolver=_resolve_provider_info,
+                tool_models=_resolve_tool_models(),
+                tools_loader=_list_tools,
+                tool_executor=_tool_executor_with_persist,
+                max_chat_loop_rounds=CHAT_MAX_LOOP_ROUNDS,
+                empty_answer_retry_count=RESOLVED_CHAT_EMPTY_ANSWER_RETRY_COUNT,
+                retry_on_empty_answer_stop=RESOLVED_CHAT_RETRY_ON_EMPTY_ANSWER_STOP,
+                logger=logger,
+                trace_id=trace_id,
+                user_id=logged_in,
+                dialog_id=dialog_id,
+                turn_id=usage_turn_id,
+                provider_name=provider_name,
+                include_usage_in_stream=_provider_supports_stream_usage(provider_name, provider_info),
+                persist_usage_event=_persist_usage_event,
+                stable_prefix=PROMPT_CACHE_STABLE_PREFIX,
+                prompt_cache_key=prompt_cache.prompt_cache_key(dialog_id) if PROMPT_CACHE_STABLE_PREFIX else "",
+                keep_alive=_ollama_residency.keep_alive_for(model),
+            ):
+                yield chunk
+        finally:
+            ticket.release()
+
+
+async def _wait_for_stream_admission(request: Request, ticket: stream_scheduler.StreamTicket, log_context: dict[str, Any]):
+    """
+    Yield queue position updates until the stream is admitted or the client goes away.
+    """
+    if ticket.is_admitted:
+        return
+    started_at = time.perf_counter()
+    _log_chat_event(logging.INFO, "chat.stream.queued", position=ticket.position(), **log_context)
+    while not ticket.is_admitted:
+        yield f"data: {json.dumps({'queue': {'position': ticket.position()}})}\n\n"
+        if await ticket.wait(stream_scheduler.QUEUE_UPDATE_INTERVAL_SECONDS):
+            break
+        if await request.is_disconnected():
+            return
+    _log_chat_event(logging.INFO, "chat.stream.admitted", waited_ms=round((time.perf_counter() - started_at) * 1000, 2), **log_context)
+    yield f"data: {json.dumps({'queue': {'position': 0}})}\n\n"
+
+
+async def _start_model_load(provider_name: str, provider_info: dict[str, Any], model: str) -> "asyncio.Task[bool] | None":
+    """
+    Load task for an Ollama model that is not resident, None when the stream
+    can start right away. When residency cannot be checked, the stream starts
+    and reports any provider error itself.
+    """
+    if provider_name != ollama_residency.PROVIDER_NAME or not _ollama_residency.track_residency:
+        return None
+    if await _ollama_residency.is_resident(provider_info, model) is not False:
+        return None
+    return _ollama_residency.load(provider_info, model)
+
+
+async def _wait_for_model_load(request: Request, load: "asyncio.Task[bool]", model: str, log_context: dict[str, Any]):
+    """
+    Yield loading updates until `load` is done or the client goes away.
+    """
+    started_at = time.perf_counter()
+    _log_chat_event(logging.INFO, "chat.model.loading", **log_context)
+    while True:
+        yield f"data: {json.dumps({'model_status': {'model': model, 'state': 'loading'}})}\n\n"
+        done, _ = await asyncio.wait({load}, timeout=ollama_residency.LOAD_STATUS_INTERVAL_SECONDS)
+        if done:
+            break
+        if await request.is_disconnected():
+            return
+    loaded = load.result()
+    _log_chat_event(
+        logging.INFO if loaded else logging.WARNING,
+        "chat.model.loaded" if loaded else "chat.model.load_failed",
+        duration_ms=round((time.perf_counter() - started_at) * 1000, 2),
+        **log_context,
+    )
+    if loaded:
+        yield f"data: {json.dumps({'model_status': {'model': model, 'state': 'ready'}})}\n\n"
+
+
+async def preload_ollama_models() -> dict[str, bool]:
+    """
+    Load `OLLAMA_PRELOAD_MODELS` so their first users do not wait for them.
+    """
+    models = [str(model) for model in CONFIGURED_OLLAMA_PRELOAD_MODELS or []]
+    provider_info = PROVIDERS.get(ollama_residency.PROVIDER_NAME) if isinstance(PROVIDERS, dict) else None
+    if not models or not isinstance(provider_info, dict):
+        return {}
+    return await _ollama_residency.preload(provider_endpoints.with_primary_endpoint(provider_info), models)
+
+
+async def stop_ollama_loads() -> None:
+    """
+    Cancel model loads still in flight, on shutdown.
+    """
+    await _ollama_residency.aclose()
+
+
+def _start_model_warm_up(model: str) -> str:
+    """
+    Start loading `model` in the background. Returns "loading", or "skipped"
+    for models that are not served by Ollama.
+    """
+    if _resolve_provider_name(model) != ollama_residency.PROVIDER_NAME:
+        return "skipped"
+    _ollama_residency.load(_resolve_provider_info(model), model)
+    return "loading"
 
 
 async def stream_chat(request: Request):
@@ -671,7 +960,9 @@ async def stream_chat(request: Request):
         summarize_last_user_message_for_log=chat_service.summarize_last_user_message_for_log,
         get_dialog=chat_repository.get_dialog,
         get_messages=chat_repository.get_messages,
+        start_dialog_title=_start_speculative_dialog_title,
         build_model_messages_from_dialog_history=_build_model_messages_from_dialog_history,
+        fit_context_window=_fit_context_window,
         get_attachments=attachment_repository.get_attachments,
         supports_model_images=_supports_model_images,
         strip_images_from_messages=_strip_images_from_messages,
@@ -763,6 +1054,19 @@ async def list_chat_models(request: Request):
     )
 
 
+@_with_auth_redirect_on_json_error()
+async def warm_up_model(request: Request):
+    return await chat_dialog_endpoints.warm_up_model(
+        request,
+        require_user_id_json=require_user_id_json,
+        parse_json_payload=parse_json_payload,
+        warm_up_model_request=WarmUpModelRequest,
+        start_model_warm_up=_start_model_warm_up,
+        json_success=json_success,
+        json_error=json_error,
+    )
+
+
 @_with_auth_redirect_on_json_error()
 async def create_dialog(request: Request):
     return await chat_dialog_endpoints.create_dialog(
@@ -808,7 +1112,7 @@ async def create_dialog_title(request: Request):
         dialog_title_model=DIALOG_TITLE_MODEL,
         is_pending_dialog_title=_is_pending_dialog_title,
         extract_first_user_message=_extract_first_user_message,
-        create_dialog_title_fn=_generate_dialog_title,
+        create_dialog_title_fn=_generate_dialog_title_coalesced,
         derive_dialog_title_from_user_message=_derive_dialog_title_from_user_message,
         log_chat_event=_log_chat_event,
         exceptions_validation=exceptions_validation,
@@ -4,7 +4,7 @@ from typing import Any
 from starlette.requests import Request
 from starlette.responses import StreamingResponse
 
-from chat_client.core import exceptions_validation
+from chat_client.core import exceptions_validation, tracing
 
 
 async def chat_response_stream(
@@ -28,139 +28,166 @@ async def chat_response_stream(
     stream_response_fn,
     json_error_from_exception,
     chat_login_redirect_path,
+    start_dialog_title=None,
+    fit_context_window=None,
 ):
     try:
         logged_in = await require_user_id_json(request, message="You must be logged in to use the chat")
         trace_id = new_trace_id()
-        payload = await parse_json_payload(request, chat_stream_request)
-        payload_messages = [message.model_dump() for message in payload.messages]
-        raw_messages = payload_messages
-        dialog_id = str(payload.dialog_id).strip()
-        available_attachments: list[dict[str, Any]] = []
-        log_context = build_chat_log_context(trace_id=trace_id, user_id=logged_in, dialog_id=dialog_id, model=payload.model)
-        log_chat_event(
-            logging.INFO,
-            "chat.request.start",
-            request_path=str(request.url.path),
-            **summarize_messages_for_log(payload_messages),
-            **log_context,
-        )
-        if dialog_id:
-            await get_dialog(logged_in, dialog_id)
-            persisted_messages = await get_messages(logged_in, dialog_id)
-            raw_messages = build_model_messages_from_dialog_history(persisted_messages)
+        with tracing.start_span("chat.request", trace_id=trace_id, user_id=logged_in) as request_span:
+            with tracing.start_span("chat.request.parse"):
+                payload = await parse_json_payload(request, chat_stream_request)
+            payload_messages = [message.model_dump() for message in payload.messages]
+            raw_messages = payload_messages
+            dialog_id = str(payload.dialog_id).strip()
+            available_attachments: list[dict[str, Any]] = []
+            context_report: dict[str, Any] | None = None
+            log_context = build_chat_log_context(trace_id=trace_id, user_id=logged_in, dialog_id=dialog_id, model=payload.model)
             log_chat_event(
                 logging.INFO,
-                "chat.request.loaded_dialog",
-                persisted_message_count=len(persisted_messages),
-                **summarize_messages_for_log(raw_messages),
+                "chat.request.start",
+                request_path=str(request.url.path),
+                **summarize_messages_for_log(payload_messages),
                 **log_context,
             )
-        tool_attachment_ids: list[int] = []
-        seen_tool_attachment_ids: set[int] = set()
-        image_attachment_ids: list[int] = []
-        seen_image_attachment_ids: set[int] = set()
-        for candidate in raw_messages:
-            if not isinstance(candidate, dict):
-                continue
-            if str(candidate.get("role", "")).strip() != "user":
-                continue
-            images = candidate.get("images", [])
-            if isinstance(images, list):
-                for image in images:
-                    if not isinstance(image, dict):
+            request_span.set_attribute("dialog_id", dialog_id)
+            request_span.set_attribute("model", payload.model)
+            if dialog_id:
+                with tracing.start_span("chat.request.load_dialog"):
+                    dialog = await get_dialog(logged_in, dialog_id)
+                    persisted_messages = await get_messages(logged_in, dialog_id)
+                if start_dialog_title is not None:
+                    start_dialog_title(logged_in, dialog_id, dialog, persisted_messages)
+                if fit_context_window is not None:
+                    with tracing.start_span("chat.request.fit_context"):
+                        raw_messages, context_report = fit_context_window(payload.model, persisted_messages)
+                    if context_report:
+                        log_chat_event(
+                            logging.INFO,
+                            "chat.request.context_trimmed",
+                            context_length=context_report["context_length"],
+                            estimated_tokens=context_report["estimated_tokens"],
+                            dropped_count=sum(1 for entry in context_report["elided"] if entry["action"] == "dropped"),
+                            truncated_count=sum(1 for entry in context_report["elided"] if entry["action"] == "truncated"),
+                            **log_context,
+                        )
+                else:
+                    raw_messages = build_model_messages_from_dialog_history(persisted_messages)
+                log_chat_event(
+                    logging.INFO,
+                    "chat.request.loaded_dialog",
+                    persisted_message_count=len(persisted_messages),
+                    **summarize_messages_for_log(raw_messages),
+                    **log_context,
+                )
+            with tracing.start_span("chat.request.normalize"):
+                tool_attachment_ids: list[int] = []
+                seen_tool_attachment_ids: set[int] = set()
+                image_attachment_ids: list[int] = []
+                seen_image_attachment_ids: set[int] = set()
+                for candidate in raw_messages:
+                    if not isinstance(candidate, dict):
                         continue
-                    attachment_id = image.get("attachment_id")
-                    if not isinstance(attachment_id, (str, int)):
+                    if str(candidate.get("role", "")).strip() != "user":
                         continue
-                    try:
-                        normalized_attachment_id = int(attachment_id)
-                    except (TypeError, ValueError):
+                    images = candidate.get("images", [])
+                    if isinstance(images, list):
+                        for image in images:
+                            if not isinstance(image, dict):
+                                continue
+                            attachment_id = image.get("attachment_id")
+                            if not isinstance(attachment_id, (str, int)):
+                                continue
+                            try:
+                                normalized_attachment_id = int(attachment_id)
+                            except (TypeError, ValueError):
+                                continue
+                            if normalized_attachment_id in seen_image_attachment_ids:
+                                continue
+                            seen_image_attachment_ids.add(normalized_attachment_id)
+                            image_attachment_ids.append(normalized_attachment_id)
+                    attachments = candidate.get("attachments", [])
+                    if not isinstance(attachments, list) or not attachments:
                         continue
-                    if normalized_attachment_id in seen_image_attachment_ids:
-                        continue
-                    seen_image_attachment_ids.add(normalized_attachment_id)
-                    image_attachment_ids.append(normalized_attachment_id)
-            attachments = candidate.get("attachments", [])
-            if not isinstance(attachments, list) or not attachments:
-                continue
-            for attachment in attachments:
-                if not isinstance(attachment, dict):
-                    continue
-                attachment_id = attachment.get("attachment_id")
-                if not isinstance(attachment_id, (str, int)):
-                    continue
-                try:
-                    normalized_attachment_id = int(attachment_id)
-                except (TypeError, ValueError):
-                    continue
-                if normalized_attachment_id in seen_tool_attachment_ids:
-                    continue
-                seen_tool_attachment_ids.add(normalized_attachment_id)
-                tool_attachment_ids.append(normalized_attachment_id)
-        image_attachments: list[dict[str, Any]] = []
-        if image_attachment_ids:
-            image_attachments = await get_attachments(logged_in, image_attachment_ids)
-        if tool_attachment_ids:
-            available_attachments = await get_attachments(logged_in, tool_attachment_ids)
-        if image_attachments:
-            attachments_by_id = {
-                int(attachment.get("attachment_id", 0)): attachment
-                for attachment in image_attachments
-                if int(attachment.get("attachment_id", 0)) > 0
-            }
-            for candidate in raw_messages:
-                if not isinstance(candidate, dict):
-                    continue
-                images = candidate.get("images", [])
-                if not isinstance(images, list):
-                    continue
-                for image in images:
-                    if not isinstance(image, dict):
-                        continue
-                    attachment_id = image.get("attachment_id")
-                    if attachment_id is None:
-                        continue
-                    try:
-                        normalized_attachment_id = int(attachment_id)
-                    except (TypeError, ValueError):
-                        continue
-                    attachment = attachments_by_id.get(normalized_attachment_id)
-                    if not attachment:
-                        continue
-                    image.setdefault("name", str(attachment.get("name", "")))
-                    image.setdefault("content_type", str(attachment.get("content_type", "")))
-                    image.setdefault("size_bytes", int(attachment.get("size_bytes", 0)))
-                    image.setdefault("storage_path", str(attachment.get("storage_path", "")))
-        if not supports_model_images(payload.model):
-            raw_messages = strip_images_from_messages(raw_messages)
-            log_chat_event(
-                logging.DEBUG,
-                "chat.request.images_stripped",
-                **summarize_messages_for_log(raw_messages),
-                **log_context,
+                    for attachment in attachments:
+                        if not isinstance(attachment, dict):
+                            continue
+                        attachment_id = attachment.get("attachment_id")
+                        if not isinstance(attachment_id, (str, int)):
+                            continue
+                        try:
+                            normalized_attachment_id = int(attachment_id)
+                        except (TypeError, ValueError):
+                            continue
+                        if normalized_attachment_id in seen_tool_attachment_ids:
+                            continue
+                        seen_tool_attachment_ids.add(normalized_attachment_id)
+                        tool_attachment_ids.append(normalized_attachment_id)
+                image_attachments: list[dict[str, Any]] = []
+                if image_attachment_ids:
+                    image_attachments = await get_attachments(logged_in, image_attachment_ids)
+                if tool_attachment_ids:
+                    available_attachments = await get_attachments(logged_in, tool_attachment_ids)
+                if image_attachments:
+                    attachments_by_id = {
+                        int(attachment.get("attachment_id", 0)): attachment
+                        for attachment in image_attachments
+                        if int(attachment.get("attachment_id", 0)) > 0
+                    }
+                    for candidate in raw_messages:
+                        if not isinstance(candidate, dict):
+                            continue
+                        images = candidate.get("images", [])
+                        if not isinstance(images, list):
+                            continue
+                        for image in images:
+                            if not isinstance(image, dict):
+                                continue
+                            attachment_id = image.get("attachment_id")
+                            if attachment_id is None:
+                                continue
+                            try:
+                                normalized_attachment_id = int(attachment_id)
+                            except (TypeError, ValueError):
+                                continue
+                            attachment = attachments_by_id.get(normalized_attachment_id)
+                            if not attachment:
+                                continue
+                            image.setdefault("name", str(attachment.get("name", "")))
+                            image.setdefault("content_type", str(attachment.get("content_type", "")))
+                            image.setdefault("size_bytes", int(attachment.get("size_bytes", 0)))
+                            image.setdefault("storage_path", str(attachment.get("storage_path", "")))
+                if not supports_model_images(payload.model):
+                    raw_messages = strip_images_from_messages(raw_messages)
+                    log_chat_event(
+                        logging.DEBUG,
+                        "chat.request.images_stripped",
+                        **summarize_messages_for_log(raw_messages),
+                        **log_context,
+                    )
+                messages = normalize_chat_messages(raw_messages)
+                log_chat_event(
+                    logging.INFO,
+                    "chat.request.normalized",
+                    **summarize_messages_for_log(messages),
+                    **summarize_last_user_message_for_log(messages),
+                    **log_context,
+                )
+            return StreamingResponse(
+                stream_response_fn(
+                    request,
+                    messages,
+                    payload.model,
+                    payload.reasoning_effort,
+                    logged_in,
+                    dialog_id,
+                    trace_id,
+                    available_attachments=available_attachments,
+                    trace_parent=request_span.context,
+                    context_report=context_report,
+                ),
+                media_type="text/event-stream",
             )
-        messages = normalize_chat_messages(raw_messages)
-        log_chat_event(
-            logging.INFO,
-            "chat.request.normalized",
-            **summarize_messages_for_log(messages),
-            **summarize_last_user_message_for_log(messages),
-            **log_context,
-        )
-        return StreamingResponse(
-            stream_response_fn(
-                request,
-                messages,
-                payload.model,
-                payload.reasoning_effort,
-                logged_in,
-                dialog_id,
-                trace_id,
-                available_attachments=available_attachments,
-            ),
-            media_type="text/event-stream",
-        )
     except exceptions_validation.JSONError as error:
         if error.status_code == 401:
             try:
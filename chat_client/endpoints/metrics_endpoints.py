@@ -0,0 +1,30 @@
+"""
+Metrics endpoint.
+"""
+
+import asyncio
+
+import data.config as config
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+from chat_client.core import metrics
+from chat_client.core.http import bearer_token_matches
+
+METRICS_TOKEN: str = getattr(config, "METRICS_TOKEN", "")
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+async def get_metrics(request: Request):
+    """
+    Metrics of all workers in the Prometheus text format. Disabled (404) unless
+    `METRICS_TOKEN` is set; scrapers send it as a bearer token.
+    """
+    if not METRICS_TOKEN:
+        return PlainTextResponse("Not Found", status_code=404)
+    if not bearer_token_matches(request, METRICS_TOKEN):
+        return PlainTextResponse("Unauthorized", status_code=401, headers={"WWW-Authenticate": "Bearer"})
+
+    # Reads the snapshot files of the other workers.
+    body = await asyncio.to_thread(metrics.REGISTRY.render)
+    return PlainTextResponse(body, media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,54 @@
+"""
+Profiling endpoint.
+"""
+
+import asyncio
+import os
+from pathlib import Path
+
+import data.config as config
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+from chat_client.core import profiling
+from chat_client.core.http import bearer_token_matches
+
+PROFILING_TOKEN: str = getattr(config, "PROFILING_TOKEN", "")
+PROFILE_DIR = getattr(config, "PROFILE_DIR", Path(getattr(config, "DATA_DIR", "data")) / "profiles")
+DEFAULT_PROFILE_SECONDS = 10.0
+
+
+def _float_param(request: Request, name: str, default: float) -> float:
+    try:
+        return float(request.query_params.get(name, default))
+    except ValueError:
+        return default
+
+
+async def create_profile(request: Request):
+    """
+    Sample the stacks of the worker that serves this request for `seconds`
+    (max 120) every `interval_ms` and return them in the folded format
+    (`flamegraph.pl`, speedscope). The profile is also written to PROFILE_DIR.
+    Disabled (404) unless `PROFILING_TOKEN` is set; send it as a bearer token.
+    """
+    if not PROFILING_TOKEN:
+        return PlainTextResponse("Not Found", status_code=404)
+    if not bearer_token_matches(request, PROFILING_TOKEN):
+        return PlainTextResponse("Unauthorized", status_code=401, headers={"WWW-Authenticate": "Bearer"})
+
+    seconds = _float_param(request, "seconds", DEFAULT_PROFILE_SECONDS)
+    interval_seconds = _float_param(request, "interval_ms", profiling.DEFAULT_SAMPLE_INTERVAL_SECONDS * 1000) / 1000
+    try:
+        profiler = await asyncio.to_thread(profiling.profile_for, seconds, interval_seconds)
+    except profiling.ProfilerBusyError as error:
+        return PlainTextResponse(str(error), status_code=409)
+    path = await asyncio.to_thread(profiling.write_collapsed, profiler, PROFILE_DIR)
+    return PlainTextResponse(
+        profiler.collapsed(),
+        headers={
+            "X-Profile-Pid": str(os.getpid()),
+            "X-Profile-Samples": str(profiler.sample_count),
+            "X-Profile-File": str(path),
+        },
+    )
@@ -3,7 +3,6 @@ import logging
 import random
 import string
 
-from captcha.image import ImageCaptcha
 from starlette.requests import Request
 from starlette.responses import RedirectResponse, Response
 
@@ -112,6 +111,8 @@ async def get_captcha(request: Request):
     captcha_text = _generate_captcha_text()
     request.session["captcha"] = captcha_text
 
+    from captcha.image import ImageCaptcha
+
     image = ImageCaptcha(width=200, height=60)
     captcha_image = image.generate(captcha_text)
     img_bytes = io.BytesIO()
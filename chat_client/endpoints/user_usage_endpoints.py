@@ -25,6 +25,11 @@ async def usage_page(request: Request):
         start_datetime=date_range.start_datetime,
         end_datetime_exclusive=date_range.end_datetime_exclusive,
     )
+    models = await chat_repository.list_usage_by_model(
+        user_id,
+        start_datetime=date_range.start_datetime,
+        end_datetime_exclusive=date_range.end_datetime_exclusive,
+    )
     return await render_template(
         templates,
         request,
@@ -32,6 +37,7 @@ async def usage_page(request: Request):
         {
             "title": "Usage",
             "usage_totals": totals,
+            "usage_models": models,
             "start_date": date_range.start_date,
             "end_date": date_range.end_date,
         },
@@ -64,8 +70,14 @@ async def get_usage(request: Request):
             start_datetime=date_range.start_datetime,
             end_datetime_exclusive=date_range.end_datetime_exclusive,
         )
+        models = await chat_repository.list_usage_by_model(
+            user_id,
+            start_datetime=date_range.start_datetime,
+            end_datetime_exclusive=date_range.end_datetime_exclusive,
+        )
         return json_success(
             totals=totals,
+            models=models,
             dialogs_info=dialogs_info,
             dialogs=dialogs_info["dialogs"],
             start_date=date_range.start_date,
@@ -0,0 +1,63 @@
+"""
+Gunicorn hooks and worker class for `chat-client server-prod`.
+
+With `--preload` the master imports the app and warms the shared state once
+(models, capability table, tool catalog, templates, static manifest) before it
+forks, so workers start with it in copy-on-write memory. Workers are restarted
+after `--max-requests` plus a random jitter, and let open responses, SSE chat
+streams included, finish before they exit.
+
+The preloaded master has already set up logging, and its writer thread is not
+copied into forked workers; `post_fork` gives each worker its own.
+"""
+
+import asyncio
+from typing import Any
+
+from uvicorn.workers import UvicornWorker
+
+from chat_client.core.logging import restart_logging
+
+# Streams still open this many seconds before the master's SIGKILL are
+# cancelled, so they end with an error event and their cleanup runs.
+CANCEL_MARGIN_SECONDS = 5
+
+
+def on_starting(server: Any) -> None:
+    if server.cfg.preload_app:
+        from chat_client.main import warm_shared_state
+
+        warm_shared_state()
+
+
+def post_fork(server: Any, worker: Any) -> None:
+    # Also registered as an at-fork hook; a no-op when that already ran.
+    restart_logging()
+
+
+class DrainingUvicornWorker(UvicornWorker):
+    """
+    A UvicornWorker that drains instead of dropping connections when it
+    restarts after max-requests or is stopped by the master.
+
+    Uvicorn already stops accepting and waits for open connections on
+    shutdown, but it stops heartbeating to the master while it waits, so the
+    master killed any worker with a stream open longer than `--timeout`. It
+    also waited without a limit; this caps the wait at `--graceful-timeout`.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.config.timeout_graceful_shutdown = max(1, self.cfg.graceful_timeout - CANCEL_MARGIN_SECONDS)
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(max(1.0, self.timeout / 2))
+            self.notify()
+
+    async def _serve(self) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat())
+        try:
+            await super()._serve()
+        finally:
+            heartbeat.cancel()
@@ -1,50 +1,77 @@
+import asyncio
 from contextlib import asynccontextmanager
 import json
 from starlette.applications import Starlette
 from chat_client.core.exceptions import exception_callbacks
 from chat_client.core.middleware import middleware
-from chat_client.core import model_capabilities
-from chat_client.core import tool_executor
+from chat_client.core import metrics, provider_endpoints, tool_executor, tracing
 import logging
+import time
+from pathlib import Path
 from chat_client import __version__, __program__
 import data.config as config
-from chat_client.core.templates import get_static_files
+from chat_client.core import static_assets
+from chat_client.core.templates import get_static_files, precompile_templates
 from chat_client.core.logging import setup_logging
 from chat_client.routes import build_routes
-from chat_client.core import config_utils
-from chat_client.core import chat_service
+from chat_client.endpoints import chat_endpoints
+from chat_client.database import cache as database_cache
+from chat_client.database import db_session
+from chat_client.tools import http_client
 
 # Setup logging
 log_level = config.LOG_LEVEL
-setup_logging(log_level)
+setup_logging(log_level, log_format=getattr(config, "LOG_FORMAT", "text"))
 logger: logging.Logger = logging.getLogger(__name__)
 logger.info(f"Starting {__program__} ({__version__})")
 
 
 static_files = get_static_files()
-MODELS = config_utils.resolve_models(getattr(config, "MODELS", {}), getattr(config, "PROVIDERS", {}))
-PROVIDERS = getattr(config, "PROVIDERS", {})
-VISION_MODELS = getattr(config, "VISION_MODELS", [])
 TOOL_MODELS = getattr(config, "TOOL_MODELS", [])
 TOOL_REGISTRY = getattr(config, "TOOL_REGISTRY", {})
 LOCAL_TOOL_DEFINITIONS = getattr(config, "LOCAL_TOOL_DEFINITIONS", [])
 MCP_SERVER_URL = getattr(config, "MCP_SERVER_URL", "")
 MCP_AUTH_TOKEN = getattr(config, "MCP_AUTH_TOKEN", "")
-SYSTEM_MESSAGE_DENYLIST = getattr(config, "SYSTEM_MESSAGE_DENYLIST", [])
-
+METRICS_TOKEN = getattr(config, "METRICS_TOKEN", "")
+METRICS_DIR = getattr(config, "METRICS_DIR", Path(getattr(config, "DATA_DIR", "data")) / "metrics")
+TRACING_EXPORTER = getattr(config, "TRACING_EXPORTER", "")
+TRACING_OTLP_ENDPOINT = getattr(config, "TRACING_OTLP_ENDPOINT", tracing.DEFAULT_OTLP_ENDPOINT)
+TRACING_OTLP_HEADERS = getattr(config, "TRACING_OTLP_HEADERS", {})
+TRACING_JSON_FILE = getattr(config, "TRACING_JSON_FILE", Path(getattr(config, "DATA_DIR", "data")) / "traces.jsonl")
+CACHE_SWEEP_INTERVAL_SECONDS = float(getattr(config, "CACHE_SWEEP_INTERVAL_SECONDS", database_cache.DEFAULT_SWEEP_INTERVAL_SECONDS))
+PROVIDER_HEALTH_CHECK_INTERVAL_SECONDS = float(
+    getattr(config, "PROVIDER_HEALTH_CHECK_INTERVAL_SECONDS", provider_endpoints.DEFAULT_HEALTH_CHECK_INTERVAL_SECONDS)
+)
 
-def _resolve_provider_info(model: str) -> dict:
-    return chat_service.resolve_provider_info(model, MODELS, PROVIDERS)
+_shared_state_warm = False
 
 
-def _model_capabilities_cache_token() -> dict:
-    return {
-        "providers": PROVIDERS,
-        "models": MODELS,
-        "vision_models": VISION_MODELS,
-        "tool_models": TOOL_MODELS,
-        "system_message_denylist": SYSTEM_MESSAGE_DENYLIST,
-    }
+def warm_shared_state() -> None:
+    """
+    Load what every request reads: provider models, the model capability
+    table, the tool catalog, compiled templates and the static asset manifest.
+    `chat-client server-prod` calls this once in the gunicorn master before it
+    forks, so workers start warm; otherwise each worker calls it from the lifespan.
+    """
+    global _shared_state_warm
+    if _shared_state_warm:
+        return
+    started = time.perf_counter()
+    chat_endpoints.discover_models()
+    # No refresh thread here: threads do not survive a fork. Workers start it from the lifespan.
+    chat_endpoints.log_model_capabilities_summary(logger, refresh_in_background=False)
+    tool_count = chat_endpoints.warm_tool_catalog()
+    template_count = precompile_templates()
+    asset_count = len(static_assets.reload_manifest())
+    _shared_state_warm = True
+    logger.info(
+        "Shared state warmed in %.2fs: %d model(s), %d tool(s), %d template(s), %d fingerprinted asset(s)",
+        time.perf_counter() - started,
+        len(chat_endpoints.MODELS),
+        tool_count,
+        template_count,
+        asset_count,
+    )
 
 
 @asynccontextmanager
@@ -63,17 +90,39 @@ async def lifespan(app):
             sort_keys=True,
         ),
     )
-    model_capabilities.warm_and_log_model_capabilities(
-        logger=logger,
-        models=MODELS,
-        vision_models=VISION_MODELS,
-        tool_models=TOOL_MODELS,
-        system_message_denylist=SYSTEM_MESSAGE_DENYLIST,
-        provider_info_resolver=_resolve_provider_info,
-        cache_token=_model_capabilities_cache_token(),
+    # A no-op when the gunicorn master already did it before forking.
+    await asyncio.to_thread(warm_shared_state)
+    chat_endpoints.start_model_capability_refresh()
+    if METRICS_TOKEN:
+        metrics.track_event_loop(asyncio.get_running_loop())
+        metrics.REGISTRY.configure_multiprocess(METRICS_DIR)
+    tracing.configure_tracing(
+        tracing.build_exporter(
+            TRACING_EXPORTER,
+            otlp_endpoint=TRACING_OTLP_ENDPOINT,
+            otlp_headers=TRACING_OTLP_HEADERS,
+            json_file=TRACING_JSON_FILE,
+        )
     )
+    cache_sweeper = None
+    if CACHE_SWEEP_INTERVAL_SECONDS > 0:
+        cache_sweeper = asyncio.create_task(database_cache.run_sweeper(db_session.async_session, CACHE_SWEEP_INTERVAL_SECONDS))
+    health_checker = None
+    if PROVIDER_HEALTH_CHECK_INTERVAL_SECONDS > 0 and provider_endpoints.configure_pools(getattr(config, "PROVIDERS", {})):
+        health_checker = asyncio.create_task(provider_endpoints.run_health_checks(PROVIDER_HEALTH_CHECK_INTERVAL_SECONDS))
+    # Loads run in the background; requests for a model that is still loading wait for the same load.
+    ollama_preloader = asyncio.create_task(chat_endpoints.preload_ollama_models())
     logger.info("Accepting incoming requests")
     yield
+    if cache_sweeper is not None:
+        cache_sweeper.cancel()
+    if health_checker is not None:
+        health_checker.cancel()
+    ollama_preloader.cancel()
+    await chat_endpoints.stop_ollama_loads()
+    await http_client.aclose()
+    metrics.REGISTRY.stop_flusher()
+    tracing.shutdown_tracing()
     logger.info("End of lifespan")
 
 
@@ -0,0 +1,42 @@
+"""Add attachment_blob table and attachment.sha256
+
+Revision ID: a8b9c0d1e2f3
+Revises: f7a8b9c0d1e2
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a8b9c0d1e2f3"
+down_revision: Union[str, Sequence[str], None] = "f7a8b9c0d1e2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "attachment_blob",
+        sa.Column("sha256", sa.Text(), nullable=False),
+        sa.Column("storage_path", sa.Text(), nullable=False),
+        sa.Column("size_bytes", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("ref_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created", sa.TIMESTAMP(timezone=True), server_default=sa.text("(CURRENT_TIMESTAMP)"), nullable=False),
+        sa.PrimaryKeyConstraint("sha256"),
+    )
+    op.add_column("attachment", sa.Column("sha256", sa.Text(), nullable=False, server_default=""))
+    op.create_index("attachment_sha256", "attachment", ["sha256"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("attachment_sha256", table_name="attachment")
+    with op.batch_alter_table("attachment") as batch_op:
+        batch_op.drop_column("sha256")
+    op.drop_table("attachment_blob")
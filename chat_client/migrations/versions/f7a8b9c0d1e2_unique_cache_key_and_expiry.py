@@ -0,0 +1,38 @@
+"""Unique cache key and cache expiry
+
+Revision ID: f7a8b9c0d1e2
+Revises: e6f7a8b9c0d1
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f7a8b9c0d1e2"
+down_revision: Union[str, Sequence[str], None] = "e6f7a8b9c0d1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep the newest row of any key written twice before the key was unique.
+    op.execute(sa.text("DELETE FROM cache WHERE cache_id NOT IN (SELECT MAX(cache_id) FROM cache GROUP BY key)"))
+    op.drop_index("ix_cache_key", table_name="cache")
+    op.create_index("ix_cache_key", "cache", ["key"], unique=True)
+    op.add_column("cache", sa.Column("expires_at", sa.Integer(), nullable=False, server_default="0"))
+    op.create_index("ix_cache_expires_at", "cache", ["expires_at"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_cache_expires_at", table_name="cache")
+    with op.batch_alter_table("cache") as batch_op:
+        batch_op.drop_column("expires_at")
+    op.drop_index("ix_cache_key", table_name="cache")
+    op.create_index("ix_cache_key", "cache", ["key"], unique=False)
@@ -18,9 +18,11 @@ class Cache(Base):
     __table_args__ = {"sqlite_autoincrement": True}
 
     cache_id: Mapped[int | None] = mapped_column(primary_key=True, autoincrement=True, init=False)
-    key: Mapped[str] = mapped_column(Text, nullable=False, index=True)
+    key: Mapped[str] = mapped_column(Text, nullable=False, index=True, unique=True)
     value: Mapped[str | None] = mapped_column(Text, nullable=True)
     unix_timestamp: Mapped[int] = mapped_column(default=0)
+    # 0 for rows that never expire.
+    expires_at: Mapped[int] = mapped_column(default=0, server_default="0", index=True)
 
 
 class User(Base):
@@ -155,10 +157,25 @@ class MessageImage(Base):
     )
 
 
+# File content stored once under its sha256, shared by every attachment with that content.
+class AttachmentBlob(Base):
+    __tablename__ = "attachment_blob"
+
+    sha256: Mapped[str] = mapped_column(Text, primary_key=True)
+    storage_path: Mapped[str] = mapped_column(Text, nullable=False)
+    size_bytes: Mapped[int] = mapped_column(nullable=False, default=0)
+    # Number of attachment rows pointing at this blob.
+    ref_count: Mapped[int] = mapped_column(nullable=False, default=0)
+    created: Mapped[datetime | None] = mapped_column(
+        TIMESTAMP(timezone=True), server_default=func.current_timestamp(), nullable=False, init=False
+    )
+
+
 class Attachment(Base):
     __tablename__ = "attachment"
     __table_args__ = (
         Index("attachment_user_id", "user_id"),
+        Index("attachment_sha256", "sha256"),
         {"sqlite_autoincrement": True},
     )
 
@@ -168,6 +185,8 @@ class Attachment(Base):
     storage_path: Mapped[str] = mapped_column(Text, nullable=False, default="")
     content_type: Mapped[str] = mapped_column(Text, nullable=False, default="")
     size_bytes: Mapped[int] = mapped_column(nullable=False, default=0)
+    # Blob holding the content; "" for files stored before content addressing.
+    sha256: Mapped[str] = mapped_column(Text, nullable=False, default="", server_default="")
     created: Mapped[datetime | None] = mapped_column(
         TIMESTAMP(timezone=True), server_default=func.current_timestamp(), nullable=False, init=False
     )
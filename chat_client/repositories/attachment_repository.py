@@ -1,8 +1,15 @@
-from sqlalchemy import distinct, select, update
+import sys
+from collections.abc import Callable
+from datetime import datetime
+from typing import Any
 
-from chat_client.core import exceptions_validation
+from sqlalchemy import Text, cast, delete, distinct, func, literal, select, update
+from sqlalchemy.dialects.sqlite import insert
+
+from chat_client.core import exceptions_validation, metrics
+from chat_client.core.attachments import IMAGE_ATTACHMENT_REF_PREFIX
 from chat_client.database.db_session import async_session
-from chat_client.models import Attachment, Message, MessageAttachment
+from chat_client.models import Attachment, AttachmentBlob, Image, Message, MessageAttachment, MessageImage
 
 
 def _serialize_attachment(attachment: Attachment) -> dict[str, str | int]:
@@ -15,36 +22,63 @@ def _serialize_attachment(attachment: Attachment) -> dict[str, str | int]:
     }
 
 
+async def _reference_blob(session, sha256: str, storage_path: str, size_bytes: int) -> None:
+    statement = insert(AttachmentBlob).values(sha256=sha256, storage_path=storage_path, size_bytes=size_bytes, ref_count=1)
+    statement = statement.on_conflict_do_update(
+        index_elements=[AttachmentBlob.sha256],
+        set_={"storage_path": statement.excluded.storage_path, "ref_count": AttachmentBlob.ref_count + 1},
+    )
+    await session.execute(statement)
+
+
+async def add_attachment(
+    session,
+    *,
+    user_id: int,
+    name: str,
+    content_type: str,
+    size_bytes: int,
+    storage_path: str,
+    sha256: str = "",
+) -> int | None:
+    """
+    Add an attachment, and a reference to its blob, to the caller's transaction.
+    """
+    attachment = Attachment(
+        user_id=user_id,
+        name=name,
+        content_type=content_type,
+        size_bytes=size_bytes,
+        storage_path=storage_path,
+        sha256=sha256,
+    )
+    session.add(attachment)
+    if sha256:
+        await _reference_blob(session, sha256, storage_path, size_bytes)
+    await session.flush()
+    return attachment.attachment_id
+
+
 async def create_attachment(
     user_id: int,
     name: str,
     content_type: str,
     size_bytes: int,
     storage_path: str,
+    sha256: str = "",
 ) -> int | None:
     async with async_session() as session:
-        attachment = Attachment(
+        attachment_id = await add_attachment(
+            session,
             user_id=user_id,
             name=name,
             content_type=content_type,
             size_bytes=size_bytes,
             storage_path=storage_path,
+            sha256=sha256,
         )
-        session.add(attachment)
-        await session.commit()
-        await session.refresh(attachment)
-        return attachment.attachment_id
-
-
-async def update_attachment_storage_path(user_id: int, attachment_id: int, storage_path: str):
-    async with async_session() as session:
-        stmt = (
-            update(Attachment)
-            .where(Attachment.attachment_id == attachment_id, Attachment.user_id == user_id)
-            .values(storage_path=storage_path)
-        )
-        await session.execute(stmt)
         await session.commit()
+        return attachment_id
 
 
 async def get_attachment(user_id: int, attachment_id: int) -> dict[str, str | int]:
@@ -133,3 +167,80 @@ async def get_dialog_attachment_ids(user_id: int, dialog_id: str) -> list[int]:
         )
         result = await session.execute(stmt)
         return [int(attachment_id) for attachment_id in result.scalars().all() if attachment_id is not None]
+
+
+async def list_legacy_attachments() -> list[dict[str, Any]]:
+    """
+    Attachments stored before content addressing, i.e. without a blob.
+    """
+    async with async_session() as session:
+        stmt = (
+            select(Attachment.attachment_id, Attachment.storage_path, Attachment.size_bytes)
+            .where(Attachment.sha256 == "")
+            .order_by(Attachment.attachment_id.asc())
+        )
+        result = await session.execute(stmt)
+        return [
+            {"attachment_id": int(attachment_id), "storage_path": str(storage_path or ""), "size_bytes": int(size_bytes or 0)}
+            for attachment_id, storage_path, size_bytes in result.all()
+        ]
+
+
+async def assign_attachment_blob(attachment_id: int, sha256: str, storage_path: str, size_bytes: int) -> None:
+    async with async_session() as session:
+        await session.execute(
+            update(Attachment)
+            .where(Attachment.attachment_id == attachment_id, Attachment.sha256 == "")
+            .values(sha256=sha256, storage_path=storage_path, size_bytes=size_bytes)
+        )
+        await _reference_blob(session, sha256, storage_path, size_bytes)
+        await session.commit()
+
+
+async def collect_garbage(created_before: datetime, remove_file: Callable[[str], int]) -> dict[str, int]:
+    """
+    Delete attachments created before `created_before` that no message links
+    to, directly or as an image, then blobs no attachment points at.
+    `remove_file(path)` deletes a file and returns the bytes it freed; it runs
+    before the transaction commits, so a concurrent upload of the same content
+    waits for the commit and then restores the file.
+    """
+    image_refs = (
+        select(Image.data_url)
+        .join(MessageImage, MessageImage.image_id == Image.image_id)
+        .where(Image.data_url.startswith(IMAGE_ATTACHMENT_REF_PREFIX))
+    )
+    image_ref = literal(IMAGE_ATTACHMENT_REF_PREFIX, Text) + cast(Attachment.attachment_id, Text)
+    referenced = select(MessageAttachment.attachment_id).union(select(Attachment.attachment_id).where(image_ref.in_(image_refs)))
+    async with async_session() as session:
+        deleted_attachments = (
+            await session.execute(
+                delete(Attachment)
+                .where(Attachment.created < created_before, Attachment.attachment_id.not_in(referenced))
+                .returning(Attachment.sha256, Attachment.storage_path)
+            )
+        ).all()
+
+        # Recount instead of decrementing, so rows removed by cascades (e.g. a deleted user) are accounted for too.
+        reference_count = select(func.count()).where(Attachment.sha256 == AttachmentBlob.sha256).scalar_subquery()
+        await session.execute(update(AttachmentBlob).values(ref_count=reference_count))
+        deleted_blobs = (
+            await session.execute(delete(AttachmentBlob).where(AttachmentBlob.ref_count == 0).returning(AttachmentBlob.storage_path))
+        ).all()
+
+        bytes_reclaimed = 0
+        for sha256, storage_path in deleted_attachments:
+            if not sha256 and storage_path:
+                bytes_reclaimed += remove_file(str(storage_path))
+        for (storage_path,) in deleted_blobs:
+            bytes_reclaimed += remove_file(str(storage_path))
+        await session.commit()
+
+    return {
+        "attachments_deleted": len(deleted_attachments),
+        "blobs_deleted": len(deleted_blobs),
+        "bytes_reclaimed": bytes_reclaimed,
+    }
+
+
+metrics.instrument_repository(sys.modules[__name__])
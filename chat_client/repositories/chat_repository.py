@@ -1,5 +1,9 @@
-from chat_client.core import exceptions_validation
-from chat_client.core.attachments import make_image_attachment_ref
+import sys
+import asyncio
+from chat_client.core import exceptions_validation, metrics
+from chat_client.core import attachments as attachment_service
+from chat_client.core.prompt_cache import cache_hit_ratio
+from chat_client.core.attachments import StagedBlob, make_image_attachment_ref
 from chat_client.core.usage_pricing import compute_usage_cost, resolve_model_pricing
 from chat_client.repositories import attachment_repository
 from chat_client.repositories import image_repository
@@ -146,6 +150,31 @@ async def update_dialog_title(user_id: int, dialog_id: str, title: str):
         }
 
 
+async def _store_inline_image(session, user_id: int, data_url: str, staged_blobs: list[StagedBlob]) -> str:
+    """
+    Move an inline image into the attachment blob store and return the
+    reference to keep in `Image.data_url`. Images that do not decode are kept inline.
+    """
+    decoded = attachment_service.decode_image_data_url(data_url)
+    if decoded is None:
+        return data_url
+    content_type, content = decoded
+    staged = await asyncio.to_thread(attachment_service.stage_blob_bytes, content)
+    staged_blobs.append(staged)
+    attachment_id = await attachment_repository.add_attachment(
+        session,
+        user_id=user_id,
+        name=attachment_service.build_image_attachment_name(staged.sha256, content_type),
+        content_type=content_type,
+        size_bytes=staged.size_bytes,
+        storage_path=str(staged.storage_path),
+        sha256=staged.sha256,
+    )
+    if attachment_id is None:
+        return data_url
+    return make_image_attachment_ref(attachment_id)
+
+
 async def create_message(
     user_id: int,
     dialog_id: str,
@@ -154,6 +183,23 @@ async def create_message(
     images: list[dict[str, str | int]] | None = None,
     attachments: list[dict[str, str | int]] | None = None,
 ):
+    staged_blobs: list[StagedBlob] = []
+    try:
+        return await _create_message(user_id, dialog_id, role, content, images, attachments, staged_blobs)
+    finally:
+        for staged in staged_blobs:
+            attachment_service.discard_staged_blob(staged)
+
+
+async def _create_message(
+    user_id: int,
+    dialog_id: str,
+    role: str,
+    content: str,
+    images: list[dict[str, str | int]] | None,
+    attachments: list[dict[str, str | int]] | None,
+    staged_blobs: list[StagedBlob],
+):
 
     async with async_session() as session:
         sequence_index = await _next_dialog_sequence_index(session, user_id, dialog_id)
@@ -207,7 +253,7 @@ async def create_message(
             if not data_url.startswith("data:image/"):
                 continue
 
-            new_image = Image(data_url=data_url)
+            new_image = Image(data_url=await _store_inline_image(session, user_id, data_url, staged_blobs))
             session.add(new_image)
             await session.flush()
             image_id = new_image.image_id
@@ -247,6 +293,8 @@ async def create_message(
 
         await _touch_dialog_in_session(session, user_id, dialog_id)
         await session.commit()
+        for staged in staged_blobs:
+            attachment_service.commit_staged_blob(staged)
         await session.refresh(new_message)
 
         return new_message.message_id
@@ -509,7 +557,7 @@ async def get_dialog_usage_totals(
     *,
     start_datetime: datetime | None = None,
     end_datetime_exclusive: datetime | None = None,
-) -> dict[str, str | int]:
+) -> dict[str, str | int | float]:
     async with async_session() as session:
         rows = (
             (
@@ -566,6 +614,7 @@ async def get_dialog_usage_totals(
         "request_count": request_count,
         "input_tokens": input_tokens,
         "cached_input_tokens": cached_input_tokens,
+        "cache_hit_ratio": cache_hit_ratio(cached_input_tokens, input_tokens),
         "output_tokens": output_tokens,
         "total_tokens": total_tokens,
         "reasoning_tokens": reasoning_tokens,
@@ -650,14 +699,14 @@ async def get_dialog_usage_by_turn(
     *,
     start_datetime: datetime | None = None,
     end_datetime_exclusive: datetime | None = None,
-) -> list[dict[str, str | int | list[str]]]:
+) -> list[dict[str, str | int | float | list[str]]]:
     events = await list_dialog_usage_events(
         user_id,
         dialog_id,
         start_datetime=start_datetime,
         end_datetime_exclusive=end_datetime_exclusive,
     )
-    turns_by_id: dict[str, dict[str, str | int | list[str]]] = {}
+    turns_by_id: dict[str, dict[str, str | int | float | list[str]]] = {}
     turn_order: list[str] = []
 
     for event in events:
@@ -710,6 +759,8 @@ async def get_dialog_usage_by_turn(
         except Exception:
             pass
 
+    for turn in turns_by_id.values():
+        turn["cache_hit_ratio"] = cache_hit_ratio(int(str(turn["cached_input_tokens"])), int(str(turn["input_tokens"])))
     return [turns_by_id[turn_id] for turn_id in turn_order]
 
 
@@ -718,7 +769,7 @@ async def get_user_usage_totals(
     *,
     start_datetime: datetime | None = None,
     end_datetime_exclusive: datetime | None = None,
-) -> dict[str, str | int]:
+) -> dict[str, str | int | float]:
     async with async_session() as session:
         rows = (
             (
@@ -776,6 +827,7 @@ async def get_user_usage_totals(
         "request_count": request_count,
         "input_tokens": input_tokens,
         "cached_input_tokens": cached_input_tokens,
+        "cache_hit_ratio": cache_hit_ratio(cached_input_tokens, input_tokens),
         "output_tokens": output_tokens,
         "total_tokens": total_tokens,
         "reasoning_tokens": reasoning_tokens,
@@ -789,7 +841,7 @@ async def list_user_usage_by_dialog(
     *,
     start_datetime: datetime | None = None,
     end_datetime_exclusive: datetime | None = None,
-) -> list[dict[str, str | int]]:
+) -> list[dict[str, str | int | float]]:
     async with async_session() as session:
         usage_rows = (
             (
@@ -808,7 +860,7 @@ async def list_user_usage_by_dialog(
             .scalars()
             .all()
         )
-    dialogs_by_id: dict[str, dict[str, str | int]] = {}
+    dialogs_by_id: dict[str, dict[str, str | int | float]] = {}
     dialog_order: list[str] = []
 
     for row in usage_rows:
@@ -860,6 +912,8 @@ async def list_user_usage_by_dialog(
         except Exception:
             pass
 
+    for dialog in dialogs_by_id.values():
+        dialog["cache_hit_ratio"] = cache_hit_ratio(int(dialog["cached_input_tokens"]), int(dialog["input_tokens"]))
     ordered_dialogs = [dialogs_by_id[dialog_id] for dialog_id in dialog_order]
     ordered_dialogs.sort(key=lambda item: (str(item.get("last_created", "")), str(item.get("dialog_id", ""))), reverse=True)
     return ordered_dialogs
@@ -871,7 +925,7 @@ async def get_user_usage_by_dialog_info(
     *,
     start_datetime: datetime | None = None,
     end_datetime_exclusive: datetime | None = None,
-) -> dict[str, list[dict[str, str | int]] | bool]:
+) -> dict[str, list[dict[str, str | int | float]] | bool]:
     dialogs = await list_user_usage_by_dialog(
         user_id,
         start_datetime=start_datetime,
@@ -886,6 +940,56 @@ async def get_user_usage_by_dialog_info(
     }
 
 
+async def list_usage_by_model(
+    user_id: int,
+    *,
+    dialog_id: str | None = None,
+    start_datetime: datetime | None = None,
+    end_datetime_exclusive: datetime | None = None,
+) -> list[dict[str, str | int | float]]:
+    """
+    Token totals and prompt-cache hit ratio per provider and model, optionally for one dialog.
+    """
+    async with async_session() as session:
+        rows = (
+            await session.execute(
+                select(
+                    LlmUsageEvent.provider,
+                    LlmUsageEvent.model,
+                    func.count(LlmUsageEvent.llm_usage_event_id),
+                    func.coalesce(func.sum(LlmUsageEvent.input_tokens), 0),
+                    func.coalesce(func.sum(LlmUsageEvent.cached_input_tokens), 0),
+                    func.coalesce(func.sum(LlmUsageEvent.output_tokens), 0),
+                )
+                .where(
+                    *_build_usage_event_filters(
+                        user_id,
+                        dialog_id=dialog_id,
+                        start_datetime=start_datetime,
+                        end_datetime_exclusive=end_datetime_exclusive,
+                    )
+                )
+                .group_by(LlmUsageEvent.provider, LlmUsageEvent.model)
+                .order_by(func.sum(LlmUsageEvent.input_tokens).desc(), LlmUsageEvent.model.asc())
+            )
+        ).all()
+
+    models: list[dict[str, str | int | float]] = []
+    for provider, model, request_count, input_tokens, cached_input_tokens, output_tokens in rows:
+        models.append(
+            {
+                "provider": str(provider or ""),
+                "model": str(model or ""),
+                "request_count": int(request_count or 0),
+                "input_tokens": int(input_tokens or 0),
+                "cached_input_tokens": int(cached_input_tokens or 0),
+                "output_tokens": int(output_tokens or 0),
+                "cache_hit_ratio": cache_hit_ratio(int(cached_input_tokens or 0), int(input_tokens or 0)),
+            }
+        )
+    return models
+
+
 async def delete_dialog(user_id: int, dialog_id: str):
 
     async with async_session() as session:
@@ -1042,3 +1146,6 @@ async def update_message(user_id: int, message_id: int, new_content: str):
             "updated": True,
             "was_first_user_message": was_first_user_message,
         }
+
+
+metrics.instrument_repository(sys.modules[__name__])
@@ -1,7 +1,15 @@
-from sqlalchemy import select
+import sys
+from typing import Any
 
-from chat_client.core.attachments import parse_image_attachment_ref
-from chat_client.models import Attachment, Image, MessageImage
+from sqlalchemy import func, select
+
+from chat_client.core import metrics
+from chat_client.core.attachments import make_image_attachment_ref, parse_image_attachment_ref
+from chat_client.database.db_session import async_session
+from chat_client.models import Attachment, Image, Message, MessageImage
+from chat_client.repositories import attachment_repository
+
+INLINE_IMAGE_PREFIX = "data:image/"
 
 
 async def load_message_images(
@@ -54,3 +62,66 @@ async def load_message_images(
             continue
         images_by_message.setdefault(message_id, []).append({"data_url": data_url})
     return images_by_message
+
+
+async def list_inline_images() -> list[dict[str, Any]]:
+    """
+    Images still stored as data URLs, with the user whose message shows them
+    and the stored size, without loading the data URLs themselves.
+    """
+    async with async_session() as session:
+        stmt = (
+            select(Image.image_id, func.min(Message.user_id), func.length(Image.data_url))
+            .join(MessageImage, MessageImage.image_id == Image.image_id)
+            .join(Message, Message.message_id == MessageImage.message_id)
+            .where(Image.data_url.startswith(INLINE_IMAGE_PREFIX))
+            .group_by(Image.image_id)
+            .order_by(Image.image_id.asc())
+        )
+        result = await session.execute(stmt)
+        return [
+            {"image_id": int(image_id), "user_id": int(user_id), "size_bytes": int(size_bytes or 0)}
+            for image_id, user_id, size_bytes in result.all()
+        ]
+
+
+async def get_image_data_url(image_id: int) -> str:
+    async with async_session() as session:
+        data_url = await session.scalar(select(Image.data_url).where(Image.image_id == image_id))
+        return str(data_url or "")
+
+
+async def replace_inline_image(
+    image_id: int,
+    *,
+    user_id: int,
+    name: str,
+    content_type: str,
+    size_bytes: int,
+    storage_path: str,
+    sha256: str,
+) -> int | None:
+    """
+    Create an attachment for a stored blob and point the image at it, in one transaction.
+    """
+    async with async_session() as session:
+        image = await session.get(Image, image_id)
+        if image is None or not str(image.data_url or "").startswith(INLINE_IMAGE_PREFIX):
+            return None
+        attachment_id = await attachment_repository.add_attachment(
+            session,
+            user_id=user_id,
+            name=name,
+            content_type=content_type,
+            size_bytes=size_bytes,
+            storage_path=storage_path,
+            sha256=sha256,
+        )
+        if attachment_id is None:
+            return None
+        image.data_url = make_image_attachment_ref(attachment_id)
+        await session.commit()
+        return attachment_id
+
+
+metrics.instrument_repository(sys.modules[__name__])
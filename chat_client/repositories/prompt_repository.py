@@ -1,9 +1,11 @@
 """Data-access helpers for Prompt CRUD operations."""
 
+import sys
+
 from sqlalchemy import select, update, delete
 
 from chat_client.database.db_session import async_session
-from chat_client.core import exceptions_validation
+from chat_client.core import exceptions_validation, metrics
 from chat_client.models import Prompt
 
 MAX_TITLE_LEN = 256
@@ -72,3 +74,6 @@ async def delete_prompt(user_id: int, prompt_id: int):
         if result.rowcount == 0:
             raise exceptions_validation.UserValidate("Prompt not found or no permission")
         await session.commit()
+
+
+metrics.instrument_repository(sys.modules[__name__])
@@ -1,5 +1,7 @@
 from chat_client.models import Token
 import secrets
+import sys
+from chat_client.core import metrics
 import arrow
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -31,3 +33,6 @@ async def validate_token(session: AsyncSession, token_value: str, type: str) ->
         return False
 
     return True
+
+
+metrics.instrument_repository(sys.modules[__name__])
@@ -1,10 +1,10 @@
 from starlette.requests import Request
 from dataclasses import dataclass
-from chat_client.database.cache import DatabaseCache
+from chat_client.database.cache import MEMORY_CACHE, DatabaseCache
 from chat_client.core.send_mail import send_smtp_message
 
 # from chat_client.core.exceptions import UserValidate
-from chat_client.core import exceptions_validation
+from chat_client.core import exceptions_validation, metrics
 from chat_client.core import user_session
 from chat_client.repositories import token_repository
 from chat_client.core.templates import get_template_content
@@ -14,6 +14,7 @@ import bcrypt
 import logging
 import secrets
 import re
+import sys
 
 from sqlalchemy import select
 from chat_client.database.db_session import async_session
@@ -285,7 +286,7 @@ async def update_profile(request: Request):
         form_data["theme_preference"] = "dark" if bool(form_data.get("dark_theme")) else "light"
 
     async with async_session() as session:
-        cache = DatabaseCache(session)
+        cache = DatabaseCache(session, memory=MEMORY_CACHE)
         cache_key = f"user_{user_id}"
         current_profile = await cache.get(cache_key)
         if not isinstance(current_profile, dict):
@@ -299,7 +300,7 @@ async def get_profile(user_id: int):
         return {}
 
     async with async_session() as session:
-        cache = DatabaseCache(session)
+        cache = DatabaseCache(session, memory=MEMORY_CACHE)
         cache_key = f"user_{user_id}"
         profile = await cache.get(cache_key)
         if not profile:
@@ -328,3 +329,6 @@ def _normalize_profile_theme(profile: dict) -> dict:
         normalized_profile["dark_theme"] = theme_preference == "dark"
 
     return normalized_profile
+
+
+metrics.instrument_repository(sys.modules[__name__])
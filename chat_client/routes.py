@@ -2,6 +2,8 @@ from starlette.routing import BaseRoute, Mount, Route
 
 from chat_client.endpoints import chat_endpoints
 from chat_client.endpoints import error_endpoints
+from chat_client.endpoints import metrics_endpoints
+from chat_client.endpoints import profiling_endpoints
 from chat_client.endpoints import prompt_endpoints
 from chat_client.endpoints import user_auth_endpoints, user_dialog_endpoints, user_profile_endpoints, user_usage_endpoints
 
@@ -34,6 +36,7 @@ chat_routes: list[Route] = [
     Route("/api/chat/attachments/{attachment_id:int}/preview", chat_endpoints.preview_attachment, methods=["GET"]),
     Route("/api/chat/config", chat_endpoints.get_chat_config, methods=["GET"]),
     Route("/api/chat/models", chat_endpoints.list_chat_models, methods=["GET"]),
+    Route("/api/chat/models/warm-up", chat_endpoints.warm_up_model, methods=["POST"]),
     Route("/api/chat/dialogs", chat_endpoints.create_dialog, methods=["POST"]),
     Route("/api/chat/dialogs/{dialog_id:str}", chat_endpoints.get_dialog, methods=["GET"]),
     Route("/api/chat/dialogs/{dialog_id:str}/messages", chat_endpoints.list_messages, methods=["GET"]),
@@ -49,6 +52,14 @@ error_routes: list[Route] = [
     Route("/api/error/log", error_endpoints.create_error_log, methods=["POST"]),
 ]
 
+metrics_routes: list[Route] = [
+    Route("/metrics", metrics_endpoints.get_metrics, methods=["GET"]),
+]
+
+admin_routes: list[Route] = [
+    Route("/admin/profile", profiling_endpoints.create_profile, methods=["POST"]),
+]
+
 prompt_routes: list[Route] = [
     Route("/prompts", prompt_endpoints.prompts_page, methods=["GET"]),
     Route("/prompts/new", prompt_endpoints.create_prompt_page, methods=["GET"]),
@@ -69,5 +80,7 @@ def build_routes(static_files) -> list[BaseRoute]:
     routes.extend(user_routes)
     routes.extend(chat_routes)
     routes.extend(error_routes)
+    routes.extend(metrics_routes)
+    routes.extend(admin_routes)
     routes.extend(prompt_routes)
     return routes
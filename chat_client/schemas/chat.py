@@ -34,6 +34,11 @@ class ChatStreamRequest(BaseModel):
     messages: list[ChatMessageRequest] = Field(default_factory=list)
 
 
+class WarmUpModelRequest(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    model: str
+
+
 class CreateDialogRequest(BaseModel):
     model_config = ConfigDict(extra="ignore")
     title: str
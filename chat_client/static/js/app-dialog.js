@@ -30,6 +30,13 @@ async function getMessages(dialogID) {
     return Requests.asyncGetJson(`/api/chat/dialogs/${dialogID}/messages`);
 }
 
+/**
+ * Ask the server to start loading a model, so the first message does not wait for it
+ */
+async function warmUpModel(model) {
+    return Requests.asyncPostJson('/api/chat/models/warm-up', { model });
+}
+
 async function getDialogUsage(dialogID) {
     return Requests.asyncGetJson(`/api/chat/dialogs/${dialogID}/usage`);
 }
@@ -69,4 +76,4 @@ async function updateMessage(messageId, content) {
     return Requests.asyncPostJson(`/api/chat/messages/${messageId}`, { content });
 }
 
-export { createDialog, generateDialogTitle, getMessages, getDialogUsage, createMessage, createAssistantTurnEvents, getConfig, updateMessage, uploadAttachment };
+export { createDialog, generateDialogTitle, getMessages, getDialogUsage, createMessage, createAssistantTurnEvents, getConfig, updateMessage, uploadAttachment, warmUpModel };
@@ -96,6 +96,20 @@ function createAssistantStreamSession({ view }) {
                 turnId = String(chunk.turnId || '').trim();
                 return;
             }
+            if (chunk.queuePosition !== undefined) {
+                const segment = await ensureLoadingAnswerContainer();
+                if (chunk.queuePosition > 0) {
+                    segment.setStatus(`Waiting in queue (position ${chunk.queuePosition})...`);
+                }
+                return;
+            }
+            if (chunk.modelStatus) {
+                const segment = await ensureLoadingAnswerContainer();
+                if (chunk.modelStatus.state === 'loading') {
+                    segment.setStatus(`Loading model ${chunk.modelStatus.model} into memory...`);
+                }
+                return;
+            }
             if (chunk.toolStatus) {
                 const currentSegment = turnUi ? turnUi.getActiveAssistantSegment() : null;
                 if (currentSegment && currentSegment.segmentKind !== 'tool') {
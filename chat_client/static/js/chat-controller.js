@@ -67,6 +67,11 @@ class ConversationController {
         };
     }
 
+    shouldWarmUpModel(modelName) {
+        const modelProviders = this.config.model_providers || {};
+        return Boolean(this.config.ollama_warm_up_on_select) && modelProviders[modelName] === 'ollama';
+    }
+
     selectedModelSupportsImages() {
         return Boolean(this.getSelectedModelCapabilities().supports_images);
     }
@@ -439,9 +444,12 @@ class ConversationController {
     }
 
     wireUI() {
-        this.modelSelection.subscribe(() => {
+        this.modelSelection.subscribe((modelName, details) => {
             this.updateAttachmentUI();
             this.updateSendButtonState();
+            if (details.source === 'select' && this.shouldWarmUpModel(modelName)) {
+                this.chat.warmUp(modelName);
+            }
         });
         this.reasoningSelection.subscribe(() => {
             this.updateSendButtonState();
@@ -1,4 +1,4 @@
-import { createDialog, generateDialogTitle, getMessages, getDialogUsage, createMessage, createAssistantTurnEvents, updateMessage, uploadAttachment } from '/static/js/app-dialog.js';
+import { createDialog, generateDialogTitle, getMessages, getDialogUsage, createMessage, createAssistantTurnEvents, updateMessage, uploadAttachment, warmUpModel } from '/static/js/app-dialog.js';
 import { asRecord, normalizeStreamEvents, parseStreamLine } from '/static/js/chat-stream-events.js';
 
 const storageService = {
@@ -42,6 +42,14 @@ async function getStreamingChatResponse(payload, signal) {
 }
 
 const chatService = {
+    async warmUp(model) {
+        try {
+            await warmUpModel(model);
+        } catch (error) {
+            console.warn('Failed to warm up model:', error);
+        }
+    },
+
     async *stream(payload, signal) {
         const response = await getStreamingChatResponse(payload, signal);
         if (!response.body) {
@@ -38,6 +38,22 @@ function normalizeStreamEvents(data, reasoningOpen) {
         };
     }
 
+    const queue = asRecord(payload.queue);
+    if (Number.isInteger(queue.position)) {
+        return {
+            events: [{ queuePosition: queue.position }],
+            reasoningOpen,
+        };
+    }
+
+    const modelStatus = asRecord(payload.model_status);
+    if (typeof modelStatus.state === 'string' && modelStatus.state) {
+        return {
+            events: [{ modelStatus: { model: String(modelStatus.model || ''), state: modelStatus.state } }],
+            reasoningOpen,
+        };
+    }
+
     if (typeof payload.turn_id === 'string' && payload.turn_id.trim()) {
         return {
             events: [{ turnId: payload.turn_id.trim() }],
@@ -2,8 +2,9 @@ import json
 import os
 from typing import Any
 
-import httpx
+from chat_client.tools import http_client
 
+GOOGLE_SEARCH_TIMEOUT_SECONDS = 15.0
 GOOGLE_SEARCH_API_URL = "https://www.googleapis.com/customsearch/v1"
 
 
@@ -13,7 +14,7 @@ def _resolve_google_search_credentials() -> tuple[str, str]:
     return api_key, cx
 
 
-def google_search(query: str, num_results: int = 5) -> str:
+async def google_search(query: str, num_results: int = 5) -> str:
     """
     Search Google via Custom Search JSON API and return compact JSON results.
     """
@@ -41,11 +42,11 @@ def google_search(query: str, num_results: int = 5) -> str:
         "num": count,
     }
 
+    httpx = http_client.httpx
     try:
-        with httpx.Client(timeout=15.0) as client:
-            response = client.get(GOOGLE_SEARCH_API_URL, params=params)
-            response.raise_for_status()
-            payload: Any = response.json()
+        response = await http_client.get(GOOGLE_SEARCH_API_URL, params=params, timeout=GOOGLE_SEARCH_TIMEOUT_SECONDS)
+        response.raise_for_status()
+        payload: Any = response.json()
     except httpx.TimeoutException:
         return json.dumps({"error": "Google Search request timed out"}, ensure_ascii=True)
     except httpx.HTTPStatusError as error:
@@ -0,0 +1,96 @@
+"""
+Shared async HTTP client for the built-in web tools.
+
+Each event loop gets one `httpx.AsyncClient`, so connections to Wikipedia or
+Google stay open between tool calls. httpx caps connections per pool, not per
+host, so concurrent requests to one host are additionally limited by a
+semaphore. httpx is imported on first use to keep config and app import cheap.
+"""
+
+import asyncio
+import weakref
+from dataclasses import dataclass, field
+from typing import Any
+from urllib.parse import urlsplit
+
+from chat_client.core import lazy_imports
+
+__getattr__ = lazy_imports.module_getattr(__name__, {"httpx": "httpx"})
+
+MAX_CONNECTIONS = 32
+MAX_KEEPALIVE_CONNECTIONS = 16
+MAX_CONNECTIONS_PER_HOST = 8
+KEEPALIVE_EXPIRY_SECONDS = 30.0
+DEFAULT_TIMEOUT_SECONDS = 20.0
+
+
+@dataclass
+class _LoopClient:
+    client: Any
+    host_slots: dict[str, asyncio.Semaphore] = field(default_factory=dict)
+
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopClient]" = weakref.WeakKeyDictionary()
+
+
+def _loop_client() -> _LoopClient:
+    loop = asyncio.get_running_loop()
+    state = _clients.get(loop)
+    if state is None or state.client.is_closed:
+        httpx = lazy_imports.load(__name__, "httpx")
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            timeout=DEFAULT_TIMEOUT_SECONDS,
+        )
+        state = _LoopClient(client=client)
+        _clients[loop] = state
+    return state
+
+
+def get_client() -> Any:
+    """
+    The `httpx.AsyncClient` of the running event loop.
+    """
+    return _loop_client().client
+
+
+async def get(
+    url: str, *, params: dict[str, Any] | None = None, headers: dict[str, str] | None = None, timeout: float | None = None
+) -> Any:
+    """
+    GET `url` with the shared client, waiting for a free per-host slot first.
+    Returns the `httpx.Response`; httpx errors propagate to the caller.
+    """
+    state = _loop_client()
+    async with _host_slot(state, url):
+        return await state.client.get(url, params=params, headers=headers, timeout=timeout or DEFAULT_TIMEOUT_SECONDS)
+
+
+async def post(url: str, *, json: Any = None, headers: dict[str, str] | None = None, timeout: float | None = None) -> Any:
+    """
+    POST `json` to `url` with the shared client, like `get`.
+    """
+    state = _loop_client()
+    async with _host_slot(state, url):
+        return await state.client.post(url, json=json, headers=headers, timeout=timeout or DEFAULT_TIMEOUT_SECONDS)
+
+
+def _host_slot(state: _LoopClient, url: str) -> asyncio.Semaphore:
+    host = urlsplit(url).netloc
+    slot = state.host_slots.get(host)
+    if slot is None:
+        slot = state.host_slots[host] = asyncio.Semaphore(MAX_CONNECTIONS_PER_HOST)
+    return slot
+
+
+async def aclose() -> None:
+    """
+    Close the running event loop's client, e.g. at the end of the app lifespan.
+    """
+    state = _clients.pop(asyncio.get_running_loop(), None)
+    if state is not None:
+        await state.client.aclose()
@@ -2,10 +2,12 @@ import importlib
 import os
 import subprocess
 import tempfile
+import time
 import uuid
 from contextlib import nullcontext
 
-from chat_client.core.attachments import resolve_tool_mount_dir
+from chat_client.core import tracing
+from chat_client.core.attachments import resolve_tool_mount_dir, resolve_tool_workspace_mode
 
 MAX_CODE_LENGTH = 8_000
 DEFAULT_PYTHON_TOOL_TIMEOUT_SECONDS = 10.0
@@ -13,6 +15,9 @@ PYTHON_TOOL_DOCKER_IMAGE = "chat-client-python-tool"
 NO_RESULT_ERROR = "[stderr]\nNo result produced. Please print the answer."
 ATTACHMENT_SOURCE_MOUNT_DIR = "/mnt/input"
 ATTACHMENT_TMPFS_SPEC = "rw,size=65m"
+# First stderr line written by the runtime prelude, followed by the container's clock in ns.
+# It splits the traced `docker run` into container startup and code execution.
+STARTED_MARKER = "__chat_client_started__ "
 
 
 class PythonRuntimeError(RuntimeError):
@@ -40,6 +45,11 @@ def force_remove_container(container_name: str) -> None:
 def build_runtime_prelude() -> str:
     workspace_dir = resolve_tool_mount_dir()
     return f"""
+import sys as _chat_client_sys
+import time as _chat_client_time
+_chat_client_sys.stderr.write({STARTED_MARKER!r} + str(_chat_client_time.time_ns()) + "\\n")
+_chat_client_sys.stderr.flush()
+
 import os as _chat_client_os
 import shutil as _chat_client_shutil
 from pathlib import Path as _chat_client_Path
@@ -183,6 +193,38 @@ def validate_code_input(code: str) -> str | None:
     return None
 
 
+def split_started_marker(stderr_text: str) -> tuple[int | None, str]:
+    """
+    Remove the prelude's start marker from `stderr_text` and return the
+    container start time it carries.
+    """
+    if not stderr_text.startswith(STARTED_MARKER):
+        return None, stderr_text
+    marker_line, _, rest = stderr_text.partition("\n")
+    try:
+        return int(marker_line[len(STARTED_MARKER) :]), rest
+    except ValueError:
+        return None, rest
+
+
+def build_attachment_mount_args(attachment_host_dir: str, workspace_mode: str) -> list[str]:
+    """
+    Docker arguments mounting the prepared attachments. In the "link" mode each
+    file is mounted writable over the workspace tmpfs; in the "copy" mode the
+    directory is mounted read-only for the runtime prelude to copy from.
+    """
+    if workspace_mode == "copy":
+        return ["-v", f"{attachment_host_dir}:{ATTACHMENT_SOURCE_MOUNT_DIR}:ro"]
+    if not os.path.isdir(attachment_host_dir):
+        return []
+    workspace_dir = resolve_tool_mount_dir().rstrip("/")
+    mount_args: list[str] = []
+    for entry in sorted(os.scandir(attachment_host_dir), key=lambda entry: entry.name):
+        if entry.is_file(follow_symlinks=False):
+            mount_args.extend(["-v", f"{entry.path}:{workspace_dir}/{entry.name}"])
+    return mount_args
+
+
 def _format_docker_runtime_error(stderr_text: str, resolved_docker_image: str) -> str:
     lowered = stderr_text.lower()
     if (
@@ -223,6 +265,7 @@ def run_python_in_docker(
                 wrapped_code = build_runtime_script(code)
                 code_file.write(wrapped_code)
                 code_file_path = code_file.name
+            attachment_mount_args = build_attachment_mount_args(resolved_attachment_host_dir, resolve_tool_workspace_mode())
         os.chmod(code_file_path, 0o644)
 
         docker_command = [
@@ -235,17 +278,24 @@ def run_python_in_docker(
             f"{resolve_tool_mount_dir()}:{ATTACHMENT_TMPFS_SPEC}",
             "-v",
             f"{code_file_path}:/sandbox/script.py:ro",
-            "-v",
-            f"{resolved_attachment_host_dir}:{ATTACHMENT_SOURCE_MOUNT_DIR}:ro",
+            *attachment_mount_args,
         ]
 
-        completed = subprocess.run(
-            [*docker_command, resolved_docker_image, "/sandbox/script.py"],
-            text=True,
-            capture_output=True,
-            timeout=timeout_seconds,
-            check=False,
-        )
+        run_started_ns = time.time_ns()
+        with tracing.start_span("tool.docker.run", image=resolved_docker_image) as run_span:
+            completed = subprocess.run(
+                [*docker_command, resolved_docker_image, "/sandbox/script.py"],
+                text=True,
+                capture_output=True,
+                timeout=timeout_seconds,
+                check=False,
+            )
+            run_finished_ns = time.time_ns()
+            run_span.set_attribute("exit_code", completed.returncode)
+            container_started_ns, completed.stderr = split_started_marker(completed.stderr or "")
+            if container_started_ns is not None and run_started_ns <= container_started_ns <= run_finished_ns:
+                tracing.record_span("tool.docker.startup", run_started_ns, container_started_ns)
+                tracing.record_span("tool.docker.execute", container_started_ns, run_finished_ns)
     except FileNotFoundError:
         raise PythonRuntimeError("Docker is not installed or not available in PATH.")
     except subprocess.TimeoutExpired:
@@ -2,10 +2,10 @@ import json
 import re
 from html import unescape
 from typing import Any
-from urllib.error import HTTPError, URLError
-from urllib.parse import urlencode
-from urllib.request import Request, urlopen
 
+from chat_client.tools import http_client
+
+WIKIPEDIA_API_URL = "https://{language}.wikipedia.org/w/api.php"
 WIKIPEDIA_API_TIMEOUT_SECONDS = 20
 WIKIPEDIA_USER_AGENT = "chat-client/0.1"
 
@@ -25,17 +25,21 @@ def _resolve_language(language: str | None) -> str:
     return normalized
 
 
-def _request_wikipedia_api(language: str, params: dict[str, Any]) -> dict[str, Any]:
-    url = f"https://{language}.wikipedia.org/w/api.php?{urlencode(params)}"
-    request = Request(url, headers={"User-Agent": WIKIPEDIA_USER_AGENT})
-
+async def _request_wikipedia_api(language: str, params: dict[str, Any]) -> dict[str, Any]:
+    httpx = http_client.httpx
     try:
-        with urlopen(request, timeout=WIKIPEDIA_API_TIMEOUT_SECONDS) as response:
-            payload = json.load(response)
-    except HTTPError as error:
-        raise ValueError(f"Wikipedia request failed with HTTP {error.code}.") from error
-    except URLError as error:
-        raise ValueError(f"Wikipedia request failed: {error.reason}.") from error
+        response = await http_client.get(
+            WIKIPEDIA_API_URL.format(language=language),
+            params=params,
+            headers={"User-Agent": WIKIPEDIA_USER_AGENT},
+            timeout=WIKIPEDIA_API_TIMEOUT_SECONDS,
+        )
+        response.raise_for_status()
+        payload = response.json()
+    except httpx.HTTPStatusError as error:
+        raise ValueError(f"Wikipedia request failed with HTTP {error.response.status_code}.") from error
+    except httpx.HTTPError as error:
+        raise ValueError(f"Wikipedia request failed: {error or type(error).__name__}.") from error
     except json.JSONDecodeError as error:
         raise ValueError("Wikipedia response was not valid JSON.") from error
 
@@ -49,7 +53,7 @@ def _clean_search_snippet(snippet: Any) -> str:
     return unescape(text)
 
 
-def get_wikipedia_pages_json(title: str, language: str = "en") -> str:
+async def get_wikipedia_pages_json(title: str, language: str = "en") -> str:
     """
     Fetch plain-text article content from Wikipedia and return the query.pages JSON payload.
     """
@@ -58,7 +62,7 @@ def get_wikipedia_pages_json(title: str, language: str = "en") -> str:
         raise ValueError("title is required and must be a non-empty string.")
 
     resolved_language = _resolve_language(language)
-    payload = _request_wikipedia_api(
+    payload = await _request_wikipedia_api(
         resolved_language,
         {
             "action": "query",
@@ -79,7 +83,7 @@ def get_wikipedia_pages_json(title: str, language: str = "en") -> str:
     return json.dumps(pages, ensure_ascii=False)
 
 
-def search_wikipedia(query: str, language: str = "en", limit: int = 5) -> str:
+async def search_wikipedia(query: str, language: str = "en", limit: int = 5) -> str:
     """
     Search Wikipedia article titles and return compact JSON results.
     """
@@ -94,7 +98,7 @@ def search_wikipedia(query: str, language: str = "en", limit: int = 5) -> str:
     result_limit = max(1, min(result_limit, 10))
 
     resolved_language = _resolve_language(language)
-    payload = _request_wikipedia_api(
+    payload = await _request_wikipedia_api(
         resolved_language,
         {
             "action": "query",
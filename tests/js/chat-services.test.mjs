@@ -37,6 +37,24 @@ test('normalizeStreamEvents handles turn id, tool status, and tool call payloads
   );
 });
 
+test('normalizeStreamEvents reports queue positions', () => {
+  assert.deepEqual(
+    normalizeStreamEvents({ queue: { position: 3 } }, false),
+    { events: [{ queuePosition: 3 }], reasoningOpen: false },
+  );
+  assert.deepEqual(
+    normalizeStreamEvents({ queue: { position: 0 } }, false),
+    { events: [{ queuePosition: 0 }], reasoningOpen: false },
+  );
+});
+
+test('normalizeStreamEvents reports model loading', () => {
+  assert.deepEqual(
+    normalizeStreamEvents({ model_status: { model: 'llama3.1:70b', state: 'loading' } }, false),
+    { events: [{ modelStatus: { model: 'llama3.1:70b', state: 'loading' } }], reasoningOpen: false },
+  );
+});
+
 test('normalizeStreamEvents opens reasoning, emits content, and marks completion', () => {
   assert.deepEqual(
     normalizeStreamEvents({
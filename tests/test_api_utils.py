@@ -114,6 +114,27 @@ def test_get_ollama_model_metadata_includes_context_length():
     }
 
 
+def test_get_ollama_model_metadata_marks_unreachable_server_and_refresh_bypasses_cache():
+    api_utils._OLLAMA_MODEL_METADATA_CACHE.clear()
+    provider = {"base_url": "http://127.0.0.1:11434/v1", "api_key": "ollama"}
+    client = DummyClient(
+        [
+            httpx.ConnectError("connection refused"),
+            DummyResponse({"capabilities": ["tools"], "model_info": {}}),
+        ]
+    )
+
+    with patch("chat_client.core.api_utils.httpx.Client", return_value=client):
+        failed = api_utils.get_ollama_model_metadata(provider, "qwen3:latest")
+        cached = api_utils.get_ollama_model_metadata(provider, "qwen3:latest")
+        refreshed = api_utils.get_ollama_model_metadata(provider, "qwen3:latest", refresh=True)
+
+    assert failed["probe_failed"] is True
+    assert cached == failed
+    assert "probe_failed" not in refreshed
+    assert refreshed["supports_tools"] is True
+
+
 def test_get_openai_model_metadata_marks_reasoning_models_supported():
     api_utils._OPENAI_MODEL_METADATA_CACHE.clear()
 
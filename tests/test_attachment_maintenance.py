@@ -0,0 +1,177 @@
+import asyncio
+import base64
+import hashlib
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from chat_client.core import attachment_maintenance
+from chat_client.core import attachments as attachment_service
+from chat_client.models import Attachment, AttachmentBlob, Dialog, Image, Message, MessageAttachment, MessageImage, User
+from chat_client.repositories import attachment_repository, chat_repository, image_repository
+from tests.test_base import TestDatabase
+
+
+def _run(monkeypatch, tmp_path, test):
+    test_db = TestDatabase()
+    monkeypatch.setattr(attachment_service, "resolve_attachment_storage_dir", lambda: tmp_path)
+
+    async def _run_test():
+        await test_db.setup()
+        for repository in (attachment_repository, chat_repository, image_repository):
+            monkeypatch.setattr(repository, "async_session", test_db.session_factory)
+        try:
+            async with test_db.session_factory() as session:
+                session.add(User(password_hash="x", email="a@example.com", random="r"))
+                await session.flush()
+                session.add(Dialog(dialog_id="d1", user_id=1, title="Dialog"))
+                await session.commit()
+            return await test(test_db.session_factory)
+        finally:
+            await test_db.teardown()
+
+    return asyncio.run(_run_test())
+
+
+async def _create(content: bytes, name: str = "notes.txt") -> int:
+    sha256 = hashlib.sha256(content).hexdigest()
+    storage_path = attachment_service.build_blob_storage_path(sha256)
+    storage_path.parent.mkdir(parents=True, exist_ok=True)
+    storage_path.write_bytes(content)
+    attachment_id = await attachment_repository.create_attachment(1, name, "text/plain", len(content), str(storage_path), sha256=sha256)
+    assert attachment_id is not None
+    return attachment_id
+
+
+async def _blobs(session_factory) -> dict[str, int]:
+    async with session_factory() as session:
+        rows = (await session.execute(select(AttachmentBlob.sha256, AttachmentBlob.ref_count))).all()
+    return {sha256: ref_count for sha256, ref_count in rows}
+
+
+def test_identical_uploads_share_one_blob(monkeypatch, tmp_path):
+    async def test(session_factory):
+        await _create(b"a,b\n1,2\n", "data.csv")
+        await _create(b"a,b\n1,2\n", "copy.csv")
+        return await _blobs(session_factory)
+
+    blobs = _run(monkeypatch, tmp_path, test)
+
+    assert blobs == {hashlib.sha256(b"a,b\n1,2\n").hexdigest(): 2}
+    assert len([path for path in (tmp_path / "blobs").rglob("*") if path.is_file()]) == 1
+
+
+def test_garbage_collection_keeps_what_messages_reference(monkeypatch, tmp_path):
+    legacy_path = tmp_path / "9_old.txt"
+    legacy_path.write_bytes(b"legacy")
+
+    async def test(session_factory):
+        linked = await _create(b"shared")
+        await _create(b"shared")
+        image = await _create(b"\x89PNG", "chart.png")
+        await _create(b"orphan")
+        async with session_factory() as session:
+            message = Message(dialog_id="d1", user_id=1, role="user", content="See files")
+            session.add(message)
+            session.add(Attachment(user_id=1, name="old.txt", storage_path=str(legacy_path), size_bytes=6))
+            image_row = Image(data_url=attachment_service.make_image_attachment_ref(image))
+            session.add(image_row)
+            await session.flush()
+            session.add(MessageAttachment(message_id=message.message_id, attachment_id=linked))
+            session.add(MessageImage(message_id=message.message_id, image_id=image_row.image_id))
+            await session.commit()
+
+        kept = await attachment_repository.collect_garbage(datetime.now() - timedelta(days=1), attachment_maintenance.remove_file)
+        report = await attachment_repository.collect_garbage(datetime.now() + timedelta(days=1), attachment_maintenance.remove_file)
+        return kept, report, await _blobs(session_factory)
+
+    kept, report, blobs = _run(monkeypatch, tmp_path, test)
+
+    assert kept == {"attachments_deleted": 0, "blobs_deleted": 0, "bytes_reclaimed": 0}
+    assert report == {"attachments_deleted": 3, "blobs_deleted": 1, "bytes_reclaimed": len(b"orphan") + len(b"legacy")}
+    assert blobs == {hashlib.sha256(b"shared").hexdigest(): 1, hashlib.sha256(b"\x89PNG").hexdigest(): 1}
+    assert not legacy_path.exists()
+    assert not attachment_service.build_blob_storage_path(hashlib.sha256(b"orphan").hexdigest()).exists()
+
+
+def test_legacy_files_are_moved_into_the_blob_store(monkeypatch, tmp_path):
+    first = tmp_path / "1_report.csv"
+    second = tmp_path / "2_report.csv"
+    first.write_bytes(b"x,y\n")
+    second.write_bytes(b"x,y\n")
+
+    async def test(session_factory):
+        async with session_factory() as session:
+            for path in (first, second, tmp_path / "3_missing.csv"):
+                session.add(Attachment(user_id=1, name="report.csv", storage_path=str(path), size_bytes=4))
+                await session.flush()
+            await session.commit()
+        report = await attachment_maintenance.migrate_legacy_attachments()
+        async with session_factory() as session:
+            paths = (await session.execute(select(Attachment.storage_path).order_by(Attachment.attachment_id))).scalars().all()
+        return report, paths, await _blobs(session_factory)
+
+    report, paths, blobs = _run(monkeypatch, tmp_path, test)
+
+    sha256 = hashlib.sha256(b"x,y\n").hexdigest()
+    assert report == {"migrated": 2, "missing": 1, "bytes_reclaimed": 4}
+    assert paths[:2] == [str(attachment_service.build_blob_storage_path(sha256))] * 2
+    assert blobs == {sha256: 2}
+    assert not first.exists() and not second.exists()
+
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\n-pixels"
+PNG_DATA_URL = "data:image/png;base64," + base64.b64encode(PNG_BYTES).decode("ascii")
+
+
+async def _image_rows(session_factory) -> list[str]:
+    async with session_factory() as session:
+        return list((await session.execute(select(Image.data_url).order_by(Image.image_id))).scalars().all())
+
+
+def test_new_inline_images_are_stored_as_blobs(monkeypatch, tmp_path):
+    async def test(session_factory):
+        message_id = await chat_repository.create_message(1, "d1", "user", "Look", images=[{"data_url": PNG_DATA_URL}])
+        async with session_factory() as session:
+            images = await image_repository.load_message_images(session, message_ids=[message_id])
+        return images[message_id], await _image_rows(session_factory), await _blobs(session_factory)
+
+    images, rows, blobs = _run(monkeypatch, tmp_path, test)
+
+    sha256 = hashlib.sha256(PNG_BYTES).hexdigest()
+    assert rows == [attachment_service.make_image_attachment_ref(1)]
+    assert images == [
+        {
+            "attachment_id": 1,
+            "name": f"image_{sha256[:12]}.png",
+            "content_type": "image/png",
+            "size_bytes": len(PNG_BYTES),
+            "preview_url": "/api/chat/attachments/1/preview",
+        }
+    ]
+    assert blobs == {sha256: 1}
+    assert attachment_service.build_blob_storage_path(sha256).read_bytes() == PNG_BYTES
+    assert not list((tmp_path / "blobs").glob(f"{attachment_service.STAGED_UPLOAD_PREFIX}*"))
+
+
+def test_existing_inline_images_are_moved_out_of_the_database(monkeypatch, tmp_path):
+    async def test(session_factory):
+        async with session_factory() as session:
+            message = Message(dialog_id="d1", user_id=1, role="user", content="Look")
+            session.add(message)
+            await session.flush()
+            for data_url in (PNG_DATA_URL, PNG_DATA_URL, "data:image/png;base64,not base64!"):
+                image_row = Image(data_url=data_url)
+                session.add(image_row)
+                await session.flush()
+                session.add(MessageImage(message_id=message.message_id, image_id=image_row.image_id))
+            await session.commit()
+        report = await attachment_maintenance.spill_inline_images()
+        return report, await _image_rows(session_factory), await _blobs(session_factory)
+
+    report, rows, blobs = _run(monkeypatch, tmp_path, test)
+
+    assert report == {"moved": 2, "skipped": 1, "bytes_moved": 2 * len(PNG_DATA_URL)}
+    assert rows[:2] == [attachment_service.make_image_attachment_ref(1), attachment_service.make_image_attachment_ref(2)]
+    assert rows[2].startswith("data:image/png")
+    assert blobs == {hashlib.sha256(PNG_BYTES).hexdigest(): 2}
@@ -2,12 +2,14 @@
 Tests for chat endpoints (chat page, streaming, models, dialogs, messages)
 """
 
+import asyncio
+import hashlib
+import json
 from datetime import datetime
-from pathlib import Path
 import pytest
-from unittest.mock import patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
-from tests.test_base import BaseTestCase, mock_openai_client
+from tests.test_base import BaseTestCase, mock_openai_client, run_async_test
 
 
 class TestChatEndpoints(BaseTestCase):
@@ -506,32 +508,18 @@ class TestChatEndpoints(BaseTestCase):
                 ]
             },
         )()
-
-        mock_client = type(
-            "Client",
-            (),
-            {
-                "chat": type(
-                    "Chat",
-                    (),
-                    {
-                        "completions": type(
-                            "Completions",
-                            (),
-                            {"create": lambda self, **kwargs: mock_response},
-                        )()
-                    },
-                )()
-            },
-        )()
+        mock_client = MagicMock()
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
 
         with (
             patch("chat_client.endpoints.chat_endpoints._resolve_provider_info", return_value={"api_key": "key", "base_url": "http://x"}),
-            patch("chat_client.endpoints.chat_endpoints.OpenAI", return_value=mock_client),
+            patch("chat_client.endpoints.chat_endpoints.AsyncOpenAI", return_value=mock_client),
         ):
-            title = _generate_dialog_title(
-                "How do I mount a network drive on Linux?",
-                "test-model",
+            title = run_async_test(
+                _generate_dialog_title(
+                    "How do I mount a network drive on Linux?",
+                    "test-model",
+                )
             )
 
         assert title == "Summarized title"
@@ -540,36 +528,133 @@ class TestChatEndpoints(BaseTestCase):
         from chat_client.endpoints.chat_endpoints import _generate_dialog_title
 
         mock_response = type("Response", (), {"choices": []})()
-
-        mock_client = type(
-            "Client",
-            (),
-            {
-                "chat": type(
-                    "Chat",
-                    (),
-                    {
-                        "completions": type(
-                            "Completions",
-                            (),
-                            {"create": lambda self, **kwargs: mock_response},
-                        )()
-                    },
-                )()
-            },
-        )()
+        mock_client = MagicMock()
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
 
         with (
             patch("chat_client.endpoints.chat_endpoints._resolve_provider_info", return_value={"api_key": "key", "base_url": "http://x"}),
-            patch("chat_client.endpoints.chat_endpoints.OpenAI", return_value=mock_client),
+            patch("chat_client.endpoints.chat_endpoints.AsyncOpenAI", return_value=mock_client),
         ):
-            title = _generate_dialog_title(
-                "Summarize release notes for version 2.1",
-                "test-model",
+            title = run_async_test(
+                _generate_dialog_title(
+                    "Summarize release notes for version 2.1",
+                    "test-model",
+                )
             )
 
         assert title == "Summarize release notes for version 2 1"
 
+    def test_generate_dialog_title_falls_back_to_derived_title_when_provider_fails(self):
+        from chat_client.endpoints.chat_endpoints import _generate_dialog_title
+
+        mock_client = MagicMock()
+        mock_client.chat.completions.create = AsyncMock(side_effect=RuntimeError("offline"))
+
+        with (
+            patch("chat_client.endpoints.chat_endpoints._resolve_provider_info", return_value={"api_key": "key", "base_url": "http://x"}),
+            patch("chat_client.endpoints.chat_endpoints.AsyncOpenAI", return_value=mock_client),
+            patch("chat_client.repositories.chat_repository.create_llm_usage_event") as mock_create_usage,
+        ):
+            title = run_async_test(_generate_dialog_title("Summarize release notes for version 2.1", "test-model", 1, "dlg"))
+
+        assert title == "Summarize release notes for version 2 1"
+        mock_create_usage.assert_not_called()
+
+    def test_generate_dialog_title_persists_usage_through_async_repository(self):
+        from chat_client.endpoints.chat_endpoints import _generate_dialog_title
+
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock()]
+        mock_response.choices[0].message.content = "Release notes"
+        mock_response.usage = None
+        mock_client = MagicMock()
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+
+        with (
+            patch("chat_client.endpoints.chat_endpoints._resolve_provider_info", return_value={"api_key": "key", "base_url": "http://x"}),
+            patch("chat_client.endpoints.chat_endpoints.AsyncOpenAI", return_value=mock_client),
+            patch("chat_client.repositories.chat_repository.create_llm_usage_event") as mock_create_usage,
+        ):
+            title = run_async_test(_generate_dialog_title("Summarize release notes", "test-model", 1, "dlg"))
+
+        assert title == "Release notes"
+        mock_create_usage.assert_awaited_once()
+        assert mock_create_usage.await_args.kwargs["call_type"] == "title_generation"
+        assert mock_create_usage.await_args.kwargs["dialog_id"] == "dlg"
+
+    def test_generate_dialog_title_coalesces_concurrent_requests_for_same_dialog(self):
+        from chat_client.endpoints.chat_endpoints import _generate_dialog_title_coalesced
+
+        calls = []
+
+        async def fake_generate(user_content, model, user_id=None, dialog_id=""):
+            calls.append(dialog_id)
+            await asyncio.sleep(0.01)
+            return f"Title for {dialog_id}"
+
+        async def _run():
+            return await asyncio.gather(
+                _generate_dialog_title_coalesced("Hello", "title-model", 1, "dlg"),
+                _generate_dialog_title_coalesced("Hello", "title-model", 1, "dlg"),
+                _generate_dialog_title_coalesced("Hello", "title-model", 1, "other"),
+            )
+
+        with patch("chat_client.endpoints.chat_endpoints._generate_dialog_title", side_effect=fake_generate):
+            titles = run_async_test(_run())
+
+        assert titles == ["Title for dlg", "Title for dlg", "Title for other"]
+        assert sorted(calls) == ["dlg", "other"]
+
+    def test_speculative_dialog_title_is_joined_by_title_request(self):
+        from chat_client.endpoints.chat_endpoints import _generate_dialog_title_coalesced, _start_speculative_dialog_title
+
+        calls = []
+
+        async def fake_generate(user_content, model, user_id=None, dialog_id=""):
+            calls.append(user_content)
+            await asyncio.sleep(0.01)
+            return "Mounted network drive"
+
+        async def _run():
+            _start_speculative_dialog_title(
+                1,
+                "dlg",
+                {"dialog_id": "dlg", "title": "New Chat"},
+                [{"role": "user", "content": "How do I mount a drive?", "images": [], "attachments": []}],
+            )
+            title = await _generate_dialog_title_coalesced("How do I mount a drive?", "title-model", 1, "dlg")
+            await asyncio.sleep(0.02)
+            return title
+
+        with (
+            patch("chat_client.endpoints.chat_endpoints.DIALOG_TITLE_MODEL", "title-model"),
+            patch("chat_client.endpoints.chat_endpoints.DIALOG_TITLE_SPECULATIVE", True),
+            patch("chat_client.endpoints.chat_endpoints._generate_dialog_title", side_effect=fake_generate),
+            patch("chat_client.repositories.chat_repository.update_dialog_title") as mock_update_dialog_title,
+        ):
+            title = run_async_test(_run())
+
+        assert title == "Mounted network drive"
+        assert calls == ["How do I mount a drive?"]
+        mock_update_dialog_title.assert_awaited_once_with(1, "dlg", "Mounted network drive")
+
+    def test_speculative_dialog_title_skips_named_dialogs(self):
+        from chat_client.endpoints.chat_endpoints import _start_speculative_dialog_title
+
+        with (
+            patch("chat_client.endpoints.chat_endpoints.DIALOG_TITLE_MODEL", "title-model"),
+            patch("chat_client.endpoints.chat_endpoints.DIALOG_TITLE_SPECULATIVE", True),
+            patch("chat_client.core.dialog_titles.start_speculative") as mock_start,
+        ):
+            _start_speculative_dialog_title(
+                1,
+                "dlg",
+                {"dialog_id": "dlg", "title": "Already named"},
+                [{"role": "user", "content": "Hello", "images": [], "attachments": []}],
+            )
+
+        mock_start.assert_not_called()
+
     def test_derive_dialog_title_from_user_message_strips_markup_and_symbols(self):
         from chat_client.endpoints.chat_endpoints import _derive_dialog_title_from_user_message
 
@@ -1160,6 +1245,52 @@ class TestChatEndpoints(BaseTestCase):
             {"role": "tool", "tool_call_id": "call_2", "content": "T2", "images": []},
         ]
 
+    @patch("chat_client.repositories.chat_repository.get_messages")
+    @patch("chat_client.repositories.chat_repository.get_dialog")
+    @patch("chat_client.endpoints.chat_endpoints.OpenAI")
+    @patch("chat_client.core.user_session.is_logged_in")
+    def test_chat_response_stream_trims_history_to_context_window_and_reports_it(
+        self,
+        mock_logged_in,
+        mock_openai_class,
+        mock_get_dialog,
+        mock_get_messages,
+    ):
+        mock_logged_in.return_value = 1
+        mock_get_dialog.return_value = {"dialog_id": "dlg3", "title": "x", "created": "2026-01-01T00:00:00"}
+        mock_get_messages.return_value = [
+            {"message_id": "1", "role": "user", "content": "old " * 2000, "images": []},
+            {
+                "message_id": None,
+                "role": "assistant_turn",
+                "turn_id": "turn-old",
+                "events": [{"event_type": "assistant_segment", "content_text": "old answer"}],
+            },
+            {"message_id": "2", "role": "user", "content": "What now?", "images": []},
+        ]
+        mock_client = mock_openai_client()
+        mock_openai_class.return_value = mock_client
+
+        with (
+            patch("chat_client.endpoints.chat_endpoints.CONTEXT_WINDOW_TOKENS", {"test-model": 1500}),
+            patch("chat_client.endpoints.chat_endpoints.RESOLVED_CONTEXT_RESERVED_OUTPUT_TOKENS", 500),
+        ):
+            response = self.client.post(
+                "/chat",
+                json={"dialog_id": "dlg3", "messages": [{"role": "user", "content": "ignored"}], "model": "test-model"},
+            )
+
+        assert response.status_code == 200
+        first_event = json.loads(response.text.split("\n\n")[0].removeprefix("data: "))
+        assert first_event["context"]["context_length"] == 1500
+        assert first_event["context"]["elided"] == [
+            {"role": "user", "message_id": "1", "action": "dropped"},
+            {"role": "assistant_turn", "turn_id": "turn-old", "action": "dropped"},
+        ]
+        called_messages = mock_client.chat.completions.create.call_args.kwargs["messages"]
+        assert [message["role"] for message in called_messages] == ["system", "user"]
+        assert called_messages[-1]["content"] == "What now?"
+
     @patch("chat_client.core.user_session.is_logged_in")
     def test_create_dialog_not_authenticated(self, mock_logged_in):
         """Test POST /api/chat/dialogs when not authenticated"""
@@ -1504,35 +1635,27 @@ class TestChatEndpoints(BaseTestCase):
         assert response.headers["content-type"].startswith("image/png")
         assert response.headers["content-disposition"].startswith("inline;")
 
-    @patch("chat_client.endpoints.chat_endpoints.attachment_service.build_attachment_storage_path")
     @patch("chat_client.repositories.attachment_repository.get_attachment")
-    @patch("chat_client.repositories.attachment_repository.update_attachment_storage_path")
     @patch("chat_client.repositories.attachment_repository.create_attachment")
     @patch("chat_client.core.user_session.is_logged_in")
-    def test_upload_attachment_authenticated(
-        self,
-        mock_logged_in,
-        mock_create_attachment,
-        mock_update_attachment_storage_path,
-        mock_get_attachment,
-        mock_build_attachment_storage_path,
-    ):
+    def test_upload_attachment_authenticated(self, mock_logged_in, mock_create_attachment, mock_get_attachment, tmp_path):
         mock_logged_in.return_value = 1
         mock_create_attachment.return_value = 42
-        upload_path = Path("tests/.test-data/uploaded_notes.txt")
-        mock_build_attachment_storage_path.return_value = upload_path
+        sha256 = hashlib.sha256(b"hello").hexdigest()
+        blob_path = tmp_path / "blobs" / sha256[:2] / sha256[2:4] / sha256
         mock_get_attachment.return_value = {
             "attachment_id": 42,
             "name": "notes.txt",
             "content_type": "text/plain",
             "size_bytes": 5,
-            "storage_path": str(upload_path),
+            "storage_path": str(blob_path),
         }
 
-        response = self.client.post(
-            "/api/chat/attachments",
-            files={"file": ("notes.txt", b"hello", "text/plain")},
-        )
+        with patch("chat_client.endpoints.chat_endpoints.attachment_service.resolve_attachment_storage_dir", return_value=tmp_path):
+            response = self.client.post(
+                "/api/chat/attachments",
+                files={"file": ("notes.txt", b"hello", "text/plain")},
+            )
 
         assert response.status_code == 200
         data = response.json()
@@ -1540,7 +1663,16 @@ class TestChatEndpoints(BaseTestCase):
         assert data["name"] == "notes.txt"
         assert data["content_type"] == "text/plain"
         assert data["size_bytes"] == 5
-        assert upload_path.read_bytes() == b"hello"
+        mock_create_attachment.assert_called_once_with(
+            user_id=1,
+            name="notes.txt",
+            content_type="text/plain",
+            size_bytes=5,
+            storage_path=str(blob_path),
+            sha256=sha256,
+        )
+        assert blob_path.read_bytes() == b"hello"
+        assert [path.name for path in (tmp_path / "blobs").iterdir()] == [sha256[:2]]
 
     @patch("chat_client.endpoints.chat_endpoints.VISION_MODELS", [])
     @patch("chat_client.core.user_session.is_logged_in")
@@ -1647,6 +1779,7 @@ class TestChatEndpoints(BaseTestCase):
         assert data["error"] is True
         assert data["redirect"] == "/user/login?next=/chat/test-dialog&reason=auth_required"
 
+    @patch("chat_client.repositories.chat_repository.list_usage_by_model")
     @patch("chat_client.repositories.chat_repository.list_dialog_usage_events")
     @patch("chat_client.repositories.chat_repository.get_dialog_usage_by_turn")
     @patch("chat_client.repositories.chat_repository.get_dialog_usage_totals")
@@ -1657,8 +1790,20 @@ class TestChatEndpoints(BaseTestCase):
         mock_get_totals,
         mock_get_turns,
         mock_list_events,
+        mock_list_models,
     ):
         mock_logged_in.return_value = 1
+        mock_list_models.return_value = [
+            {
+                "provider": "openai",
+                "model": "gpt-5",
+                "request_count": 2,
+                "input_tokens": 1700,
+                "cached_input_tokens": 1000,
+                "output_tokens": 65,
+                "cache_hit_ratio": 0.5882,
+            }
+        ]
         mock_get_totals.return_value = {
             "request_count": 2,
             "input_tokens": 1700,
@@ -1713,13 +1858,17 @@ class TestChatEndpoints(BaseTestCase):
         assert data["totals"]["cached_input_tokens"] == 1000
         assert data["turns"][0]["turn_id"] == "turn-server-1"
         assert data["events"][0]["request_id"] == "cmpl-1"
+        assert data["models"][0]["model"] == "gpt-5"
+        assert data["models"][0]["cached_input_tokens"] == 1000
         mock_list_events.assert_called_once_with(
             1,
             "test-dialog",
             start_datetime=None,
             end_datetime_exclusive=None,
         )
+        mock_list_models.assert_called_once_with(1, dialog_id="test-dialog", start_datetime=None, end_datetime_exclusive=None)
 
+    @patch("chat_client.repositories.chat_repository.list_usage_by_model")
     @patch("chat_client.repositories.chat_repository.list_dialog_usage_events")
     @patch("chat_client.repositories.chat_repository.get_dialog_usage_by_turn")
     @patch("chat_client.repositories.chat_repository.get_dialog_usage_totals")
@@ -1730,8 +1879,20 @@ class TestChatEndpoints(BaseTestCase):
         mock_get_totals,
         mock_get_turns,
         mock_list_events,
+        mock_list_models,
     ):
         mock_logged_in.return_value = 1
+        mock_list_models.return_value = [
+            {
+                "provider": "openai",
+                "model": "gpt-5",
+                "request_count": 2,
+                "input_tokens": 1700,
+                "cached_input_tokens": 1000,
+                "output_tokens": 65,
+                "cache_hit_ratio": 0.5882,
+            }
+        ]
         mock_get_totals.return_value = {
             "request_count": 1,
             "input_tokens": 1200,
@@ -1785,7 +1946,9 @@ class TestChatEndpoints(BaseTestCase):
         assert data["error"] is False
         assert data["dialog_id"] == "deleted-dialog"
         assert data["events"][0]["dialog_title"] == "Deleted dialog"
+        assert data["models"][0]["provider"] == "openai"
 
+    @patch("chat_client.repositories.chat_repository.list_usage_by_model")
     @patch("chat_client.repositories.chat_repository.list_dialog_usage_events")
     @patch("chat_client.repositories.chat_repository.get_dialog_usage_by_turn")
     @patch("chat_client.repositories.chat_repository.get_dialog_usage_totals")
@@ -1796,8 +1959,10 @@ class TestChatEndpoints(BaseTestCase):
         mock_get_totals,
         mock_get_turns,
         mock_list_events,
+        mock_list_models,
     ):
         mock_logged_in.return_value = 1
+        mock_list_models.return_value = []
         mock_get_totals.return_value = {
             "request_count": 1,
             "input_tokens": 1,
@@ -1865,6 +2030,12 @@ class TestChatEndpoints(BaseTestCase):
             start_datetime=datetime(2026, 1, 3, 0, 0, 0),
             end_datetime_exclusive=datetime(2026, 1, 6, 0, 0, 0),
         )
+        mock_list_models.assert_called_once_with(
+            1,
+            dialog_id="test-dialog",
+            start_datetime=datetime(2026, 1, 3, 0, 0, 0),
+            end_datetime_exclusive=datetime(2026, 1, 6, 0, 0, 0),
+        )
 
     @patch("chat_client.core.user_session.is_logged_in")
     def test_get_user_usage_not_authenticated(self, mock_logged_in):
@@ -1876,11 +2047,23 @@ class TestChatEndpoints(BaseTestCase):
         data = response.json()
         assert data["error"] is True
 
+    @patch("chat_client.repositories.chat_repository.list_usage_by_model")
     @patch("chat_client.repositories.chat_repository.get_user_usage_by_dialog_info")
     @patch("chat_client.repositories.chat_repository.get_user_usage_totals")
     @patch("chat_client.core.user_session.is_logged_in")
-    def test_get_user_usage_authenticated(self, mock_logged_in, mock_get_totals, mock_get_usage_info):
+    def test_get_user_usage_authenticated(self, mock_logged_in, mock_get_totals, mock_get_usage_info, mock_list_models):
         mock_logged_in.return_value = 1
+        mock_list_models.return_value = [
+            {
+                "provider": "openai",
+                "model": "gpt-5",
+                "request_count": 2,
+                "input_tokens": 1700,
+                "cached_input_tokens": 1000,
+                "output_tokens": 65,
+                "cache_hit_ratio": 0.5882,
+            }
+        ]
         mock_get_totals.return_value = {
             "request_count": 2,
             "input_tokens": 1700,
@@ -1919,14 +2102,19 @@ class TestChatEndpoints(BaseTestCase):
         assert data["totals"]["cost_amount"] == "0.00151250"
         assert data["dialogs_info"]["dialogs"][0]["dialog_id"] == "dialog-1"
         assert data["dialogs"][0]["dialog_id"] == "dialog-1"
+        assert data["models"][0]["model"] == "gpt-5"
+        assert data["models"][0]["cache_hit_ratio"] == 0.5882
         mock_get_totals.assert_called_once_with(1, start_datetime=None, end_datetime_exclusive=None)
         mock_get_usage_info.assert_called_once_with(1, current_page=1, start_datetime=None, end_datetime_exclusive=None)
+        mock_list_models.assert_called_once_with(1, start_datetime=None, end_datetime_exclusive=None)
 
+    @patch("chat_client.repositories.chat_repository.list_usage_by_model")
     @patch("chat_client.repositories.chat_repository.get_user_usage_by_dialog_info")
     @patch("chat_client.repositories.chat_repository.get_user_usage_totals")
     @patch("chat_client.core.user_session.is_logged_in")
-    def test_get_user_usage_authenticated_with_date_range(self, mock_logged_in, mock_get_totals, mock_get_usage_info):
+    def test_get_user_usage_authenticated_with_date_range(self, mock_logged_in, mock_get_totals, mock_get_usage_info, mock_list_models):
         mock_logged_in.return_value = 1
+        mock_list_models.return_value = []
         mock_get_totals.return_value = {
             "request_count": 1,
             "input_tokens": 100,
@@ -1953,11 +2141,28 @@ class TestChatEndpoints(BaseTestCase):
             start_datetime=datetime(2026, 1, 2, 0, 0, 0),
             end_datetime_exclusive=datetime(2026, 1, 5, 0, 0, 0),
         )
+        mock_list_models.assert_called_once_with(
+            1,
+            start_datetime=datetime(2026, 1, 2, 0, 0, 0),
+            end_datetime_exclusive=datetime(2026, 1, 5, 0, 0, 0),
+        )
 
+    @patch("chat_client.repositories.chat_repository.list_usage_by_model")
     @patch("chat_client.repositories.chat_repository.get_user_usage_totals")
     @patch("chat_client.core.user_session.is_logged_in")
-    def test_usage_page_authenticated(self, mock_logged_in, mock_get_totals):
+    def test_usage_page_authenticated(self, mock_logged_in, mock_get_totals, mock_list_models):
         mock_logged_in.return_value = 1
+        mock_list_models.return_value = [
+            {
+                "provider": "openai",
+                "model": "gpt-5",
+                "request_count": 2,
+                "input_tokens": 1700,
+                "cached_input_tokens": 1000,
+                "output_tokens": 65,
+                "cache_hit_ratio": 0.5882,
+            }
+        ]
         mock_get_totals.return_value = {
             "request_count": 2,
             "input_tokens": 1700,
@@ -1978,12 +2183,17 @@ class TestChatEndpoints(BaseTestCase):
         assert "load-more-usage-dialogs" in response.text
         assert "usage-dialogs-container" in response.text
         assert 'type="date"' in response.text
+        assert "<td>gpt-5</td>" in response.text
+        assert "<td>58.8%</td>" in response.text
         mock_get_totals.assert_called_once_with(1, start_datetime=None, end_datetime_exclusive=None)
+        mock_list_models.assert_called_once_with(1, start_datetime=None, end_datetime_exclusive=None)
 
+    @patch("chat_client.repositories.chat_repository.list_usage_by_model")
     @patch("chat_client.repositories.chat_repository.get_user_usage_totals")
     @patch("chat_client.core.user_session.is_logged_in")
-    def test_usage_page_authenticated_with_date_range(self, mock_logged_in, mock_get_totals):
+    def test_usage_page_authenticated_with_date_range(self, mock_logged_in, mock_get_totals, mock_list_models):
         mock_logged_in.return_value = 1
+        mock_list_models.return_value = []
         mock_get_totals.return_value = {
             "request_count": 1,
             "input_tokens": 100,
@@ -2005,6 +2215,11 @@ class TestChatEndpoints(BaseTestCase):
             start_datetime=datetime(2026, 1, 2, 0, 0, 0),
             end_datetime_exclusive=datetime(2026, 1, 5, 0, 0, 0),
         )
+        mock_list_models.assert_called_once_with(
+            1,
+            start_datetime=datetime(2026, 1, 2, 0, 0, 0),
+            end_datetime_exclusive=datetime(2026, 1, 5, 0, 0, 0),
+        )
 
     @patch("chat_client.core.user_session.is_logged_in")
     def test_get_user_usage_invalid_page(self, mock_logged_in):
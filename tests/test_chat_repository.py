@@ -656,12 +656,25 @@ def test_create_llm_usage_event_and_get_dialog_usage_totals():
                 "request_count": 2,
                 "input_tokens": 1700,
                 "cached_input_tokens": 1000,
+                "cache_hit_ratio": 0.5882,
                 "output_tokens": 65,
                 "total_tokens": 1765,
                 "reasoning_tokens": 7,
                 "currency": "USD",
                 "cost_amount": "0.00151250",
             }
+            assert await chat_repository.list_usage_by_model(user_id, dialog_id=dialog_id) == [
+                {
+                    "provider": "openai",
+                    "model": "gpt-5",
+                    "request_count": 2,
+                    "input_tokens": 1700,
+                    "cached_input_tokens": 1000,
+                    "output_tokens": 65,
+                    "cache_hit_ratio": 0.5882,
+                }
+            ]
+            assert await chat_repository.list_usage_by_model(user_id, dialog_id="other-dialog") == []
 
             async with session_factory() as session:
                 rows = (
@@ -774,6 +787,7 @@ def test_usage_aggregation_recovers_cost_and_models_from_events():
                     "request_count": 2,
                     "input_tokens": 1700,
                     "cached_input_tokens": 1000,
+                    "cache_hit_ratio": 0.5882,
                     "output_tokens": 65,
                     "total_tokens": 1765,
                     "reasoning_tokens": 7,
@@ -1,9 +1,11 @@
 import asyncio
+import json
 import threading
 import logging
 from types import SimpleNamespace
 
-from chat_client.core import chat_service
+from chat_client.core import chat_service, prompt_cache
+from chat_client.core.chat_message_utils import build_model_messages_from_dialog_history
 
 
 class DummyOpenAIError(Exception):
@@ -322,6 +324,77 @@ def test_chat_response_stream_uses_streaming_tool_loop():
     assert final_stream.closed is True
 
 
+def test_stable_prefix_tool_loop_matches_the_history_rebuilt_next_turn():
+    first_stream = DummyStream(
+        [
+            _chunk("Let me check."),
+            _chunk(
+                None,
+                tool_calls=[
+                    SimpleNamespace(
+                        index=0,
+                        id="call_utc",
+                        type="function",
+                        function=SimpleNamespace(name="get_time", arguments='{"timezone": "UTC"}'),
+                    )
+                ],
+            ),
+            _chunk("", finish_reason="tool_calls"),
+        ]
+    )
+    final_stream = DummyStream([_chunk("It is noon.", finish_reason="stop")])
+    create_calls = []
+
+    def _create(**kwargs):
+        create_calls.append(kwargs)
+        return first_stream if len(create_calls) == 1 else final_stream
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=_create)))
+
+    async def _run():
+        async for _chunk_text in chat_service.chat_response_stream(
+            DummyRequest(disconnected_after_calls=999),
+            messages=[{"role": "user", "content": "What time is it?", "images": [], "attachments": []}],
+            model="tool-model",
+            openai_client_cls=lambda **_: client,
+            provider_info_resolver=lambda _model: {},
+            tool_models=["tool-model"],
+            tools_loader=lambda: [{"type": "function", "function": {"name": "get_time"}}],
+            tool_executor=lambda _tool_call: {"time": "12:00"},
+            logger=logging.getLogger("test"),
+            provider_name="openai",
+            stable_prefix=True,
+            prompt_cache_key="dialog-key",
+        ):
+            pass
+
+    asyncio.run(_run())
+
+    persisted_history = [
+        {"role": "user", "content": "What time is it?", "images": [], "attachments": []},
+        {
+            "role": "assistant_turn",
+            "turn_id": "turn-1",
+            "events": [
+                {"event_type": "assistant_segment", "content_text": "Let me check."},
+                {
+                    "event_type": "tool_call",
+                    "tool_call_id": "call_utc",
+                    "tool_name": "get_time",
+                    "arguments_json": json.dumps({"timezone": "UTC"}),
+                    "result_text": json.dumps({"time": "12:00"}, ensure_ascii=True),
+                    "error_text": "",
+                },
+            ],
+        },
+    ]
+    rebuilt = prompt_cache.stable_messages(
+        chat_service.normalize_chat_messages(build_model_messages_from_dialog_history(persisted_history))
+    )
+    assert create_calls[1]["messages"] == rebuilt
+    assert create_calls[1]["extra_body"] == {"prompt_cache_key": "dialog-key"}
+
+
 def test_chat_response_stream_persists_provider_usage_per_round():
     stream = DummyStream(
         [
@@ -1,4 +1,8 @@
+import sys
+from types import SimpleNamespace
+
 import click
+import pytest
 from click.testing import CliRunner
 
 from chat_client.cli import cli
@@ -17,3 +21,33 @@ def test_create_user_runs_bootstrap_before_prompting_for_credentials(monkeypatch
     assert "bootstrap blocked command" in result.output
     assert "Email:" not in result.output
     assert "Password:" not in result.output
+
+
+@pytest.fixture
+def gunicorn_commands(monkeypatch):
+    commands = []
+    monkeypatch.setitem(sys.modules, "data.config", SimpleNamespace(DATA_DIR="tests/.test-data"))
+    monkeypatch.setattr("chat_client.cli._emit_bootstrap_messages", lambda **_kwargs: None)
+    monkeypatch.setattr("chat_client.cli.clear_multiprocess_directory", lambda _path: None)
+    monkeypatch.setattr("chat_client.cli.subprocess.run", lambda cmd, check: commands.append(cmd))
+    return commands
+
+
+def test_server_prod_preloads_and_restarts_workers_gracefully(gunicorn_commands):
+    result = CliRunner().invoke(cli, ["server-prod", "--max-requests", "500", "--max-requests-jitter", "50"])
+
+    assert result.exit_code == 0, result.output
+    (cmd,) = gunicorn_commands
+    assert "--preload" in cmd
+    assert "--config=python:chat_client.gunicorn_conf" in cmd
+    assert "--worker-class=chat_client.gunicorn_conf.DrainingUvicornWorker" in cmd
+    assert "--max-requests=500" in cmd
+    assert "--max-requests-jitter=50" in cmd
+    assert "--graceful-timeout=120" in cmd
+
+
+def test_server_prod_without_preload(gunicorn_commands):
+    result = CliRunner().invoke(cli, ["server-prod", "--no-preload"])
+
+    assert result.exit_code == 0, result.output
+    assert "--preload" not in gunicorn_commands[0]
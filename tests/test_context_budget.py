@@ -0,0 +1,161 @@
+from chat_client.core import context_budget
+from chat_client.core.chat_message_utils import build_model_messages_from_dialog_history
+from chat_client.core.context_budget import TokenCounter, fit_dialog_history
+
+
+def _user(message_id: int, content: str) -> dict:
+    return {"message_id": str(message_id), "role": "user", "content": content, "images": [], "attachments": []}
+
+
+def _turn(turn_id: str, answer: str, tool_result: str = "") -> dict:
+    events = []
+    if tool_result:
+        events.append(
+            {
+                "event_type": "tool_call",
+                "tool_call_id": f"call_{turn_id}",
+                "tool_name": "python_tool",
+                "arguments_json": '{"code": "print(1)"}',
+                "result_text": tool_result,
+                "error_text": "",
+            }
+        )
+    events.append({"event_type": "assistant_segment", "content_text": answer})
+    return {"message_id": None, "role": "assistant_turn", "turn_id": turn_id, "events": events}
+
+
+def _dialog(exchanges: int, words: int = 50) -> list[dict]:
+    history: list[dict] = [{"message_id": "1", "role": "system", "content": "You are terse.", "images": [], "attachments": []}]
+    for index in range(exchanges):
+        history.append(_user(100 + index, f"question {index} " + "word " * words))
+        history.append(_turn(f"t{index}", f"answer {index} " + "word " * words))
+    return history
+
+
+def test_history_that_fits_is_unchanged():
+    history = _dialog(3)
+    fit = fit_dialog_history(history, context_length=100_000, counter=TokenCounter())
+
+    assert fit.messages == build_model_messages_from_dialog_history(history)
+    assert fit.elided == []
+    assert fit.fits
+
+
+def test_consecutive_legacy_tool_rows_keep_their_shared_tool_calls_message():
+    history = [
+        {"role": "user", "content": "Find article", "images": []},
+        {"role": "tool", "content": "A", "tool_call_id": "call_1", "tool_name": "search", "arguments_json": "{}"},
+        {"role": "tool", "content": "B", "tool_call_id": "call_2", "tool_name": "search", "arguments_json": "{}"},
+        {"role": "assistant", "content": "Found", "images": []},
+    ]
+
+    fit = fit_dialog_history(history, context_length=100_000, counter=TokenCounter())
+
+    assert fit.messages == build_model_messages_from_dialog_history(history)
+
+
+def test_oldest_exchanges_are_dropped_and_replaced_by_a_note():
+    history = _dialog(10)
+    counter = TokenCounter()
+    full_tokens = counter.count_messages(build_model_messages_from_dialog_history(history))
+
+    fit = fit_dialog_history(history, context_length=full_tokens // 2 + 100, counter=counter, reserved_output_tokens=100)
+
+    assert fit.fits
+    assert fit.messages[0] == {"role": "system", "content": "You are terse."}
+    assert fit.messages[1]["role"] == "system"
+    assert "omitted" in fit.messages[1]["content"]
+    assert fit.messages[-2]["content"].startswith("question 9")
+    dropped = [entry for entry in fit.elided if entry["action"] == "dropped"]
+    assert dropped[:2] == [
+        {"role": "user", "message_id": "100", "action": "dropped"},
+        {"role": "assistant_turn", "turn_id": "t0", "action": "dropped"},
+    ]
+    assert len(dropped) % 2 == 0
+    assert not any(message["content"].startswith("question 0") for message in fit.messages)
+
+
+def test_tool_definitions_are_subtracted_from_the_budget():
+    history = _dialog(4)
+    counter = TokenCounter()
+    full_tokens = counter.count_messages(build_model_messages_from_dialog_history(history))
+    # Tool definitions of about a third of the history.
+    tools = [{"type": "function", "function": {"name": "python_tool", "description": "Run code. " * (full_tokens // 8), "parameters": {}}}]
+    tool_tokens = counter.count_tools(tools)
+
+    without_tools = fit_dialog_history(history, context_length=full_tokens + 100, counter=counter, reserved_output_tokens=100)
+    with_tools = fit_dialog_history(
+        history, context_length=full_tokens + 100, counter=counter, reserved_output_tokens=100, reserved_input_tokens=tool_tokens
+    )
+
+    assert tool_tokens > full_tokens // 4
+    assert without_tools.elided == []
+    assert with_tools.budget_tokens == full_tokens - tool_tokens
+    assert with_tools.estimated_tokens <= with_tools.budget_tokens
+    assert any(entry["action"] == "dropped" for entry in with_tools.elided)
+
+
+def test_oversized_tool_results_in_earlier_turns_are_truncated_first():
+    big_result = "row, " * 10_000
+    history = [_user(1, "Load the data"), _turn("t0", "Loaded", tool_result=big_result), _user(2, "Plot it")]
+
+    fit = fit_dialog_history(history, context_length=3000, counter=TokenCounter(), reserved_output_tokens=500, tool_result_max_tokens=200)
+
+    assert fit.fits
+    tool_message = next(message for message in fit.messages if message["role"] == "tool")
+    assert len(tool_message["content"]) < 1000
+    assert "characters omitted" in tool_message["content"]
+    assert fit.elided == [
+        {
+            "role": "assistant_turn",
+            "turn_id": "t0",
+            "tool_call_id": "call_t0",
+            "action": "truncated",
+            "original_tokens": context_budget.estimate_tokens(big_result),
+        }
+    ]
+
+
+def test_latest_exchange_is_never_trimmed():
+    history = [_user(1, "Hi"), _turn("t0", "Hello"), _user(2, "x" * 40_000)]
+
+    fit = fit_dialog_history(history, context_length=1000, counter=TokenCounter(), reserved_output_tokens=100)
+
+    assert not fit.fits
+    assert fit.messages[-1]["content"] == "x" * 40_000
+
+
+def test_counts_of_persisted_messages_are_cached_for_a_configured_tokenizer():
+    calls = []
+
+    def tokenizer(text: str) -> int:
+        calls.append(text)
+        return len(text.split())
+
+    counter = TokenCounter(tokenizer)
+    history = _dialog(5)
+    fit_dialog_history(history, context_length=100_000, counter=counter)
+    first_pass = len(calls)
+    history.append(_user(999, "one more"))
+    fit_dialog_history(history, context_length=100_000, counter=counter)
+
+    assert first_pass > 0
+    assert len(calls) == first_pass + 1
+
+
+def test_exchanges_are_dropped_in_steps_so_the_prefix_stays_put():
+    counter = TokenCounter()
+    history = _dialog(20)
+    context_length = counter.count_messages(build_model_messages_from_dialog_history(_dialog(12))) + 100
+
+    def fit(exchanges: int):
+        return fit_dialog_history(
+            history[: 1 + 2 * exchanges], context_length=context_length, counter=counter, reserved_output_tokens=100, drop_step=4
+        )
+
+    turns = [fit(13), fit(14), fit(15)]
+
+    assert all(turn.fits for turn in turns)
+    assert [len(turn.elided) for turn in turns] == [8, 8, 8]
+    assert turns[1].messages[: len(turns[0].messages)] == turns[0].messages
+    assert turns[2].messages[: len(turns[1].messages)] == turns[1].messages
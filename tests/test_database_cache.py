@@ -0,0 +1,96 @@
+import asyncio
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from chat_client.database import cache as database_cache
+from chat_client.database.cache import DatabaseCache, MemoryCache, sweep_expired
+from chat_client.models import Base, Cache
+
+
+def _run_with_session(tmp_path, test):
+    async def _run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'cache.db'}", echo=False)
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            session_factory = async_sessionmaker(engine, expire_on_commit=False)
+            async with session_factory() as session:
+                return await test(session)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(_run())
+
+
+def test_set_upserts_one_row_per_key(tmp_path):
+    async def test(session):
+        cache = DatabaseCache(session)
+        await cache.set("user_1", {"theme": "dark"})
+        await cache.set("user_1", {"theme": "light"})
+        rows = await session.scalar(select(func.count()).select_from(Cache))
+        return rows, await cache.get("user_1")
+
+    rows, value = _run_with_session(tmp_path, test)
+
+    assert rows == 1
+    assert value == {"theme": "light"}
+
+
+def test_get_many_returns_only_present_and_fresh_keys(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(database_cache.time, "time", lambda: now[0])
+
+    async def test(session):
+        cache = DatabaseCache(session)
+        await cache.set_many({"a": 1, "b": [2]}, ttl_seconds=10)
+        await cache.set("c", "kept")
+        before = await cache.get_many(["a", "b", "c", "missing"])
+        now[0] += 11
+        after = await cache.get_many(["a", "b", "c"])
+        aged = await cache.get("c", expire_in=5)
+        swept = await sweep_expired(session)
+        rows = await session.scalar(select(func.count()).select_from(Cache))
+        return before, after, aged, swept, rows
+
+    before, after, aged, swept, rows = _run_with_session(tmp_path, test)
+
+    assert before == {"a": 1, "b": [2], "c": "kept"}
+    assert after == {"c": "kept"}
+    assert aged is None
+    assert (swept, rows) == (2, 1)
+
+
+def test_large_values_are_stored_compressed(tmp_path):
+    value = {"text": "word " * 10_000}
+
+    async def test(session):
+        cache = DatabaseCache(session, compress_min_bytes=1024)
+        await cache.set("big", value)
+        stored = await session.scalar(select(Cache.value).where(Cache.key == "big"))
+        return stored, await cache.get("big")
+
+    stored, loaded = _run_with_session(tmp_path, test)
+
+    assert stored.startswith(database_cache.COMPRESSED_PREFIX)
+    assert len(stored) < 2000
+    assert loaded == value
+
+
+def test_memory_tier_answers_repeated_reads(tmp_path):
+    memory = MemoryCache(max_entries=2)
+
+    async def test(session):
+        cache = DatabaseCache(session, memory=memory)
+        await cache.set("profile", {"theme": "dark"})
+        await session.execute(Cache.__table__.delete())
+        await session.commit()
+        cached = await cache.get("profile")
+        await cache.delete_key("profile")
+        return cached, await cache.get("profile")
+
+    cached, deleted = _run_with_session(tmp_path, test)
+
+    assert cached == {"theme": "dark"}
+    assert deleted is None
+    assert len(memory) == 0
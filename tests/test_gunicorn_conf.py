@@ -0,0 +1,70 @@
+import asyncio
+import logging
+import os
+from types import SimpleNamespace
+
+import pytest
+from gunicorn.config import Config
+
+from chat_client import gunicorn_conf
+from chat_client.core.logging import setup_logging, stop_logging
+
+
+def _worker(graceful_timeout: int, timeout: float = 30) -> gunicorn_conf.DrainingUvicornWorker:
+    cfg = Config()
+    cfg.set("graceful_timeout", graceful_timeout)
+    log = SimpleNamespace(error_log=logging.getLogger("test.gunicorn.error"), access_log=logging.getLogger("test.gunicorn.access"))
+    return gunicorn_conf.DrainingUvicornWorker(0, os.getpid(), [], None, timeout, cfg, log)
+
+
+def test_draining_worker_bounds_graceful_shutdown_by_graceful_timeout():
+    assert _worker(120).config.timeout_graceful_shutdown == 120 - gunicorn_conf.CANCEL_MARGIN_SECONDS
+    assert _worker(2).config.timeout_graceful_shutdown == 1
+
+
+def test_draining_worker_keeps_notifying_the_master_while_serving(monkeypatch):
+    worker = _worker(120, timeout=0.01)
+    notified = []
+    monkeypatch.setattr(worker, "notify", lambda: notified.append(True))
+
+    async def serve_until_notified():
+        while not notified:
+            await asyncio.sleep(0.01)
+
+    monkeypatch.setattr(gunicorn_conf.UvicornWorker, "_serve", lambda _self: serve_until_notified())
+    asyncio.run(asyncio.wait_for(worker._serve(), timeout=5))
+
+    assert notified
+
+
+def test_on_starting_warms_shared_state_only_when_preloading(monkeypatch):
+    calls = []
+    monkeypatch.setattr("chat_client.main.warm_shared_state", lambda: calls.append(True))
+
+    gunicorn_conf.on_starting(SimpleNamespace(cfg=SimpleNamespace(preload_app=False)))
+    assert calls == []
+    gunicorn_conf.on_starting(SimpleNamespace(cfg=SimpleNamespace(preload_app=True)))
+    assert calls == [True]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+def test_workers_forked_from_a_preloaded_master_write_their_logs(tmp_path):
+    # The master sets up logging when it imports the app.
+    setup_logging(logging.INFO, data_dir=tmp_path)
+    try:
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 1
+            try:
+                gunicorn_conf.post_fork(None, None)
+                logging.getLogger("chat_client.test").info("record from a worker")
+                stop_logging()
+                exit_code = 0
+            finally:
+                os._exit(exit_code)
+        _, status = os.waitpid(pid, 0)
+    finally:
+        stop_logging()
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert "record from a worker" in (tmp_path / "main.log").read_text(encoding="utf-8")
@@ -0,0 +1,65 @@
+import os
+import re
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+\d+ \|\s+(\d+) \|\s*(\S+)")
+
+# Cumulative import time budgets, a few times what the modules take today so
+# that only a real regression (a heavy dependency back at module level) fails.
+CLI_BUDGET_SECONDS = 0.5
+MAIN_BUDGET_SECONDS = 2.0
+
+
+def _import_profile(module: str, cwd: Path) -> dict[str, float]:
+    """
+    Cumulative import time in seconds per module imported by `import module`.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(cwd), str(REPO_ROOT)]))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    profile = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            profile[match.group(2)] = int(match.group(1)) / 1_000_000
+    return profile
+
+
+def _top_level_packages(profile: dict[str, float]) -> set[str]:
+    return {name.split(".")[0] for name in profile}
+
+
+@pytest.fixture
+def app_dir(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    (data_dir / "__init__.py").write_text("", encoding="utf-8")
+    shutil.copy(REPO_ROOT / "chat_client" / "config-dist.py", data_dir / "config.py")
+    return tmp_path
+
+
+def test_cli_import_skips_database_and_http_stacks(tmp_path):
+    profile = _import_profile("chat_client.cli", tmp_path)
+
+    assert _top_level_packages(profile).isdisjoint({"sqlalchemy", "alembic", "httpx", "openai", "PIL", "captcha"})
+    assert profile["chat_client.cli"] < CLI_BUDGET_SECONDS
+
+
+def test_app_import_defers_heavy_dependencies(app_dir):
+    profile = _import_profile("chat_client.main", app_dir)
+
+    assert _top_level_packages(profile).isdisjoint({"openai", "httpx", "PIL", "captcha", "alembic"})
+    assert profile["chat_client.main"] < MAIN_BUDGET_SECONDS
@@ -1,6 +1,11 @@
+import json
 import logging
+import logging.handlers
+import os
 
-from chat_client.core.logging import NOISY_DEPENDENCY_LOGGERS, setup_logging
+import pytest
+
+from chat_client.core.logging import NOISY_DEPENDENCY_LOGGERS, log_event, setup_logging, stop_logging
 
 
 def test_setup_logging_raises_noisy_dependency_loggers_to_warning(tmp_path):
@@ -15,3 +20,72 @@ def test_setup_logging_preserves_higher_application_log_level_for_dependencies(t
 
     for logger_name in NOISY_DEPENDENCY_LOGGERS:
         assert logging.getLogger(logger_name).level == logging.ERROR
+
+
+def test_setup_logging_writes_records_from_a_background_listener(tmp_path):
+    setup_logging(logging.INFO, data_dir=tmp_path)
+    try:
+        root_handlers = list(logging.getLogger().handlers)
+        logging.getLogger("chat_client.test").info("queued %s", "record")
+    finally:
+        stop_logging()
+
+    assert len(root_handlers) == 1
+    assert isinstance(root_handlers[0], logging.handlers.QueueHandler)
+    assert "queued record" in (tmp_path / "main.log").read_text(encoding="utf-8")
+
+
+def test_json_log_format_emits_event_fields_as_structured_data(tmp_path):
+    setup_logging(logging.INFO, data_dir=tmp_path, log_format="json")
+    try:
+        test_logger = logging.getLogger("chat_client.test")
+        log_event(test_logger, logging.INFO, "chat.model.call.finish", model="qwen3", round=2, error=None)
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            test_logger.exception("plain message")
+    finally:
+        stop_logging()
+
+    lines = [json.loads(line) for line in (tmp_path / "main.log").read_text(encoding="utf-8").splitlines()]
+    event_line = next(line for line in lines if line.get("event") == "chat.model.call.finish")
+    error_line = next(line for line in lines if line.get("message") == "plain message")
+
+    assert event_line["fields"] == {"model": "qwen3", "round": 2}
+    assert event_line["level"] == "INFO"
+    assert event_line["logger"] == "chat_client.test"
+    assert "ValueError: boom" in error_line["exc_info"]
+
+
+def test_log_event_text_output_is_unchanged(tmp_path):
+    setup_logging(logging.INFO, data_dir=tmp_path)
+    try:
+        log_event(logging.getLogger("chat_client.test"), logging.INFO, "chat.assistant.answer", chars=12)
+    finally:
+        stop_logging()
+
+    assert "chat.assistant.answer: {'chars': 12}" in (tmp_path / "main.log").read_text(encoding="utf-8")
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+def test_forked_child_writes_its_own_records(tmp_path):
+    setup_logging(logging.INFO, data_dir=tmp_path)
+    try:
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 1
+            try:
+                logging.getLogger("chat_client.test").info("record from the child")
+                stop_logging()
+                exit_code = 0
+            finally:
+                os._exit(exit_code)
+        _, status = os.waitpid(pid, 0)
+        logging.getLogger("chat_client.test").info("record from the parent")
+    finally:
+        stop_logging()
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    log_text = (tmp_path / "main.log").read_text(encoding="utf-8")
+    assert "record from the child" in log_text
+    assert "record from the parent" in log_text
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import os
+import sys
+import types
+
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from chat_client.core import metrics
+from chat_client.endpoints import metrics_endpoints
+
+
+def _registry() -> tuple[metrics.MetricsRegistry, metrics.Histogram, metrics.Gauge]:
+    registry = metrics.MetricsRegistry()
+    histogram = registry.histogram("request_seconds", "Request latency.", ("model",), (0.1, 1.0))
+    gauge = registry.gauge("active", "Active streams.")
+    return registry, histogram, gauge
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry, histogram, gauge = _registry()
+    histogram.observe(0.05, model="a")
+    histogram.observe(0.5, model="a")
+    histogram.observe(3.0, model="a")
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+
+    text = registry.render()
+
+    assert "# TYPE request_seconds histogram" in text
+    assert 'request_seconds_bucket{model="a",le="0.1"} 1' in text
+    assert 'request_seconds_bucket{model="a",le="1"} 2' in text
+    assert 'request_seconds_bucket{model="a",le="+Inf"} 3' in text
+    assert 'request_seconds_sum{model="a"} 3.55' in text
+    assert 'request_seconds_count{model="a"} 3' in text
+    assert "active 1" in text
+
+
+def test_label_values_are_escaped():
+    registry, histogram, _ = _registry()
+    histogram.observe(0.05, model='odd"name')
+
+    assert 'model="odd\\"name"' in registry.render()
+
+
+def test_collect_merges_other_workers_and_drops_gauges_of_dead_workers(tmp_path, monkeypatch):
+    registry, histogram, gauge = _registry()
+    registry.directory = tmp_path
+    histogram.observe(0.05, model="a")
+    gauge.set(2)
+
+    other_registry, other_histogram, other_gauge = _registry()
+    other_histogram.observe(0.5, model="a")
+    other_histogram.observe(0.5, model="b")
+    other_gauge.set(3)
+    (tmp_path / "metrics-1001.json").write_text(json.dumps(other_registry.snapshot()), encoding="utf-8")
+    (tmp_path / "metrics-1002.json").write_text(json.dumps(other_registry.snapshot()), encoding="utf-8")
+    monkeypatch.setattr(metrics, "_pid_is_alive", lambda pid: pid == 1001)
+
+    collected = registry.collect()
+
+    request_series = collected["request_seconds"]["series"]
+    assert request_series[("a",)][2] == 3
+    assert request_series[("a",)][0] == [1, 2, 0]
+    assert request_series[("b",)][2] == 2
+    assert collected["active"]["series"][()] == 5
+
+
+def test_write_snapshot_skips_own_file_when_collecting(tmp_path):
+    registry, histogram, _ = _registry()
+    registry.directory = tmp_path
+    histogram.observe(0.05, model="a")
+    registry.write_snapshot()
+
+    assert (tmp_path / f"metrics-{os.getpid()}.json").exists()
+    assert registry.collect()["request_seconds"]["series"][("a",)][2] == 1
+
+
+def test_clear_multiprocess_directory_removes_snapshots(tmp_path):
+    (tmp_path / "metrics-1.json").write_text("{}", encoding="utf-8")
+    (tmp_path / "other.txt").write_text("keep", encoding="utf-8")
+
+    metrics.clear_multiprocess_directory(tmp_path)
+
+    assert not (tmp_path / "metrics-1.json").exists()
+    assert (tmp_path / "other.txt").exists()
+
+
+def test_instrument_repository_records_public_async_functions():
+    module = types.ModuleType("chat_client.repositories.fake_repository")
+
+    async def fetch(value):
+        return value * 2
+
+    async def _private():
+        return None
+
+    fetch.__module__ = module.__name__
+    _private.__module__ = module.__name__
+    module.fetch = fetch
+    module._private = _private
+    sys.modules[module.__name__] = module
+    try:
+        metrics.instrument_repository(module)
+        assert asyncio.run(module.fetch(21)) == 42
+    finally:
+        sys.modules.pop(module.__name__, None)
+
+    assert module._private is _private
+    series = metrics.DB_QUERY_DURATION.snapshot()["series"]
+    assert any(labels == ["fake_repository.fetch"] for labels, *_ in series)
+
+
+def _metrics_client() -> TestClient:
+    return TestClient(Starlette(routes=[Route("/metrics", metrics_endpoints.get_metrics)]))
+
+
+def test_metrics_endpoint_is_disabled_without_token(monkeypatch):
+    monkeypatch.setattr(metrics_endpoints, "METRICS_TOKEN", "")
+
+    assert _metrics_client().get("/metrics").status_code == 404
+
+
+def test_metrics_endpoint_requires_bearer_token(monkeypatch):
+    monkeypatch.setattr(metrics_endpoints, "METRICS_TOKEN", "secret")
+    client = _metrics_client()
+
+    unauthorized = client.get("/metrics", headers={"Authorization": "Bearer wrong"})
+    authorized = client.get("/metrics", headers={"Authorization": "Bearer secret"})
+
+    assert unauthorized.status_code == 401
+    assert unauthorized.headers["www-authenticate"] == "Bearer"
+    assert authorized.status_code == 200
+    assert authorized.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE chat_time_to_first_token_seconds histogram" in authorized.text
@@ -0,0 +1,180 @@
+import asyncio
+import gzip
+import zlib
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from chat_client.core.middleware import CompressionMiddleware, LimitRequestSizeMiddleware, NoCacheMiddleware, RequestTooLarge
+
+
+def _build_client(max_size: int = 10) -> tuple[TestClient, list[int]]:
+    body_sizes: list[int] = []
+
+    async def echo(request: Request):
+        body = await request.body()
+        body_sizes.append(len(body))
+        return JSONResponse({"size": len(body)})
+
+    async def swallow(request: Request):
+        try:
+            await request.body()
+        except RequestTooLarge:
+            return JSONResponse({"error": True}, status_code=500)
+        return JSONResponse({"ok": True})
+
+    async def stream(request: Request):
+        async def chunks():
+            yield b"data: one\n\n"
+            yield b"data: two\n\n"
+
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    app = Starlette(
+        routes=[
+            Route("/echo", echo, methods=["POST"]),
+            Route("/swallow", swallow, methods=["POST"]),
+            Route("/stream", stream),
+            Route("/static/app.js", lambda request: JSONResponse({})),
+        ],
+        middleware=[Middleware(NoCacheMiddleware), Middleware(LimitRequestSizeMiddleware, max_size=max_size)],
+    )
+    return TestClient(app), body_sizes
+
+
+def test_limit_request_size_rejects_declared_content_length_before_app_runs():
+    client, body_sizes = _build_client()
+
+    response = client.post("/echo", content=b"x" * 11)
+
+    assert response.status_code == 413
+    assert response.json() == {"error": True, "message": "Request body too large"}
+    assert body_sizes == []
+
+
+def test_limit_request_size_counts_streamed_body_without_content_length():
+    client, body_sizes = _build_client()
+
+    def body():
+        yield b"x" * 6
+        yield b"x" * 6
+
+    response = client.post("/echo", content=body())
+
+    assert response.status_code == 413
+    assert body_sizes == []
+
+
+def test_limit_request_size_answers_413_when_app_swallows_the_error():
+    client, _ = _build_client()
+
+    def body():
+        yield b"x" * 6
+        yield b"x" * 6
+
+    response = client.post("/swallow", content=body())
+
+    assert response.status_code == 413
+
+
+def test_limit_request_size_passes_small_bodies_through():
+    client, body_sizes = _build_client()
+
+    response = client.post("/echo", content=b"x" * 10)
+
+    assert response.status_code == 200
+    assert response.json() == {"size": 10}
+    assert body_sizes == [10]
+
+
+def test_no_cache_middleware_sets_cache_control_per_path():
+    client, _ = _build_client()
+
+    static_response = client.get("/static/app.js")
+    stream_response = client.get("/stream")
+
+    assert static_response.headers["cache-control"] == "public, max-age=31536000"
+    assert stream_response.headers["cache-control"] == "no-store"
+    assert stream_response.text == "data: one\n\ndata: two\n\n"
+
+
+def _build_compression_client() -> TestClient:
+    async def messages(request: Request):
+        return JSONResponse({"messages": [{"role": "assistant", "content": "tool output " * 20} for _ in range(50)]})
+
+    async def small(request: Request):
+        return JSONResponse({"ok": True})
+
+    async def events(request: Request):
+        async def chunks():
+            for index in range(3):
+                yield f"data: {'token ' * 200}{index}\n\n".encode()
+
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    async def encoded(request: Request):
+        return Response(gzip.compress(b"x" * 2000), media_type="text/plain", headers={"Content-Encoding": "gzip"})
+
+    app = Starlette(
+        routes=[Route("/messages", messages), Route("/small", small), Route("/events", events), Route("/encoded", encoded)],
+        middleware=[Middleware(CompressionMiddleware, minimum_size=500)],
+    )
+    return TestClient(app)
+
+
+def test_compression_middleware_compresses_large_json_only():
+    client = _build_compression_client()
+
+    large = client.get("/messages", headers={"Accept-Encoding": "gzip"})
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    identity = client.get("/messages", headers={"Accept-Encoding": "identity"})
+
+    assert large.headers["content-encoding"] == "gzip"
+    assert large.headers["vary"] == "Accept-Encoding"
+    assert int(large.headers["content-length"]) < len(identity.content)
+    assert large.json() == identity.json()
+    assert "content-encoding" not in small.headers
+    assert "content-encoding" not in identity.headers
+
+
+def test_compression_middleware_skips_event_streams_and_encoded_responses():
+    client = _build_compression_client()
+
+    events = client.get("/events", headers={"Accept-Encoding": "gzip"})
+    encoded = client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in events.headers
+    assert events.text.count("data: ") == 3
+    assert encoded.headers["content-encoding"] == "gzip"
+    assert encoded.text == "x" * 2000
+
+
+def test_compression_middleware_flushes_each_streamed_chunk():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain"), (b"etag", b'"abc"')]})
+        for index in range(3):
+            await send({"type": "http.response.body", "body": f"line {index}\n".encode(), "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    sent: list[dict] = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(CompressionMiddleware(app, minimum_size=500)(scope, receive, send))
+    headers = dict(sent[0]["headers"])
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    assert headers[b"content-encoding"] == b"gzip"
+    assert headers[b"etag"] == b'W/"abc"'
+    assert b"content-length" not in headers
+    assert decoder.decompress(sent[1]["body"]) == b"line 0\n"
+    assert decoder.decompress(sent[2]["body"]) == b"line 1\n"
@@ -1,6 +1,10 @@
+import threading
+import time
+
 from unittest.mock import patch
 
 from chat_client.core import model_capabilities
+from chat_client.core.model_capability_store import ModelCapabilityStore
 
 
 def test_build_model_capabilities_merges_ollama_detection():
@@ -243,3 +247,208 @@ def test_supports_model_thinking_control_uses_built_capabilities():
             )
             is True
         )
+
+
+def test_model_capability_table_is_reused_until_config_object_changes():
+    model_capabilities.clear_model_capabilities_cache()
+    models = {"qwen3:latest": "ollama"}
+    vision_models = ["qwen3:latest"]
+
+    def resolve_provider_info(_model_name: str) -> dict:
+        return {"base_url": "http://localhost:11434/v1", "api_key": "ollama"}
+
+    with (
+        patch(
+            "chat_client.core.model_capabilities.get_ollama_model_metadata",
+            return_value={"supports_images": False, "supports_tools": True, "supports_thinking": False, "context_length": 8192},
+        ),
+        patch("chat_client.core.model_capabilities._build_cache_key", wraps=model_capabilities._build_cache_key) as mock_build_cache_key,
+    ):
+        first = model_capabilities.get_model_capability_table(
+            models=models,
+            vision_models=vision_models,
+            tool_models=[],
+            system_message_denylist=None,
+            provider_info_resolver=resolve_provider_info,
+        )
+        second = model_capabilities.get_model_capability_table(
+            models=models,
+            vision_models=vision_models,
+            tool_models=first.sources[2],
+            system_message_denylist=None,
+            provider_info_resolver=resolve_provider_info,
+        )
+        reloaded = model_capabilities.get_model_capability_table(
+            models={"qwen3:latest": "ollama", "plain-model": "openai"},
+            vision_models=vision_models,
+            tool_models=first.sources[2],
+            system_message_denylist=None,
+            provider_info_resolver=resolve_provider_info,
+        )
+
+    assert second is first
+    assert mock_build_cache_key.call_count == 2
+    assert reloaded.version == first.version + 1
+    assert first.supports("qwen3:latest", "supports_images") is True
+    assert first.tool_models == ("qwen3:latest",)
+    assert first.get("unknown-model") == {}
+    assert "plain-model" in reloaded.capabilities
+
+
+def test_model_capability_table_is_read_only():
+    model_capabilities.clear_model_capabilities_cache()
+    table = model_capabilities.build_model_capability_table(
+        models={"plain-model": "custom"},
+        vision_models=[],
+        tool_models=[],
+        system_message_denylist=[],
+        provider_info_resolver=lambda _model_name: {},
+    )
+
+    try:
+        table.capabilities["plain-model"]["supports_images"] = True  # type: ignore[index]
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("capability table should be immutable")
+    as_dict = table.as_dict()
+    as_dict["plain-model"]["supports_images"] = True
+    assert table.supports("plain-model", "supports_images") is False
+
+
+def _ollama_provider(_model_name: str) -> dict:
+    return {"base_url": "http://localhost:11434/v1", "api_key": "ollama"}
+
+
+def test_build_model_capabilities_probes_models_concurrently_within_limit():
+    model_capabilities.clear_model_capabilities_cache()
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def slow_metadata(_provider, model_name, **_kwargs):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+        return {"supports_images": False, "supports_tools": model_name == "m1", "supports_thinking": False, "context_length": None}
+
+    model_capabilities.configure_probing(concurrency=2, timeout_seconds=1)
+    try:
+        with patch("chat_client.core.model_capabilities.get_ollama_model_metadata", side_effect=slow_metadata) as mock_metadata:
+            capabilities = model_capabilities.build_model_capabilities(
+                models={f"m{index}": "ollama" for index in range(5)},
+                vision_models=[],
+                tool_models=[],
+                system_message_denylist=[],
+                provider_info_resolver=_ollama_provider,
+            )
+    finally:
+        model_capabilities.configure_probing()
+
+    assert mock_metadata.call_count == 5
+    assert peak == 2
+    assert mock_metadata.call_args.args[0]["timeout_seconds"] == 1.0
+    assert [name for name, details in capabilities.items() if details["supports_tools"]] == ["m1"]
+
+
+def test_build_model_capabilities_starts_from_stored_results(tmp_path):
+    model_capabilities.clear_model_capabilities_cache()
+    store_path = tmp_path / "model_capabilities.json"
+    detected = {"supports_images": True, "supports_tools": True, "supports_thinking": False, "context_length": 4096}
+    model_capabilities.configure_probing(store=ModelCapabilityStore(store_path, ttl_seconds=3600))
+    try:
+        with patch("chat_client.core.model_capabilities.get_ollama_model_metadata", return_value=detected):
+            first = model_capabilities.build_model_capabilities(
+                models={"qwen3:latest": "ollama"},
+                vision_models=[],
+                tool_models=[],
+                system_message_denylist=[],
+                provider_info_resolver=_ollama_provider,
+            )
+
+        # A fresh worker reads the shared file and does not probe at all.
+        model_capabilities.clear_model_capabilities_cache()
+        model_capabilities.configure_probing(store=ModelCapabilityStore(store_path, ttl_seconds=3600))
+        with patch("chat_client.core.model_capabilities.get_ollama_model_metadata") as mock_metadata:
+            second = model_capabilities.build_model_capabilities(
+                models={"qwen3:latest": "ollama"},
+                vision_models=[],
+                tool_models=[],
+                system_message_denylist=[],
+                provider_info_resolver=_ollama_provider,
+            )
+    finally:
+        model_capabilities.configure_probing()
+
+    assert mock_metadata.call_count == 0
+    assert second == first
+    assert second["qwen3:latest"]["supports_images"] is True
+
+
+def test_build_model_capabilities_does_not_store_failed_probes(tmp_path):
+    model_capabilities.clear_model_capabilities_cache()
+    store = ModelCapabilityStore(tmp_path / "model_capabilities.json", ttl_seconds=3600)
+    model_capabilities.configure_probing(store=store)
+    try:
+        with patch(
+            "chat_client.core.model_capabilities.get_ollama_model_metadata",
+            return_value={"supports_images": False, "supports_tools": False, "probe_failed": True},
+        ):
+            model_capabilities.build_model_capabilities(
+                models={"qwen3:latest": "ollama"},
+                vision_models=[],
+                tool_models=[],
+                system_message_denylist=[],
+                provider_info_resolver=_ollama_provider,
+            )
+    finally:
+        model_capabilities.configure_probing()
+
+    assert not (tmp_path / "model_capabilities.json").exists()
+
+
+def test_refresh_stale_model_capabilities_reprobes_expired_entries(tmp_path):
+    model_capabilities.clear_model_capabilities_cache()
+    store = ModelCapabilityStore(tmp_path / "model_capabilities.json", ttl_seconds=60)
+    models = {"qwen3:latest": "ollama"}
+    kwargs = {
+        "models": models,
+        "vision_models": [],
+        "tool_models": [],
+        "system_message_denylist": [],
+        "provider_info_resolver": _ollama_provider,
+    }
+    model_capabilities.configure_probing(store=store)
+    try:
+        store.put_many(
+            {
+                model_capabilities._build_probe_requests(models, set(), _ollama_provider)[0].store_key: {
+                    "supports_images": False,
+                    "supports_tools": False,
+                }
+            },
+            now=time.time() - 120,
+        )
+        with patch(
+            "chat_client.core.model_capabilities.get_ollama_model_metadata",
+            return_value={"supports_images": False, "supports_tools": True, "supports_thinking": False, "context_length": None},
+        ) as mock_metadata:
+            stale_table = model_capabilities.get_model_capability_table(**kwargs)
+            assert mock_metadata.call_count == 0
+
+            refreshed_table = model_capabilities.refresh_stale_model_capabilities(**kwargs)
+            current_table = model_capabilities.get_model_capability_table(**kwargs)
+            second_refresh = model_capabilities.refresh_stale_model_capabilities(**kwargs)
+    finally:
+        model_capabilities.configure_probing()
+
+    assert stale_table.tool_models == ()
+    assert mock_metadata.call_count == 1
+    assert mock_metadata.call_args.kwargs["refresh"] is True
+    assert refreshed_table is current_table
+    assert current_table.tool_models == ("qwen3:latest",)
+    assert second_refresh is None
@@ -0,0 +1,194 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from chat_client.core import chat_service, ollama_residency
+from chat_client.core.ollama_residency import OllamaResidency
+
+
+class _FakeOllama:
+    """
+    A local Ollama answering `/api/ps` with its loaded models and loading
+    models on `/api/generate` after `load_seconds`.
+    """
+
+    def __init__(self, loaded: list[str] | None = None, load_seconds: float = 0.0):
+        self.loaded = list(loaded or [])
+        self.generate_payloads: list[dict] = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send_json(self, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self._send_json({"models": [{"name": name, "model": name} for name in fake.loaded]})
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                fake.generate_payloads.append(payload)
+                time.sleep(load_seconds)
+                fake.loaded.append(ollama_residency.normalize_model_name(payload["model"]))
+                self._send_json({"model": payload["model"], "done": True, "done_reason": "load"})
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.provider_info = {"base_url": f"http://127.0.0.1:{self.server.server_address[1]}/v1", "api_key": "ollama"}
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def test_concurrent_loads_of_a_model_share_one_request():
+    ollama = _FakeOllama(loaded=["qwen3:8b"], load_seconds=0.05)
+    residency = OllamaResidency(keep_alive={"llama3.1": "1h"}, default_keep_alive="10m")
+
+    async def run():
+        before = await residency.is_resident(ollama.provider_info, "llama3.1")
+        loads = [residency.load(ollama.provider_info, "llama3.1"), residency.load(ollama.provider_info, "llama3.1:latest")]
+        results = await asyncio.gather(*loads)
+        after = await residency.is_resident(ollama.provider_info, "llama3.1")
+        preloaded = await residency.preload(ollama.provider_info, ["qwen3:8b", "mistral"])
+        return before, loads[0] is loads[1], results, after, preloaded
+
+    try:
+        before, shared, results, after, preloaded = asyncio.run(run())
+    finally:
+        ollama.close()
+
+    assert before is False
+    assert shared is True
+    assert results == [True, True]
+    assert after is True
+    assert preloaded == {"qwen3:8b": True, "mistral": True}
+    assert ollama.generate_payloads == [{"model": "llama3.1", "keep_alive": "1h"}, {"model": "mistral", "keep_alive": "10m"}]
+
+
+def test_unreachable_server_leaves_residency_unknown():
+    residency = OllamaResidency()
+
+    async def run():
+        return await residency.is_resident({"base_url": "http://127.0.0.1:9/v1"}, "llama3.1"), await residency.load({}, "llama3.1")
+
+    assert asyncio.run(run()) == (None, False)
+
+
+def test_keep_alive_is_only_sent_to_ollama():
+    messages = [{"role": "user", "content": "hi"}]
+
+    ollama_kwargs = chat_service.build_chat_completion_create_kwargs(
+        model="llama3.1", messages=messages, provider_name="ollama", keep_alive=-1
+    )
+    openai_kwargs = chat_service.build_chat_completion_create_kwargs(model="gpt", messages=messages, provider_name="openai", keep_alive=-1)
+
+    assert ollama_kwargs["extra_body"] == {"keep_alive": -1}
+    assert "extra_body" not in openai_kwargs
+
+
+class _Request:
+    def __init__(self, disconnected: bool = False):
+        self.disconnected = disconnected
+
+    async def is_disconnected(self):
+        return self.disconnected
+
+
+def test_chat_stream_reports_model_loading(monkeypatch):
+    from chat_client.endpoints import chat_endpoints
+
+    monkeypatch.setattr(ollama_residency, "LOAD_STATUS_INTERVAL_SECONDS", 0.01)
+    monkeypatch.setattr(chat_endpoints, "_ollama_residency", OllamaResidency())
+    ollama = _FakeOllama(load_seconds=0.1)
+
+    async def run():
+        events = []
+        load = await chat_endpoints._start_model_load("ollama", ollama.provider_info, "llama3.1")
+        assert load is not None
+        async for chunk in chat_endpoints._wait_for_model_load(_Request(), load, "llama3.1", {}):
+            events.append(json.loads(chunk.removeprefix("data: ")))
+        return events, load.result(), await chat_endpoints._start_model_load("ollama", ollama.provider_info, "llama3.1")
+
+    try:
+        events, loaded, next_load = asyncio.run(run())
+    finally:
+        ollama.close()
+
+    assert len(events) >= 3
+    assert events[0] == {"model_status": {"model": "llama3.1", "state": "loading"}}
+    assert events[-1] == {"model_status": {"model": "llama3.1", "state": "ready"}}
+    assert loaded is True
+    # Once loaded, the next stream starts without waiting.
+    assert next_load is None
+    assert len(ollama.generate_payloads) == 1
+
+
+def test_loads_in_flight_are_cancelled_on_close():
+    ollama = _FakeOllama(load_seconds=0.2)
+    residency = OllamaResidency()
+
+    async def run():
+        load = residency.load(ollama.provider_info, "llama3.1")
+        await asyncio.sleep(0.01)
+        await residency.aclose()
+        return load
+
+    try:
+        load = asyncio.run(run())
+    finally:
+        ollama.close()
+
+    assert load.cancelled()
+    assert residency._loads == {}
+
+
+def test_chat_stream_stops_when_the_model_cannot_be_used(monkeypatch):
+    from chat_client.core import stream_scheduler
+    from chat_client.endpoints import chat_endpoints
+
+    monkeypatch.setattr(ollama_residency, "LOAD_STATUS_INTERVAL_SECONDS", 0.01)
+    scheduler = stream_scheduler.StreamScheduler()
+    monkeypatch.setattr(chat_endpoints, "_stream_scheduler", scheduler)
+    model_calls = []
+    streams_running_during_load = []
+
+    async def fake_chat_response_stream(*args, **kwargs):
+        model_calls.append(args)
+        yield "data: {}\n\n"
+
+    monkeypatch.setattr(chat_endpoints.chat_service, "chat_response_stream", fake_chat_response_stream)
+    monkeypatch.setattr(chat_endpoints, "_resolve_provider_name", lambda _model: "ollama")
+    monkeypatch.setattr(chat_endpoints, "_resolve_provider_info", lambda _model: {"base_url": "http://ollama.invalid/v1"})
+    monkeypatch.setattr(chat_endpoints, "_supports_model_thinking_control", lambda _model: False)
+
+    async def run(load_result, request):
+        async def load(seconds):
+            streams_running_during_load.append(scheduler.running("provider", "ollama"))
+            await asyncio.sleep(seconds)
+            return load_result
+
+        async def start_model_load(*_args):
+            return asyncio.create_task(load(60 if load_result is None else 0))
+
+        monkeypatch.setattr(chat_endpoints, "_start_model_load", start_model_load)
+        stream = chat_endpoints._chat_response_stream(request, [{"role": "user", "content": "hi"}], "llama3.1", "", 1, "", "trace")
+        return [json.loads(chunk.removeprefix("data: ")) async for chunk in stream]
+
+    failed = asyncio.run(run(False, _Request()))
+    disconnected = asyncio.run(run(None, _Request(disconnected=True)))
+
+    assert failed[-1] == {"error": "Unable to load model llama3.1. Try again later."}
+    assert disconnected[-1] == {"model_status": {"model": "llama3.1", "state": "loading"}}
+    assert model_calls == []
+    # The load runs before the stream is admitted, so it does not hold a stream slot.
+    assert streams_running_during_load == [0, 0]
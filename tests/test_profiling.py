@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import threading
+import time
+from types import SimpleNamespace
+
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from chat_client.core import chat_service, profiling
+from chat_client.endpoints import profiling_endpoints
+
+
+def _spin_until(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(200))
+
+
+def test_sampling_profiler_records_folded_stacks_of_other_threads():
+    stop = threading.Event()
+    worker = threading.Thread(target=_spin_until, args=(stop,), name="busy worker")
+    worker.start()
+    try:
+        profiler = profiling.profile_for(0.2, interval_seconds=0.002)
+    finally:
+        stop.set()
+        worker.join()
+
+    folded = profiler.collapsed()
+    busy_lines = [line for line in folded.splitlines() if line.startswith("busy_worker;")]
+
+    assert profiler.sample_count > 5
+    assert busy_lines
+    assert any("_spin_until_(test_profiling.py:" in line for line in busy_lines)
+    stack, count = busy_lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert " " not in stack
+
+
+def test_profile_for_rejects_concurrent_profiles():
+    results: list[BaseException | None] = []
+
+    def run():
+        try:
+            profiling.profile_for(0.2)
+            results.append(None)
+        except profiling.ProfilerBusyError as error:
+            results.append(error)
+
+    first = threading.Thread(target=run)
+    first.start()
+    time.sleep(0.05)
+    run()
+    first.join()
+
+    assert sum(isinstance(result, profiling.ProfilerBusyError) for result in results) == 1
+
+
+def test_write_collapsed_writes_profile_file(tmp_path):
+    profiler = profiling.SamplingProfiler()
+    profiler.samples["MainThread;main_(app.py:1)"] = 3
+
+    path = profiling.write_collapsed(profiler, tmp_path)
+
+    assert path.read_text(encoding="utf-8") == "MainThread;main_(app.py:1) 3\n"
+
+
+def test_cpu_split_separates_cpu_sections_from_waits():
+    split = profiling.CpuSplit()
+    with split.cpu("serialize"):
+        sum(range(100_000))
+    with split.wait("provider_stream"):
+        time.sleep(0.02)
+
+    summary = split.summary()
+
+    assert summary["serialize_cpu_ms"] > 0
+    assert summary["loop_cpu_ms"] == summary["serialize_cpu_ms"]
+    assert summary["provider_stream_wait_ms"] >= 15
+    assert summary["wall_ms"] >= summary["provider_stream_wait_ms"]
+
+
+def test_chat_response_stream_logs_wall_and_cpu_split(caplog):
+    chunk_payload = {"choices": [{"delta": {"content": "hi"}}]}
+    chunk = SimpleNamespace(
+        choices=[SimpleNamespace(delta=SimpleNamespace(content="hi", tool_calls=None), finish_reason="stop")],
+        usage=None,
+        model_dump=lambda: chunk_payload,
+    )
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **_: iter([chunk]))))
+
+    class Request:
+        async def is_disconnected(self):
+            return False
+
+    async def run():
+        async for _ in chat_service.chat_response_stream(
+            Request(),
+            messages=[{"role": "user", "content": "hi"}],
+            model="test-model",
+            openai_client_cls=lambda **_: client,
+            provider_info_resolver=lambda _model: {},
+            tool_models=[],
+            tools_loader=lambda: [],
+            tool_executor=lambda _tool_call: "",
+            logger=logging.getLogger("test.profiling"),
+        ):
+            pass
+
+    with caplog.at_level(logging.INFO, logger="test.profiling"):
+        asyncio.run(run())
+
+    closed = next(record for record in caplog.records if getattr(record, "event", "") == "chat.stream.closed")
+    fields = closed.event_fields
+    for key in ("wall_ms", "loop_cpu_ms", "serialize_cpu_ms", "log_cpu_ms", "provider_connect_wait_ms", "provider_stream_wait_ms"):
+        assert key in fields
+
+
+def _client() -> TestClient:
+    return TestClient(Starlette(routes=[Route("/admin/profile", profiling_endpoints.create_profile, methods=["POST"])]))
+
+
+def test_profile_endpoint_is_disabled_without_token(monkeypatch):
+    monkeypatch.setattr(profiling_endpoints, "PROFILING_TOKEN", "")
+
+    assert _client().post("/admin/profile").status_code == 404
+
+
+def test_profile_endpoint_requires_token_and_returns_folded_profile(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling_endpoints, "PROFILING_TOKEN", "secret")
+    monkeypatch.setattr(profiling_endpoints, "PROFILE_DIR", tmp_path)
+    client = _client()
+
+    unauthorized = client.post("/admin/profile?seconds=0.05")
+    response = client.post("/admin/profile?seconds=0.05&interval_ms=5", headers={"Authorization": "Bearer secret"})
+
+    assert unauthorized.status_code == 401
+    assert response.status_code == 200
+    assert int(response.headers["x-profile-samples"]) > 0
+    assert response.text.endswith("\n")
+    assert list(tmp_path.glob("profile-*.folded"))
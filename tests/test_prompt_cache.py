@@ -0,0 +1,54 @@
+from chat_client.core import chat_service, prompt_cache
+
+
+def test_stable_messages_keep_only_provider_keys_in_a_fixed_order():
+    messages = [
+        {"content": "Hi", "role": "user", "images": [], "attachments": []},
+        {
+            "tool_calls": [{"function": {"arguments": '{"q": "café"}', "name": "search"}, "id": "call_1", "type": "function"}],
+            "role": "assistant",
+            "content": None,
+        },
+        {"tool_call_id": "call_1", "role": "tool", "content": "found"},
+    ]
+
+    stable = prompt_cache.stable_messages(messages)
+
+    assert [list(message) for message in stable] == [
+        ["role", "content"],
+        ["role", "content", "tool_calls"],
+        ["role", "content", "tool_call_id"],
+    ]
+    assert stable[1]["content"] == ""
+    assert stable[1]["tool_calls"][0]["function"]["arguments"] == '{"q":"caf\\u00e9"}'
+    assert messages[0]["images"] == []
+
+
+def test_tool_definitions_are_sent_in_name_order():
+    tools = [
+        {"type": "function", "function": {"name": "search_wikipedia"}},
+        {"type": "function", "function": {"name": "python_tool"}},
+    ]
+
+    create_kwargs = chat_service.build_chat_completion_create_kwargs(
+        model="m", messages=[], provider_name="ollama", tool_definitions=tools, stable_prefix=True
+    )
+
+    assert [tool["function"]["name"] for tool in create_kwargs["tools"]] == ["python_tool", "search_wikipedia"]
+    assert "extra_body" not in create_kwargs
+
+
+def test_provider_cache_hints():
+    key = prompt_cache.prompt_cache_key("dialog-1")
+
+    assert key == prompt_cache.prompt_cache_key("dialog-1") != prompt_cache.prompt_cache_key("dialog-2")
+    assert prompt_cache.provider_cache_hints("openai", key) == {"prompt_cache_key": key}
+    assert prompt_cache.provider_cache_hints("openai", "") == {}
+    assert prompt_cache.provider_cache_hints("llama") == {"cache_prompt": True}
+    assert prompt_cache.provider_cache_hints("ollama", key) == {}
+
+
+def test_cache_hit_ratio():
+    assert prompt_cache.cache_hit_ratio(1000, 1700) == 0.5882
+    assert prompt_cache.cache_hit_ratio(0, 0) == 0.0
+    assert prompt_cache.cache_hit_ratio(50, 10) == 1.0
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import openai
+import pytest
+from openai import OpenAI
+
+from chat_client.core import chat_service, provider_endpoints
+from chat_client.core.provider_endpoints import Endpoint, EndpointPool, NoHealthyEndpointError
+
+
+class _FakeProvider:
+    """
+    A local OpenAI-compatible backend answering chat completions with an SSE
+    stream of `text`, or with `status` when that is not 200.
+    """
+
+    def __init__(self, text: str = "", status: int = 200):
+        self.requests = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                fake.requests += 1
+                if status != 200:
+                    body = json.dumps({"error": {"message": "overloaded"}}).encode("utf-8")
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                for delta, finish_reason in (({"role": "assistant", "content": text}, None), ({}, "stop")):
+                    chunk = {
+                        "id": "chatcmpl-1",
+                        "object": "chat.completion.chunk",
+                        "created": 0,
+                        "model": "fake",
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class _Request:
+    async def is_disconnected(self):
+        return False
+
+
+@pytest.fixture(autouse=True)
+def _clear_pools():
+    provider_endpoints.clear_pools()
+    yield
+    provider_endpoints.clear_pools()
+
+
+def test_pool_prefers_least_outstanding_and_ejects_failing_endpoints():
+    now = [0.0]
+    pool = EndpointPool("local", [Endpoint("http://a/v1"), Endpoint("http://b/v1")], clock=lambda: now[0])
+
+    first = pool.acquire()
+    second = pool.acquire()
+    assert {first.base_url, second.base_url} == {"http://a/v1", "http://b/v1"}
+    pool.release(first)
+    pool.release(second)
+
+    failing = pool.endpoints[0]
+    for _ in range(provider_endpoints.FAILURE_THRESHOLD):
+        pool.release(pool.acquire(exclude=["http://b/v1"]), failed=True)
+    assert failing.is_open
+    assert [pool.acquire().base_url for _ in range(2)] == ["http://b/v1", "http://b/v1"]
+    with pytest.raises(NoHealthyEndpointError):
+        pool.acquire(exclude=["http://b/v1"])
+
+    now[0] += provider_endpoints.BASE_COOLDOWN_SECONDS
+    trial = pool.acquire(exclude=["http://b/v1"])
+    assert trial is failing
+    pool.release(trial, failed=True)
+    assert failing.cooldown_seconds == 2 * provider_endpoints.BASE_COOLDOWN_SECONDS
+    pool.record_success(failing)
+    assert not failing.is_open
+
+
+def test_health_check_counts_unreachable_endpoints_as_failures(monkeypatch):
+    pool = EndpointPool("local", [Endpoint("http://127.0.0.1:9/v1")])
+    endpoint = pool.endpoints[0]
+
+    assert asyncio.run(provider_endpoints.check_endpoint(pool, endpoint)) is False
+    assert endpoint.consecutive_failures == 1
+
+    async def broken_get(*args, **kwargs):
+        raise TypeError("unexpected keyword argument")
+
+    # A bug in the check itself is raised, not reported as an unhealthy endpoint.
+    monkeypatch.setattr(provider_endpoints.http_client, "get", broken_get)
+    with pytest.raises(TypeError):
+        asyncio.run(provider_endpoints.check_endpoint(pool, endpoint))
+    assert endpoint.consecutive_failures == 1
+
+
+def test_latency_routing_prefers_the_faster_endpoint():
+    pool = EndpointPool("local", [Endpoint("http://slow/v1"), Endpoint("http://fast/v1")], strategy="latency")
+    pool.record_latency(pool.endpoints[0], 2.0)
+    pool.record_latency(pool.endpoints[1], 0.5)
+
+    chosen = [pool.acquire().base_url for _ in range(4)]
+
+    # The fast endpoint takes streams until its load-weighted latency reaches the slow one's.
+    assert chosen == ["http://fast/v1", "http://fast/v1", "http://fast/v1", "http://slow/v1"]
+
+
+def test_only_transport_errors_429_and_5xx_move_on_to_another_endpoint():
+    request = httpx.Request("POST", "http://a/v1/chat/completions")
+
+    def status_error(status_code):
+        return openai.APIStatusError("error", response=httpx.Response(status_code, request=request), body=None)
+
+    retryable = [openai.APIConnectionError(request=request), openai.APITimeoutError(request=request), status_error(429), status_error(503)]
+    final = [openai.OpenAIError("The api_key client option must be set"), status_error(401), status_error(400), ValueError("bug")]
+
+    assert all(chat_service._is_retryable_provider_error(error) for error in retryable)
+    assert not any(chat_service._is_retryable_provider_error(error) for error in final)
+
+
+def test_stream_creation_fails_over_to_a_healthy_endpoint():
+    broken = _FakeProvider(status=503)
+    healthy = _FakeProvider(text="hello from the healthy backend")
+    provider_info = {"endpoints": [broken.base_url, healthy.base_url], "api_key": "test"}
+
+    async def run():
+        chunks = []
+        async for chunk in chat_service.chat_response_stream(
+            _Request(),
+            messages=[{"role": "user", "content": "hi"}],
+            model="fake",
+            openai_client_cls=OpenAI,
+            provider_info_resolver=lambda _model: provider_info,
+            tool_models=[],
+            tools_loader=lambda: [],
+            tool_executor=lambda _tool_call: "",
+            logger=logging.getLogger("test"),
+            provider_name="fake-pool",
+        ):
+            chunks.append(chunk)
+        return chunks
+
+    try:
+        # Make the broken endpoint the first choice.
+        pool = provider_endpoints.get_pool("fake-pool", provider_info)
+        assert pool is not None
+        pool.endpoints[1].last_used = 1.0
+        chunks = asyncio.run(run())
+    finally:
+        broken.close()
+        healthy.close()
+
+    assert broken.requests == 1
+    assert healthy.requests == 1
+    assert "hello from the healthy backend" in "".join(chunks)
+    assert all("error" not in json.loads(chunk.removeprefix("data: ")) for chunk in chunks)
+    assert [endpoint.consecutive_failures for endpoint in pool.endpoints] == [1, 0]
+    assert pool.endpoints[1].latency_seconds is not None
+    assert [endpoint.outstanding for endpoint in pool.endpoints] == [0, 0]
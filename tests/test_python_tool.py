@@ -1,4 +1,6 @@
+import sqlite3
 import subprocess
+import sys
 import tempfile
 import types
 from pathlib import Path
@@ -6,7 +8,9 @@ from unittest.mock import patch
 
 import pytest
 
+from chat_client.core import attachments as attachment_service
 from chat_client.core.attachments import prepare_tool_attachment_mount
+from chat_client.tools import python_runtime
 from chat_client.tools.python_tool import NO_RESULT_ERROR, python_hardened, python_relaxed
 from chat_client.tools.python_runtime import (
     PythonRuntimeError,
@@ -50,14 +54,17 @@ def test_python_tool_allows_imports():
         run_mock.assert_called_once()
 
 
-def test_python_tool_allows_open_calls_with_workspace_mount():
+def test_python_tool_allows_open_calls_with_workspace_mount(tmp_path):
+    (tmp_path / "notes.txt").write_text("ok", encoding="utf-8")
     with patch("chat_client.tools.python_runtime.subprocess.run") as run_mock:
         run_mock.return_value = subprocess.CompletedProcess(args=[], returncode=0, stdout="ok\n", stderr="")
-        result = python_hardened("print(open('/mnt/data/notes.txt').read())", attachment_host_dir="/tmp/tool-files")
+        result = python_hardened("print(open('/mnt/data/notes.txt').read())", attachment_host_dir=str(tmp_path))
         assert result == "ok"
         called_args = run_mock.call_args[0][0]
-        assert "/tmp/tool-files:/mnt/input:ro" in called_args
+        # Each input is mounted writable over the workspace tmpfs; nothing is mounted at /mnt/input.
+        assert f"{tmp_path}/notes.txt:/mnt/data/notes.txt" in called_args
         assert "/mnt/data:rw,size=65m" in called_args
+        assert not any(str(arg).endswith(":/mnt/input:ro") for arg in called_args)
 
 
 def test_python_tool_allows_numpy_import():
@@ -85,7 +92,8 @@ def test_python_tool_invokes_docker_with_hardening_flags():
         assert "chat-client-python-tool" in called_args
 
 
-def test_python_tool_mounts_attachment_directory_when_present():
+@patch("chat_client.tools.python_runtime.resolve_tool_workspace_mode", return_value="copy")
+def test_python_tool_mounts_attachment_directory_when_present(_mock_workspace_mode):
     with patch("chat_client.tools.python_runtime.subprocess.run") as run_mock:
         run_mock.return_value = subprocess.CompletedProcess(args=[], returncode=0, stdout="ok\n", stderr="")
         result = python_hardened("print('ok')", attachment_host_dir="/tmp/tool-files")
@@ -96,7 +104,8 @@ def test_python_tool_mounts_attachment_directory_when_present():
         assert "/mnt/data:rw,size=65m" in called_args
 
 
-def test_python_tool_mounts_empty_directory_when_not_provided():
+@patch("chat_client.tools.python_runtime.resolve_tool_workspace_mode", return_value="copy")
+def test_python_tool_mounts_empty_directory_when_not_provided(_mock_workspace_mode):
     with patch("chat_client.tools.python_runtime.subprocess.run") as run_mock:
         run_mock.return_value = subprocess.CompletedProcess(args=[], returncode=0, stdout="ok\n", stderr="")
         result = python_hardened("print('ok')")
@@ -108,7 +117,8 @@ def test_python_tool_mounts_empty_directory_when_not_provided():
         assert "/mnt/data:rw,size=65m" in called_args
 
 
-def test_prepare_tool_attachment_mount_makes_staged_file_world_readable():
+def test_prepare_tool_attachment_mount_makes_staged_file_world_readable(monkeypatch):
+    monkeypatch.setattr(attachment_service, "resolve_tool_workspace_mode", lambda: "copy")
     with tempfile.TemporaryDirectory() as temp_dir:
         source_path = Path(temp_dir) / "notes.txt"
         source_path.write_text("hello", encoding="utf-8")
@@ -130,6 +140,77 @@ def test_prepare_tool_attachment_mount_makes_staged_file_world_readable():
             assert staged_path.stat().st_mode & 0o777 == 0o644
 
 
+def test_prepare_tool_attachment_mount_hardlinks_readable_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(attachment_service, "resolve_attachment_storage_dir", lambda: tmp_path)
+    monkeypatch.setattr(attachment_service, "resolve_tool_workspace_mode", lambda: "copy")
+    source_path = tmp_path / "report.csv"
+    source_path.write_text("a,b\n", encoding="utf-8")
+    source_path.chmod(0o644)
+
+    with prepare_tool_attachment_mount([{"attachment_id": 1, "name": "report.csv", "storage_path": str(source_path)}]) as (
+        mount_dir,
+        mounted_attachments,
+    ):
+        staged_path = Path(str(mount_dir)) / mounted_attachments[0]["name"]
+        assert staged_path.stat().st_ino == source_path.stat().st_ino
+
+    assert source_path.read_text(encoding="utf-8") == "a,b\n"
+
+
+def test_linked_workspace_inputs_are_private_writable_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(attachment_service, "resolve_attachment_storage_dir", lambda: tmp_path)
+    source_path = tmp_path / "app.db"
+    with sqlite3.connect(source_path) as connection:
+        connection.execute("CREATE TABLE item (name TEXT)")
+    connection.close()
+    source_path.chmod(0o644)
+
+    with prepare_tool_attachment_mount([{"attachment_id": 1, "name": "app.db", "storage_path": str(source_path)}]) as (
+        mount_dir,
+        mounted_attachments,
+    ):
+        staged_path = Path(str(mount_dir)) / mounted_attachments[0]["name"]
+        assert attachment_service.resolve_tool_workspace_mode() == "link"
+        assert staged_path.stat().st_ino != source_path.stat().st_ino
+        assert staged_path.stat().st_mode & 0o777 == 0o666
+        with sqlite3.connect(staged_path) as connection:
+            connection.execute("INSERT INTO item VALUES ('a')")
+        connection.close()
+        mount_args = python_runtime.build_attachment_mount_args(str(mount_dir), "link")
+
+    assert mount_args == ["-v", f"{staged_path}:/mnt/data/app.db"]
+    with sqlite3.connect(source_path) as connection:
+        assert connection.execute("SELECT count(*) FROM item").fetchone()[0] == 0
+    connection.close()
+
+
+def test_copied_workspace_inputs_are_writable_without_open(tmp_path, monkeypatch):
+    source_dir = tmp_path / "input"
+    workspace_dir = tmp_path / "data"
+    source_dir.mkdir()
+    (source_dir / "notes.txt").write_text("old", encoding="utf-8")
+    with sqlite3.connect(source_dir / "app.db") as connection:
+        connection.execute("CREATE TABLE item (name TEXT)")
+    connection.close()
+    monkeypatch.setattr(python_runtime, "ATTACHMENT_SOURCE_MOUNT_DIR", str(source_dir))
+    monkeypatch.setattr(python_runtime, "resolve_tool_mount_dir", lambda: str(workspace_dir))
+    code = (
+        f"import os, sqlite3\nos.chdir({str(workspace_dir)!r})\n"
+        "fd = os.open('notes.txt', os.O_WRONLY | os.O_TRUNC)\nos.write(fd, b'new')\nos.close(fd)\n"
+        "connection = sqlite3.connect('app.db')\nconnection.execute(\"INSERT INTO item VALUES ('a')\")\nconnection.commit()\n"
+        "print(connection.execute('SELECT count(*) FROM item').fetchone()[0])"
+    )
+
+    completed = subprocess.run([sys.executable, "-c", build_runtime_script(code)], capture_output=True, text=True, check=True)
+
+    assert completed.stdout.splitlines() == ["1"]
+    assert (workspace_dir / "notes.txt").read_text(encoding="utf-8") == "new"
+    assert (source_dir / "notes.txt").read_text(encoding="utf-8") == "old"
+    with sqlite3.connect(source_dir / "app.db") as connection:
+        assert connection.execute("SELECT count(*) FROM item").fetchone()[0] == 0
+    connection.close()
+
+
 def test_python_tool_empty_output_returns_retry_hint():
     with patch("chat_client.tools.python_runtime.subprocess.run") as run_mock:
         run_mock.return_value = subprocess.CompletedProcess(args=[], returncode=0, stdout="", stderr="")
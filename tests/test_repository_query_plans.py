@@ -0,0 +1,113 @@
+import asyncio
+import sqlite3
+from pathlib import Path
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from chat_client.database.migration import Migration
+from chat_client.database.query_plan import QueryRecorder, explain_query_plan, full_table_scans
+from chat_client.database.synthetic_data import SEARCH_NEEDLE, SyntheticDataSpec, populate
+from chat_client.repositories import chat_repository
+
+MIGRATIONS_PATH = str(Path(chat_repository.__file__).resolve().parent.parent / "migrations")
+LARGE_TABLES = (
+    "users",
+    "dialog",
+    "message",
+    "image",
+    "message_image",
+    "attachment",
+    "message_attachment",
+    "tool_call_event",
+    "assistant_turn_event",
+    "llm_usage_event",
+)
+SPEC = SyntheticDataSpec(users=20, dialogs_per_user=3, turns_per_dialog=6, heavy_user_dialogs=30, heavy_dialog_turns=60)
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    db_path = tmp_path / "database.db"
+    Migration(str(db_path), MIGRATIONS_PATH).run_migrations()
+    return db_path, populate(db_path, SPEC)
+
+
+def _record(db_path: Path, make_call, monkeypatch) -> list:
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", echo=False)
+        monkeypatch.setattr(chat_repository, "async_session", async_sessionmaker(engine, expire_on_commit=False))
+        try:
+            with QueryRecorder(engine) as recorder:
+                await make_call()
+        finally:
+            await engine.dispose()
+        return recorder.queries
+
+    return asyncio.run(run())
+
+
+def _calls(summary):
+    user_id = summary.heavy_user_id
+    dialog_id = summary.heavy_dialog_id
+    return {
+        "get_messages": lambda: chat_repository.get_messages(user_id, dialog_id),
+        "get_dialogs_info": lambda: chat_repository.get_dialogs_info(user_id, 2),
+        "get_dialogs_info_search": lambda: chat_repository.get_dialogs_info(user_id, 1, SEARCH_NEEDLE),
+        "get_user_usage_totals": lambda: chat_repository.get_user_usage_totals(user_id),
+        "list_user_usage_by_dialog": lambda: chat_repository.list_user_usage_by_dialog(user_id),
+        "get_dialog_usage_totals": lambda: chat_repository.get_dialog_usage_totals(user_id, dialog_id),
+        "create_assistant_turn_events": lambda: chat_repository.create_assistant_turn_events(
+            user_id, dialog_id, "turn-plan", [{"event_type": "assistant_segment", "content_text": "done"}]
+        ),
+        "update_message": lambda: chat_repository.update_message(user_id, 3, "Edited question"),
+    }
+
+
+@pytest.mark.parametrize(
+    "name",
+    [
+        "get_messages",
+        "get_dialogs_info",
+        "get_dialogs_info_search",
+        "get_user_usage_totals",
+        "list_user_usage_by_dialog",
+        "get_dialog_usage_totals",
+        "create_assistant_turn_events",
+        "update_message",
+    ],
+)
+def test_repository_queries_do_not_scan_large_tables(dataset, monkeypatch, name):
+    db_path, summary = dataset
+    queries = _record(db_path, _calls(summary)[name], monkeypatch)
+
+    connection = sqlite3.connect(str(db_path))
+    try:
+        plans = {query.statement: explain_query_plan(connection, query.statement, query.parameters) for query in queries}
+    finally:
+        connection.close()
+    scans = {statement: full_table_scans(plan, LARGE_TABLES) for statement, plan in plans.items()}
+
+    assert queries
+    assert {statement: lines for statement, lines in scans.items() if lines} == {}
+
+
+def test_get_messages_query_count_does_not_grow_with_dialog_length(dataset, monkeypatch):
+    db_path, summary = dataset
+    user_id = summary.heavy_user_id
+    long_dialog, short_dialog = summary.heavy_dialog_ids[0], summary.heavy_dialog_ids[1]
+
+    long_queries = _record(db_path, lambda: chat_repository.get_messages(user_id, long_dialog), monkeypatch)
+    short_queries = _record(db_path, lambda: chat_repository.get_messages(user_id, short_dialog), monkeypatch)
+
+    assert len(long_queries) == len(short_queries)
+
+
+def test_get_dialogs_info_query_count_does_not_grow_with_page_size(dataset, monkeypatch):
+    db_path, summary = dataset
+    monkeypatch.setattr(chat_repository.config, "DIALOGS_PER_PAGE", 2, raising=False)
+    small_page = _record(db_path, lambda: chat_repository.get_dialogs_info(summary.heavy_user_id, 1), monkeypatch)
+    monkeypatch.setattr(chat_repository.config, "DIALOGS_PER_PAGE", 25, raising=False)
+    large_page = _record(db_path, lambda: chat_repository.get_dialogs_info(summary.heavy_user_id, 1), monkeypatch)
+
+    assert len(small_page) == len(large_page)
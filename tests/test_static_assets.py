@@ -0,0 +1,70 @@
+import gzip
+
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from chat_client.core import static_assets
+from chat_client.core.static_assets import PrecompressedStaticFiles
+
+
+def _write_static_tree(static_dir):
+    (static_dir / "js").mkdir(parents=True)
+    (static_dir / "js" / "app.js").write_text("export const value = 1;\n" * 50, encoding="utf-8")
+    (static_dir / "favicon.png").write_bytes(b"\x89PNG" + b"\x00" * 400)
+    (static_dir / "fetch.sh").write_text("#!/bin/sh\n", encoding="utf-8")
+
+
+def test_build_static_assets_writes_hashed_files_and_compressed_siblings(tmp_path):
+    _write_static_tree(tmp_path)
+    try:
+        manifest = static_assets.build_static_assets(tmp_path)
+
+        hashed_js = manifest["js/app.js"]
+        build_dir = tmp_path / "build"
+        assert hashed_js.startswith("js/app.") and hashed_js.endswith(".js")
+        assert (build_dir / hashed_js).read_bytes() == (tmp_path / "js" / "app.js").read_bytes()
+        assert gzip.decompress((build_dir / f"{hashed_js}.gz").read_bytes()) == (tmp_path / "js" / "app.js").read_bytes()
+        assert not (build_dir / f"{manifest['favicon.png']}.gz").exists()
+        assert "fetch.sh" not in manifest
+        assert static_assets.static_url("js/app.js") == f"/static/build/{hashed_js}"
+        assert static_assets.static_url("missing.css").startswith("/static/missing.css?version=")
+
+        # Rebuilding does not fingerprint the previous build output.
+        assert static_assets.build_static_assets(tmp_path) == manifest
+    finally:
+        static_assets.reload_manifest()
+
+
+def test_generate_import_map_resolves_modules_through_static_url(tmp_path):
+    _write_static_tree(tmp_path)
+
+    import_map = static_assets.generate_import_map(tmp_path, module_dirs=("js",))
+
+    assert '"/static/js/app.js": "{{ static_url(\'js/app.js\') }}"' in import_map
+
+
+def test_precompressed_static_files_negotiates_encoding_and_etag(tmp_path):
+    _write_static_tree(tmp_path)
+    try:
+        manifest = static_assets.build_static_assets(tmp_path)
+    finally:
+        static_assets.reload_manifest()
+    client = TestClient(Starlette(routes=[Mount("/static", app=PrecompressedStaticFiles(directory=tmp_path))]))
+    url = f"/static/build/{manifest['js/app.js']}"
+
+    compressed = client.get(url, headers={"Accept-Encoding": "gzip"})
+    plain = client.get(url, headers={"Accept-Encoding": "identity"})
+    refused = client.get(url, headers={"Accept-Encoding": "gzip;q=0"})
+    revalidated = client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": compressed.headers["etag"]})
+
+    assert compressed.status_code == 200
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["content-type"].startswith("text/javascript")
+    assert compressed.headers["vary"] == "Accept-Encoding"
+    assert compressed.text == (tmp_path / "js" / "app.js").read_text(encoding="utf-8")
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["vary"] == "Accept-Encoding"
+    assert plain.headers["etag"] != compressed.headers["etag"]
+    assert "content-encoding" not in refused.headers
+    assert revalidated.status_code == 304
@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+import pytest
+
+from chat_client.core import metrics, stream_scheduler
+from chat_client.core.stream_scheduler import QueueFullError, StreamScheduler
+
+
+def test_users_are_served_round_robin():
+    async def run():
+        scheduler = StreamScheduler(provider_limits={"ollama": 1}, user_limit=0)
+        first = scheduler.enqueue("alice", "ollama", "llama")
+        second = scheduler.enqueue("alice", "ollama", "llama")
+        third = scheduler.enqueue("alice", "ollama", "llama")
+        other = scheduler.enqueue("bob", "ollama", "llama")
+        positions = [ticket.position() for ticket in (first, second, third, other)]
+        admitted = []
+        for running in (first, second, other):
+            running.release()
+            admitted.append([ticket.is_admitted for ticket in (second, third, other)])
+        return positions, admitted, scheduler.queued
+
+    positions, admitted, queued = asyncio.run(run())
+
+    assert positions == [0, 1, 3, 2]
+    assert admitted == [[True, False, False], [True, False, True], [True, True, True]]
+    assert queued == 0
+
+
+def test_user_limit_does_not_hold_back_other_users():
+    async def run():
+        scheduler = StreamScheduler(user_limit=1)
+        first = scheduler.enqueue(1, "openai", "gpt")
+        waiting = scheduler.enqueue(1, "openai", "gpt")
+        other = scheduler.enqueue(2, "openai", "gpt")
+        admitted = (first.is_admitted, waiting.is_admitted, other.is_admitted)
+        first.release()
+        return admitted, waiting.is_admitted, scheduler.running("user", 1)
+
+    admitted, waiting_admitted, running = asyncio.run(run())
+
+    assert admitted == (True, False, True)
+    assert waiting_admitted is True
+    assert running == 1
+
+
+def test_full_queue_refuses_streams_and_cancelled_waits_leave_it():
+    async def run():
+        scheduler = StreamScheduler(model_limits={"llama": 1}, max_queued=1)
+        running = scheduler.enqueue(1, "ollama", "llama")
+        waiting = scheduler.enqueue(2, "ollama", "llama")
+        with pytest.raises(QueueFullError):
+            scheduler.enqueue(3, "ollama", "llama")
+        waiting.release()
+        replacement = scheduler.enqueue(3, "ollama", "llama")
+        depth = metrics.CHAT_STREAM_QUEUE_DEPTH.snapshot()["series"]
+        running.release()
+        return scheduler.queued, depth, replacement.is_admitted
+
+    queued, depth, admitted = asyncio.run(run())
+
+    assert queued == 0
+    assert depth == [[[], 1.0]]
+    assert admitted is True
+
+
+def test_queued_stream_receives_position_updates(monkeypatch):
+    from chat_client.endpoints import chat_endpoints
+
+    monkeypatch.setattr(stream_scheduler, "QUEUE_UPDATE_INTERVAL_SECONDS", 0.01)
+
+    class _Request:
+        async def is_disconnected(self):
+            return False
+
+    async def run():
+        scheduler = StreamScheduler(provider_limits={"ollama": 1})
+        running = scheduler.enqueue(1, "ollama", "llama")
+        ticket = scheduler.enqueue(2, "ollama", "llama")
+        events = []
+        async for chunk in chat_endpoints._wait_for_stream_admission(_Request(), ticket, {}):
+            events.append(json.loads(chunk.removeprefix("data: ")))
+            if len(events) == 2:
+                running.release()
+        return events, ticket.is_admitted
+
+    events, admitted = asyncio.run(run())
+
+    assert events[:2] == [{"queue": {"position": 1}}, {"queue": {"position": 1}}]
+    assert events[-1] == {"queue": {"position": 0}}
+    assert admitted is True
@@ -97,3 +97,17 @@ def test_build_startup_tool_summary_reports_mcp_without_auth_token():
         },
         "tool_models": [],
     }
+
+
+def test_cacheable_tools_declare_a_ttl():
+    specs = tool_config.normalize_local_tool_specs(
+        tool_registry={},
+        local_tool_definitions=[
+            {"name": "search", "execution": {"cacheable": True, "cache_ttl_seconds": 600}},
+            {"name": "pages", "execution": {"cacheable": True}},
+            {"name": "python", "execution": {"mount_workspace": True}},
+        ],
+    )
+
+    assert [spec.execution.cache_ttl_seconds for spec in specs] == [600.0, tool_config.DEFAULT_TOOL_CACHE_TTL_SECONDS, None]
+    assert specs[2].execution.mount_workspace is True
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from chat_client.core import tool_executor, tool_result_cache
+from chat_client.core.tool_result_cache import ToolResultCache
+from chat_client.database.cache import MemoryCache
+from chat_client.models import Base, Cache
+
+
+def _tool_call(arguments: str) -> dict:
+    return {"id": "call_1", "type": "function", "function": {"name": "search_wikipedia", "arguments": arguments}}
+
+
+def test_identical_arguments_are_served_from_memory(caplog):
+    cache = ToolResultCache()
+    calls = []
+
+    async def run():
+        calls.append(1)
+        return {"pages": ["Python"]}
+
+    async def _run():
+        first = await tool_executor.execute_tool_cached(
+            _tool_call('{"query": "python", "limit": 3}'), run, result_cache=cache, ttl_seconds=60, logger=logging.getLogger("test")
+        )
+        second = await tool_executor.execute_tool_cached(
+            _tool_call('{"limit": 3, "query": "python"}'), run, result_cache=cache, ttl_seconds=60, logger=logging.getLogger("test")
+        )
+        return first, second
+
+    caplog.set_level(logging.INFO, logger="test")
+    first, second = asyncio.run(_run())
+
+    assert first == second == {"pages": ["Python"]}
+    assert first is not second
+    assert len(calls) == 1
+    assert cache.stats()["cache_hits"] == 1
+    assert "chat.tool.cache.miss" in caplog.text
+    assert "chat.tool.cache.hit" in caplog.text
+
+
+def test_tools_without_a_ttl_are_not_cached():
+    cache = ToolResultCache()
+    calls = []
+
+    async def run():
+        calls.append(1)
+
+    async def _run():
+        for _ in range(2):
+            await tool_executor.execute_tool_cached(
+                _tool_call("{}"), run, result_cache=cache, ttl_seconds=None, logger=logging.getLogger("test")
+            )
+
+    asyncio.run(_run())
+
+    assert len(calls) == 2
+    assert cache.stats()["cache_misses"] == 0
+
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(tool_result_cache.time, "time", lambda: now[0])
+    cache = ToolResultCache()
+
+    async def _run():
+        await cache.set("key", "result", ttl_seconds=10)
+        fresh = await cache.get("key", ttl_seconds=10)
+        now[0] += 11
+        expired = await cache.get("key", ttl_seconds=10)
+        return fresh, expired
+
+    fresh, expired = asyncio.run(_run())
+
+    assert fresh.hit and fresh.value == "result"
+    assert not expired.hit
+
+
+def test_database_tier_is_shared_between_caches(tmp_path):
+    async def _run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'cache.db'}", echo=False)
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            session_factory = async_sessionmaker(engine, expire_on_commit=False)
+            worker_a = ToolResultCache(session_factory=session_factory)
+            worker_b = ToolResultCache(session_factory=session_factory)
+
+            key = ToolResultCache.make_key("search_wikipedia", {"query": "python"})
+            assert await worker_a.set(key, ["Python"], ttl_seconds=60)
+            shared = await worker_b.get(key, ttl_seconds=60)
+            promoted = await worker_b.get(key, ttl_seconds=60)
+            assert not await worker_a.set("other", object(), ttl_seconds=60)
+            return shared, promoted
+        finally:
+            await engine.dispose()
+
+    shared, promoted = asyncio.run(_run())
+
+    assert (shared.hit, shared.value, shared.tier) == (True, ["Python"], "database")
+    assert promoted.tier == "memory"
+
+
+def test_database_reads_go_through_the_shared_memory_tier(tmp_path):
+    async def _run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'cache.db'}", echo=False)
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            session_factory = async_sessionmaker(engine, expire_on_commit=False)
+            memory = MemoryCache()
+            writer = ToolResultCache(session_factory=session_factory, memory=memory)
+            reader = ToolResultCache(session_factory=session_factory, memory=memory)
+
+            key = ToolResultCache.make_key("search_wikipedia", {"query": "python"})
+            await writer.set(key, ["Python"], ttl_seconds=60)
+            # Without the row, only the shared memory tier can answer.
+            async with session_factory() as session:
+                await session.execute(delete(Cache))
+                await session.commit()
+            return len(memory), await reader.get(key, ttl_seconds=60)
+        finally:
+            await engine.dispose()
+
+    remembered, lookup = asyncio.run(_run())
+
+    assert remembered == 1
+    assert (lookup.hit, lookup.value) == (True, ["Python"])
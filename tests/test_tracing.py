@@ -0,0 +1,184 @@
+import asyncio
+import json
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from chat_client.core import chat_service, tracing
+from chat_client.tools.python_runtime import STARTED_MARKER, split_started_marker
+
+
+class MemoryExporter:
+    def __init__(self):
+        self.spans: list[tracing.Span] = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+    def shutdown(self):
+        return None
+
+
+@pytest.fixture
+def exporter():
+    memory_exporter = MemoryExporter()
+    tracing.configure_tracing(memory_exporter, schedule_delay_seconds=0.01)
+    yield memory_exporter
+    tracing.shutdown_tracing()
+
+
+def _finished(exporter: MemoryExporter) -> dict[str, tracing.Span]:
+    tracing.shutdown_tracing()
+    return {span.name: span for span in exporter.spans}
+
+
+def test_start_span_is_non_recording_when_tracing_is_off():
+    tracing.shutdown_tracing()
+
+    with tracing.start_span("ignored") as span:
+        span.set_attribute("key", "value")
+        span.add_event("event")
+
+    assert span.recording is False
+    assert span.attributes == {}
+
+
+def test_spans_nest_and_follow_to_thread(exporter):
+    def work_in_thread():
+        with tracing.start_span("in_thread"):
+            pass
+
+    async def run():
+        with tracing.start_span("root", trace_id="a" * 32):
+            with tracing.start_span("child"):
+                await asyncio.to_thread(work_in_thread)
+
+    asyncio.run(run())
+    spans = _finished(exporter)
+
+    assert spans["root"].context.trace_id == "a" * 32
+    assert spans["root"].parent_span_id == ""
+    assert spans["child"].parent_span_id == spans["root"].context.span_id
+    assert spans["in_thread"].parent_span_id == spans["child"].context.span_id
+    assert {span.context.trace_id for span in spans.values()} == {"a" * 32}
+
+
+def test_explicit_parent_links_a_span_started_after_the_parent_ended(exporter):
+    with tracing.start_span("request") as request_span:
+        pass
+    with tracing.start_span("stream", parent=request_span.context):
+        tracing.record_span("startup", 1_000, 2_000)
+
+    spans = _finished(exporter)
+
+    assert spans["stream"].parent_span_id == spans["request"].context.span_id
+    assert spans["startup"].parent_span_id == spans["stream"].context.span_id
+    assert (spans["startup"].start_time_ns, spans["startup"].end_time_ns) == (1_000, 2_000)
+
+
+def test_exceptions_mark_the_span_as_failed(exporter):
+    with pytest.raises(ValueError):
+        with tracing.start_span("failing"):
+            raise ValueError("boom")
+
+    span = _finished(exporter)["failing"]
+
+    assert span.status_code == tracing.STATUS_ERROR
+    assert span.events[0][0] == "exception"
+
+
+def test_json_file_exporter_writes_one_span_per_line(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracing.configure_tracing(tracing.JsonFileSpanExporter(path), schedule_delay_seconds=0.01)
+    with tracing.start_span("outer", model="m"):
+        with tracing.start_span("inner"):
+            pass
+    tracing.shutdown_tracing()
+
+    rows = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+    assert [row["name"] for row in rows] == ["inner", "outer"]
+    assert rows[1]["attributes"] == {"model": "m"}
+    assert rows[0]["parent_span_id"] == rows[1]["span_id"]
+
+
+def test_build_otlp_payload_uses_otlp_json_shape():
+    span = tracing.Span("work", tracing.SpanContext("b" * 32, "c" * 16), "d" * 16, {"round": 2, "ok": True, "ratio": 0.5})
+    span.start_time_ns = 10
+    span.end_time_ns = 20
+
+    payload = tracing.build_otlp_payload([span], "svc")
+    resource_spans = payload["resourceSpans"][0]
+    otlp_span = resource_spans["scopeSpans"][0]["spans"][0]
+
+    assert resource_spans["resource"]["attributes"] == [{"key": "service.name", "value": {"stringValue": "svc"}}]
+    assert otlp_span["traceId"] == "b" * 32
+    assert otlp_span["parentSpanId"] == "d" * 16
+    assert otlp_span["startTimeUnixNano"] == "10"
+    assert {"key": "round", "value": {"intValue": "2"}} in otlp_span["attributes"]
+    assert {"key": "ok", "value": {"boolValue": True}} in otlp_span["attributes"]
+    assert {"key": "ratio", "value": {"doubleValue": 0.5}} in otlp_span["attributes"]
+
+
+def test_build_exporter_rejects_unknown_kind():
+    assert tracing.build_exporter("") is None
+    with pytest.raises(ValueError):
+        tracing.build_exporter("zipkin")
+
+
+def test_split_started_marker_removes_the_prelude_line():
+    started_ns, stderr_text = split_started_marker(f"{STARTED_MARKER}123\nTraceback\n")
+
+    assert started_ns == 123
+    assert stderr_text == "Traceback\n"
+    assert split_started_marker("plain") == (None, "plain")
+
+
+def _chunk(content=None, finish_reason=None, tool_calls=None):
+    payload = {"choices": [{"delta": {"content": content}}]}
+    return SimpleNamespace(
+        choices=[SimpleNamespace(delta=SimpleNamespace(content=content, tool_calls=tool_calls), finish_reason=finish_reason)],
+        usage=None,
+        model_dump=lambda: payload,
+    )
+
+
+class _Request:
+    async def is_disconnected(self):
+        return False
+
+
+def test_chat_response_stream_records_round_and_tool_spans(exporter):
+    tool_call = SimpleNamespace(index=0, id="call_1", type="function", function=SimpleNamespace(name="clock", arguments="{}"))
+    streams = [[_chunk(None, tool_calls=[tool_call]), _chunk("", finish_reason="tool_calls")], [_chunk("done", finish_reason="stop")]]
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **_: iter(streams.pop(0)))))
+
+    async def run():
+        with tracing.start_span("chat.stream"):
+            async for _ in chat_service.chat_response_stream(
+                _Request(),
+                messages=[{"role": "user", "content": "time?"}],
+                model="tool-model",
+                openai_client_cls=lambda **_: client,
+                provider_info_resolver=lambda _model: {},
+                tool_models=["tool-model"],
+                tools_loader=lambda: [{"type": "function", "function": {"name": "clock"}}],
+                tool_executor=lambda _tool_call: "noon",
+                logger=logging.getLogger("test"),
+            ):
+                pass
+
+    asyncio.run(run())
+    tracing.shutdown_tracing()
+    spans = exporter.spans
+    stream_span = next(span for span in spans if span.name == "chat.stream")
+    rounds = [span for span in spans if span.name == "chat.model.round"]
+    tool_span = next(span for span in spans if span.name == "chat.tool")
+
+    assert [span.attributes["round"] for span in rounds] == [1, 2]
+    assert all(span.parent_span_id == stream_span.context.span_id for span in rounds)
+    assert [name for name, _, _ in rounds[1].events] == ["first_token", "last_token"]
+    assert sum(span.name == "chat.model.connect" for span in spans) == 2
+    assert tool_span.attributes["tool"] == "clock"
+    assert tool_span.parent_span_id == stream_span.context.span_id
@@ -1,27 +1,72 @@
-import io
+import asyncio
 import json
-from urllib.error import HTTPError, URLError
-from unittest.mock import patch
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
 
 import pytest
 
+from chat_client.core import tool_executor
+from chat_client.tools import google_search_tool, wikipedia_tool
 from chat_client.tools.wikipedia_tool import get_wikipedia_pages_json, search_wikipedia
 
 
-class _WikipediaResponse(io.BytesIO):
-    def __enter__(self):
-        return self
-
-    def __exit__(self, exc_type, exc, traceback):
-        self.close()
-        return False
-
-
-def _json_response(payload):
-    return _WikipediaResponse(json.dumps(payload).encode("utf-8"))
-
-
-def test_get_wikipedia_pages_json_returns_pages_payload():
+class _StubServer:
+    """
+    A local HTTP/1.1 server answering every GET with `status` and `body`, and
+    recording what it was asked.
+    """
+
+    def __init__(self):
+        self.status = 200
+        self.body = b"{}"
+        self.requests: list[dict] = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                stub.requests.append(
+                    {
+                        "path": url.path,
+                        "query": {key: values[0] for key, values in parse_qs(url.query).items()},
+                        "user_agent": self.headers.get("User-Agent", ""),
+                        "client_port": self.client_address[1],
+                    }
+                )
+                self.send_response(stub.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(stub.body)))
+                self.end_headers()
+                self.wfile.write(stub.body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def respond(self, payload, status: int = 200) -> None:
+        self.status = status
+        self.body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    stub = _StubServer()
+    stub.thread.start()
+    monkeypatch.setattr(wikipedia_tool, "WIKIPEDIA_API_URL", stub.url + "/{language}/w/api.php")
+    monkeypatch.setattr(google_search_tool, "GOOGLE_SEARCH_API_URL", stub.url + "/customsearch/v1")
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
+
+
+def test_get_wikipedia_pages_json_returns_pages_payload(stub_server):
     payload = {
         "query": {
             "pages": [
@@ -33,41 +78,41 @@ def test_get_wikipedia_pages_json_returns_pages_payload():
             ]
         }
     }
+    stub_server.respond(payload)
 
-    with patch("chat_client.tools.wikipedia_tool.urlopen", return_value=_json_response(payload)) as urlopen_mock:
-        result = get_wikipedia_pages_json(" Earth ")
+    result = asyncio.run(get_wikipedia_pages_json(" Earth "))
 
     assert json.loads(result) == payload["query"]["pages"]
-    request = urlopen_mock.call_args.args[0]
-    assert request.full_url.startswith("https://en.wikipedia.org/w/api.php?")
-    assert "titles=Earth" in request.full_url
-    assert request.headers["User-agent"] == "chat-client/0.1"
+    request = stub_server.requests[0]
+    assert request["path"] == "/en/w/api.php"
+    assert request["query"]["titles"] == "Earth"
+    assert request["user_agent"] == "chat-client/0.1"
 
 
-def test_get_wikipedia_pages_json_supports_language_code():
-    payload = {"query": {"pages": [{"title": "Jorden", "extract": "Jorden er..."}]}}
+def test_get_wikipedia_pages_json_supports_language_code(stub_server):
+    stub_server.respond({"query": {"pages": [{"title": "Jorden", "extract": "Jorden er..."}]}})
 
-    with patch("chat_client.tools.wikipedia_tool.urlopen", return_value=_json_response(payload)) as urlopen_mock:
-        get_wikipedia_pages_json("Jorden", language="DA")
+    asyncio.run(get_wikipedia_pages_json("Jorden", language="DA"))
 
-    assert urlopen_mock.call_args.args[0].full_url.startswith("https://da.wikipedia.org/w/api.php?")
+    assert stub_server.requests[0]["path"] == "/da/w/api.php"
 
 
-def test_search_wikipedia_returns_compact_results():
-    payload = {
-        "query": {
-            "search": [
-                {
-                    "pageid": 9228,
-                    "title": "Earth",
-                    "snippet": '<span class="searchmatch">Earth</span> is a planet.',
-                }
-            ]
+def test_search_wikipedia_returns_compact_results(stub_server):
+    stub_server.respond(
+        {
+            "query": {
+                "search": [
+                    {
+                        "pageid": 9228,
+                        "title": "Earth",
+                        "snippet": '<span class="searchmatch">Earth</span> is a planet.',
+                    }
+                ]
+            }
         }
-    }
+    )
 
-    with patch("chat_client.tools.wikipedia_tool.urlopen", return_value=_json_response(payload)) as urlopen_mock:
-        result = search_wikipedia("earth", limit=50)
+    result = asyncio.run(search_wikipedia("earth", limit=50))
 
     assert json.loads(result) == {
         "query": "earth",
@@ -75,9 +120,9 @@ def test_search_wikipedia_returns_compact_results():
         "result_count": 1,
         "results": [{"title": "Earth", "snippet": "Earth is a planet.", "pageid": 9228}],
     }
-    request_url = urlopen_mock.call_args.args[0].full_url
-    assert "list=search" in request_url
-    assert "srlimit=10" in request_url
+    query = stub_server.requests[0]["query"]
+    assert query["list"] == "search"
+    assert query["srlimit"] == "10"
 
 
 @pytest.mark.parametrize(
@@ -90,18 +135,85 @@ def test_search_wikipedia_returns_compact_results():
 )
 def test_wikipedia_tools_validate_inputs(callable_, kwargs, message):
     with pytest.raises(ValueError, match=message):
-        callable_(**kwargs)
+        asyncio.run(callable_(**kwargs))
+
+
+def test_wikipedia_tool_reports_http_error(stub_server):
+    stub_server.respond({"error": "unavailable"}, status=503)
+
+    with pytest.raises(ValueError, match="HTTP 503"):
+        asyncio.run(get_wikipedia_pages_json("Earth"))
 
 
-def test_wikipedia_tool_reports_http_error():
-    error = HTTPError(url="https://en.wikipedia.org/w/api.php", code=503, msg="Service Unavailable", hdrs=None, fp=None)
+def test_wikipedia_tool_reports_invalid_json(stub_server):
+    stub_server.respond(b"<html>")
 
-    with patch("chat_client.tools.wikipedia_tool.urlopen", side_effect=error):
-        with pytest.raises(ValueError, match="HTTP 503"):
-            get_wikipedia_pages_json("Earth")
+    with pytest.raises(ValueError, match="not valid JSON"):
+        asyncio.run(search_wikipedia("Earth"))
 
 
-def test_wikipedia_tool_reports_url_error():
-    with patch("chat_client.tools.wikipedia_tool.urlopen", side_effect=URLError("network down")):
-        with pytest.raises(ValueError, match="network down"):
-            search_wikipedia("Earth")
+def test_wikipedia_tool_reports_connection_error(monkeypatch):
+    monkeypatch.setattr(wikipedia_tool, "WIKIPEDIA_API_URL", "http://127.0.0.1:1/{language}/w/api.php")
+
+    with pytest.raises(ValueError, match="Wikipedia request failed"):
+        asyncio.run(search_wikipedia("Earth"))
+
+
+def test_calls_on_one_event_loop_reuse_the_connection(stub_server):
+    stub_server.respond({"query": {"search": []}})
+
+    async def _run():
+        await search_wikipedia("Earth")
+        await search_wikipedia("Mars")
+
+    asyncio.run(_run())
+
+    assert len(stub_server.requests) == 2
+    assert stub_server.requests[0]["client_port"] == stub_server.requests[1]["client_port"]
+
+
+def test_google_search_uses_the_shared_client(stub_server, monkeypatch):
+    monkeypatch.setenv("GOOGLE_SEARCH_API_KEY", "key")
+    monkeypatch.setenv("GOOGLE_SEARCH_CX", "cx")
+    stub_server.respond({"items": [{"title": "Earth", "link": "https://example.com/earth", "snippet": "A planet."}]})
+
+    result = asyncio.run(google_search_tool.google_search("earth", num_results=3))
+
+    assert json.loads(result)["results"] == [{"title": "Earth", "link": "https://example.com/earth", "snippet": "A planet."}]
+    assert stub_server.requests[0]["path"] == "/customsearch/v1"
+    assert stub_server.requests[0]["query"]["num"] == "3"
+
+
+def test_async_tools_are_awaited_without_a_worker_thread(stub_server, monkeypatch):
+    stub_server.respond({"query": {"search": [{"title": "Earth", "snippet": ""}]}})
+
+    async def _no_thread(*args, **kwargs):
+        raise AssertionError("async tools must not run in a worker thread")
+
+    monkeypatch.setattr(tool_executor.asyncio, "to_thread", _no_thread)
+    tools = [
+        {
+            "type": "function",
+            "function": {
+                "name": "search_wikipedia",
+                "parameters": {"type": "object", "properties": {"query": {"type": "string"}}, "required": ["query"]},
+            },
+        }
+    ]
+
+    result = asyncio.run(
+        tool_executor.execute_local_tool_with_runtime_context_async(
+            {"id": "call_1", "type": "function", "function": {"name": "search_wikipedia", "arguments": '{"query": "earth"}'}},
+            logger=logging.getLogger("test"),
+            tools=tools,
+            tool_registry={"search_wikipedia": search_wikipedia},
+            local_tool_definitions=[],
+            has_local_tool_registry=True,
+            has_mcp_config=False,
+            mcp_server_url="",
+            mcp_auth_token="",
+            mcp_timeout_seconds=1.0,
+        )
+    )
+
+    assert json.loads(result)["results"] == [{"title": "Earth", "snippet": ""}]